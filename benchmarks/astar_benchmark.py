@@ -0,0 +1,115 @@
+# oop-2025-proj-pycade/benchmarks/astar_benchmark.py
+"""
+比較舊版 (每次查詢建立 TileNode + dict/set) 與 GridAStar 的 A* 展開速度。
+
+用法: python -m benchmarks.astar_benchmark [--queries 2000] [--seed 42]
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+import settings
+from core.ai_controller_base import TileNode, DIRECTIONS
+from core.astar_engine import GridAStar
+from core.map_manager import MapManager
+
+
+def legacy_astar(map_data, width, height, start_coords, target_coords):
+    """舊版 AIControllerBase.astar_find_path 的演算法 (不含日誌與炸彈檢查)，回傳 (路徑, 展開數)。"""
+    def node_at(x, y):
+        if 0 <= y < height and 0 <= x < width:
+            return TileNode(x, y, map_data[y][x])
+        return None
+
+    start_node = node_at(*start_coords)
+    target_node = node_at(*target_coords)
+    open_set = [(0, 0, start_node)]
+    node_data = {start_coords: start_node}
+    closed_set = set()
+    start_node.g_cost = 0
+    start_node.h_cost = abs(start_node.x - target_node.x) + abs(start_node.y - target_node.y)
+    expansions = 0
+    while open_set:
+        _, _, popped = heapq.heappop(open_set)
+        current = node_data[(popped.x, popped.y)]
+        if current.g_cost < popped.g_cost or (current.x, current.y) in closed_set:
+            continue
+        expansions += 1
+        if current == target_node:
+            path = []
+            while current:
+                path.append(current)
+                current = current.parent
+            return path[::-1], expansions
+        closed_set.add((current.x, current.y))
+        for dx, dy in DIRECTIONS.values():
+            template = node_at(current.x + dx, current.y + dy)
+            if not template or not template.is_walkable_for_astar_planning():
+                continue
+            if (template.x, template.y) in closed_set:
+                continue
+            tentative_g = current.g_cost + template.get_astar_move_cost_to_here()
+            existing = node_data.get((template.x, template.y))
+            if existing is None or tentative_g < existing.g_cost:
+                neighbor = existing or template
+                neighbor.parent = current
+                neighbor.g_cost = tentative_g
+                neighbor.h_cost = abs(neighbor.x - target_node.x) + abs(neighbor.y - target_node.y)
+                heapq.heappush(open_set, (neighbor.get_f_cost(), neighbor.h_cost, neighbor))
+                node_data[(neighbor.x, neighbor.y)] = neighbor
+    return [], expansions
+
+
+def build_layouts(seed):
+    random.seed(seed)
+    width, height = getattr(settings, 'GRID_WIDTH', 15), getattr(settings, 'GRID_HEIGHT', 11)
+    p1, p2 = (1, 1), (width - 2, height - 2)
+    manager = MapManager(None)
+    return {
+        'classic': manager.get_classic_map_layout(width, height, p1, p2, safe_radius=2),
+        'random': manager.get_truly_random_map_layout(width, height, p1, p2, safe_radius=2),
+    }
+
+
+def build_queries(layout, count, rng):
+    walkable = [(x, y) for y, row in enumerate(layout) for x, ch in enumerate(row) if ch in '.D']
+    return [(rng.choice(walkable), rng.choice(walkable)) for _ in range(count)]
+
+
+def run(queries_per_map=2000, seed=42):
+    results = {}
+    for name, layout in build_layouts(seed).items():
+        width, height = len(layout[0]), len(layout)
+        queries = build_queries(layout, queries_per_map, random.Random(seed))
+
+        legacy_expansions = 0
+        t0 = time.perf_counter()
+        for start, target in queries:
+            _, expanded = legacy_astar(layout, width, height, start, target)
+            legacy_expansions += expanded
+        legacy_seconds = time.perf_counter() - t0
+
+        engine = GridAStar()
+        t0 = time.perf_counter()
+        for start, target in queries:
+            engine.find_path_nodes(layout, width, height, start, target, TileNode)
+        engine_seconds = time.perf_counter() - t0
+
+        results[name] = {
+            'legacy_expansions_per_sec': legacy_expansions / legacy_seconds,
+            'engine_expansions_per_sec': engine.total_expansions / engine_seconds,
+            'speedup': legacy_seconds / engine_seconds,
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    for map_name, stats in run(args.queries, args.seed).items():
+        print(f"{map_name:>8}: legacy {stats['legacy_expansions_per_sec']:>12,.0f} exp/s | "
+              f"GridAStar {stats['engine_expansions_per_sec']:>12,.0f} exp/s | x{stats['speedup']:.2f}")
@@ -0,0 +1,57 @@
+# oop-2025-proj-pycade/benchmarks/snapshot_benchmark.py
+"""
+量測 Simulation.snapshot()/restore() 的吞吐量 (15x11 經典地圖，雙方各有一顆炸彈在倒數)。
+
+用法: python -m benchmarks.snapshot_benchmark [--pairs 200000] [--seed 42]
+"""
+
+import argparse
+import random
+import time
+
+import settings
+from core.map_manager import MapManager
+from core.simulation import Simulation
+
+
+def build_simulation(seed):
+    random.seed(seed)
+    width, height = getattr(settings, 'GRID_WIDTH', 15), getattr(settings, 'GRID_HEIGHT', 11)
+    p1, p2 = (1, 1), (width - 2, height - 2)
+    layout = MapManager(None).get_classic_map_layout(width, height, p1, p2, safe_radius=2)
+    sim = Simulation(layout, [p1, p2], seed=seed)
+    sim.try_place_bomb(0)
+    sim.try_place_bomb(1)
+    for _ in range(30): # 讓雙方離開炸彈、狀態不是初始值
+        sim.step([(1, 0), (-1, 0)], 1 / 60)
+    return sim
+
+
+def run(pairs=200000, seed=42):
+    sim = build_simulation(seed)
+    t0 = time.perf_counter()
+    for _ in range(pairs):
+        sim.restore(sim.snapshot())
+    pair_seconds = time.perf_counter() - t0
+
+    # 搜尋的典型用法：從同一個快照反覆還原並往前推進一步
+    root = sim.snapshot()
+    t0 = time.perf_counter()
+    for _ in range(pairs // 10):
+        sim.restore(root)
+        sim.step([(0, 1), None], 1 / 60)
+    rollout_seconds = time.perf_counter() - t0
+    return {
+        'pairs_per_sec': pairs / pair_seconds,
+        'restore_step_per_sec': (pairs // 10) / rollout_seconds,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    stats = run(args.pairs, args.seed)
+    print(f"snapshot+restore: {stats['pairs_per_sec']:>12,.0f} pairs/s | "
+          f"restore+step: {stats['restore_step_per_sec']:>12,.0f} /s")
@@ -2,9 +2,10 @@
 
 import pygame
 import settings
-import random
 from collections import deque
 from .ai_controller_base import AIControllerBase, ai_log, DIRECTIONS
+from .game_clock import get_ticks
+from .planning_board import PLAN_PENDING, run_planning_search
 
 class AggressiveAIController(AIControllerBase):
     """
@@ -48,7 +49,9 @@ class AggressiveAIController(AIControllerBase):
             return
 
         ai_log(f"AGGRESSIVE: Planning path from {ai_current_tile} to human at {human_pos}.")
-        self.astar_planned_path = self.astar_find_path(ai_current_tile, human_pos)
+        astar_path = run_planning_search(self, ai_current_tile, "astar_find_path", ai_current_tile, human_pos)
+        if astar_path is PLAN_PENDING: return # 背景搜尋中，AI 停在原地等結果
+        self.astar_planned_path = astar_path
         
         if self.astar_planned_path:
             self.astar_path_current_segment_index = 0
@@ -97,7 +100,7 @@ class AggressiveAIController(AIControllerBase):
                 self.change_state("PLANNING_PATH_TO_PLAYER") # A*路徑上的點都處理完了
             else:
                 # 強制立即重新評估下一個A*節點，而不是等待下一個決策週期
-                self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval 
+                self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval 
             return
 
         if target_node_in_astar.is_empty_for_direct_movement():
@@ -111,8 +114,10 @@ class AggressiveAIController(AIControllerBase):
             return
         
         elif target_node_in_astar.is_destructible_box():
+            bombing_plan = run_planning_search(self, ai_current_tile, "_plan_obstacle_bombing", target_node_in_astar, ai_current_tile)
+            if bombing_plan is PLAN_PENDING: return
             self.target_destructible_wall_node_in_astar = target_node_in_astar
-            bomb_spot, retreat_spot = self._find_optimal_bombing_spot_aggressive(target_node_in_astar, ai_current_tile)
+            bomb_spot, retreat_spot, path_to_bomb_spot = bombing_plan
 
             if bomb_spot and retreat_spot:
                 self.chosen_bombing_spot_coords = bomb_spot
@@ -130,8 +135,7 @@ class AggressiveAIController(AIControllerBase):
                     else:
                         ai_log("AGGRESSIVE: At bombing spot, but no bombs. Re-planning.")
                         self.change_state("PLANNING_PATH_TO_PLAYER")
-                else: # 需要移動到轟炸點
-                    path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, bomb_spot)
+                else: # 需要移動到轟炸點 (路徑已在規劃時算好)
                     if path_to_bomb_spot and len(path_to_bomb_spot) > 1:
                         self.set_current_movement_sub_path(path_to_bomb_spot)
                         # 狀態保持在 EXECUTING_PATH_CLEARANCE，但子路徑會被執行
@@ -166,8 +170,10 @@ class AggressiveAIController(AIControllerBase):
         # 嘗試放置炸彈攻擊玩家
         if not self.ai_just_placed_bomb and self.ai_player.bombs_placed_count < self.ai_player.max_bombs:
             if self._is_tile_in_hypothetical_blast(human_pos[0], human_pos[1], ai_current_tile[0], ai_current_tile[1], self.ai_player.bomb_range):
-                can_bomb, retreat_spot = self.can_place_bomb_and_retreat(ai_current_tile)
-                if can_bomb or random.random() < 0.4: 
+                bomb_check = run_planning_search(self, ai_current_tile, "can_place_bomb_and_retreat", ai_current_tile)
+                if bomb_check is PLAN_PENDING: return
+                can_bomb, retreat_spot = bomb_check
+                if can_bomb or self.rng.random() < 0.4: 
                     self.chosen_bombing_spot_coords = ai_current_tile
                     self.chosen_retreat_spot_coords = retreat_spot 
                     self.ai_player.place_bomb()
@@ -204,21 +210,13 @@ class AggressiveAIController(AIControllerBase):
 
         if not self.ai_just_placed_bomb and self.ai_player.bombs_placed_count < self.ai_player.max_bombs:
             if self._is_tile_in_hypothetical_blast(human_pos[0], human_pos[1], ai_current_tile[0], ai_current_tile[1], self.ai_player.bomb_range):
-                if random.random() < self.cqc_bomb_chance:
-                    ai_log("AGGRESSIVE CQC: High chance bomb!")
-                    can_bomb, retreat_spot = self.can_place_bomb_and_retreat(ai_current_tile) 
-                    
+                cqc_plan = run_planning_search(self, ai_current_tile, "_plan_cqc_bomb", ai_current_tile)
+                if cqc_plan is PLAN_PENDING: return
+                will_bomb, retreat_spot = cqc_plan
+                if will_bomb:
                     self.chosen_bombing_spot_coords = ai_current_tile
                     self.chosen_retreat_spot_coords = retreat_spot 
 
-                    if not retreat_spot: 
-                        desperate_options = self.find_safe_tiles_nearby_for_retreat(ai_current_tile, ai_current_tile, self.ai_player.bomb_range, max_depth=3, min_options_needed=1)
-                        if desperate_options:
-                            self.chosen_retreat_spot_coords = random.choice(desperate_options)
-                            ai_log(f"AGGRESSIVE CQC: No perfect retreat, chose desperate: {self.chosen_retreat_spot_coords}")
-                        else: 
-                            ai_log("AGGRESSIVE CQC: No retreat found at all, bombing anyway!")
-
                     self.ai_player.place_bomb()
                     
                     # 【關鍵修正】放置炸彈後，必須立即設定撤退路徑並切換狀態
@@ -244,7 +242,7 @@ class AggressiveAIController(AIControllerBase):
                 available_reposition_spots.append((next_x, next_y))
         
         if available_reposition_spots:
-            reposition_target = random.choice(available_reposition_spots)
+            reposition_target = self.rng.choice(available_reposition_spots)
             self.set_current_movement_sub_path([ai_current_tile, reposition_target])
     # （3）！！！ENGAGING_PLAYER 和 CLOSE_QUARTERS_COMBAT 狀態處理修改結束！！！（3）
 
@@ -275,7 +273,11 @@ class AggressiveAIController(AIControllerBase):
                 self.target_destructible_wall_node_in_astar = None 
                 self.chosen_bombing_spot_coords = None
                 self.chosen_retreat_spot_coords = None
-                self.change_state("PLANNING_PATH_TO_PLAYER") 
+                # 【新增】目標沒變且修補後的路徑仍需清障時，直接沿用增量修補的路徑，不重新搜尋
+                if self._resume_repaired_path_to_player(ai_current_tile):
+                    self.change_state("EXECUTING_PATH_CLEARANCE")
+                else:
+                    self.change_state("PLANNING_PATH_TO_PLAYER") 
             # else: 炸彈還沒清，繼續等待
             return
 
@@ -292,6 +294,14 @@ class AggressiveAIController(AIControllerBase):
             self.change_state("EVADING_DANGER")
     # （4）！！！TACTICAL_RETREAT_AND_WAIT 狀態處理修改結束！！！（4）
             
+    def _resume_repaired_path_to_player(self, ai_current_tile):
+        planner = self.incremental_planner
+        if planner is None or planner.goal != self._get_human_player_current_tile():
+            return False
+        if not self._repair_astar_plan(ai_current_tile):
+            return False
+        return any(node.is_destructible_box() for node in self.astar_planned_path)
+
     def handle_evading_danger_state(self, ai_current_tile):
         super().handle_evading_danger_state(ai_current_tile)
         # 基底的 evading state 在安全後會根據 self.default_state_after_evasion 切換
@@ -299,10 +309,34 @@ class AggressiveAIController(AIControllerBase):
 
     def handle_idle_state(self, ai_current_tile):
         ai_log(f"AGGRESSIVE: Idling at {ai_current_tile}. Will re-plan to player soon.")
-        if pygame.time.get_ticks() - self.state_start_time > self.idle_duration_ms: 
+        if get_ticks(self.game) - self.state_start_time > self.idle_duration_ms: 
             self.change_state("PLANNING_PATH_TO_PLAYER")
 
     # --- 特定輔助函式 ---
+    # 以下的 _plan_* 只計算並回傳結果、不改變 AI 狀態，可以經由 run_planning_search 在背景執行緒對棋盤快照執行
+    def _plan_obstacle_bombing(self, wall_node, ai_current_tile):
+        """炸開 A* 路徑上的障礙：回傳 (放置點, 撤退點, 走到放置點的路徑)。"""
+        bomb_spot, retreat_spot = self._find_optimal_bombing_spot_aggressive(wall_node, ai_current_tile)
+        path_to_bomb_spot = None
+        if bomb_spot and retreat_spot and ai_current_tile != bomb_spot:
+            path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, bomb_spot)
+        return bomb_spot, retreat_spot, path_to_bomb_spot
+
+    def _plan_cqc_bomb(self, ai_current_tile):
+        """近身戰的放炸彈判斷：回傳 (是否放炸彈, 撤退點)；沒有完美撤退點時退而求其次找一個。"""
+        if self.rng.random() >= self.cqc_bomb_chance:
+            return False, None
+        ai_log("AGGRESSIVE CQC: High chance bomb!")
+        can_bomb, retreat_spot = self.can_place_bomb_and_retreat(ai_current_tile)
+        if not retreat_spot:
+            desperate_options = self.find_safe_tiles_nearby_for_retreat(ai_current_tile, ai_current_tile, self.ai_player.bomb_range, max_depth=3, min_options_needed=1)
+            if desperate_options:
+                retreat_spot = self.rng.choice(desperate_options)
+                ai_log(f"AGGRESSIVE CQC: No perfect retreat, chose desperate: {retreat_spot}")
+            else:
+                ai_log("AGGRESSIVE CQC: No retreat found at all, bombing anyway!")
+        return True, retreat_spot
+
     def _find_optimal_bombing_spot_aggressive(self, wall_node, ai_current_tile):
         candidate_placements = []
         # 優先考慮與牆壁相鄰的四個格子作為放置點
@@ -326,7 +360,7 @@ class AggressiveAIController(AIControllerBase):
 
             retreat_spots = self.find_safe_tiles_nearby_for_retreat(
                 bomb_spot_coords, bomb_spot_coords, self.ai_player.bomb_range, 
-                self.retreat_search_depth, self.min_retreat_options_for_bombing 
+                self.retreat_search_depth, self.min_retreat_options_for_bombing, max_results=1
             )
             if retreat_spots: # 攻擊型AI只要有一個撤退點就行
                 best_retreat_spot = retreat_spots[0] 
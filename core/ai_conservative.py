@@ -2,9 +2,10 @@
 
 import pygame
 import settings #
-import random #
-from collections import deque #
 from .ai_controller_base import AIControllerBase, ai_log, DIRECTIONS #
+from .flow_field import FlowField, iter_breadth_first
+from .game_clock import get_ticks
+from .planning_board import PLAN_PENDING, run_planning_search
 
 class ConservativeAIController(AIControllerBase):
     """
@@ -50,37 +51,24 @@ class ConservativeAIController(AIControllerBase):
         ai_log(f"CONSERVATIVE: In PLANNING_ROAM at {ai_current_tile}.") #
         self.roaming_target_tile = None 
 
-        # 1. 檢查是否有值得炸的牆壁 (如果AI當前沒有移動任務)
-        if not self.current_movement_sub_path and random.random() < self.obstacle_bombing_chance: #
-            self.target_obstacle_to_bomb = self._find_nearby_worthwhile_obstacle(ai_current_tile, search_radius=3) #
-            if self.target_obstacle_to_bomb: #
-                ai_log(f"CONSERVATIVE: Found obstacle {self.target_obstacle_to_bomb} to consider bombing.") #
-                self.change_state("ASSESSING_OBSTACLE") #
-                return
+        roam_plan = run_planning_search(self, ai_current_tile, "_plan_roam", ai_current_tile)
+        if roam_plan is PLAN_PENDING: return # 背景搜尋中
 
-        # 2. 如果不炸牆，則尋找新的漫遊目標點
-        potential_roam_targets = self._find_safe_roaming_spots(ai_current_tile, count=3, depth=self.roam_target_seek_depth) #
-        if potential_roam_targets: #
-            self.roaming_target_tile = random.choice(potential_roam_targets) #
-            
-            if self.roaming_target_tile == ai_current_tile: #
-                ai_log("CONSERVATIVE: Roam target is current tile. Idling briefly.")
-                self.roaming_target_tile = None
-                self.change_state("IDLE") 
-                return
+        # 1. 值得炸的牆壁
+        if roam_plan[0] == "obstacle":
+            self.target_obstacle_to_bomb = roam_plan[1] #
+            ai_log(f"CONSERVATIVE: Found obstacle {self.target_obstacle_to_bomb} to consider bombing.") #
+            self.change_state("ASSESSING_OBSTACLE") #
+            return
 
-            path_to_roam_target = self.bfs_find_direct_movement_path(ai_current_tile, self.roaming_target_tile) #
-            
-            if path_to_roam_target and len(path_to_roam_target) > 1: #
-                ai_log(f"CONSERVATIVE: New roam target {self.roaming_target_tile}. Path: {path_to_roam_target}") #
-                self.set_current_movement_sub_path(path_to_roam_target) #
-                self.change_state("ROAMING") 
-            else:
-                ai_log("CONSERVATIVE: Could not find valid path to roam target. Idling.") #
-                self.roaming_target_tile = None #
-                self.change_state("IDLE") #
+        # 2. 新的漫遊目標點
+        if roam_plan[0] == "roam":
+            self.roaming_target_tile, path_to_roam_target = roam_plan[1], roam_plan[2]
+            ai_log(f"CONSERVATIVE: New roam target {self.roaming_target_tile}. Path: {path_to_roam_target}") #
+            self.set_current_movement_sub_path(path_to_roam_target) #
+            self.change_state("ROAMING") 
         else:
-            ai_log("CONSERVATIVE: No safe roaming spots found. Idling.") #
+            ai_log(f"CONSERVATIVE: {roam_plan[1]} Idling.") #
             self.change_state("IDLE") #
 
     def handle_roaming_state(self, ai_current_tile): #
@@ -118,15 +106,16 @@ class ConservativeAIController(AIControllerBase):
             self.target_obstacle_to_bomb = None #
             self.change_state("PLANNING_ROAM"); return
 
-        bomb_spot, retreat_spot = self._find_optimal_bombing_spot_for_obstacle(self.target_obstacle_to_bomb, ai_current_tile) #
+        bombing_plan = run_planning_search(self, ai_current_tile, "_plan_obstacle_bombing", self.target_obstacle_to_bomb, ai_current_tile)
+        if bombing_plan is PLAN_PENDING: return
+        bomb_spot, retreat_spot, path_to_bomb_spot = bombing_plan
 
         if bomb_spot and retreat_spot: #
             ai_log(f"CONSERVATIVE: Plan to bomb obstacle: Bomb at {bomb_spot}, retreat to {retreat_spot}.") #
             self.chosen_bombing_spot_coords = bomb_spot #
             self.chosen_retreat_spot_coords = retreat_spot #
             
-            # 【修正】在移動到轟炸點之前，先設定路徑
-            path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, self.chosen_bombing_spot_coords)
+            # 【修正】在移動到轟炸點之前，先設定路徑 (路徑已在規劃時算好)
             if path_to_bomb_spot and len(path_to_bomb_spot) > 0 : # 允許原地不動 (長度為1，set_current_movement_sub_path 會處理)
                 self.set_current_movement_sub_path(path_to_bomb_spot)
                 self.change_state("MOVING_TO_BOMB_OBSTACLE") #
@@ -209,26 +198,8 @@ class ConservativeAIController(AIControllerBase):
 
         if not self.current_movement_sub_path: 
             ai_log("CONSERVATIVE: Finding new evasion path.") #
-            safe_spots = self.find_safe_tiles_nearby_for_retreat(
-                from_coords=ai_current_tile,
-                bomb_coords_as_danger_source=ai_current_tile, 
-                bomb_range_of_danger_source=0, 
-                max_depth=self.retreat_search_depth + 1, # 逃跑時看得更遠
-                min_options_needed=3 
-            ) #
-            
-            best_path_to_safety = None
-            if safe_spots: #
-                candidate_paths = []
-                for spot in safe_spots: #
-                    path = self.bfs_find_direct_movement_path(ai_current_tile, spot, max_depth=self.retreat_search_depth + 1) #
-                    if path and len(path) > 1: #
-                        openness = self._get_tile_openness(spot[0], spot[1]) #
-                        candidate_paths.append({'path': path, 'openness': openness, 'len': len(path)})
-                
-                if candidate_paths:
-                    candidate_paths.sort(key=lambda p: (-p['openness'], p['len'])) # 優先空曠，其次路徑短
-                    best_path_to_safety = candidate_paths[0]['path']
+            # 時間展開搜尋一次找出目的地與路線，並排除途中會被火焰覆蓋的格子
+            best_path_to_safety = self.find_evasion_route(ai_current_tile, max_depth=self.retreat_search_depth + 1) # 逃跑時看得更遠
             
             if best_path_to_safety: #
                 ai_log(f"CONSERVATIVE: Found best evasion path to {best_path_to_safety[-1]}. Path: {best_path_to_safety}") #
@@ -260,10 +231,39 @@ class ConservativeAIController(AIControllerBase):
 
     def handle_idle_state(self, ai_current_tile): #
         ai_log(f"CONSERVATIVE: Briefly idling at {ai_current_tile}.") #
-        if pygame.time.get_ticks() - self.state_start_time > self.idle_duration_ms: #
+        if get_ticks(self.game) - self.state_start_time > self.idle_duration_ms: #
             self.change_state("PLANNING_ROAM") #
 
     # --- 特定輔助函式 ---
+    # 以下的 _plan_* 只計算並回傳結果、不改變 AI 狀態，可以經由 run_planning_search 在背景執行緒對棋盤快照執行
+    def _plan_roam(self, ai_current_tile):
+        """規劃下一步：("obstacle", 牆)、("roam", 目標, 路徑) 或 ("idle", 原因)。"""
+        # 1. 檢查是否有值得炸的牆壁 (如果AI當前沒有移動任務)
+        if not self.current_movement_sub_path and self.rng.random() < self.obstacle_bombing_chance: #
+            obstacle = self._find_nearby_worthwhile_obstacle(ai_current_tile, search_radius=3) #
+            if obstacle:
+                return "obstacle", obstacle
+
+        # 2. 如果不炸牆，則尋找新的漫遊目標點
+        potential_roam_targets = self._find_safe_roaming_spots(ai_current_tile, count=3, depth=self.roam_target_seek_depth) #
+        if not potential_roam_targets:
+            return "idle", "No safe roaming spots found."
+        roam_target = self.rng.choice(potential_roam_targets) #
+        if roam_target == ai_current_tile: #
+            return "idle", "Roam target is current tile."
+        path_to_roam_target = self.bfs_find_direct_movement_path(ai_current_tile, roam_target) #
+        if path_to_roam_target and len(path_to_roam_target) > 1: #
+            return "roam", roam_target, path_to_roam_target
+        return "idle", "Could not find valid path to roam target."
+
+    def _plan_obstacle_bombing(self, wall_node, ai_current_tile):
+        """炸障礙物的計畫：回傳 (放置點, 撤退點, 走到放置點的路徑)。"""
+        bomb_spot, retreat_spot = self._find_optimal_bombing_spot_for_obstacle(wall_node, ai_current_tile) #
+        path_to_bomb_spot = None
+        if bomb_spot and retreat_spot:
+            path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, bomb_spot)
+        return bomb_spot, retreat_spot, path_to_bomb_spot
+
     def _find_nearby_worthwhile_obstacle(self, ai_current_tile, search_radius=3): #
         potential_targets = []
         for r_offset in range(-search_radius, search_radius + 1): #
@@ -284,7 +284,7 @@ class ConservativeAIController(AIControllerBase):
                                 break 
                     # if node in potential_targets: continue # 避免重複加入，但上面的 break 已經處理
         if potential_targets: #
-            return random.choice(potential_targets) #
+            return self.rng.choice(potential_targets) #
         return None #
 
     def _find_optimal_bombing_spot_for_obstacle(self, wall_node, ai_current_tile): #
@@ -302,7 +302,7 @@ class ConservativeAIController(AIControllerBase):
 
             retreat_spots = self.find_safe_tiles_nearby_for_retreat(
                 bomb_spot_coords, bomb_spot_coords, self.ai_player.bomb_range, 
-                self.retreat_search_depth, self.min_retreat_options_for_obstacle
+                self.retreat_search_depth, self.min_retreat_options_for_obstacle, max_results=1
             ) #
             if retreat_spots: #
                 best_retreat_spot = retreat_spots[0]  #
@@ -318,31 +318,20 @@ class ConservativeAIController(AIControllerBase):
         return candidate_placements[0]['bomb_spot'], candidate_placements[0]['retreat_spot'] #
 
     def _find_safe_roaming_spots(self, ai_current_tile, count=1, depth=3): #
-        q = deque([(ai_current_tile, 0)]) # (coords, current_depth) #
-        visited = {ai_current_tile} #
+        map_data = self.map_manager.map_data
+        # 路徑上的格子短期安全即可
+        is_passable = lambda x, y: map_data[y][x] == '.' and not self.is_tile_dangerous(x, y, future_seconds=0.1) #
+        field = FlowField(ai_current_tile, self.map_manager.tile_width, self.map_manager.tile_height)
         potential_spots = [] #
 
-        while q and len(potential_spots) < count * 5: # 找多一點候選 #
-            (curr_x, curr_y), d = q.popleft() #
-
-            if d > 0 and d <= depth: #
-                # 漫遊時，對目標點的安全性要求可以略微放寬一點點，主要確保路徑安全
-                if not self.is_tile_dangerous(curr_x, curr_y, future_seconds=self.evasion_urgency_seconds * 0.7): #
-                    openness = self._get_tile_openness(curr_x, curr_y, radius=1) #
-                    if openness >= 1 : # 至少有一個方向是空的，避免選到死角
-                        potential_spots.append(((curr_x, curr_y), openness))
-            
-            if d < depth: #
-                shuffled_directions = list(DIRECTIONS.values()); random.shuffle(shuffled_directions) #
-                for dx, dy in shuffled_directions: #
-                    next_x, next_y = curr_x + dx, curr_y + dy #
-                    next_coords = (next_x, next_y) #
-                    if next_coords not in visited: #
-                        node = self._get_node_at_coords(next_x, next_y) #
-                        if node and node.is_empty_for_direct_movement(): #
-                             if not self.is_tile_dangerous(next_x, next_y, future_seconds=0.1): # # 路徑上的格子短期安全即可
-                                visited.add(next_coords) #
-                                q.append((next_coords, d + 1)) #
+        for (curr_x, curr_y), d in iter_breadth_first(field, is_passable, max_depth=depth, rng=self.rng): # 共用的 BFS 核心
+            if len(potential_spots) >= count * 5: break # 找多一點候選 #
+            if d == 0: continue #
+            # 漫遊時，對目標點的安全性要求可以略微放寬一點點，主要確保路徑安全
+            if not self.is_tile_dangerous(curr_x, curr_y, future_seconds=self.evasion_urgency_seconds * 0.7): #
+                openness = self._get_tile_openness(curr_x, curr_y, radius=1) #
+                if openness >= 1 : # 至少有一個方向是空的，避免選到死角
+                    potential_spots.append(((curr_x, curr_y), openness))
         
         if not potential_spots: return [] #
         potential_spots.sort(key=lambda s: s[1], reverse=True) #
@@ -2,9 +2,15 @@
 
 import pygame
 import settings
-import random
 from collections import deque
-import heapq
+from core.astar_engine import GridAStar
+from core.danger_field import get_danger_field
+from core.flow_field import FlowField, iter_breadth_first
+from core.game_clock import get_ticks
+from core.match_random import match_rng, AI_RNG
+from core.incremental_planner import DStarLitePlanner
+from core.async_planner import AsyncPlanner
+from core.planning_board import PLAN_PENDING, run_planning_search
 
 AI_DEBUG_MODE = True
 
@@ -62,9 +68,9 @@ class AIController:
         self.game = game_instance
         self.map_manager = self.game.map_manager
         self.current_state = AI_STATE_PLANNING_PATH_TO_PLAYER
-        self.state_start_time = pygame.time.get_ticks()
+        self.state_start_time = get_ticks(self.game)
         self.ai_decision_interval = settings.AI_MOVE_DELAY
-        self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval
+        self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval
         self.human_player_sprite = self.game.player1
         self.player_initial_spawn_tile = None
         self.astar_planned_path = []
@@ -86,16 +92,57 @@ class AIController:
         self.cqc_last_reposition_target = None
         self.movement_history = deque(maxlen=4) # 記錄最近4個AI所在格子
         self.oscillation_stuck_counter = 0
+        self.astar_engine = GridAStar({'.': COST_MOVE_EMPTY, 'D': COST_BOMB_BOX})
+        self.incremental_planner = None # 目前 A* 計畫對應的 D* Lite 規劃器
+        self.astar_plan_repair_pending = False
+        self.async_planner = None
+        self.enable_async_planning() # 規劃狀態的搜尋在背景執行緒對棋盤快照執行 (見 core/planning_board.py)
+        add_listener = getattr(self.map_manager, 'add_tile_change_listener', None)
+        if callable(add_listener):
+            add_listener(self._on_map_tile_changed)
 
         ai_log(f"[AI_INIT] AIController for Player ID: {id(self.ai_player)} initialized. Initial state: {self.current_state}. Debug Mode: {AI_DEBUG_MODE}")
         self.reset_state()
 
+    @property
+    def rng(self):
+        """這場對戰的 AI 亂數串流 (Game 沒有種子化亂數時退回全域 random)。"""
+        return match_rng(self.game, AI_RNG)
+
+    # --- 背景規劃 (與 AIControllerBase 相同) ---
+
+    def enable_async_planning(self):
+        """建立背景規劃器 (AI_ASYNC_PLANNING 關閉時維持同步規劃)。"""
+        if getattr(settings, "AI_ASYNC_PLANNING", True):
+            self.async_planner = AsyncPlanner(f"ai-planner-{id(self.ai_player)}")
+
+    def shutdown(self):
+        """放棄背景計畫並結束規劃執行緒 (Game 場景結束或重新開始時呼叫)。"""
+        if self.async_planner is not None:
+            self.async_planner.shutdown()
+
+    @property
+    def uses_async_planning(self):
+        """只有非固定步長的 Game 使用背景規劃；固定步長模式 (與測試用的假 Game) 保持同步。"""
+        return self.async_planner is not None and getattr(self.game, 'deterministic', True) is False
+
+    def _get_plan_stamp(self, ai_current_tile):
+        """計畫有效的前提：AI 位置、地圖版本、炸彈與雙方生命都和提交時相同。"""
+        bomb_tiles = tuple(sorted((bomb.current_tile_x, bomb.current_tile_y) for bomb in getattr(self.game, 'bombs_group', ())
+                                  if not bomb.exploded))
+        opponent_lives = getattr(self.human_player_sprite, 'lives', None)
+        return (ai_current_tile, getattr(self.map_manager, 'map_version', 0), bomb_tiles, self.ai_player.lives, opponent_lives)
+
     def reset_state(self):
         ai_log(f"[AI_RESET] Resetting AI state for Player ID: {id(self.ai_player)}.")
+        if self.async_planner is not None:
+            self.async_planner.cancel()
         self.current_state = AI_STATE_PLANNING_PATH_TO_PLAYER
-        self.state_start_time = pygame.time.get_ticks()
+        self.state_start_time = get_ticks(self.game)
         self.astar_planned_path = []
         self.astar_path_current_segment_index = 0
+        self.incremental_planner = None
+        self.astar_plan_repair_pending = False
         self.current_movement_sub_path = []
         self.current_movement_sub_path_index = 0
         self.target_destructible_wall_node_in_astar = None
@@ -104,7 +151,7 @@ class AIController:
         self.last_bomb_placed_time = 0
         self.ai_just_placed_bomb = False # 確保重置
         self.path_to_player_initial_spawn_clear = False
-        self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval
+        self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval
         self.player_initial_spawn_tile = getattr(self.game, 'player1_start_tile', (1,1))
         ai_log(f"[AI_RESET] Target player initial spawn tile set to: {self.player_initial_spawn_tile}")
         self.decision_cycle_stuck_counter = 0
@@ -130,7 +177,9 @@ class AIController:
                     ai_log(f"    [STATE_CHANGE_CLEANUP] Leaving TACTICAL_RETREAT_AND_WAIT but bomb might still be active. ai_just_placed_bomb remains {self.ai_just_placed_bomb}.")
 
             self.current_state = new_state
-            self.state_start_time = pygame.time.get_ticks()
+            self.state_start_time = get_ticks(self.game)
+            if self.async_planner is not None:
+                self.async_planner.cancel() # 背景計畫屬於提交它的狀態
             self.current_movement_sub_path = []
             self.current_movement_sub_path_index = 0
             self.cqc_last_reposition_target = None # 清理CQC的最後移動目標
@@ -145,6 +194,40 @@ class AIController:
             if new_state == AI_STATE_PLANNING_PATH_TO_PLAYER:
                  self.astar_planned_path = []
                  self.astar_path_current_segment_index = 0
+                 self.incremental_planner = None
+            elif new_state == AI_STATE_EXECUTING_PATH_CLEARANCE and self.astar_planned_path:
+                self._seed_incremental_planner()
+
+    def _seed_incremental_planner(self):
+        """以目前的 astar_planned_path 建立 D* Lite 搜尋樹；目標相同時沿用既有的規劃器。"""
+        start_node, goal_node = self.astar_planned_path[0], self.astar_planned_path[-1]
+        goal_coords = (goal_node.x, goal_node.y)
+        if self.incremental_planner is not None and self.incremental_planner.goal == goal_coords:
+            return
+        planner = DStarLitePlanner({'.': COST_MOVE_EMPTY, 'D': COST_BOMB_BOX})
+        planner.plan(self.map_manager.map_data, self.map_manager.tile_width, self.map_manager.tile_height,
+                     (start_node.x, start_node.y), goal_coords)
+        self.incremental_planner = planner
+        self.astar_plan_repair_pending = False
+
+    def _on_map_tile_changed(self, tile_x, tile_y, old_char, new_char):
+        if self.incremental_planner is not None:
+            self.incremental_planner.notify_tile_changed(tile_x, tile_y, new_char)
+            self.astar_plan_repair_pending = True
+
+    def _repair_astar_plan(self, ai_current_tile):
+        """以增量規劃器從目前位置修補 astar_planned_path；修補失敗時保留原路徑。"""
+        self.astar_plan_repair_pending = False
+        if self.incremental_planner is None:
+            return False
+        path_coords = self.incremental_planner.replan(ai_current_tile)
+        if not path_coords:
+            ai_log(f"[AI_REPAIR] No incremental path from {ai_current_tile} to {self.incremental_planner.goal}.")
+            return False
+        self.astar_planned_path = [self._get_node_at_coords(x, y) for x, y in path_coords]
+        self.astar_path_current_segment_index = 0
+        ai_log(f"[AI_REPAIR] Repaired A* plan ({self.incremental_planner.last_expansions} expansions): {path_coords}")
+        return True
 
 
     def _get_ai_current_tile(self):
@@ -210,60 +293,33 @@ class AIController:
         return False
 
     def is_tile_dangerous(self, tile_x, tile_y, future_seconds=0.3):
-        tile_rect = pygame.Rect(tile_x * settings.TILE_SIZE, tile_y * settings.TILE_SIZE, settings.TILE_SIZE, settings.TILE_SIZE)
-        for exp_sprite in self.game.explosions_group:
-            if exp_sprite.rect.colliderect(tile_rect):
-                return True
-        for bomb in self.game.bombs_group:
-            if bomb.exploded: continue
-            time_to_explosion_ms = bomb.time_left
-            if 0 < time_to_explosion_ms < future_seconds * 1000:
-                range_to_check = bomb.placed_by_player.bomb_range if hasattr(bomb.placed_by_player, 'bomb_range') else 1
-                if self._is_tile_in_hypothetical_blast(tile_x, tile_y, bomb.current_tile_x, bomb.current_tile_y, range_to_check):
-                    return True
-        return False
+        return get_danger_field(self.game, self.map_manager).is_dangerous(tile_x, tile_y, future_seconds)
 
     def find_safe_tiles_nearby_for_retreat(self, from_tile_coords, bomb_just_placed_at_coords, bomb_range, max_depth=6):
         ai_log(f"    [RETREAT_FINDER] find_safe_tiles_nearby_for_retreat: from_tile={from_tile_coords}, bomb_at={bomb_just_placed_at_coords}, range={bomb_range}, max_depth={max_depth}")
-        q = deque([(from_tile_coords, [from_tile_coords], 0)])
-        visited = {from_tile_coords}
+        map_data = self.map_manager.map_data
+        is_passable = lambda x, y: map_data[y][x] == '.' and not self.is_tile_dangerous(x, y, future_seconds=0.2)
+        field = FlowField(from_tile_coords, self.map_manager.tile_width, self.map_manager.tile_height)
         safe_retreat_spots = []
         nodes_processed_count = 0
         max_nodes_to_log_details_retreat = 25
 
-        while q:
+        # 共用的 BFS 核心只保存父節點陣列；depth 就是路徑長度，不必替每個節點複製路徑
+        for (curr_x, curr_y), depth in iter_breadth_first(field, is_passable, max_depth=max_depth, rng=self.rng):
             nodes_processed_count += 1
-            (curr_x, curr_y), path, depth = q.popleft()
-
-            if depth > max_depth:
-                if nodes_processed_count <= max_nodes_to_log_details_retreat:
-                    ai_log(f"      [RETREAT_FINDER] BFS: ({curr_x},{curr_y}) depth {depth} > max_depth. Skipping path: {path}")
-                continue
-
             is_safe_from_this_bomb = not self._is_tile_in_hypothetical_blast(curr_x, curr_y, bomb_just_placed_at_coords[0], bomb_just_placed_at_coords[1], bomb_range)
             is_safe_from_other_dangers = not self.is_tile_dangerous(curr_x, curr_y, future_seconds=settings.AI_RETREAT_SPOT_OTHER_DANGER_FUTURE_SECONDS)
 
             if nodes_processed_count <= max_nodes_to_log_details_retreat:
-                ai_log(f"      [RETREAT_FINDER] BFS: Processing ({curr_x},{curr_y}), depth {depth}. Path: {path}. SafeFromThisBomb: {is_safe_from_this_bomb}, SafeFromOthers: {is_safe_from_other_dangers}")
+                ai_log(f"      [RETREAT_FINDER] BFS: Processing ({curr_x},{curr_y}), depth {depth}. SafeFromThisBomb: {is_safe_from_this_bomb}, SafeFromOthers: {is_safe_from_other_dangers}")
 
             if is_safe_from_this_bomb and is_safe_from_other_dangers:
-                ai_log(f"        [RETREAT_FINDER] Found SAFE spot: ({curr_x},{curr_y}) with path_len {len(path)-1}")
-                safe_retreat_spots.append({'coords': (curr_x, curr_y), 'path_len': len(path) -1 })
+                ai_log(f"        [RETREAT_FINDER] Found SAFE spot: ({curr_x},{curr_y}) with path_len {depth}")
+                safe_retreat_spots.append({'coords': (curr_x, curr_y), 'path_len': depth})
                 if len(safe_retreat_spots) >= 10:
                     ai_log(f"        [RETREAT_FINDER] Reached 10 safe spots. Breaking.")
                     break
 
-            if depth < max_depth:
-                shuffled_directions = list(DIRECTIONS.values()); random.shuffle(shuffled_directions)
-                for dx, dy in shuffled_directions:
-                    next_x, next_y = curr_x + dx, curr_y + dy
-                    if (next_x, next_y) not in visited:
-                        node = self._get_node_at_coords(next_x, next_y)
-                        if node and node.is_empty_for_direct_movement():
-                            if not self.is_tile_dangerous(next_x, next_y, future_seconds=0.2):
-                                visited.add((next_x, next_y))
-                                q.append(((next_x, next_y), path + [(next_x, next_y)], depth + 1))
-
         ai_log(f"    [RETREAT_FINDER] find_safe_tiles_nearby_for_retreat finished. Found spots: {safe_retreat_spots}")
         if safe_retreat_spots:
             safe_retreat_spots.sort(key=lambda x: x['path_len'])
@@ -301,62 +357,21 @@ class AIController:
         if not start_node or not target_node:
             ai_log(f"[AI_ASTAR_ERROR] Invalid start ({start_node}) or target ({target_node}) node."); return []
 
-        open_set = []; closed_set = set(); open_set_dict = {}
-        start_node.g_cost = 0
-        start_node.h_cost = abs(start_node.x - target_node.x) + abs(start_node.y - target_node.y)
-        start_node.parent = None
-        heapq.heappush(open_set, (start_node.get_f_cost(), start_node.h_cost, start_node))
-        open_set_dict[(start_node.x, start_node.y)] = start_node
-        path_found = False; final_node = None
-
-        while open_set:
-            _, _, current_node = heapq.heappop(open_set)
-            open_set_dict.pop((current_node.x, current_node.y), None)
-            if current_node == target_node:
-                final_node = current_node; path_found = True; break
-            if (current_node.x, current_node.y) in closed_set: continue
-            closed_set.add((current_node.x, current_node.y))
-
-            for neighbor_node_template in self._get_node_neighbors(current_node, for_astar_planning=True):
-                if (neighbor_node_template.x, neighbor_node_template.y) in closed_set: continue
-                move_cost_to_neighbor = neighbor_node_template.get_astar_move_cost_to_here()
-                tentative_g_cost = current_node.g_cost + move_cost_to_neighbor
-                neighbor_node = open_set_dict.get((neighbor_node_template.x, neighbor_node_template.y), neighbor_node_template)
-                if tentative_g_cost < neighbor_node.g_cost:
-                    neighbor_node.parent = current_node
-                    neighbor_node.g_cost = tentative_g_cost
-                    neighbor_node.h_cost = abs(neighbor_node.x - target_node.x) + abs(neighbor_node.y - target_node.y)
-                    heapq.heappush(open_set, (neighbor_node.get_f_cost(), neighbor_node.h_cost, neighbor_node))
-                    open_set_dict[(neighbor_node.x, neighbor_node.y)] = neighbor_node
-
-        path = []
-        if path_found and final_node:
-            temp = final_node
-            while temp: path.append(temp); temp = temp.parent
-            path.reverse()
-            ai_log(f"[AI_ASTAR_SUCCESS] Path found ({len(path)} segments). Example segment: {path[0] if path else 'N/A'}")
+        path = self.astar_engine.find_path_nodes(
+            self.map_manager.map_data, self.map_manager.tile_width, self.map_manager.tile_height,
+            start_coords, target_coords, TileNode)
+        if path:
+            ai_log(f"[AI_ASTAR_SUCCESS] Path found ({len(path)} segments). Example segment: {path[0]}")
         else: ai_log(f"[AI_ASTAR_FAIL] No path found from {start_coords} to {target_coords}.")
         return path
 
     def bfs_find_direct_movement_path(self, start_coords, target_coords, max_depth=15, avoid_specific_tile=None):
-        q = deque([(start_coords, [start_coords])])
-        visited = {start_coords}
-        while q:
-            (curr_x, curr_y), path = q.popleft()
-            if len(path) -1 > max_depth : continue
-            if (curr_x, curr_y) == target_coords: return path
-
-            shuffled_directions = list(DIRECTIONS.values()); random.shuffle(shuffled_directions)
-            for dx, dy in shuffled_directions:
-                next_x, next_y = curr_x + dx, curr_y + dy
-                next_coords = (next_x, next_y)
-                if next_coords not in visited:
-                    if avoid_specific_tile and next_coords == avoid_specific_tile: continue
-                    node = self._get_node_at_coords(next_x, next_y)
-                    if node and node.is_empty_for_direct_movement() and \
-                       not self.is_tile_dangerous(next_x, next_y, future_seconds=0.15):
-                        visited.add(next_coords)
-                        q.append((next_coords, path + [next_coords]))
+        map_data = self.map_manager.map_data
+        is_passable = lambda x, y: (x, y) != avoid_specific_tile and map_data[y][x] == '.' and \
+            not self.is_tile_dangerous(x, y, future_seconds=0.15)
+        field = FlowField(start_coords, self.map_manager.tile_width, self.map_manager.tile_height)
+        for coords, _ in iter_breadth_first(field, is_passable, max_depth=max_depth, rng=self.rng):
+            if coords == target_coords: return field.path_to(target_coords) # 找到目標就停止，只還原這一條路徑
         return []
 
 
@@ -395,9 +410,67 @@ class AIController:
         ai_log(f"    [OPTIMAL_BOMB_SPOT_FINDER] Chosen optimal bombing setup: {best_setup}")
         return best_setup['bomb_spot'], best_setup['retreat_spot']
 
+    # 以下的 _plan_* / _find_* 只計算並回傳結果、不改變 AI 狀態，可以經由 run_planning_search 在背景執行緒對棋盤快照執行
+    def _plan_wall_bombing(self, wall_node, ai_current_tile):
+        """炸 A* 路徑上的牆：回傳 (放置點, 撤退點, 走到放置點的路徑)。"""
+        bomb_spot, retreat_spot = self._find_optimal_bombing_and_retreat_spot(wall_node, ai_current_tile)
+        path_to_bomb_spot = None
+        if bomb_spot and retreat_spot and ai_current_tile != bomb_spot:
+            path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, bomb_spot, max_depth=7)
+        return bomb_spot, retreat_spot, path_to_bomb_spot
+
+    def _find_best_engagement_bombing_action(self, ai_current_tile, human_pos):
+        """找出能炸到玩家且有退路、走最少步就能到的放置點；回傳動作 dict 或 None。"""
+        best_bombing_action = None
+        potential_bombing_spots = [ai_current_tile]
+        for dx, dy in DIRECTIONS.values():
+            adj_x, adj_y = ai_current_tile[0] + dx, ai_current_tile[1] + dy
+            adj_node = self._get_node_at_coords(adj_x, adj_y)
+            if adj_node and adj_node.is_empty_for_direct_movement() and not self.is_tile_dangerous(adj_x, adj_y, 0.1):
+                potential_bombing_spots.append((adj_x, adj_y))
+        ai_log(f"    ENGAGE: Potential bombing spots to check: {potential_bombing_spots}")
+
+        for spot_to_bomb_from in potential_bombing_spots:
+            dist_human_to_this_bomb_spot = abs(spot_to_bomb_from[0] - human_pos[0]) + abs(spot_to_bomb_from[1] - human_pos[1])
+            if dist_human_to_this_bomb_spot <= self.ai_player.bomb_range:
+                ai_log(f"      ENGAGE: Checking bombing from {spot_to_bomb_from} (dist to human: {dist_human_to_this_bomb_spot}, AI range: {self.ai_player.bomb_range})")
+                is_player_in_blast = self._is_tile_in_hypothetical_blast(human_pos[0], human_pos[1], spot_to_bomb_from[0], spot_to_bomb_from[1], self.ai_player.bomb_range)
+                ai_log(f"        ENGAGE: Is player {human_pos} in blast if bombed from {spot_to_bomb_from} (range {self.ai_player.bomb_range})? {is_player_in_blast}")
+                if is_player_in_blast:
+                    can_bomb_at_spot, retreat_spot = self.can_place_bomb_and_retreat(spot_to_bomb_from)
+                    ai_log(f"        ENGAGE_BOMB_CHECK_RESULT: can_place_bomb_and_retreat({spot_to_bomb_from}) returned: can_bomb={can_bomb_at_spot}, retreat_to={retreat_spot}")
+                    if can_bomb_at_spot:
+                        path_to_this_bomb_spot = [ai_current_tile] if spot_to_bomb_from == ai_current_tile else self.bfs_find_direct_movement_path(ai_current_tile, spot_to_bomb_from, max_depth=3)
+                        if path_to_this_bomb_spot:
+                            num_moves_to_spot = len(path_to_this_bomb_spot) -1
+                            if best_bombing_action is None or num_moves_to_spot < best_bombing_action['path_to_bomb_spot_len']:
+                                best_bombing_action = {'bomb_spot': spot_to_bomb_from, 'retreat_spot': retreat_spot, 'path_to_bomb_spot_coords': path_to_this_bomb_spot, 'path_to_bomb_spot_len': num_moves_to_spot}
+                                ai_log(f"          ENGAGE: Found a candidate bombing action: {best_bombing_action}")
+        return best_bombing_action
+
+    def _plan_cqc_bomb(self, ai_current_tile):
+        """近戰放炸彈的計畫：("safe", 撤退點)、("desperate", 相鄰的撤退點) 或 (None, None)。"""
+        can_bomb_here, retreat_spot_here = self.can_place_bomb_and_retreat(ai_current_tile)
+        if can_bomb_here:
+            return "safe", retreat_spot_here
+        if self.rng.random() < settings.AI_CLOSE_QUARTERS_BOMB_CHANCE:
+            ai_log(f"    CQC: No perfect retreat, but attempting AGGRESSIVE bomb at {ai_current_tile} (chance: {settings.AI_CLOSE_QUARTERS_BOMB_CHANCE}).")
+            desperate_retreat_options = []
+            for dx, dy in DIRECTIONS.values():
+                next_r_x, next_r_y = ai_current_tile[0] + dx, ai_current_tile[1] + dy
+                if not self._is_tile_in_hypothetical_blast(next_r_x, next_r_y, ai_current_tile[0], ai_current_tile[1], self.ai_player.bomb_range):
+                    node = self._get_node_at_coords(next_r_x, next_r_y)
+                    if node and node.is_empty_for_direct_movement() and not self.is_tile_dangerous(next_r_x, next_r_y, 0.1):
+                        desperate_retreat_options.append((next_r_x, next_r_y))
+            if desperate_retreat_options:
+                return "desperate", self.rng.choice(desperate_retreat_options)
+            ai_log(f"    CQC: Aggressive bomb considered but no desperate retreat from {ai_current_tile}.")
+        else: ai_log(f"    CQC: Did not pass aggressive bomb chance.")
+        return None, None
+
     def is_bomb_still_active(self, bomb_placed_timestamp):
         if bomb_placed_timestamp == 0: return False
-        elapsed_time = pygame.time.get_ticks() - bomb_placed_timestamp
+        elapsed_time = get_ticks(self.game) - bomb_placed_timestamp
         return elapsed_time < (settings.BOMB_TIMER + settings.EXPLOSION_DURATION + 200)
 
     def is_path_to_player_initial_spawn_clear(self):
@@ -491,7 +564,7 @@ class AIController:
             self.current_movement_sub_path = []; self.current_movement_sub_path_index = 0; return True
 
     def update(self):
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks(self.game)
         ai_current_tile = self._get_ai_current_tile()
 
         if not ai_current_tile or not self.ai_player or not self.ai_player.is_alive:
@@ -566,33 +639,43 @@ class AIController:
                 if self.current_state == AI_STATE_PLANNING_PATH_TO_PLAYER: self.handle_planning_path_to_player_state(ai_current_tile)
                 return # 避免後續的移動執行干擾
 
-            # 狀態處理
-            if self.current_state == AI_STATE_EVADING_DANGER: self.handle_evading_danger_state(ai_current_tile)
-            elif self.current_state == AI_STATE_PLANNING_PATH_TO_PLAYER: self.handle_planning_path_to_player_state(ai_current_tile)
-            elif self.current_state == AI_STATE_EXECUTING_PATH_CLEARANCE: self.handle_executing_path_clearance_state(ai_current_tile)
-            elif self.current_state == AI_STATE_TACTICAL_RETREAT_AND_WAIT: self.handle_tactical_retreat_and_wait_state(ai_current_tile)
-            elif self.current_state == AI_STATE_ENGAGING_PLAYER: self.handle_engaging_player_state(ai_current_tile)
-            elif self.current_state == AI_STATE_CLOSE_QUARTERS_COMBAT: self.handle_close_quarters_combat_state(ai_current_tile)
+            self.handle_state(ai_current_tile)
+        elif self.async_planner is not None and self.async_planner.busy and self.current_state != AI_STATE_EVADING_DANGER:
+            self.handle_state(ai_current_tile) # 【新增】背景計畫可能已經送達，不必等到下一個決策週期
 
         if self.ai_player.action_timer <= 0:
             sub_path_finished_or_failed = False
             if self.current_movement_sub_path:
                 sub_path_finished_or_failed = self.execute_next_move_on_sub_path(ai_current_tile)
             if sub_path_finished_or_failed:
-                self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval -1
+                self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval -1
             if not self.current_movement_sub_path:
                 self.ai_player.is_moving = False
 
-        if AI_DEBUG_MODE and hasattr(self.game, 'screen') and self.game.screen:
+        if AI_DEBUG_MODE and hasattr(self.game, 'screen') and self.game.screen and \
+           getattr(self.game, 'show_ai_debug_overlay', True) is not False:
              self.debug_draw_path(self.game.screen)
 
+    def handle_state(self, ai_current_tile):
+        # 狀態處理
+        if self.astar_plan_repair_pending and self.current_state == AI_STATE_EXECUTING_PATH_CLEARANCE:
+            self._repair_astar_plan(ai_current_tile)
+        if self.current_state == AI_STATE_EVADING_DANGER: self.handle_evading_danger_state(ai_current_tile)
+        elif self.current_state == AI_STATE_PLANNING_PATH_TO_PLAYER: self.handle_planning_path_to_player_state(ai_current_tile)
+        elif self.current_state == AI_STATE_EXECUTING_PATH_CLEARANCE: self.handle_executing_path_clearance_state(ai_current_tile)
+        elif self.current_state == AI_STATE_TACTICAL_RETREAT_AND_WAIT: self.handle_tactical_retreat_and_wait_state(ai_current_tile)
+        elif self.current_state == AI_STATE_ENGAGING_PLAYER: self.handle_engaging_player_state(ai_current_tile)
+        elif self.current_state == AI_STATE_CLOSE_QUARTERS_COMBAT: self.handle_close_quarters_combat_state(ai_current_tile)
+
     def handle_planning_path_to_player_state(self, ai_current_tile):
         ai_log(f"[AI_HANDLER] PLANNING_PATH_TO_PLAYER at {ai_current_tile}")
         if not self.player_initial_spawn_tile:
             self.player_initial_spawn_tile = self._get_human_player_current_tile() or (1,1)
             ai_log(f"[AI_ERROR] Player initial spawn tile was not set! Fallback to: {self.player_initial_spawn_tile}")
 
-        self.astar_planned_path = self.astar_find_path(ai_current_tile, self.player_initial_spawn_tile)
+        astar_path = run_planning_search(self, ai_current_tile, "astar_find_path", ai_current_tile, self.player_initial_spawn_tile)
+        if astar_path is PLAN_PENDING: return # 背景搜尋中，AI 停在原地等結果
+        self.astar_planned_path = astar_path
         if self.astar_planned_path:
             self.astar_path_current_segment_index = 0
             self.path_to_player_initial_spawn_clear = not any(node.is_destructible_box() for node in self.astar_planned_path)
@@ -641,7 +724,7 @@ class AIController:
         if ai_current_tile == (current_astar_target_node.x, current_astar_target_node.y):
             ai_log(f"      AI is AT A* target node {current_astar_target_node}. Advancing A* path index.")
             self.astar_path_current_segment_index += 1
-            self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval -1
+            self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval -1
             return
 
         if current_astar_target_node.is_empty_for_direct_movement():
@@ -656,7 +739,9 @@ class AIController:
         elif current_astar_target_node.is_destructible_box():
             self.target_destructible_wall_node_in_astar = current_astar_target_node
             ai_log(f"      A* segment is DESTRUCTIBLE_BOX: {self.target_destructible_wall_node_in_astar}. Finding bombing spot.")
-            bomb_spot_coord, retreat_spot_coord = self._find_optimal_bombing_and_retreat_spot(self.target_destructible_wall_node_in_astar, ai_current_tile)
+            bombing_plan = run_planning_search(self, ai_current_tile, "_plan_wall_bombing", self.target_destructible_wall_node_in_astar, ai_current_tile)
+            if bombing_plan is PLAN_PENDING: return
+            bomb_spot_coord, retreat_spot_coord, path_to_bomb_spot_for_wall = bombing_plan
 
             if bomb_spot_coord and retreat_spot_coord:
                 self.chosen_bombing_spot_coords = bomb_spot_coord
@@ -674,7 +759,6 @@ class AIController:
                         ai_log("        AI at bombing spot for wall, but no bombs available. Re-planning.")
                         self.change_state(AI_STATE_PLANNING_PATH_TO_PLAYER)
                 else:
-                    path_to_bomb_spot_for_wall = self.bfs_find_direct_movement_path(ai_current_tile, self.chosen_bombing_spot_coords, max_depth=7)
                     if path_to_bomb_spot_for_wall:
                         self.set_current_movement_sub_path(path_to_bomb_spot_for_wall)
                         ai_log(f"        Setting sub-path to chosen bombing spot {self.chosen_bombing_spot_coords} for wall.")
@@ -774,30 +858,8 @@ class AIController:
         ai_log(f"  ENGAGE_BOMB_CHECK: Condition (not ai_just_placed_bomb AND bombs_available): {can_attempt_bombing_check} (ai_just_placed_bomb={self.ai_just_placed_bomb}, bombs_placed={self.ai_player.bombs_placed_count}, max_bombs={self.ai_player.max_bombs})")
 
         if can_attempt_bombing_check:
-            potential_bombing_spots = [ai_current_tile]
-            for dx, dy in DIRECTIONS.values():
-                adj_x, adj_y = ai_current_tile[0] + dx, ai_current_tile[1] + dy
-                adj_node = self._get_node_at_coords(adj_x, adj_y)
-                if adj_node and adj_node.is_empty_for_direct_movement() and not self.is_tile_dangerous(adj_x, adj_y, 0.1):
-                    potential_bombing_spots.append((adj_x, adj_y))
-            ai_log(f"    ENGAGE: Potential bombing spots to check: {potential_bombing_spots}")
-
-            for spot_to_bomb_from in potential_bombing_spots:
-                dist_human_to_this_bomb_spot = abs(spot_to_bomb_from[0] - human_pos[0]) + abs(spot_to_bomb_from[1] - human_pos[1])
-                if dist_human_to_this_bomb_spot <= self.ai_player.bomb_range:
-                    ai_log(f"      ENGAGE: Checking bombing from {spot_to_bomb_from} (dist to human: {dist_human_to_this_bomb_spot}, AI range: {self.ai_player.bomb_range})")
-                    is_player_in_blast = self._is_tile_in_hypothetical_blast(human_pos[0], human_pos[1], spot_to_bomb_from[0], spot_to_bomb_from[1], self.ai_player.bomb_range)
-                    ai_log(f"        ENGAGE: Is player {human_pos} in blast if bombed from {spot_to_bomb_from} (range {self.ai_player.bomb_range})? {is_player_in_blast}")
-                    if is_player_in_blast:
-                        can_bomb_at_spot, retreat_spot = self.can_place_bomb_and_retreat(spot_to_bomb_from)
-                        ai_log(f"        ENGAGE_BOMB_CHECK_RESULT: can_place_bomb_and_retreat({spot_to_bomb_from}) returned: can_bomb={can_bomb_at_spot}, retreat_to={retreat_spot}")
-                        if can_bomb_at_spot:
-                            path_to_this_bomb_spot = [ai_current_tile] if spot_to_bomb_from == ai_current_tile else self.bfs_find_direct_movement_path(ai_current_tile, spot_to_bomb_from, max_depth=3)
-                            if path_to_this_bomb_spot:
-                                num_moves_to_spot = len(path_to_this_bomb_spot) -1
-                                if best_bombing_action is None or num_moves_to_spot < best_bombing_action['path_to_bomb_spot_len']:
-                                    best_bombing_action = {'bomb_spot': spot_to_bomb_from, 'retreat_spot': retreat_spot, 'path_to_bomb_spot_coords': path_to_this_bomb_spot, 'path_to_bomb_spot_len': num_moves_to_spot}
-                                    ai_log(f"          ENGAGE: Found a candidate bombing action: {best_bombing_action}")
+            best_bombing_action = run_planning_search(self, ai_current_tile, "_find_best_engagement_bombing_action", ai_current_tile, human_pos)
+            if best_bombing_action is PLAN_PENDING: return
             if best_bombing_action:
                 ai_log(f"    ENGAGE: BEST BOMBING ACTION CHOSEN: {best_bombing_action}")
                 self.chosen_bombing_spot_coords = best_bombing_action['bomb_spot']
@@ -851,8 +913,10 @@ class AIController:
             is_player_in_blast_here = self._is_tile_in_hypothetical_blast(human_pos[0], human_pos[1], ai_current_tile[0], ai_current_tile[1], self.ai_player.bomb_range)
             if is_player_in_blast_here:
                 ai_log(f"  CQC: Player {human_pos} is in blast if AI bombs at current spot {ai_current_tile}.")
-                can_bomb_here, retreat_spot_here = self.can_place_bomb_and_retreat(ai_current_tile)
-                if can_bomb_here:
+                cqc_plan = run_planning_search(self, ai_current_tile, "_plan_cqc_bomb", ai_current_tile)
+                if cqc_plan is PLAN_PENDING: return
+                bomb_kind, retreat_spot_here = cqc_plan
+                if bomb_kind == "safe":
                     ai_log(f"    CQC: Found safe retreat to {retreat_spot_here}. Placing bomb at {ai_current_tile}.")
                     self.chosen_bombing_spot_coords = ai_current_tile
                     self.chosen_retreat_spot_coords = retreat_spot_here
@@ -862,26 +926,14 @@ class AIController:
                     else: ai_log(f"    CQC: [CRITICAL] Placed bomb but no BFS path to chosen retreat {retreat_spot_here}!")
                     self.change_state(AI_STATE_TACTICAL_RETREAT_AND_WAIT)
                     return
-                else:
-                    if random.random() < settings.AI_CLOSE_QUARTERS_BOMB_CHANCE:
-                        ai_log(f"    CQC: No perfect retreat, but attempting AGGRESSIVE bomb at {ai_current_tile} (chance: {settings.AI_CLOSE_QUARTERS_BOMB_CHANCE}).")
-                        desperate_retreat_options = []
-                        for dx, dy in DIRECTIONS.values():
-                            next_r_x, next_r_y = ai_current_tile[0] + dx, ai_current_tile[1] + dy
-                            if not self._is_tile_in_hypothetical_blast(next_r_x, next_r_y, ai_current_tile[0], ai_current_tile[1], self.ai_player.bomb_range):
-                                node = self._get_node_at_coords(next_r_x, next_r_y)
-                                if node and node.is_empty_for_direct_movement() and not self.is_tile_dangerous(next_r_x, next_r_y, 0.1):
-                                    desperate_retreat_options.append((next_r_x, next_r_y))
-                        if desperate_retreat_options:
-                            self.chosen_bombing_spot_coords = ai_current_tile
-                            self.chosen_retreat_spot_coords = random.choice(desperate_retreat_options)
-                            ai_log(f"      CQC: Aggressive bomb! Desperate retreat to {self.chosen_retreat_spot_coords}.")
-                            self.ai_player.place_bomb()
-                            self.set_current_movement_sub_path([ai_current_tile, self.chosen_retreat_spot_coords])
-                            self.change_state(AI_STATE_TACTICAL_RETREAT_AND_WAIT)
-                            return
-                        else: ai_log(f"    CQC: Aggressive bomb considered but no desperate retreat from {ai_current_tile}.")
-                    else: ai_log(f"    CQC: Did not pass aggressive bomb chance.")
+                elif bomb_kind == "desperate":
+                    self.chosen_bombing_spot_coords = ai_current_tile
+                    self.chosen_retreat_spot_coords = retreat_spot_here
+                    ai_log(f"      CQC: Aggressive bomb! Desperate retreat to {self.chosen_retreat_spot_coords}.")
+                    self.ai_player.place_bomb()
+                    self.set_current_movement_sub_path([ai_current_tile, self.chosen_retreat_spot_coords])
+                    self.change_state(AI_STATE_TACTICAL_RETREAT_AND_WAIT)
+                    return
             else: ai_log(f"  CQC: Bombing at current spot {ai_current_tile} would not hit player {human_pos}.")
         else: ai_log(f"  CQC: Cannot attempt bombing (no bombs or ai_just_placed_bomb is True).")
 
@@ -906,9 +958,9 @@ class AIController:
                 # Try to pick a spot that wasn't the one AI just came from, if possible
                 preferred_spots = [s for s in available_reposition_spots if s != self.cqc_last_reposition_target]
                 if preferred_spots:
-                    best_reposition_tile = random.choice(preferred_spots)
+                    best_reposition_tile = self.rng.choice(preferred_spots)
                 elif available_reposition_spots : # Only option is to go back
-                    best_reposition_tile = random.choice(available_reposition_spots)
+                    best_reposition_tile = self.rng.choice(available_reposition_spots)
 
             if best_reposition_tile:
                 ai_log(f"    CQC: Repositioning to {best_reposition_tile} from options {available_reposition_spots}. Last target: {self.cqc_last_reposition_target}")
@@ -986,7 +1038,7 @@ class AIController:
                     pygame.draw.aalines(surface, (220, 20, 180, 230), False, sub_path_points_to_draw, True)
                     next_sub_step_coords = self.current_movement_sub_path[self.current_movement_sub_path_index + 1]
                     next_px, next_py = next_sub_step_coords[0] * tile_size + half_tile, next_sub_step_coords[1] * tile_size + half_tile
-                    pulse_factor = abs(pygame.time.get_ticks() % 1000 - 500) / 500
+                    pulse_factor = abs(get_ticks(self.game) % 1000 - 500) / 500
                     radius = int(tile_size // 5 + pulse_factor * (tile_size//10))
                     pygame.draw.circle(surface, (50, 255, 255, 220), (next_px, next_py), radius, 0)
 
@@ -1010,7 +1062,7 @@ class AIController:
             if show_long_term_strategic_elements and self.target_destructible_wall_node_in_astar and self.current_state == AI_STATE_EXECUTING_PATH_CLEARANCE:
                 wall_node = self.target_destructible_wall_node_in_astar
                 wall_rect = pygame.Rect(wall_node.x * tile_size, wall_node.y * tile_size, tile_size, tile_size)
-                pulse_factor_wall = abs(pygame.time.get_ticks() % 600 - 300) / 300
+                pulse_factor_wall = abs(get_ticks(self.game) % 600 - 300) / 300
                 alpha_wall = int(120 + pulse_factor_wall * 100)
                 thickness_wall = 2 + int(pulse_factor_wall * 2)
                 s_wall = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
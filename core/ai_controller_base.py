@@ -2,9 +2,19 @@
 
 import pygame
 import settings
-import random
-from collections import deque
 import heapq
+from collections import deque
+from itertools import islice
+from core.astar_engine import GridAStar
+from core.blast_footprint import BlastFootprintCache
+from core.danger_field import get_danger_field
+from core.evasion_search import find_evasion_route
+from core.async_planner import AsyncPlanner
+from core.game_clock import get_ticks
+from core.match_random import match_rng, AI_RNG
+from core.flow_field import FlowField, FlowFieldCache, iter_breadth_first
+from core.incremental_planner import DStarLitePlanner
+from core.occupancy_index import sprites_at
 
 AI_DEBUG_MODE = True
 def ai_log(message):
@@ -12,6 +22,9 @@ def ai_log(message):
     if AI_DEBUG_MODE:
         print(f"[AI_BASE] {message}")
 
+# 這些狀態沿著 astar_planned_path 前進；地圖格子改變時以增量規劃器修補路徑，而不是回到 PLANNING_* 重新搜尋
+INCREMENTAL_REPAIR_STATES = ("EXECUTING_PATH_CLEARANCE", "EXECUTING_ASTAR_PATH_TO_TARGET")
+
 DIRECTIONS = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
 
 class TileNode:
@@ -80,18 +93,61 @@ class AIControllerBase:
         self.player_initial_spawn_tile = getattr(self.game, 'player1_start_tile', (1,1))
 
         self.evasion_urgency_seconds = getattr(settings, "AI_EVASION_SAFETY_CHECK_FUTURE_SECONDS", 0.5)
+        self.astar_engine = GridAStar() # 陣列式 A*，在多次規劃之間重複使用同一組陣列
+        self.flow_field_cache = FlowFieldCache() # 每個決策週期共用的 BFS 距離場
+        self.blast_footprint_cache = BlastFootprintCache(getattr(settings, "AI_BLAST_FOOTPRINT_CACHE_SIZE", 512))
+        self.incremental_planner = None # 目前 A* 計畫對應的 D* Lite 規劃器
+        self.astar_plan_repair_pending = False
+        self.async_planner = None
+        self.enable_async_planning() # 規劃狀態的搜尋在背景執行緒對棋盤快照執行 (見 core/planning_board.py)
+        add_listener = getattr(self.map_manager, 'add_tile_change_listener', None)
+        if callable(add_listener):
+            add_listener(self._on_map_tile_changed)
 
         self.reset_state()
         
         self.retreat_img = pygame.image.load(settings.AI_RETREAT_IMG)
         self.retreat_img = pygame.transform.smoothscale(self.retreat_img, (settings.TILE_SIZE, settings.TILE_SIZE))
 
+    @property
+    def rng(self):
+        """這場對戰的 AI 亂數串流 (Game 沒有種子化亂數時退回全域 random)。"""
+        return match_rng(self.game, AI_RNG)
+
+    # --- 背景規劃 ---
+
+    def enable_async_planning(self):
+        """建立背景規劃器 (AI_ASYNC_PLANNING 關閉時維持同步規劃)。"""
+        if getattr(settings, "AI_ASYNC_PLANNING", True):
+            self.async_planner = AsyncPlanner(f"ai-planner-{id(self.ai_player)}")
+
+    def shutdown(self):
+        """放棄背景計畫並結束規劃執行緒 (Game 場景結束或重新開始時呼叫)。"""
+        if self.async_planner is not None:
+            self.async_planner.shutdown()
+
+    @property
+    def uses_async_planning(self):
+        """只有非固定步長的 Game 使用背景規劃；固定步長模式 (與測試用的假 Game) 保持同步，讓同一個種子的對戰可以重現。"""
+        return self.async_planner is not None and getattr(self.game, 'deterministic', True) is False
+
+    def _get_plan_stamp(self, ai_current_tile):
+        """計畫有效的前提：AI 位置、地圖版本、炸彈與雙方生命都和提交時相同。"""
+        bomb_tiles = tuple(sorted((bomb.current_tile_x, bomb.current_tile_y) for bomb in getattr(self.game, 'bombs_group', ())
+                                  if not bomb.exploded))
+        opponent_lives = getattr(self.human_player_sprite, 'lives', None)
+        return (ai_current_tile, getattr(self.map_manager, 'map_version', 0), bomb_tiles, self.ai_player.lives, opponent_lives)
+
     def reset_state(self):
         ai_log(f"Resetting AI state for Player ID: {id(self.ai_player)}.")
+        if self.async_planner is not None:
+            self.async_planner.cancel()
         self.current_state = "PLANNING_PATH" # Default initial state for base, will be changed by derived class
-        self.state_start_time = pygame.time.get_ticks()
+        self.state_start_time = get_ticks(self.game)
         self.astar_planned_path = []
         self.astar_path_current_segment_index = 0
+        self.incremental_planner = None
+        self.astar_plan_repair_pending = False
         self.current_movement_sub_path = [] # Correctly clears here
         self.current_movement_sub_path_index = 0
         self.last_bomb_placed_time = 0
@@ -101,7 +157,7 @@ class AIControllerBase:
         self.target_obstacle_to_bomb = None
         self.target_destructible_wall_node_in_astar = None
         self.roaming_target_tile = None
-        self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval
+        self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval
         current_ai_tile_tuple = self._get_ai_current_tile()
         self.last_known_tile = current_ai_tile_tuple if current_ai_tile_tuple else (-1,-1)
         self.movement_history.clear()
@@ -112,7 +168,11 @@ class AIControllerBase:
         if self.current_state != new_state:
             ai_log(f"[STATE_CHANGE] ID: {id(self.ai_player)} From {self.current_state} -> {new_state}")
             self.current_state = new_state
-            self.state_start_time = pygame.time.get_ticks()
+            self.state_start_time = get_ticks(self.game)
+
+            # 【修改】背景計畫屬於提交它的狀態；換狀態 (包含緊急閃避與死亡) 就直接放棄
+            if self.async_planner is not None:
+                self.async_planner.cancel()
 
             # --- MODIFICATION START ---
             # Only clear paths if entering a "planning" state, or a state that specifically requires it.
@@ -127,6 +187,9 @@ class AIControllerBase:
             if new_state.startswith("PLANNING_"):
                  self.astar_planned_path = []
                  self.astar_path_current_segment_index = 0
+                 self.incremental_planner = None
+            elif new_state in INCREMENTAL_REPAIR_STATES and self.astar_planned_path:
+                self._seed_incremental_planner()
             
             # Clean up specific target variables based on the new state
             if new_state not in ["EXECUTING_PATH_CLEARANCE", "TACTICAL_RETREAT_AND_WAIT", "ASSESSING_OBSTACLE", "MOVING_TO_BOMB_OBSTACLE", "EXECUTING_ASTAR_PATH_TO_TARGET", "ASSESSING_OBSTACLE_FOR_ITEM"]: # Added ASSESSING_OBSTACLE_FOR_ITEM
@@ -148,7 +211,7 @@ class AIControllerBase:
 
 
     def update(self):
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks(self.game)
         ai_current_tile = self._get_ai_current_tile()
 
         if not ai_current_tile or not self.ai_player.is_alive:
@@ -186,6 +249,8 @@ class AIControllerBase:
                 return
 
             self.handle_state(ai_current_tile)
+        elif self.async_planner is not None and self.async_planner.busy and self.current_state != "EVADING_DANGER":
+            self.handle_state(ai_current_tile) # 【新增】背景計畫可能已經送達，不必等到下一個決策週期
 
         if self.ai_player.action_timer <= 0:
             if self.current_movement_sub_path:
@@ -193,12 +258,14 @@ class AIControllerBase:
                 sub_path_finished = self.execute_next_move_on_sub_path(ai_current_tile)
                 # --- MODIFICATION END ---
                 if sub_path_finished:
-                    self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval
+                    self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval
             else:
                 if hasattr(self.ai_player, 'is_moving'):
                     self.ai_player.is_moving = False
     
     def handle_state(self, ai_current_tile):
+        if self.astar_plan_repair_pending and self.current_state in INCREMENTAL_REPAIR_STATES:
+            self._repair_astar_plan(ai_current_tile)
         state_handler_method_name = f"handle_{self.current_state.lower()}_state"
         handler = getattr(self, state_handler_method_name, self.handle_unknown_state)
         handler(ai_current_tile)
@@ -244,7 +311,7 @@ class AIControllerBase:
     def handle_idle_state(self, ai_current_tile):
         ai_log(f"Base: In IDLE at {ai_current_tile}. Default: go PLANNING_PATH after delay.")
         idle_duration = getattr(self, 'idle_duration_ms', 2000)
-        if pygame.time.get_ticks() - self.state_start_time > idle_duration:
+        if get_ticks(self.game) - self.state_start_time > idle_duration:
             default_planning_state = "PLANNING_PATH"
             if hasattr(self, 'default_planning_state_on_stuck'):
                 default_planning_state = self.default_planning_state_on_stuck
@@ -288,7 +355,7 @@ class AIControllerBase:
              if self.astar_path_current_segment_index >= len(self.astar_planned_path):
                  self.change_state("PLANNING_PATH")
              else:
-                 self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval
+                 self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval
 
 
     def handle_moving_to_collect_item_state(self, ai_current_tile):
@@ -329,28 +396,7 @@ class AIControllerBase:
         if not self.current_movement_sub_path:
             ai_log("Base: Finding new evasion path.")
             retreat_search_depth = getattr(self, 'retreat_search_depth', 7)
-            min_options_for_evasion = getattr(self, 'min_retreat_options_for_evasion', 1)
-
-            safe_spots = self.find_safe_tiles_nearby_for_retreat(
-                from_coords=ai_current_tile,
-                bomb_coords_as_danger_source=ai_current_tile,
-                bomb_range_of_danger_source=0,
-                max_depth=retreat_search_depth,
-                min_options_needed=min_options_for_evasion
-            )
-            
-            best_path_to_safety = None
-            if safe_spots:
-                candidate_paths = []
-                for spot in safe_spots:
-                    path = self.bfs_find_direct_movement_path(ai_current_tile, spot, max_depth=retreat_search_depth)
-                    if path and len(path) > 1:
-                        openness = self._get_tile_openness(spot[0], spot[1])
-                        candidate_paths.append({'path': path, 'openness': openness, 'len': len(path)})
-                
-                if candidate_paths:
-                    candidate_paths.sort(key=lambda p: (-p['openness'], p['len']))
-                    best_path_to_safety = candidate_paths[0]['path']
+            best_path_to_safety = self.find_evasion_route(ai_current_tile, max_depth=retreat_search_depth)
             
             if best_path_to_safety:
                 ai_log(f"Base: Found best evasion path to {best_path_to_safety[-1]}. Path: {best_path_to_safety}")
@@ -406,11 +452,8 @@ class AIControllerBase:
 
     def _is_tile_blocked_by_opponent_bomb(self, tile_x, tile_y):
         if hasattr(self.game, 'bombs_group'):
-            for bomb in self.game.bombs_group:
-                if not bomb.exploded and \
-                   bomb.current_tile_x == tile_x and \
-                   bomb.current_tile_y == tile_y and \
-                   bomb.placed_by_player is not self.ai_player:
+            for bomb in sprites_at(self.game.bombs_group, tile_x, tile_y): # 格子索引查詢
+                if not bomb.exploded and bomb.placed_by_player is not self.ai_player:
                     return True
         return False
 
@@ -469,71 +512,84 @@ class AIControllerBase:
         
         return stuck or oscillating
 
+    def _get_opponent_bomb_tiles(self):
+        """回傳所有未爆炸的對手炸彈所在格子，供搜尋時一次性排除。"""
+        if not hasattr(self.game, 'bombs_group'):
+            return set()
+        return {(bomb.current_tile_x, bomb.current_tile_y) for bomb in self.game.bombs_group
+                if not bomb.exploded and bomb.placed_by_player is not self.ai_player}
+
     def astar_find_path(self, start_coords, target_coords):
         ai_log(f"A* Pathfinding from {start_coords} to {target_coords}")
-        start_node = self._get_node_at_coords(start_coords[0], start_coords[1])
-        target_node = self._get_node_at_coords(target_coords[0], target_coords[1])
-        if not start_node or not target_node: return []
-
-        open_set = []
-        heapq.heappush(open_set, (0, 0, start_node))
-        node_data = {(start_node.x, start_node.y): start_node}
-        closed_set = set()
-        start_node.g_cost = 0
-        start_node.h_cost = abs(start_node.x - target_node.x) + abs(start_node.y - target_node.y)
-        start_node.parent = None
-
-        while open_set:
-            current_f, current_h, current_node_from_heap = heapq.heappop(open_set)
-            if (current_node_from_heap.x, current_node_from_heap.y) not in node_data or \
-               node_data[(current_node_from_heap.x, current_node_from_heap.y)].g_cost < current_node_from_heap.g_cost:
-                continue
-            current_node = node_data[(current_node_from_heap.x, current_node_from_heap.y)]
-
-            if current_node == target_node:
-                path = []
-                temp = current_node
-                while temp: path.append(temp); temp = temp.parent
-                return path[::-1]
-            closed_set.add((current_node.x, current_node.y))
-
-            for neighbor_template in self._get_node_neighbors(current_node, for_astar_planning=True):
-                if (neighbor_template.x, neighbor_template.y) in closed_set: continue
-                tentative_g_cost = current_node.g_cost + neighbor_template.get_astar_move_cost_to_here()
-                neighbor_coords = (neighbor_template.x, neighbor_template.y)
-                current_neighbor_data = node_data.get(neighbor_coords)
-                if current_neighbor_data is None or tentative_g_cost < current_neighbor_data.g_cost:
-                    if current_neighbor_data is None:
-                        actual_neighbor_node = TileNode(neighbor_template.x, neighbor_template.y, neighbor_template.tile_char)
-                    else: actual_neighbor_node = current_neighbor_data
-                    actual_neighbor_node.parent = current_node
-                    actual_neighbor_node.g_cost = tentative_g_cost
-                    actual_neighbor_node.h_cost = abs(actual_neighbor_node.x - target_node.x) + abs(actual_neighbor_node.y - target_node.y)
-                    heapq.heappush(open_set, (actual_neighbor_node.get_f_cost(), actual_neighbor_node.h_cost, actual_neighbor_node))
-                    node_data[neighbor_coords] = actual_neighbor_node
-        ai_log(f"A* Pathfinding failed to find path from {start_coords} to {target_coords}")
-        return []
+        if not self._get_node_at_coords(start_coords[0], start_coords[1]) or \
+           not self._get_node_at_coords(target_coords[0], target_coords[1]):
+            return []
+        path = self.astar_engine.find_path_nodes(
+            self.map_manager.map_data, self.map_manager.tile_width, self.map_manager.tile_height,
+            start_coords, target_coords, TileNode, blocked_tiles=self._get_opponent_bomb_tiles())
+        if not path:
+            ai_log(f"A* Pathfinding failed to find path from {start_coords} to {target_coords}")
+        return path
+
+    def _seed_incremental_planner(self):
+        """以目前的 astar_planned_path 建立 D* Lite 搜尋樹；目標相同時沿用既有的規劃器。"""
+        start_node, goal_node = self.astar_planned_path[0], self.astar_planned_path[-1]
+        goal_coords = (goal_node.x, goal_node.y)
+        if self.incremental_planner is not None and self.incremental_planner.goal == goal_coords:
+            return
+        planner = DStarLitePlanner()
+        planner.plan(self.map_manager.map_data, self.map_manager.tile_width, self.map_manager.tile_height,
+                     (start_node.x, start_node.y), goal_coords, blocked_tiles=self._get_opponent_bomb_tiles())
+        self.incremental_planner = planner
+        self.astar_plan_repair_pending = False
+
+    def _on_map_tile_changed(self, tile_x, tile_y, old_char, new_char):
+        if self.incremental_planner is not None:
+            self.incremental_planner.notify_tile_changed(tile_x, tile_y, new_char)
+            self.astar_plan_repair_pending = True
+
+    def _repair_astar_plan(self, ai_current_tile):
+        """以增量規劃器從目前位置修補 astar_planned_path；修補失敗時保留原路徑，交由各狀態自行重新規劃。"""
+        self.astar_plan_repair_pending = False
+        if self.incremental_planner is None:
+            return False
+        path_coords = self.incremental_planner.replan(ai_current_tile, blocked_tiles=self._get_opponent_bomb_tiles())
+        if not path_coords:
+            ai_log(f"Incremental repair found no path from {ai_current_tile} to {self.incremental_planner.goal}.")
+            return False
+        self.astar_planned_path = [self._get_node_at_coords(x, y) for x, y in path_coords]
+        self.astar_path_current_segment_index = 0
+        ai_log(f"Repaired A* plan incrementally ({self.incremental_planner.last_expansions} expansions): {path_coords}")
+        return True
+
+    def _get_search_cache_key(self):
+        """本次決策的搜尋快取鍵：tick、地圖版本與炸彈集合任一改變就失效；沒有 tick 計數時回傳 None (不快取)。"""
+        tick = getattr(self.game, 'tick_count', None)
+        if not isinstance(tick, int):
+            return None
+        bomb_signature = tuple((bomb.current_tile_x, bomb.current_tile_y, bomb.exploded) for bomb in getattr(self.game, 'bombs_group', ()))
+        return (tick, getattr(self.map_manager, 'map_version', 0), bomb_signature)
+
+    def _build_movement_flow_field(self, start_coords, avoid_specific_tile=None):
+        map_data = self.map_manager.map_data
+        opponent_bomb_tiles = self._get_opponent_bomb_tiles()
+
+        def is_passable(x, y):
+            return map_data[y][x] == '.' and (x, y) != avoid_specific_tile and \
+                   (x, y) not in opponent_bomb_tiles and not self.is_tile_dangerous(x, y, future_seconds=0.15)
+
+        return FlowField.build(start_coords, self.map_manager.tile_width, self.map_manager.tile_height, is_passable, rng=self.rng)
+
+    def get_flow_field(self, start_coords):
+        """回傳從 start_coords 出發的移動距離場，同一決策週期內重複使用。"""
+        return self.flow_field_cache.get(self._get_search_cache_key(), start_coords, self._build_movement_flow_field)
 
     def bfs_find_direct_movement_path(self, start_coords, target_coords, max_depth=20, avoid_specific_tile=None):
-        q = deque([(start_coords, [start_coords])])
-        visited = {start_coords}
-        while q:
-            (curr_x, curr_y), path = q.popleft()
-            if len(path) -1 > max_depth : continue
-            if (curr_x, curr_y) == target_coords: return path
-            shuffled_directions = list(DIRECTIONS.values()); random.shuffle(shuffled_directions)
-            for dx, dy in shuffled_directions:
-                next_x, next_y = curr_x + dx, curr_y + dy
-                next_coords = (next_x, next_y)
-                if next_coords not in visited:
-                    if avoid_specific_tile and next_coords == avoid_specific_tile: continue
-                    node = self._get_node_at_coords(next_x, next_y)
-                    if node and node.is_empty_for_direct_movement() and \
-                       not self.is_tile_dangerous(next_x, next_y, future_seconds=0.15) and \
-                       not self._is_tile_blocked_by_opponent_bomb(next_x, next_y):
-                        visited.add(next_coords)
-                        q.append((next_coords, path + [next_coords]))
-        return []
+        if avoid_specific_tile:
+            field = self._build_movement_flow_field(start_coords, avoid_specific_tile)
+        else:
+            field = self.get_flow_field(start_coords)
+        return field.path_to(target_coords, max_depth)
         
     def can_place_bomb_and_retreat(self, bomb_placement_coords):
         ai_log(f"    [AI_BOMB_DECISION_HELPER] can_place_bomb_and_retreat called for: {bomb_placement_coords}")
@@ -553,17 +609,14 @@ class AIControllerBase:
         
         # Check if another AI (if any, and not self) is at the bomb_placement_coords
         # This is more for future-proofing if you have multiple AIs.
-        for player_sprite in self.game.players_group: # Iterate through all players
+        for player_sprite in sprites_at(self.game.players_group, bomb_placement_coords[0], bomb_placement_coords[1]): # Players on that tile
             if player_sprite is not self.ai_player and player_sprite.is_alive: # Check if it's another player and alive
-                if player_sprite.tile_x == bomb_placement_coords[0] and player_sprite.tile_y == bomb_placement_coords[1]:
-                    ai_log(f"      [AI_BOMB_DECISION_HELPER] Another player (ID: {id(player_sprite)}) is at bomb spot {bomb_placement_coords}. Returning False.")
-                    return False, None
+                ai_log(f"      [AI_BOMB_DECISION_HELPER] Another player (ID: {id(player_sprite)}) is at bomb spot {bomb_placement_coords}. Returning False.")
+                return False, None
         
         # Check if there's already a non-exploded bomb at the spot
-        for bomb in self.game.bombs_group:
-            if not bomb.exploded and \
-               bomb.current_tile_x == bomb_placement_coords[0] and \
-               bomb.current_tile_y == bomb_placement_coords[1]:
+        for bomb in sprites_at(self.game.bombs_group, bomb_placement_coords[0], bomb_placement_coords[1]):
+            if not bomb.exploded:
                 # Optional: Could allow placing if it's AI's own bomb and owner_has_left_tile is False,
                 # but Player.place_bomb already has complex logic for this.
                 # Simplest for decision making: if any bomb is there, don't place another.
@@ -588,7 +641,8 @@ class AIControllerBase:
             bomb_coords_as_danger_source=bomb_placement_coords, # The new bomb is the danger
             bomb_range_of_danger_source=bomb_range_to_use,
             max_depth=retreat_search_depth,
-            min_options_needed=min_options
+            min_options_needed=min_options,
+            max_results=1 # 只會用到最佳的撤退點
         )
         ai_log(f"      [AI_BOMB_DECISION_HELPER] find_safe_tiles_nearby_for_retreat for spot {bomb_placement_coords} (range {bomb_range_to_use}) found: {retreat_spots}")
 
@@ -608,42 +662,59 @@ class AIControllerBase:
             ai_log(f"      [AI_BOMB_DECISION_HELPER] Cannot bomb at {bomb_placement_coords}, no safe retreat found by find_safe_tiles_nearby_for_retreat. Returning False.")
             return False, None
 
-    def find_safe_tiles_nearby_for_retreat(self, from_coords, bomb_coords_as_danger_source, bomb_range_of_danger_source, max_depth=6, min_options_needed=1):
-        ai_log(f"Finding safe retreat from {from_coords}, danger at {bomb_coords_as_danger_source} (range {bomb_range_of_danger_source}), depth {max_depth}")
-        q = deque([(from_coords, [from_coords], 0)])
-        visited = {from_coords}
-        potential_safe_spots = []
+    def find_evasion_route(self, from_coords, max_depth=7):
+        """
+        時間展開的逃生搜尋：一次找出安全目的地與抵達路線。
+        每一步以 AI_GRID_MOVE_ACTION_DURATION 計時，拒絕在 AI 經過時會被火焰覆蓋的格子；
+        目的地的排序與原本相同：空曠程度優先，路線長度其次。
+        """
+        danger_field = get_danger_field(self.game, self.map_manager)
+        opponent_bomb_tiles = self._get_opponent_bomb_tiles()
+        map_data = self.map_manager.map_data
+
+        def is_passable(x, y):
+            return map_data[y][x] == '.' and (x, y) not in opponent_bomb_tiles
+
+        step_ms = getattr(settings, "AI_GRID_MOVE_ACTION_DURATION", 0.2) * 1000
+        safe_horizon_ms = getattr(settings, "AI_RETREAT_SPOT_OTHER_DANGER_FUTURE_SECONDS", self.evasion_urgency_seconds) * 1000
+        return find_evasion_route(
+            danger_field, from_coords, is_passable, max_depth, step_ms,
+            blast_duration_ms=getattr(settings, "EXPLOSION_DURATION", 500),
+            safe_horizon_ms=safe_horizon_ms,
+            score_fn=lambda coords, path_len: (-self._get_tile_openness(coords[0], coords[1]), path_len),
+            rng=self.rng)
+
+    def iter_safe_retreat_tiles(self, from_coords, bomb_coords_as_danger_source, bomb_range_of_danger_source, max_depth=6):
+        """
+        依偏好順序 (空曠程度高、距離遠、先被 BFS 找到) 逐一產生安全的撤退格。
+        越空曠、越遠的格子越優先，所以在產生第一個之前必須把 max_depth 內的 BFS 全部跑完；
+        候選以 heap 排列，呼叫端只取前 k 個時省下的是排序 (k 次 pop 取代整個 sort)，不是搜尋。
+        """
+        map_data = self.map_manager.map_data
+        opponent_bomb_tiles = self._get_opponent_bomb_tiles()
         future_check_seconds = getattr(settings, "AI_RETREAT_SPOT_OTHER_DANGER_FUTURE_SECONDS", self.evasion_urgency_seconds)
-        while q:
-            (curr_x, curr_y), path, depth = q.popleft()
-            if depth > max_depth: continue
-            is_safe_from_this_bomb = True
-            if bomb_range_of_danger_source > 0:
-                is_safe_from_this_bomb = not self._is_tile_in_hypothetical_blast(curr_x, curr_y, bomb_coords_as_danger_source[0], bomb_coords_as_danger_source[1], bomb_range_of_danger_source)
-            is_safe_from_others = not self.is_tile_dangerous(curr_x, curr_y, future_seconds=future_check_seconds)
-            is_blocked_by_opponent_bomb = self._is_tile_blocked_by_opponent_bomb(curr_x, curr_y)
-            if is_safe_from_this_bomb and is_safe_from_others and not is_blocked_by_opponent_bomb:
-                openness = self._get_tile_openness(curr_x, curr_y)
-                potential_safe_spots.append({
-                    'coords': (curr_x, curr_y),
-                    'path_len': len(path) - 1,
-                    'depth': depth,
-                    'openness': openness })
-            if depth < max_depth:
-                shuffled_directions = list(DIRECTIONS.values()); random.shuffle(shuffled_directions)
-                for dx, dy in shuffled_directions:
-                    next_coords = (curr_x + dx, curr_y + dy)
-                    if next_coords not in visited:
-                        node = self._get_node_at_coords(next_coords[0], next_coords[1])
-                        if node and node.is_empty_for_direct_movement():
-                            if not self.is_tile_dangerous(next_coords[0], next_coords[1], 0.05) and \
-                               not self._is_tile_blocked_by_opponent_bomb(next_coords[0], next_coords[1]):
-                                visited.add(next_coords)
-                                q.append((next_coords, path + [next_coords], depth + 1))
-        if not potential_safe_spots: return []
-        potential_safe_spots.sort(key=lambda s: (-s['openness'], -s['depth'], s['path_len']))
-        return [spot['coords'] for spot in potential_safe_spots[:max(min_options_needed, len(potential_safe_spots))]]
-        
+
+        def is_passable(x, y):
+            return map_data[y][x] == '.' and not self.is_tile_dangerous(x, y, 0.05) and (x, y) not in opponent_bomb_tiles
+
+        field = FlowField(from_coords, self.map_manager.tile_width, self.map_manager.tile_height)
+        candidates = []
+        for order, ((curr_x, curr_y), depth) in enumerate(iter_breadth_first(field, is_passable, max_depth, rng=self.rng)):
+            if bomb_range_of_danger_source > 0 and self._is_tile_in_hypothetical_blast(curr_x, curr_y, bomb_coords_as_danger_source[0], bomb_coords_as_danger_source[1], bomb_range_of_danger_source):
+                continue
+            if self.is_tile_dangerous(curr_x, curr_y, future_seconds=future_check_seconds) or (curr_x, curr_y) in opponent_bomb_tiles:
+                continue
+            candidates.append((-self._get_tile_openness(curr_x, curr_y), -depth, order, (curr_x, curr_y)))
+        heapq.heapify(candidates)
+        while candidates:
+            yield heapq.heappop(candidates)[-1]
+
+    def find_safe_tiles_nearby_for_retreat(self, from_coords, bomb_coords_as_danger_source, bomb_range_of_danger_source, max_depth=6, min_options_needed=1, max_results=None):
+        ai_log(f"Finding safe retreat from {from_coords}, danger at {bomb_coords_as_danger_source} (range {bomb_range_of_danger_source}), depth {max_depth}")
+        spots = self.iter_safe_retreat_tiles(from_coords, bomb_coords_as_danger_source, bomb_range_of_danger_source, max_depth)
+        # 原本就回傳所有候選 (min_options_needed 只是下限)；max_results 只限制回傳數量，BFS 仍會完整跑完 (見 iter_safe_retreat_tiles)
+        return list(islice(spots, max_results)) if max_results else list(spots)
+
     def set_current_movement_sub_path(self, path_coords_list):
         if path_coords_list and len(path_coords_list) > 1:
             self.current_movement_sub_path = path_coords_list
@@ -698,7 +769,7 @@ class AIControllerBase:
 
     def is_bomb_still_active(self, bomb_placed_timestamp):
         if bomb_placed_timestamp == 0: return False
-        elapsed_time = pygame.time.get_ticks() - bomb_placed_timestamp
+        elapsed_time = get_ticks(self.game) - bomb_placed_timestamp
         bomb_timer_duration = getattr(settings, 'BOMB_TIMER', 3000)
         explosion_effect_duration = getattr(settings, 'EXPLOSION_DURATION', 300)
         buffer_time = 200 
@@ -714,42 +785,16 @@ class AIControllerBase:
                 if node and node.is_empty_for_direct_movement(): open_count += 1 
         return open_count 
 
+    def _get_blast_footprint(self, bomb_x, bomb_y, bomb_range):
+        """回傳在 (bomb_x, bomb_y) 放置炸彈會波及的格子 (frozenset)，結果依地圖版本快取。"""
+        return self.blast_footprint_cache.get(self.map_manager, bomb_x, bomb_y, bomb_range)
+
     def _is_tile_in_hypothetical_blast(self, check_tile_x, check_tile_y, bomb_placed_at_x, bomb_placed_at_y, bomb_range):
-        if not (0 <= check_tile_x < self.map_manager.tile_width and 0 <= check_tile_y < self.map_manager.tile_height): return False
-        if check_tile_x == bomb_placed_at_x and check_tile_y == bomb_placed_at_y: return True
-        if check_tile_y == bomb_placed_at_y and abs(check_tile_x - bomb_placed_at_x) <= bomb_range:
-            blocked = False; step = 1 if check_tile_x > bomb_placed_at_x else -1
-            for i in range(1, abs(check_tile_x - bomb_placed_at_x) + 1): 
-                current_check_x = bomb_placed_at_x + i * step
-                if self.map_manager.is_solid_wall_at(current_check_x, bomb_placed_at_y): blocked = True; break
-                if current_check_x == check_tile_x: break 
-                node_between = self._get_node_at_coords(current_check_x, bomb_placed_at_y) 
-                if node_between and node_between.is_destructible_box(): blocked = True; break 
-            if not blocked and (bomb_placed_at_x + (abs(check_tile_x - bomb_placed_at_x) * step)) == check_tile_x : return True
-        if check_tile_x == bomb_placed_at_x and abs(check_tile_y - bomb_placed_at_y) <= bomb_range:
-            blocked = False; step = 1 if check_tile_y > bomb_placed_at_y else -1
-            for i in range(1, abs(check_tile_y - bomb_placed_at_y) + 1): 
-                current_check_y = bomb_placed_at_y + i * step
-                if self.map_manager.is_solid_wall_at(bomb_placed_at_x, current_check_y): blocked = True; break
-                if current_check_y == check_tile_y: break
-                node_between = self._get_node_at_coords(bomb_placed_at_x, current_check_y)
-                if node_between and node_between.is_destructible_box(): blocked = True; break
-            if not blocked and (bomb_placed_at_y + (abs(check_tile_y - bomb_placed_at_y) * step)) == check_tile_y : return True
-        return False
+        return (check_tile_x, check_tile_y) in self._get_blast_footprint(bomb_placed_at_x, bomb_placed_at_y, bomb_range)
 
     def is_tile_dangerous(self, tile_x, tile_y, future_seconds=0.3):
-        tile_rect = pygame.Rect(tile_x * settings.TILE_SIZE, tile_y * settings.TILE_SIZE, settings.TILE_SIZE, settings.TILE_SIZE)
-        if hasattr(self.game, 'explosions_group'):
-            for exp_sprite in self.game.explosions_group:
-                if exp_sprite.rect.colliderect(tile_rect): return True
-        if hasattr(self.game, 'bombs_group'):
-            for bomb in self.game.bombs_group:
-                if bomb.exploded: continue
-                time_to_explosion_ms = bomb.time_left
-                if 0 < time_to_explosion_ms < future_seconds * 1000:
-                    range_to_check = bomb.placed_by_player.bomb_range if hasattr(bomb.placed_by_player, 'bomb_range') else 1
-                    if self._is_tile_in_hypothetical_blast(tile_x, tile_y, bomb.current_tile_x, bomb.current_tile_y, range_to_check): return True
-        return False
+        # 危險地圖每個 tick 只建立一次，這裡只是一次陣列查詢
+        return get_danger_field(self.game, self.map_manager).is_dangerous(tile_x, tile_y, future_seconds)
         
     def debug_draw_path(self, surface):
         if not self.ai_player or not self.ai_player.is_alive:
@@ -798,7 +843,7 @@ class AIControllerBase:
                 if self.current_movement_sub_path_index + 1 < len(self.current_movement_sub_path):
                     next_step_coords = self.current_movement_sub_path[self.current_movement_sub_path_index + 1]
                     next_px, next_py = next_step_coords[0] * tile_size + half_tile, next_step_coords[1] * tile_size + half_tile
-                    pulse = abs(pygame.time.get_ticks() % 1000 - 500) / 500.0
+                    pulse = abs(get_ticks(self.game) % 1000 - 500) / 500.0
                     radius = int(half_tile * 0.3 + (half_tile * 0.2 * pulse))
                     alpha = int(150 + 105 * pulse)
                     pulse_s = pygame.Surface((radius*2,radius*2), pygame.SRCALPHA); pygame.draw.circle(pulse_s, (*COLOR_NEXT_STEP[:3], alpha), (radius,radius), radius); surface.blit(pulse_s, (next_px-radius, next_py-radius))
@@ -823,7 +868,7 @@ class AIControllerBase:
                 obs_s = pygame.Surface((tile_size,tile_size), pygame.SRCALPHA); obs_s.fill((*COLOR_TARGET_OBSTACLE[:3],100)); surface.blit(obs_s, (ox*tile_size,oy*tile_size)); pygame.draw.rect(surface, COLOR_TARGET_OBSTACLE, (ox*tile_size,oy*tile_size,tile_size,tile_size),2)
 
             evasion_check_seconds = getattr(self, 'evasion_urgency_seconds', 0.5)
-            if self.current_state == "EVADING_DANGER" or (pygame.time.get_ticks() // 250) % 2 == 0:
+            if self.current_state == "EVADING_DANGER" or (get_ticks(self.game) // 250) % 2 == 0:
                 check_radius = 4 
                 for r_offset in range(-check_radius, check_radius + 1):
                     for c_offset in range(-check_radius, check_radius + 1):
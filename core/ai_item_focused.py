@@ -2,9 +2,11 @@
 
 import pygame
 import settings
-import random
 from collections import deque
 from .ai_controller_base import AIControllerBase, ai_log, DIRECTIONS, TileNode
+from .flow_field import FlowField, iter_breadth_first
+from .game_clock import get_ticks
+from .planning_board import PLAN_PENDING, run_planning_search
 
 class ItemFocusedAIController(AIControllerBase):
     """
@@ -131,51 +133,35 @@ class ItemFocusedAIController(AIControllerBase):
         self.potential_wall_to_bomb_for_item = None #
         self.astar_planned_path = [] #
 
-        best_item_on_ground = self._find_best_item_on_ground(ai_current_tile) #
-        if best_item_on_ground: #
-            self.target_item_on_ground = best_item_on_ground['item'] #
-            item_coords = best_item_on_ground['coords'] #
-            path_to_item = self.bfs_find_direct_movement_path(ai_current_tile, item_coords, max_depth=25) #
-            if path_to_item and len(path_to_item) > 1: #
-                self.set_current_movement_sub_path(path_to_item) #
-                self.change_state("MOVING_TO_COLLECT_ITEM") #
-                return
-            self.astar_planned_path = self.astar_find_path(ai_current_tile, item_coords) #
-            if self.astar_planned_path: #
-                self.astar_path_current_segment_index = 0 #
-                self.change_state("EXECUTING_ASTAR_PATH_TO_TARGET") #
-                return
-            self.target_item_on_ground = None #
-
-        human_pos = self._get_human_player_current_tile() #
-        attack_chance = 0.05 + (self.aggression_level * 0.7) #
-        if human_pos and random.random() < attack_chance: #
-            ai_log(f"ITEM_FOCUSED: Aggression check passed (chance: {attack_chance:.2f}). Engaging player.") #
+        item_plan = run_planning_search(self, ai_current_tile, "_plan_item_target", ai_current_tile)
+        if item_plan is PLAN_PENDING: return # 背景搜尋中
+        decision = item_plan[0]
+
+        if decision == "collect": #
+            self.target_item_on_ground = getattr(item_plan[1], 'sprite', item_plan[1]) # 快照中的道具換回場上的精靈
+            self.set_current_movement_sub_path(item_plan[2]) #
+            self.change_state("MOVING_TO_COLLECT_ITEM") #
+        elif decision == "astar": #
+            self.target_item_on_ground = getattr(item_plan[1], 'sprite', item_plan[1])
+            self.astar_planned_path = item_plan[2] #
+            self.astar_path_current_segment_index = 0 #
+            self.change_state("EXECUTING_ASTAR_PATH_TO_TARGET") #
+        elif decision == "attack": #
+            human_pos = item_plan[1]
             dist_to_human = abs(ai_current_tile[0] - human_pos[0]) + abs(ai_current_tile[1] - human_pos[1]) #
             if dist_to_human <= self.cqc_engagement_distance: #
                 self.change_state("CLOSE_QUARTERS_COMBAT") #
             else:
                 self.change_state("ENGAGING_PLAYER") #
-            return
-
-        current_wall_target = self._find_best_wall_to_bomb_for_items(ai_current_tile, exclude_wall_node=self.last_failed_bombing_target_wall) #
-        if current_wall_target: #
-            self.potential_wall_to_bomb_for_item = current_wall_target #
-            if random.random() < self.item_bombing_chance: #
-                self.change_state("ASSESSING_OBSTACLE_FOR_ITEM") #
-                return
-        
-        potential_roam_targets = self._find_safe_roaming_spots(ai_current_tile, count=1, depth=self.roam_target_seek_depth, exclude_target=self.last_failed_roam_target) #
-        if potential_roam_targets: #
-            roam_target = potential_roam_targets[0] #
-            path_to_roam = self.bfs_find_direct_movement_path(ai_current_tile, roam_target) #
-            if path_to_roam and len(path_to_roam) > 1: #
-                self.set_current_movement_sub_path(path_to_roam) #
-                self.roaming_target_tile = roam_target #
-                self.change_state("ROAMING") #
-                return
-        
-        self.change_state("IDLE") #
+        elif decision == "bomb_wall": #
+            self.potential_wall_to_bomb_for_item = item_plan[1] #
+            self.change_state("ASSESSING_OBSTACLE_FOR_ITEM") #
+        elif decision == "roam": #
+            self.set_current_movement_sub_path(item_plan[2]) #
+            self.roaming_target_tile = item_plan[1] #
+            self.change_state("ROAMING") #
+        else:
+            self.change_state("IDLE") #
     
     def handle_endgame_hunt_state(self, ai_current_tile): #
         ai_log(f"ITEM_FOCUSED: In ENDGAME_HUNT at {ai_current_tile}. ChainBombing: {self.is_chain_bombing_active}, Count: {self.chain_bombs_placed_in_sequence}/{self.max_bombs_per_chain}") #
@@ -194,12 +180,15 @@ class ItemFocusedAIController(AIControllerBase):
             # 通常Player.place_bomb()後，AI控制器會立即規劃撤退
             # 我們在這裡的邏輯是：如果剛放完一顆，並且還能繼續連鎖，就規劃下一顆
             ai_log(f"    Chain bomb #{self.chain_bombs_placed_in_sequence} placed. AI at {ai_current_tile}. Considering next chain bomb.")
+            can_continue_chain = self.ai_player.bombs_placed_count < self.ai_player.max_bombs and \
+                                 self.chain_bombs_placed_in_sequence < self.max_bombs_per_chain
+            if can_continue_chain:
+                # 從當前（剛躲開上一顆炸彈的臨時點）尋找下一個陷阱點；等待背景結果時保留標誌，下個 frame 仍會回到這裡
+                next_bombing_plan = run_planning_search(self, ai_current_tile, "_find_trapping_bomb_spot", ai_current_tile, human_pos, True)
+                if next_bombing_plan is PLAN_PENDING: return
             self.ai_just_placed_bomb = False # 清除標誌，準備下一次放置判斷
 
-            if self.ai_player.bombs_placed_count < self.ai_player.max_bombs and \
-               self.chain_bombs_placed_in_sequence < self.max_bombs_per_chain:
-                # 從當前（剛躲開上一顆炸彈的臨時點）尋找下一個陷阱點
-                next_bombing_plan = self._find_trapping_bomb_spot(ai_current_tile, human_pos, is_chaining=True)
+            if can_continue_chain:
                 if next_bombing_plan:
                     next_stand_tile, next_temp_retreat, next_path_to_stand = next_bombing_plan
                     # 確保新的放置點與上一個不同，避免原地重複放（除非特殊策略）
@@ -231,7 +220,7 @@ class ItemFocusedAIController(AIControllerBase):
                 self.chain_bombs_placed_in_sequence += 1
                 # 找到躲避這顆剛放的炸彈的臨時位置
                 temp_retreat_path_after_this_bomb = None
-                safe_spots = self.find_safe_tiles_nearby_for_retreat(ai_current_tile, ai_current_tile, self.ai_player.bomb_range, max_depth=3, min_options_needed=1)
+                safe_spots = self.find_safe_tiles_nearby_for_retreat(ai_current_tile, ai_current_tile, self.ai_player.bomb_range, max_depth=3, min_options_needed=1, max_results=1)
                 if safe_spots:
                     temp_retreat_path_after_this_bomb = self.bfs_find_direct_movement_path(ai_current_tile, safe_spots[0], max_depth=3)
                 
@@ -257,7 +246,8 @@ class ItemFocusedAIController(AIControllerBase):
 
             if not self.is_chain_bombing_active or not self.current_chain_target_stand_tile: # 開始新的轟炸序列 或 中斷後重新規劃
                 self._reset_chain_bombing_state() # 確保是全新的開始
-                bombing_plan = self._find_trapping_bomb_spot(ai_current_tile, human_pos, is_chaining=False)
+                bombing_plan = run_planning_search(self, ai_current_tile, "_find_trapping_bomb_spot", ai_current_tile, human_pos, False)
+                if bombing_plan is PLAN_PENDING: return
                 if bombing_plan:
                     stand_on_tile, retreat_spot, path_to_stand_on_tile = bombing_plan
                     ai_log(f"    New hunt plan: Stand at {stand_on_tile}, final retreat to {retreat_spot}.")
@@ -291,7 +281,7 @@ class ItemFocusedAIController(AIControllerBase):
         retreat_target = self.final_retreat_spot_after_chain
         if not retreat_target:
             # 如果沒有特別為連鎖設定的最終撤退點，就用一個通用的安全點
-            safe_spots = self.find_safe_tiles_nearby_for_retreat(ai_current_tile, ai_current_tile, 0, self.retreat_search_depth, 1)
+            safe_spots = self.find_safe_tiles_nearby_for_retreat(ai_current_tile, ai_current_tile, 0, self.retreat_search_depth, 1, max_results=1)
             if safe_spots:
                 retreat_target = safe_spots[0]
         
@@ -310,7 +300,9 @@ class ItemFocusedAIController(AIControllerBase):
         if self.current_movement_sub_path: return #
         if ai_current_tile == item_coords: self.change_state("PLANNING_ITEM_TARGET") #
         else: 
-            self.astar_planned_path = self.astar_find_path(ai_current_tile, item_coords) #
+            astar_path = run_planning_search(self, ai_current_tile, "astar_find_path", ai_current_tile, item_coords)
+            if astar_path is PLAN_PENDING: return
+            self.astar_planned_path = astar_path #
             if self.astar_planned_path: self.astar_path_current_segment_index = 0; self.change_state("EXECUTING_ASTAR_PATH_TO_TARGET") #
             else: self.change_state("PLANNING_ITEM_TARGET") #
 
@@ -320,14 +312,16 @@ class ItemFocusedAIController(AIControllerBase):
         if self.current_movement_sub_path: return #
         target_node_in_astar = self.astar_planned_path[self.astar_path_current_segment_index] #
         if ai_current_tile == (target_node_in_astar.x, target_node_in_astar.y): #
-            self.astar_path_current_segment_index += 1; self.last_decision_time = pygame.time.get_ticks() - self.ai_decision_interval; return #
+            self.astar_path_current_segment_index += 1; self.last_decision_time = get_ticks(self.game) - self.ai_decision_interval; return #
         if target_node_in_astar.is_empty_for_direct_movement(): #
             path_to_node = self.bfs_find_direct_movement_path(ai_current_tile, (target_node_in_astar.x, target_node_in_astar.y)) #
             if path_to_node: self.set_current_movement_sub_path(path_to_node) #
             else: self.change_state("PLANNING_ITEM_TARGET") #
         elif target_node_in_astar.is_destructible_box(): #
             self.target_destructible_wall_node_in_astar = target_node_in_astar #
-            bomb_spot, retreat_spot = self._find_optimal_bombing_spot_for_obstacle(target_node_in_astar, ai_current_tile, 1) #
+            bombing_plan = run_planning_search(self, ai_current_tile, "_find_optimal_bombing_spot_for_obstacle", target_node_in_astar, ai_current_tile, 1)
+            if bombing_plan is PLAN_PENDING: return
+            bomb_spot, retreat_spot = bombing_plan #
             if bomb_spot and retreat_spot: self.chosen_bombing_spot_coords = bomb_spot; self.chosen_retreat_spot_coords = retreat_spot; self.change_state("MOVING_TO_BOMB_OBSTACLE") #
             else: self.change_state("PLANNING_ITEM_TARGET") #
         else: self.change_state("PLANNING_ITEM_TARGET") #
@@ -335,10 +329,11 @@ class ItemFocusedAIController(AIControllerBase):
     def handle_assessing_obstacle_for_item_state(self, ai_current_tile): #
         if not self.potential_wall_to_bomb_for_item or not self._get_node_at_coords(self.potential_wall_to_bomb_for_item.x, self.potential_wall_to_bomb_for_item.y).is_destructible_box(): #
             self.change_state("PLANNING_ITEM_TARGET"); return #
-        bomb_spot, retreat_spot = self._find_optimal_bombing_spot_for_obstacle(self.potential_wall_to_bomb_for_item, ai_current_tile, self.min_retreat_options_for_obstacle_bombing) #
+        bombing_plan = run_planning_search(self, ai_current_tile, "_plan_obstacle_bombing", self.potential_wall_to_bomb_for_item, ai_current_tile)
+        if bombing_plan is PLAN_PENDING: return
+        bomb_spot, retreat_spot, path_to_bomb_spot = bombing_plan #
         if bomb_spot and retreat_spot: #
             self.chosen_bombing_spot_coords = bomb_spot; self.chosen_retreat_spot_coords = retreat_spot #
-            path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, self.chosen_bombing_spot_coords) #
             if path_to_bomb_spot: self.set_current_movement_sub_path(path_to_bomb_spot); self.change_state("MOVING_TO_BOMB_OBSTACLE") #
             else: self.change_state("PLANNING_ITEM_TARGET") #
         else: self.change_state("PLANNING_ITEM_TARGET") #
@@ -404,7 +399,7 @@ class ItemFocusedAIController(AIControllerBase):
         super().handle_evading_danger_state(ai_current_tile) #
 
     def handle_idle_state(self, ai_current_tile): #
-        if pygame.time.get_ticks() - self.state_start_time > self.idle_duration_ms: #
+        if get_ticks(self.game) - self.state_start_time > self.idle_duration_ms: #
             self.change_state("PLANNING_ITEM_TARGET") #
 
     def handle_engaging_player_state(self, ai_current_tile): #
@@ -415,8 +410,10 @@ class ItemFocusedAIController(AIControllerBase):
         if self.current_movement_sub_path: return #
         if not self.ai_just_placed_bomb and self.ai_player.bombs_placed_count < self.ai_player.max_bombs: #
             if self._is_tile_in_hypothetical_blast(human_pos[0], human_pos[1], ai_current_tile[0], ai_current_tile[1], self.ai_player.bomb_range): #
-                can_bomb, retreat_spot = self.can_place_bomb_and_retreat(ai_current_tile) #
-                if can_bomb or random.random() < self.aggression_level * 0.5: #
+                bomb_check = run_planning_search(self, ai_current_tile, "can_place_bomb_and_retreat", ai_current_tile)
+                if bomb_check is PLAN_PENDING: return
+                can_bomb, retreat_spot = bomb_check #
+                if can_bomb or self.rng.random() < self.aggression_level * 0.5: #
                     self.chosen_retreat_spot_coords = retreat_spot #
                     self.ai_player.place_bomb() #
                     if retreat_spot: self.set_current_movement_sub_path(self.bfs_find_direct_movement_path(ai_current_tile, retreat_spot)) #
@@ -435,8 +432,10 @@ class ItemFocusedAIController(AIControllerBase):
         if self.current_movement_sub_path: return #
         if not self.ai_just_placed_bomb and self.ai_player.bombs_placed_count < self.ai_player.max_bombs: #
             if self._is_tile_in_hypothetical_blast(human_pos[0], human_pos[1], ai_current_tile[0], ai_current_tile[1], self.ai_player.bomb_range): #
-                if random.random() < (self.cqc_bomb_chance * (0.5 + self.aggression_level)): #
-                    can_bomb, retreat_spot = self.can_place_bomb_and_retreat(ai_current_tile) #
+                cqc_plan = run_planning_search(self, ai_current_tile, "_plan_cqc_bomb", ai_current_tile)
+                if cqc_plan is PLAN_PENDING: return
+                will_bomb, retreat_spot = cqc_plan
+                if will_bomb: #
                     self.chosen_retreat_spot_coords = retreat_spot #
                     self.ai_player.place_bomb() #
                     if retreat_spot: self.set_current_movement_sub_path(self.bfs_find_direct_movement_path(ai_current_tile, retreat_spot)) #
@@ -444,9 +443,55 @@ class ItemFocusedAIController(AIControllerBase):
                     return
         if not self.current_movement_sub_path: #
             available_spots = [c for c in self._get_adjacent_empty_tiles(ai_current_tile) if c != human_pos] #
-            if available_spots: self.set_current_movement_sub_path([ai_current_tile, random.choice(available_spots)]) #
+            if available_spots: self.set_current_movement_sub_path([ai_current_tile, self.rng.choice(available_spots)]) #
 
     # --- Helper Functions (許多與 v6 相同) ---
+    # 以下的 _plan_* / _find_* 只計算並回傳結果、不改變 AI 狀態，可以經由 run_planning_search 在背景執行緒對棋盤快照執行
+    def _plan_item_target(self, ai_current_tile):
+        """規劃下一步：("collect", 道具, 路徑)、("astar", 道具, A* 路徑)、("attack", 玩家位置)、("bomb_wall", 牆)、("roam", 目標, 路徑) 或 ("idle",)。"""
+        best_item_on_ground = self._find_best_item_on_ground(ai_current_tile) #
+        if best_item_on_ground: #
+            item_coords = best_item_on_ground['coords'] #
+            path_to_item = self.bfs_find_direct_movement_path(ai_current_tile, item_coords, max_depth=25) #
+            if path_to_item and len(path_to_item) > 1: #
+                return "collect", best_item_on_ground['item'], path_to_item
+            astar_path = self.astar_find_path(ai_current_tile, item_coords) #
+            if astar_path: #
+                return "astar", best_item_on_ground['item'], astar_path
+
+        human_pos = self._get_human_player_current_tile() #
+        attack_chance = 0.05 + (self.aggression_level * 0.7) #
+        if human_pos and self.rng.random() < attack_chance: #
+            ai_log(f"ITEM_FOCUSED: Aggression check passed (chance: {attack_chance:.2f}). Engaging player.") #
+            return "attack", human_pos
+
+        current_wall_target = self._find_best_wall_to_bomb_for_items(ai_current_tile, exclude_wall_node=self.last_failed_bombing_target_wall) #
+        if current_wall_target and self.rng.random() < self.item_bombing_chance: #
+            return "bomb_wall", current_wall_target
+
+        potential_roam_targets = self._find_safe_roaming_spots(ai_current_tile, count=1, depth=self.roam_target_seek_depth, exclude_target=self.last_failed_roam_target) #
+        if potential_roam_targets: #
+            roam_target = potential_roam_targets[0] #
+            path_to_roam = self.bfs_find_direct_movement_path(ai_current_tile, roam_target) #
+            if path_to_roam and len(path_to_roam) > 1: #
+                return "roam", roam_target, path_to_roam
+        return ("idle",)
+
+    def _plan_obstacle_bombing(self, wall_node, ai_current_tile):
+        """為道具炸牆的計畫：回傳 (放置點, 撤退點, 走到放置點的路徑)。"""
+        bomb_spot, retreat_spot = self._find_optimal_bombing_spot_for_obstacle(wall_node, ai_current_tile, self.min_retreat_options_for_obstacle_bombing) #
+        path_to_bomb_spot = None
+        if bomb_spot and retreat_spot:
+            path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, bomb_spot) #
+        return bomb_spot, retreat_spot, path_to_bomb_spot
+
+    def _plan_cqc_bomb(self, ai_current_tile):
+        """近戰放炸彈的計畫：回傳 (是否放炸彈, 撤退點)；機率沒過時不做撤退搜尋。"""
+        if self.rng.random() < (self.cqc_bomb_chance * (0.5 + self.aggression_level)): #
+            can_bomb, retreat_spot = self.can_place_bomb_and_retreat(ai_current_tile) #
+            return True, retreat_spot
+        return False, None
+
     def _find_trapping_bomb_spot(self, ai_current_tile, player_tile, is_chaining=False): #
         ai_log(f"    TRAP SEARCH (Chain:{is_chaining}): AI at {ai_current_tile}, Player at {player_tile}") #
         candidate_plans = [] 
@@ -517,6 +562,7 @@ class ItemFocusedAIController(AIControllerBase):
     def _find_best_item_on_ground(self, ai_current_tile): #
         if not self.game.items_group: return None #
         best_item_found = None; highest_priority_value = float('inf'); shortest_path_len_to_item = float('inf') #
+        flow_field = self.get_flow_field(ai_current_tile) # 一次 BFS，之後每個道具只是 O(1) 的距離查詢
         for item_sprite in self.game.items_group: #
             if not item_sprite.alive(): continue #
             priority = self.item_type_priority.get(item_sprite.type, 99) #
@@ -524,9 +570,8 @@ class ItemFocusedAIController(AIControllerBase):
             dist_to_item_manhattan = abs(ai_current_tile[0] - item_coords[0]) + abs(ai_current_tile[1] - item_coords[1]) #
             if priority < highest_priority_value or (priority == highest_priority_value and dist_to_item_manhattan < shortest_path_len_to_item) : #
                 if dist_to_item_manhattan < shortest_path_len_to_item + 5 : #
-                    temp_path_bfs = self.bfs_find_direct_movement_path(ai_current_tile, item_coords, max_depth=15) #
-                    if temp_path_bfs and len(temp_path_bfs)>1: #
-                        current_path_len = len(temp_path_bfs) -1 #
+                    current_path_len = flow_field.distance_to(item_coords) #
+                    if 0 < current_path_len <= 15: #
                         if priority < highest_priority_value or (priority == highest_priority_value and current_path_len < shortest_path_len_to_item): #
                             highest_priority_value = priority; shortest_path_len_to_item = current_path_len #
                             best_item_found = {'item': item_sprite, 'coords': item_coords, 'dist_bfs': current_path_len} #
@@ -537,6 +582,7 @@ class ItemFocusedAIController(AIControllerBase):
 
     def _find_best_wall_to_bomb_for_items(self, ai_current_tile, exclude_wall_node=None): #
         potential_walls = []; tile_height = self.map_manager.tile_height; tile_width = self.map_manager.tile_width #
+        flow_field = self.get_flow_field(ai_current_tile) #
         for r in range(tile_height): #
             for c in range(tile_width): #
                 node = self._get_node_at_coords(c, r) #
@@ -549,7 +595,7 @@ class ItemFocusedAIController(AIControllerBase):
                     bomb_spot_x, bomb_spot_y = node.x + dx_wall_offset, node.y + dy_wall_offset #
                     bomb_spot_node_check = self._get_node_at_coords(bomb_spot_x, bomb_spot_y) #
                     if bomb_spot_node_check and bomb_spot_node_check.is_empty_for_direct_movement(): #
-                        if self.bfs_find_direct_movement_path(ai_current_tile, (bomb_spot_x, bomb_spot_y), max_depth=7): #
+                        if flow_field.distance_to((bomb_spot_x, bomb_spot_y)) <= 7: #
                             can_reach_bomb_spot = True; break #
                 if can_reach_bomb_spot: potential_walls.append({'node': node, 'dist': dist_to_wall, 'score': -dist_to_wall }) #
         if not potential_walls: return None #
@@ -565,7 +611,7 @@ class ItemFocusedAIController(AIControllerBase):
             if not (bomb_spot_node and bomb_spot_node.is_empty_for_direct_movement()): continue #
             path_to_bomb_spot = self.bfs_find_direct_movement_path(ai_current_tile, bomb_spot_coords, max_depth=7) #
             if not path_to_bomb_spot : continue #
-            retreat_spots = self.find_safe_tiles_nearby_for_retreat(bomb_spot_coords, bomb_spot_coords, self.ai_player.bomb_range, self.retreat_search_depth, min_retreat_options) #
+            retreat_spots = self.find_safe_tiles_nearby_for_retreat(bomb_spot_coords, bomb_spot_coords, self.ai_player.bomb_range, self.retreat_search_depth, min_retreat_options, max_results=1) #
             if retreat_spots: #
                 best_retreat_spot = retreat_spots[0] #
                 if self.bfs_find_direct_movement_path(bomb_spot_coords, best_retreat_spot, self.retreat_search_depth): #
@@ -575,26 +621,20 @@ class ItemFocusedAIController(AIControllerBase):
         return candidate_placements[0]['bomb_spot'], candidate_placements[0]['retreat_spot'] #
 
     def _find_safe_roaming_spots(self, ai_current_tile, count=1, depth=3, exclude_target=None): #
-        q = deque([(ai_current_tile, 0)]); visited = {ai_current_tile}; potential_spots = [] #
-        while q and len(potential_spots) < count * 10: #
-            (curr_x, curr_y), d = q.popleft() #
-            if d > 0 and d <= depth: #
-                if (curr_x, curr_y) == exclude_target: continue #
-                if not self.is_tile_dangerous(curr_x, curr_y, future_seconds=self.evasion_urgency_seconds * 0.3): #
-                    openness = self._get_tile_openness(curr_x, curr_y, radius=1) #
-                    if openness >= 1 and (curr_x, curr_y) != ai_current_tile: potential_spots.append(((curr_x, curr_y), openness)) #
-            if d < depth: #
-                shuffled_directions = list(DIRECTIONS.values()); random.shuffle(shuffled_directions) #
-                for dx, dy in shuffled_directions: #
-                    next_x, next_y = curr_x + dx, curr_y + dy; next_coords = (next_x, next_y) #
-                    if next_coords not in visited: #
-                        node = self._get_node_at_coords(next_x, next_y) #
-                        if node and node.is_empty_for_direct_movement() and not self.is_tile_dangerous(next_x, next_y, future_seconds=0.05): #
-                            visited.add(next_coords); q.append((next_coords, d + 1)) #
+        map_data = self.map_manager.map_data
+        # exclude_target 不列入候選也不從它往外展開
+        is_passable = lambda x, y: map_data[y][x] == '.' and (x, y) != exclude_target and not self.is_tile_dangerous(x, y, future_seconds=0.05) #
+        field = FlowField(ai_current_tile, self.map_manager.tile_width, self.map_manager.tile_height)
+        potential_spots = [] #
+        for (curr_x, curr_y), d in iter_breadth_first(field, is_passable, max_depth=depth, rng=self.rng): # 共用的 BFS 核心，不複製路徑
+            if len(potential_spots) >= count * 10: break #
+            if d == 0: continue #
+            if not self.is_tile_dangerous(curr_x, curr_y, future_seconds=self.evasion_urgency_seconds * 0.3): #
+                openness = self._get_tile_openness(curr_x, curr_y, radius=1) #
+                if openness >= 1: potential_spots.append(((curr_x, curr_y), openness)) #
         if not potential_spots: return [] #
         potential_spots.sort(key=lambda s: s[1], reverse=True) #
-        final_choices = [spot[0] for spot in potential_spots if spot[0] != ai_current_tile] #
-        return final_choices[:count] #
+        return [spot[0] for spot in potential_spots[:count]] #
 
     def _get_safe_area_size(self, start_tile, blocked_tiles): #
         q = deque([start_tile]); visited = {start_tile}; count = 0 #
@@ -607,16 +647,7 @@ class ItemFocusedAIController(AIControllerBase):
         return count #
 
     def _get_hypothetical_blast_tiles(self, bomb_coords, bomb_range): #
-        blast_tiles = {bomb_coords} #
-        for dx, dy in DIRECTIONS.values(): #
-            for i in range(1, bomb_range + 1): #
-                nx, ny = bomb_coords[0] + dx * i, bomb_coords[1] + dy * i #
-                if not (0 <= nx < self.map_manager.tile_width and 0 <= ny < self.map_manager.tile_height): break #
-                if self.map_manager.is_solid_wall_at(nx, ny): break #
-                blast_tiles.add((nx, ny)) #
-                node = self._get_node_at_coords(nx, ny) #
-                if node and node.is_destructible_box(): break #
-        return blast_tiles #
+        return self._get_blast_footprint(bomb_coords[0], bomb_coords[1], bomb_range) # 依地圖版本快取的 frozenset
         
     def _get_adjacent_empty_tiles(self, tile): #
         x, y = tile; empty_tiles = [] #
@@ -0,0 +1,323 @@
+# oop-2025-proj-pycade/core/ai_mcts.py
+
+import math
+import random
+import time
+import settings
+from .ai_controller_base import AIControllerBase, ai_log
+from .game_clock import get_ticks
+from .simulation import Simulation, ACTION_BOMB, ACTION_WAIT, MOVE_ACTIONS
+from .blast_footprint import compute_blast_tiles
+
+AI_INDEX = 1 # Simulation.from_game 中 AI 的索引 (玩家 1 為 0)
+OPPONENT_INDEX = 0
+
+
+class MCTSNode:
+    """開環 (open-loop) 搜尋樹的節點：以 AI 的行動序列為鍵，狀態每次迭代從根快照重新模擬。"""
+    __slots__ = ('action', 'parent', 'children', 'untried_actions', 'visits', 'value_sum')
+
+    def __init__(self, action=None, parent=None):
+        self.action = action
+        self.parent = parent
+        self.children = {}
+        self.untried_actions = None # 第一次拜訪時依當下的模擬狀態決定
+        self.visits = 0
+        self.value_sum = 0.0
+
+    def mean_value(self):
+        return self.value_sum / self.visits if self.visits else 0.0
+
+
+class MCTSAIController(AIControllerBase):
+    """
+    以蒙地卡羅樹搜尋決策的 AI：在 core.simulation 的前向模型上，以 AI_MOVE_DELAY 為一步做 rollout，
+    選出拜訪次數最多的行動 (移動一格、放炸彈或等待)。
+    - 每次決策有時間預算 (AI_MCTS_TIME_BUDGET_MS)；固定步長模式改用固定迭代數，保持可重現。
+    - 走到預期的格子時沿用上一次搜尋樹中對應的子樹。
+    - 置換表 (transposition table) 記錄已評估過的狀態，同一狀態經由不同順序到達時不再重新 rollout。
+    - 搜尋只讀取 Simulation 快照，所以在背景執行緒進行 (AI_ASYNC_PLANNING)；棋盤改變後才送達的計畫會被丟棄。
+    緊急閃避仍由 AIControllerBase 的 EVADING_DANGER 同步處理。
+    """
+    def __init__(self, ai_player_sprite, game_instance):
+        self.time_budget_ms = getattr(settings, "AI_MCTS_TIME_BUDGET_MS", 8)
+        self.fixed_iterations = getattr(settings, "AI_MCTS_ITERATIONS", 16)
+        self.rollout_depth = getattr(settings, "AI_MCTS_ROLLOUT_DEPTH", 18)
+        self.exploration = getattr(settings, "AI_MCTS_EXPLORATION", 1.2)
+        self.transposition_min_visits = getattr(settings, "AI_MCTS_TRANSPOSITION_MIN_VISITS", 2)
+        self.transposition_table_size = getattr(settings, "AI_MCTS_TRANSPOSITION_TABLE_SIZE", 20000)
+        self.root = None
+        self.expected_tile = None
+        self.transpositions = {} # 狀態鍵 -> [評估次數, 評估值總和]；搜尋期間交給 MCTSSearch，結束時換回
+        self.last_search_iterations = 0
+        self.last_search_ms = 0.0
+        super().__init__(ai_player_sprite, game_instance)
+        self.plan_max_age_ms = getattr(settings, "AI_ASYNC_PLAN_MAX_AGE_MS", 400)
+
+        ai_log("MCTSAIController initialized.")
+        self.default_planning_state_on_stuck = "PLANNING_MCTS"
+        self.default_state_after_evasion = "PLANNING_MCTS"
+        self.change_state("PLANNING_MCTS")
+
+    def reset_state(self):
+        super().reset_state()
+        self.root = None
+        self.expected_tile = None
+        self.transpositions = {}
+        self.change_state("PLANNING_MCTS")
+
+    @property
+    def step_seconds(self):
+        """前向模型中一步的長度：一個決策間隔。"""
+        return max(self.ai_decision_interval, 1) / 1000
+
+    # --- 狀態處理 ---
+
+    def handle_planning_mcts_state(self, ai_current_tile):
+        if self.ai_player.action_timer > 0 or self.current_movement_sub_path:
+            return # 上一個行動還在執行
+        if not self.uses_async_planning:
+            action = self.search(Simulation.from_game(self.game), ai_current_tile)
+            ai_log(f"MCTS: {self.last_search_iterations} iterations in {self.last_search_ms:.1f} ms -> {action}")
+            self._apply_action(action, ai_current_tile)
+            return
+
+        # 背景規劃：先取回已完成的計畫 (過期的由 AsyncPlanner 丟棄)，再為目前的棋盤提交新的搜尋
+        now = get_ticks(self.game)
+        stamp = self._get_plan_stamp(ai_current_tile)
+        # 超過一個決策週期還沒完成就等它做完 (與 run_planning_search 相同)，主迴圈不休息時計畫才不會全部過期
+        result = self.async_planner.poll(stamp, now, self.plan_max_age_ms, wait_after=self.ai_decision_interval)
+        if result is not None:
+            action = self._commit_search_result(result, ai_current_tile)
+            ai_log(f"MCTS (async): {self.last_search_iterations} iterations in {self.last_search_ms:.1f} ms -> {action}")
+            self._apply_action(action, ai_current_tile)
+            return
+        if not self.async_planner.busy:
+            # 子樹、置換表與亂數都交給這個工作獨占；計畫被丟棄 (或工作被取消後仍在執行) 時不會寫到主執行緒的狀態
+            job = self._new_search_job(ai_current_tile)
+            self.async_planner.submit(stamp, now, job.run, Simulation.from_game(self.game))
+
+    def _apply_action(self, action, ai_current_tile):
+        if action == ACTION_BOMB:
+            self.ai_player.place_bomb()
+        elif action not in (None, ACTION_WAIT):
+            target = (ai_current_tile[0] + action[0], ai_current_tile[1] + action[1])
+            self.set_current_movement_sub_path([ai_current_tile, target])
+
+    # --- 搜尋 ---
+
+    def search(self, sim, ai_current_tile=None):
+        """在 sim 的目前狀態上搜尋，回傳 AI 的行動；sim 會被拿來模擬，結束時內容不保證不變。"""
+        job = self._new_search_job(ai_current_tile)
+        return self._commit_search_result(job.run(sim), ai_current_tile)
+
+    def _new_search_job(self, ai_current_tile):
+        """
+        建立一次搜尋：可沿用的子樹與置換表從控制器移交給工作，亂數是從 AI 亂數串流衍生的獨立 Random。
+        在主執行緒呼叫，所以固定步長模式下對 ai_rng 的消耗仍然可以重現。
+        """
+        root = self._take_reusable_root(ai_current_tile)
+        transpositions = self.transpositions
+        self.root, self.transpositions = None, {}
+        time_budget_ms = None if getattr(self.game, 'deterministic', False) is True else self.time_budget_ms
+        return MCTSSearch(root, transpositions, random.Random(self.rng.getrandbits(64)), self.step_seconds,
+                          rollout_depth=self.rollout_depth, exploration=self.exploration,
+                          iterations=self.fixed_iterations, time_budget_ms=time_budget_ms,
+                          transposition_min_visits=self.transposition_min_visits)
+
+    def _commit_search_result(self, result, ai_current_tile):
+        """在主執行緒採用搜尋結果：換回置換表、選出拜訪最多的行動，並保留對應的子樹供下次沿用。"""
+        root, transpositions, self.last_search_iterations, self.last_search_ms = result
+        self.transpositions = transpositions if len(transpositions) <= self.transposition_table_size else {}
+        if not root.children:
+            self.root = None
+            return ACTION_WAIT
+        action, child = max(root.children.items(), key=lambda item: (item[1].visits, item[1].mean_value()))
+        self.root = child
+        self.expected_tile = ai_current_tile if action in (ACTION_BOMB, ACTION_WAIT) or ai_current_tile is None else \
+            (ai_current_tile[0] + action[0], ai_current_tile[1] + action[1])
+        return action
+
+    def _take_reusable_root(self, ai_current_tile):
+        root = self.root
+        if root is not None and ai_current_tile is not None and ai_current_tile == self.expected_tile:
+            root.parent = None
+            root.action = None
+            return root
+        return MCTSNode()
+
+
+class MCTSSearch:
+    """
+    一次 MCTS 搜尋的工作：樹、置換表、亂數與炸彈範圍快取都屬於這個物件，
+    只讀寫傳入的 Simulation，所以可以整個交給背景執行緒。
+    """
+    def __init__(self, root, transpositions, rng, step_seconds, rollout_depth=18, exploration=1.2,
+                 iterations=16, time_budget_ms=None, transposition_min_visits=2):
+        self.root = root
+        self.transpositions = transpositions
+        self.rng = rng
+        self.step_seconds = step_seconds
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.iterations = iterations
+        self.time_budget_ms = time_budget_ms # None 表示固定迭代數 (固定步長模式)
+        self.transposition_min_visits = transposition_min_visits
+        self._danger_cache_key, self._danger_cache = None, set()
+
+    def run(self, sim):
+        """執行搜尋迭代並回傳 (root, 置換表, 迭代數, 毫秒)；sim 結束時內容不保證不變。"""
+        root = self.root
+        root_snapshot = sim.snapshot()
+        start = time.perf_counter()
+        deadline = None if self.time_budget_ms is None else start + self.time_budget_ms / 1000
+        iterations = 0
+        while True:
+            if deadline is None:
+                if iterations >= self.iterations:
+                    break
+            elif iterations > 0 and time.perf_counter() >= deadline:
+                break
+            sim.restore(root_snapshot)
+            self._run_iteration(root, sim)
+            iterations += 1
+        return root, self.transpositions, iterations, (time.perf_counter() - start) * 1000
+
+    def _run_iteration(self, root, sim):
+        node = root
+        path = [root]
+        # 選擇：沿著已完全展開的節點以 UCT 往下走
+        while not sim.game_over and node.untried_actions is not None and not node.untried_actions and node.children:
+            node = self._select_child(node)
+            self._advance(sim, node.action)
+            path.append(node)
+
+        value = None
+        if not sim.game_over:
+            if node.untried_actions is None:
+                node.untried_actions = self._legal_actions(sim, AI_INDEX)
+                self.rng.shuffle(node.untried_actions)
+            if node.untried_actions:
+                action = node.untried_actions.pop()
+                child = MCTSNode(action, node)
+                node.children[action] = child
+                self._advance(sim, action)
+                node = child
+                path.append(child)
+                value = self._evaluate_with_transpositions(sim)
+        if value is None:
+            value = self._rollout(sim)
+
+        for visited in path:
+            visited.visits += 1
+            visited.value_sum += value
+
+    def _select_child(self, node):
+        log_visits = math.log(node.visits + 1)
+        best_child, best_score = None, -math.inf
+        for child in node.children.values():
+            if child.visits == 0:
+                return child
+            score = child.mean_value() + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_child, best_score = child, score
+        return best_child
+
+    def _evaluate_with_transpositions(self, sim):
+        key = self._state_key(sim)
+        entry = self.transpositions.get(key)
+        if entry is not None and entry[0] >= self.transposition_min_visits:
+            return entry[1] / entry[0]
+        value = self._rollout(sim)
+        if entry is None:
+            self.transpositions[key] = [1, value]
+        else:
+            entry[0] += 1
+            entry[1] += value
+        return value
+
+    def _state_key(self, sim):
+        ai, opponent = sim.players[AI_INDEX], sim.players[OPPONENT_INDEX]
+        return (sim.tick_count, ai.tile_x, ai.tile_y, ai.lives, ai.bombs_placed_count,
+                opponent.tile_x, opponent.tile_y, opponent.lives,
+                tuple(sorted((bomb.tile_x, bomb.tile_y, int(bomb.time_left)) for bomb in sim.bombs)),
+                hash(tuple(sim.map_data)), len(sim.items))
+
+    def _advance(self, sim, ai_action):
+        actions = [None, None]
+        actions[AI_INDEX] = ai_action
+        actions[OPPONENT_INDEX] = self._rollout_action(sim, OPPONENT_INDEX)
+        sim.step(actions, self.step_seconds)
+
+    def _rollout(self, sim):
+        for _ in range(self.rollout_depth):
+            if sim.game_over:
+                break
+            self._advance(sim, self._rollout_action(sim, AI_INDEX))
+        return self._evaluate(sim)
+
+    def _rollout_action(self, sim, index):
+        """
+        rollout 策略：在合法行動中隨機選擇，但會避開炸彈範圍 (站在範圍內時偏好離開)，
+        對手在附近時較常放炸彈。比均勻亂走更接近實際玩家，評估值也比較不會過度悲觀。
+        """
+        actions = self._legal_actions(sim, index)
+        if len(actions) == 1:
+            return actions[0]
+        danger = self._bomb_danger_tiles(sim)
+        player = sim.players[index]
+        opponent = sim.players[1 - index]
+        in_danger = (player.tile_x, player.tile_y) in danger or (player.tile_x, player.tile_y) in sim.explosions
+        near_opponent = abs(player.tile_x - opponent.tile_x) + abs(player.tile_y - opponent.tile_y) <= 3
+        weights = []
+        for action in actions:
+            if action == ACTION_WAIT:
+                weights.append(0.1 if in_danger else 1.0)
+            elif action == ACTION_BOMB:
+                weights.append(0.05 if in_danger else 1.5 if near_opponent else 0.2)
+            else:
+                target_safe = (player.tile_x + action[0], player.tile_y + action[1]) not in danger
+                weights.append(4.0 if target_safe else 0.3)
+        return self.rng.choices(actions, weights=weights, k=1)[0]
+
+    def _bomb_danger_tiles(self, sim):
+        """目前所有炸彈的爆炸範圍；以 (炸彈, 地圖) 為鍵快取，同一步的兩位玩家共用。"""
+        bombs = tuple((bomb.tile_x, bomb.tile_y, sim.players[bomb.owner].bomb_range if 0 <= bomb.owner < len(sim.players)
+                       else bomb.bomb_range) for bomb in sim.bombs)
+        if not bombs:
+            return ()
+        key = (bombs, tuple(sim.map_data))
+        if self._danger_cache_key == key:
+            return self._danger_cache
+        danger = set()
+        for x, y, bomb_range in bombs:
+            danger.update(compute_blast_tiles(sim.map_data, sim.width, sim.height, x, y, bomb_range))
+        self._danger_cache_key, self._danger_cache = key, danger
+        return danger
+
+    @staticmethod
+    def _legal_actions(sim, index):
+        player = sim.players[index]
+        actions = [ACTION_WAIT]
+        if not player.is_alive:
+            return actions
+        x, y = player.tile_x, player.tile_y
+        for dx, dy in MOVE_ACTIONS:
+            tx, ty = x + dx, y + dy
+            if 0 <= tx < sim.width and 0 <= ty < sim.height and sim.map_data[ty][tx] == '.' \
+                    and (tx, ty) not in sim.explosions and sim.bomb_at(tx, ty) is None:
+                actions.append((dx, dy))
+        if player.bombs_placed_count < player.max_bombs and sim.bomb_at(x, y) is None:
+            actions.append(ACTION_BOMB)
+        return actions
+
+    def _evaluate(self, sim):
+        """AI 觀點的評估值，介於 -1 與 1：勝負為 ±1，否則比較生命、火力與分數，並鼓勵接近對手。"""
+        if sim.game_over:
+            return 1.0 if sim.winner == "AI" else -1.0 if sim.winner == "P1" else 0.0
+        ai, opponent = sim.players[AI_INDEX], sim.players[OPPONENT_INDEX]
+        value = 0.35 * (ai.lives - opponent.lives)
+        value += 0.05 * ((ai.bomb_range + ai.max_bombs) - (opponent.bomb_range + opponent.max_bombs))
+        value += 0.001 * (ai.score - opponent.score)
+        value -= 0.01 * (abs(ai.tile_x - opponent.tile_x) + abs(ai.tile_y - opponent.tile_y))
+        return max(-1.0, min(1.0, value))
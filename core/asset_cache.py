@@ -0,0 +1,50 @@
+# oop-2025-proj-pycade/core/asset_cache.py
+
+import pygame
+
+# 整個程式共用的圖片快取：鍵為 (路徑, 目標尺寸, 旗標)，值為已 convert 的 Surface。
+# 回傳的 Surface 會被多個精靈共用，呼叫端不可就地修改 (fill、blit 到它上面等)，需要修改時請先 copy()。
+_surface_cache = {}
+
+
+def _normalize_size(size):
+    if size is None:
+        return None
+    return int(size[0]), int(size[1])
+
+
+def load_image(path, size=None, alpha=True):
+    """
+    載入 (並可選擇縮放) 圖片，同樣的 (path, size, alpha) 只會從硬碟讀取與縮放一次。
+    size 為 None 時回傳原始尺寸；alpha 為 True 時使用 convert_alpha()，否則使用 convert()。
+    載入失敗時照常拋出 pygame.error，失敗結果不會被快取。
+    """
+    size = _normalize_size(size)
+    key = (path, size, alpha)
+    surface = _surface_cache.get(key)
+    if surface is not None:
+        return surface
+
+    if size is None:
+        raw_image = pygame.image.load(path)
+        surface = raw_image.convert_alpha() if alpha else raw_image.convert()
+    else:
+        surface = pygame.transform.smoothscale(load_image(path, None, alpha), size)
+    _surface_cache[key] = surface
+    return surface
+
+
+def load_image_scaled_to_height(path, height, alpha=True):
+    """依高度等比例縮放 (寬度取整數)，用於炸彈等只指定高度的圖片。"""
+    original = load_image(path, None, alpha)
+    width = int(original.get_width() * (height / original.get_height()))
+    return load_image(path, (width, height), alpha)
+
+
+def clear_asset_cache():
+    """清空快取 (例如重新建立顯示模式之後)。"""
+    _surface_cache.clear()
+
+
+def asset_cache_size():
+    return len(_surface_cache)
@@ -0,0 +1,142 @@
+# oop-2025-proj-pycade/core/astar_engine.py
+
+import heapq
+
+# 與 TileNode.get_astar_move_cost_to_here 相同的成本表；不在表中的字元視為不可通行
+DEFAULT_ASTAR_TILE_COSTS = {'.': 1, 'D': 3}
+
+_NEIGHBOR_OFFSETS = ((0, -1), (0, 1), (-1, 0), (1, 0)) # 與 DIRECTIONS 的 UP, DOWN, LEFT, RIGHT 順序一致
+
+
+class GridAStar:
+    """
+    以扁平整數索引陣列實作的 A* 引擎。
+    g-cost、parent 與 closed 狀態都存在大小為 tile_width * tile_height 的 list 中，
+    並透過 generation 計數器在多次呼叫之間重複使用，不必每次清空或重新配置。
+    """
+
+    def __init__(self, tile_costs=None):
+        self.tile_costs = dict(tile_costs) if tile_costs else dict(DEFAULT_ASTAR_TILE_COSTS)
+        self.width = 0
+        self.height = 0
+        self._g_cost = []
+        self._parent = []
+        self._seen_generation = []   # 該格的 g_cost / parent 是否屬於本次搜尋
+        self._closed_generation = [] # 該格是否已在本次搜尋中被展開
+        self._generation = 0
+        self.last_expansions = 0
+        self.total_expansions = 0
+
+    def _ensure_capacity(self, width, height):
+        if width == self.width and height == self.height:
+            return
+        size = width * height
+        self.width, self.height = width, height
+        self._g_cost = [0] * size
+        self._parent = [-1] * size
+        self._seen_generation = [0] * size
+        self._closed_generation = [0] * size
+        self._generation = 0
+
+    def find_path_coords(self, map_data, width, height, start_coords, target_coords, blocked_tiles=None):
+        """
+        回傳從 start_coords 到 target_coords 的座標列表 (包含兩端)，找不到時回傳 []。
+        blocked_tiles 為額外視為不可通行的格子集合 (例如對手的炸彈)。
+        """
+        self.last_expansions = 0
+        sx, sy = start_coords
+        tx, ty = target_coords
+        if not (0 <= sx < width and 0 <= sy < height and 0 <= tx < width and 0 <= ty < height):
+            return []
+
+        self._ensure_capacity(width, height)
+        self._generation += 1
+        generation = self._generation
+        g_cost = self._g_cost
+        parent = self._parent
+        seen = self._seen_generation
+        closed = self._closed_generation
+        tile_costs = self.tile_costs
+
+        start_index = sy * width + sx
+        target_index = ty * width + tx
+        g_cost[start_index] = 0
+        parent[start_index] = -1
+        seen[start_index] = generation
+
+        start_h = abs(sx - tx) + abs(sy - ty)
+        open_heap = [(start_h, start_h, start_index)]
+        expansions = 0
+        found = False
+
+        while open_heap:
+            f_cost, h_cost, index = heapq.heappop(open_heap)
+            if closed[index] == generation:
+                continue
+            current_g = g_cost[index]
+            if f_cost - h_cost > current_g:
+                continue # 過期的 heap 項目
+            closed[index] = generation
+            expansions += 1
+            if index == target_index:
+                found = True
+                break
+
+            cx, cy = index % width, index // width
+            for dx, dy in _NEIGHBOR_OFFSETS:
+                nx, ny = cx + dx, cy + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                n_index = ny * width + nx
+                if closed[n_index] == generation:
+                    continue
+                move_cost = tile_costs.get(map_data[ny][nx])
+                if move_cost is None:
+                    continue
+                if blocked_tiles and (nx, ny) in blocked_tiles:
+                    continue
+                tentative_g = current_g + move_cost
+                if seen[n_index] != generation or tentative_g < g_cost[n_index]:
+                    seen[n_index] = generation
+                    g_cost[n_index] = tentative_g
+                    parent[n_index] = index
+                    n_h = abs(nx - tx) + abs(ny - ty)
+                    heapq.heappush(open_heap, (tentative_g + n_h, n_h, n_index))
+
+        self.last_expansions = expansions
+        self.total_expansions += expansions
+        if not found:
+            return []
+
+        path = []
+        index = target_index
+        while index != -1:
+            path.append((index % width, index // width))
+            index = parent[index]
+        path.reverse()
+        return path
+
+    def g_cost_at(self, x, y):
+        """回傳最近一次搜尋中 (x, y) 的 g-cost；未被觸及時回傳 inf。"""
+        index = y * self.width + x
+        if self._seen_generation[index] != self._generation:
+            return float('inf')
+        return self._g_cost[index]
+
+    def find_path_nodes(self, map_data, width, height, start_coords, target_coords, node_factory, blocked_tiles=None):
+        """
+        與 find_path_coords 相同，但回傳以 node_factory(x, y, tile_char) 建立的節點列表，
+        並填好 parent / g_cost / h_cost，維持狀態處理器原本預期的路徑格式。
+        """
+        coords_path = self.find_path_coords(map_data, width, height, start_coords, target_coords, blocked_tiles)
+        tx, ty = target_coords
+        nodes = []
+        previous = None
+        for x, y in coords_path:
+            node = node_factory(x, y, map_data[y][x])
+            node.parent = previous
+            node.g_cost = self.g_cost_at(x, y)
+            node.h_cost = abs(x - tx) + abs(y - ty)
+            nodes.append(node)
+            previous = node
+        return nodes
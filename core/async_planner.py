@@ -0,0 +1,67 @@
+# oop-2025-proj-pycade/core/async_planner.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncPlanner:
+    """
+    在背景執行緒中執行 AI 規劃的小工具：一次最多一個工作。
+    每個工作附帶提交時的戳記 (stamp) 與時間；主迴圈以 poll() 取回結果時，
+    戳記不同 (棋盤已經改變) 或結果太舊的計畫會被丟棄，不會被執行。
+    規劃函式只應該讀取提交時傳入的快照，不能碰 Game 的精靈群組。
+    """
+    def __init__(self, name="ai-planner"):
+        self.name = name
+        self._executor = None # 第一次 submit 時才建立執行緒
+        self._pending = None # (stamp, submitted_at, future)
+        self.delivered_plans = 0
+        self.discarded_plans = 0
+
+    def __deepcopy__(self, memo):
+        """拷貝 Game (例如重播的關鍵影格) 時不拷貝執行緒與進行中的工作，只建立新的空規劃器。"""
+        return AsyncPlanner(self.name)
+
+    @property
+    def busy(self):
+        return self._pending is not None
+
+    def submit(self, stamp, submitted_at, plan_function, *args):
+        """提交一個規劃工作；已有工作在進行時回傳 False。"""
+        if self._pending is not None:
+            return False
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self._pending = (stamp, submitted_at, self._executor.submit(plan_function, *args))
+        return True
+
+    def poll(self, current_stamp, now, max_age=None, wait_after=None):
+        """
+        工作完成且仍然有效時回傳結果，否則回傳 None (尚未完成或已丟棄)。規劃中的例外會在這裡拋出。
+        工作提交超過 wait_after 毫秒仍未完成時直接等它做完：主迴圈不休息 (例如無畫面的訓練) 時背景執行緒搶不到 GIL，不等就永遠拿不到結果。
+        """
+        if self._pending is None:
+            return None
+        stamp, submitted_at, future = self._pending
+        if not future.done() and (wait_after is None or now - submitted_at < wait_after):
+            return None
+        self._pending = None
+        result = future.result()
+        if stamp != current_stamp or (max_age is not None and now - submitted_at > max_age):
+            self.discarded_plans += 1
+            return None
+        self.delivered_plans += 1
+        return result
+
+    def cancel(self):
+        """放棄目前的工作 (背景執行緒仍會跑完，但結果不會被採用)。"""
+        if self._pending is not None:
+            self._pending[2].cancel()
+            self._pending = None
+            self.discarded_plans += 1
+
+    def shutdown(self):
+        """放棄目前的工作並結束執行緒 (正在執行的工作跑完後執行緒就會退出)；之後再 submit 會建立新的執行緒。"""
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
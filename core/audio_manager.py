@@ -2,6 +2,7 @@
 
 import pygame
 import settings
+from collections import OrderedDict
 
 class AudioManager:
     def __init__(self):
@@ -20,8 +21,16 @@ class AudioManager:
             'hurt': settings.HURT_PATH,
             'place_bomb': settings.PLACE_BOMB_SOUND_PATH,
         }
-        # Sounds are now loaded on demand, so we store running sounds to manage them.
+        # Looping sounds are tracked by name (value is the Channel they play on) so they can be stopped.
         self.playing_sounds = {}
+        # Decoded sounds are cached (LRU, bounded by AUDIO_SOUND_CACHE_MAX_BYTES) instead of decoding on every play.
+        self.sound_cache = OrderedDict()
+        self.sound_cache_bytes = 0
+        self.sound_cache_max_bytes = getattr(settings, "AUDIO_SOUND_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+        # Channel pool: overlapping effects reuse a fixed set of channels.
+        self.num_sfx_channels = getattr(settings, "AUDIO_SFX_CHANNELS", 8)
+        self.channel_pool = None
+        self._next_channel_index = 0
         self.music_volume = settings.MENU_MUSIC_VOLUME
         self.sfx_volume = 0.5
         self.paused_sfx = {} # For web browser compatibility
@@ -42,9 +51,78 @@ class AudioManager:
         pygame.mixer.stop() # More direct way to stop all sounds
         self.playing_sounds.clear()
 
+    def _estimate_sound_bytes(self, sound):
+        """Approximate decoded size of a Sound from its length and the mixer format."""
+        frequency, sample_format, channels = pygame.mixer.get_init() or (44100, -16, 2)
+        try:
+            return int(float(sound.get_length()) * frequency * channels * (abs(sample_format) // 8))
+        except (TypeError, ValueError, pygame.error):
+            return 0
+
+    def get_sound(self, name):
+        """
+        Returns the decoded Sound for a name, loading it on first use.
+        The least recently used sounds are evicted when the cache exceeds its memory budget
+        (sounds that are currently looping are kept).
+        """
+        sound = self.sound_cache.get(name)
+        if sound is not None:
+            self.sound_cache.move_to_end(name)
+            return sound
+
+        sound = pygame.mixer.Sound(self.sound_paths[name])
+        self.sound_cache[name] = sound
+        self.sound_cache_bytes += self._estimate_sound_bytes(sound)
+        for cached_name in list(self.sound_cache):
+            if self.sound_cache_bytes <= self.sound_cache_max_bytes:
+                break
+            if cached_name == name or cached_name in self.playing_sounds:
+                continue
+            evicted = self.sound_cache.pop(cached_name)
+            self.sound_cache_bytes -= self._estimate_sound_bytes(evicted)
+        return sound
+
+    def preload_sounds(self, names=None):
+        """Decodes the given sounds (default: all known sounds) ahead of time."""
+        for name in (names if names is not None else self.sound_paths):
+            try:
+                self.get_sound(name)
+            except pygame.error as e:
+                print(f"Error preloading sound '{name}': {e}")
+
+    def _get_channel_pool(self):
+        if self.channel_pool is None:
+            try:
+                if pygame.mixer.get_num_channels() < self.num_sfx_channels:
+                    pygame.mixer.set_num_channels(self.num_sfx_channels)
+                self.channel_pool = [pygame.mixer.Channel(i) for i in range(self.num_sfx_channels)]
+            except pygame.error:
+                self.channel_pool = []
+        return self.channel_pool
+
+    def _acquire_channel(self):
+        """
+        Returns an idle channel from the pool. When all are busy, the oldest one-shot channel
+        is reused (looping channels are never stolen). Returns None if there is no pool.
+        """
+        pool = self._get_channel_pool()
+        if not pool:
+            return None
+        looping_channels = set(self.playing_sounds.values())
+        for channel in pool:
+            if not channel.get_busy() and channel not in looping_channels:
+                return channel
+        for offset in range(len(pool)):
+            index = (self._next_channel_index + offset) % len(pool)
+            if pool[index] not in looping_channels:
+                self._next_channel_index = (index + 1) % len(pool)
+                pool[index].stop()
+                return pool[index]
+        return None
+
     def play_sound(self, name, loops=0, volume_multiplier=1.0):
         """
-        Loads and plays a sound effect on demand.
+        Plays a cached sound effect on a channel from the pool.
 
         Args:
             name (str): The key name of the sound to play.
@@ -56,14 +134,21 @@ class AudioManager:
             try:
                 # Stop the specific sound if it's looping, before playing a new one.
                 if name in self.playing_sounds:
-                    self.playing_sounds[name].stop()
-                    
-                sound = pygame.mixer.Sound(path)
-                sound.set_volume(self.sfx_volume * volume_multiplier)
-                sound.play(loops=loops)
+                    self.playing_sounds.pop(name).stop()
+
+                sound = self.get_sound(name)
+                volume = self.sfx_volume * volume_multiplier
+                channel = self._acquire_channel()
+                if channel is not None:
+                    # The Sound object is shared, so the volume is set on the channel instead.
+                    channel.play(sound, loops=loops)
+                    channel.set_volume(volume)
+                else:
+                    sound.set_volume(volume)
+                    channel = sound.play(loops=loops)
                 # If it's a looping sound, keep track of it
-                if loops == -1:
-                    self.playing_sounds[name] = sound
+                if loops == -1 and channel is not None:
+                    self.playing_sounds[name] = channel
             except pygame.error as e:
                 print(f"Error loading and playing sound '{name}' from '{path}': {e}")
         else:
@@ -155,8 +240,8 @@ class AudioManager:
         Instead, we record looping sounds and stop everything.
         """
         self.paused_sfx.clear()
-        for name, sound_obj in self.playing_sounds.items():
-            self.paused_sfx[name] = sound_obj # Store the sound object itself
+        for name, channel in self.playing_sounds.items():
+            self.paused_sfx[name] = channel # Only the names matter; they are replayed on unpause
         
         self.stop_all_sounds() # Stop all sounds
 
@@ -165,7 +250,7 @@ class AudioManager:
         'Resumes' SFX by re-playing the looping sounds that were active
         before the pause.
         """
-        for name, sound_obj in self.paused_sfx.items():
+        for name in self.paused_sfx:
             # play_sound handles re-adding to self.playing_sounds
             self.play_sound(name, loops=-1) 
         self.paused_sfx.clear()
@@ -0,0 +1,66 @@
+# oop-2025-proj-pycade/core/blast_footprint.py
+
+from collections import OrderedDict
+
+# 爆炸向四個方向延伸的順序，與 Bomb.explode 相同 (UP, DOWN, LEFT, RIGHT)
+BLAST_DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def compute_blast_tiles(map_data, width, height, origin_x, origin_y, bomb_range, cleared_tiles=None):
+    """
+    不建立任何精靈，直接由地圖字元計算一次爆炸會覆蓋的格子。
+    規則與 Bomb.explode 相同：'W' 或地圖外會擋住火焰；'D' 本身會被波及，但火焰不再往後延伸。
+    cleared_tiles 中的 'D' 視為已被炸毀 (例如連鎖爆炸中較早的爆炸)。
+    回傳的列表以炸彈所在格開頭，之後依 UP, DOWN, LEFT, RIGHT 的順序排列。
+    """
+    tiles = [(origin_x, origin_y)]
+    for dx, dy in BLAST_DIRECTIONS:
+        for i in range(1, bomb_range + 1):
+            nx, ny = origin_x + dx * i, origin_y + dy * i
+            if not (0 <= nx < width and 0 <= ny < height):
+                break
+            tile_char = map_data[ny][nx]
+            if tile_char == 'W':
+                break
+            tiles.append((nx, ny))
+            if tile_char == 'D' and not (cleared_tiles and (nx, ny) in cleared_tiles):
+                break
+    return tiles
+
+
+class BlastFootprintCache:
+    """
+    假設爆炸範圍的 LRU 快取，以 (炸彈格, 範圍) 為鍵，值為 frozenset。
+    結果只取決於地圖內容，所以 map_manager.map_version 改變時整批失效；
+    沒有整數 map_version 的 map_manager (例如測試用的 Mock) 不快取。
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.map_version = None
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, map_manager, origin_x, origin_y, bomb_range):
+        map_version = getattr(map_manager, 'map_version', None)
+        if not isinstance(map_version, int):
+            self.misses += 1
+            return frozenset(compute_blast_tiles(map_manager.map_data, map_manager.tile_width, map_manager.tile_height,
+                                                 origin_x, origin_y, bomb_range))
+        if map_version != self.map_version:
+            self.map_version = map_version
+            self._entries.clear()
+        key = (origin_x, origin_y, bomb_range)
+        footprint = self._entries.get(key)
+        if footprint is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return footprint
+        self.misses += 1
+        footprint = frozenset(compute_blast_tiles(map_manager.map_data, map_manager.tile_width, map_manager.tile_height,
+                                                  origin_x, origin_y, bomb_range))
+        self._entries[key] = footprint
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return footprint
@@ -0,0 +1,75 @@
+# oop-2025-proj-pycade/core/danger_field.py
+
+import settings
+from core.detonation_timeline import solve_detonation_timeline
+
+ACTIVE_EXPLOSION_MS = -1.0 # 正在燃燒的爆炸格：任何 future_seconds 都視為危險
+
+
+def explosion_tile(explosion):
+    """回傳爆炸精靈所在格；舊的 Explosion 物件沒有 tile_x/tile_y 時由 rect 推算。"""
+    if hasattr(explosion, 'tile_x'):
+        return explosion.tile_x, explosion.tile_y
+    return explosion.rect.x // settings.TILE_SIZE, explosion.rect.y // settings.TILE_SIZE
+
+
+class DangerField:
+    """
+    每個遊戲 tick 建立一次的危險地圖。
+    每格記錄「最早會被爆炸覆蓋的時間」(毫秒，相對於現在)，
+    讓 is_tile_dangerous(x, y, future_seconds) 變成一次陣列查詢。
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.earliest_blast_ms = [float('inf')] * (width * height)
+        self.timeline = None
+
+    def mark_tile(self, x, y, blast_time_ms):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = y * self.width + x
+            if blast_time_ms < self.earliest_blast_ms[index]:
+                self.earliest_blast_ms[index] = blast_time_ms
+
+    def earliest_blast_at(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.earliest_blast_ms[y * self.width + x]
+        return float('inf')
+
+    def is_dangerous(self, x, y, future_seconds):
+        return self.earliest_blast_at(x, y) < future_seconds * 1000
+
+    @classmethod
+    def from_game(cls, game, map_manager):
+        """依目前的 explosions_group 與 bombs_group (含連鎖引爆) 建立危險地圖。"""
+        width, height = map_manager.tile_width, map_manager.tile_height
+        field = cls(width, height)
+        for explosion in getattr(game, 'explosions_group', ()):
+            field.mark_tile(*explosion_tile(explosion), ACTIVE_EXPLOSION_MS)
+
+        # 炸彈部分交給連鎖時間軸：被波及的炸彈會以提前後的時間計入
+        field.timeline = solve_detonation_timeline(getattr(game, 'bombs_group', ()), map_manager.map_data, width, height)
+        for (tile_x, tile_y), blast_ms in field.timeline.blast_tiles.items():
+            field.mark_tile(tile_x, tile_y, blast_ms)
+        return field
+
+
+def get_danger_field(game, map_manager):
+    """
+    回傳本 tick 共用的 DangerField。
+    以 (game.tick_count, 炸彈數, 爆炸數) 作為快取鍵；沒有整數 tick_count 時 (例如測試用的假 Game) 每次都重建。
+    """
+    tick = getattr(game, 'tick_count', None)
+    bombs = getattr(game, 'bombs_group', ())
+    explosions = getattr(game, 'explosions_group', ())
+    if not isinstance(tick, int):
+        return DangerField.from_game(game, map_manager)
+
+    key = (tick, len(bombs), len(explosions))
+    cached = getattr(game, 'danger_field_cache', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    field = DangerField.from_game(game, map_manager)
+    game.danger_field_cache = (key, field)
+    return field
@@ -0,0 +1,72 @@
+# oop-2025-proj-pycade/core/detonation_timeline.py
+
+import heapq
+from core.blast_footprint import compute_blast_tiles
+
+
+class DetonationTimeline:
+    """
+    連鎖爆炸時間軸的計算結果。
+    detonation_ms: id(bomb) -> 實際引爆時間 (毫秒，相對於現在)，已考慮被其他炸彈提前引爆。
+    blast_tiles: (x, y) -> 該格最早被火焰覆蓋的時間。
+    """
+
+    def __init__(self):
+        self.detonation_ms = {}
+        self.blast_tiles = {}
+        self.chained_bomb_ids = set() # 被其他炸彈提前引爆的炸彈
+
+    def detonation_time(self, bomb):
+        return self.detonation_ms.get(id(bomb), float('inf'))
+
+    def is_chained(self, bomb):
+        return id(bomb) in self.chained_bomb_ids
+
+    def blast_time_at(self, x, y):
+        return self.blast_tiles.get((x, y), float('inf'))
+
+    def blast_tile_set(self):
+        return set(self.blast_tiles)
+
+
+def solve_detonation_timeline(bombs, map_data, width, height):
+    """
+    以優先佇列依時間順序模擬所有炸彈的引爆：
+    炸彈被火焰波及時，其引爆時間會被提前到該火焰的時間，並繼續向外連鎖。
+    較早引爆所炸毀的 'D' 不再阻擋之後的爆炸 (同一時間的爆炸仍看到原本的 'D')。
+    每顆炸彈只會被展開一次，整體成本為 O(B log B + B * range)。
+    """
+    timeline = DetonationTimeline()
+    live_bombs = [bomb for bomb in bombs if not bomb.exploded]
+    bombs_by_tile = {}
+    best_time = []
+    open_heap = []
+    for index, bomb in enumerate(live_bombs):
+        bombs_by_tile.setdefault((bomb.current_tile_x, bomb.current_tile_y), []).append(index)
+        fuse_ms = max(0.0, bomb.time_left)
+        best_time.append(fuse_ms)
+        heapq.heappush(open_heap, (fuse_ms, index))
+
+    detonated = [False] * len(live_bombs)
+    cleared_before = {} # 'D' 格 -> 被炸毀的時間
+    while open_heap:
+        blast_ms, index = heapq.heappop(open_heap)
+        if detonated[index] or blast_ms > best_time[index]:
+            continue
+        detonated[index] = True
+        bomb = live_bombs[index]
+        timeline.detonation_ms[id(bomb)] = blast_ms
+
+        cleared_tiles = {tile for tile, cleared_ms in cleared_before.items() if cleared_ms < blast_ms}
+        bomb_range = getattr(bomb.placed_by_player, 'bomb_range', 1)
+        for tile in compute_blast_tiles(map_data, width, height, bomb.current_tile_x, bomb.current_tile_y, bomb_range, cleared_tiles):
+            if blast_ms < timeline.blast_tiles.get(tile, float('inf')):
+                timeline.blast_tiles[tile] = blast_ms
+            if map_data[tile[1]][tile[0]] == 'D' and tile not in cleared_before:
+                cleared_before[tile] = blast_ms
+            for other_index in bombs_by_tile.get(tile, ()):
+                if not detonated[other_index] and blast_ms < best_time[other_index]:
+                    best_time[other_index] = blast_ms
+                    timeline.chained_bomb_ids.add(id(live_bombs[other_index]))
+                    heapq.heappush(open_heap, (blast_ms, other_index))
+    return timeline
@@ -0,0 +1,70 @@
+# oop-2025-proj-pycade/core/evasion_search.py
+
+import random
+from collections import deque
+
+_NEIGHBOR_OFFSETS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def is_occupancy_safe(earliest_blast_ms, enter_ms, leave_ms, blast_duration_ms):
+    """在 [enter_ms, leave_ms] 停留於某格時，是否不會與該格的火焰 [earliest, earliest + duration] 重疊。"""
+    return not (earliest_blast_ms < leave_ms and enter_ms < earliest_blast_ms + blast_duration_ms)
+
+
+def find_evasion_route(danger_field, start_coords, is_passable, max_depth, step_ms, blast_duration_ms,
+                       safe_horizon_ms, score_fn=None, rng=random):
+    """
+    以 (格子, 抵達步數) 為狀態的時間展開 BFS，一次找出安全的目的地與路線。
+    - 第 d 步抵達的格子被視為在 [d * step_ms, (d + 1) * step_ms] 之間被佔用，
+      與 DangerField 記錄的火焰時間窗重疊就不展開 (不會選到中途穿越爆炸的路線)。
+    - 目的地必須在抵達後 safe_horizon_ms 內都不會被波及。
+    - 同一格可以在不同步數被抵達 (例如繞路等火焰結束)，所以 visited 以 (格子, 步數) 為鍵。
+    score_fn(coords, path_len) 回傳越小越好的排序鍵；預設選最短路線。
+    回傳起點到目的地的座標列表 (至少兩格)；找不到時回傳 []。
+    """
+    if score_fn is None:
+        score_fn = lambda coords, path_len: path_len
+    width = danger_field.width
+    start_index = start_coords[1] * width + start_coords[0]
+    parents = {(start_index, 0): None}
+    queue = deque([(start_index, 0)])
+    best_key, best_state = None, None
+    offsets = list(_NEIGHBOR_OFFSETS)
+    earliest = danger_field.earliest_blast_ms
+    while queue:
+        index, depth = queue.popleft()
+        if depth > 0:
+            arrival_ms = depth * step_ms
+            if earliest[index] >= arrival_ms + safe_horizon_ms:
+                coords = (index % width, index // width)
+                key = score_fn(coords, depth)
+                if best_key is None or key < best_key:
+                    best_key, best_state = key, (index, depth)
+        if depth >= max_depth:
+            continue
+        cx, cy = index % width, index // width
+        next_depth = depth + 1
+        enter_ms = next_depth * step_ms
+        rng.shuffle(offsets)
+        for dx, dy in offsets:
+            nx, ny = cx + dx, cy + dy
+            if not (0 <= nx < width and 0 <= ny < danger_field.height):
+                continue
+            n_index = ny * width + nx
+            state = (n_index, next_depth)
+            if state in parents or not is_passable(nx, ny):
+                continue
+            if not is_occupancy_safe(earliest[n_index], enter_ms, enter_ms + step_ms, blast_duration_ms):
+                continue
+            parents[state] = (index, depth)
+            queue.append(state)
+
+    if best_state is None:
+        return []
+    path = []
+    state = best_state
+    while state is not None:
+        path.append((state[0] % width, state[0] // width))
+        state = parents[state]
+    path.reverse()
+    return path
@@ -0,0 +1,116 @@
+# oop-2025-proj-pycade/core/flow_field.py
+
+import random
+from collections import deque
+
+_NEIGHBOR_OFFSETS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+UNREACHED = -1
+
+
+class FlowField:
+    """
+    從單一起點出發的 BFS 距離 / 父節點場。
+    建立一次後，到任何目標的距離是 O(1)，路徑還原是 O(路徑長度)。
+    """
+
+    def __init__(self, start_coords, width, height):
+        self.start_coords = start_coords
+        self.width = width
+        self.height = height
+        size = width * height
+        self.distance = [UNREACHED] * size
+        self.parent = [UNREACHED] * size
+
+    @classmethod
+    def build(cls, start_coords, width, height, is_passable, rng=random):
+        """
+        is_passable(x, y) 決定某格能否踏入 (起點本身不檢查，與原本的 BFS 一致)。
+        鄰居展開順序以 rng 打亂，保留原本 AI 在等長路徑間隨機選擇的行為。
+        """
+        field = cls(start_coords, width, height)
+        for _ in iter_breadth_first(field, is_passable, rng=rng):
+            pass
+        return field
+
+    def distance_to(self, target_coords):
+        """回傳到目標的步數；無法到達時回傳 inf。"""
+        tx, ty = target_coords
+        if not (0 <= tx < self.width and 0 <= ty < self.height):
+            return float('inf')
+        d = self.distance[ty * self.width + tx]
+        return float('inf') if d == UNREACHED else d
+
+    def path_to(self, target_coords, max_depth=float('inf')):
+        """回傳從起點到目標的座標列表 (含兩端)；無法在 max_depth 步內到達時回傳 []。"""
+        if self.distance_to(target_coords) > max_depth:
+            return []
+        width = self.width
+        index = target_coords[1] * width + target_coords[0]
+        path = []
+        while index != UNREACHED:
+            path.append((index % width, index // width))
+            index = self.parent[index]
+        path.reverse()
+        return path
+
+
+def iter_breadth_first(field, is_passable, max_depth=float('inf'), rng=random):
+    """
+    在 field 上從 field.start_coords 展開 BFS，每從佇列取出一格就 yield ((x, y), depth)。
+    只記錄 distance / parent 陣列，不替每個節點複製路徑；呼叫端可以在找到足夠的結果後直接停止，
+    已展開的格子仍可用 field.path_to() 還原路徑。深度達到 max_depth 的格子不再往外展開。
+    """
+    width, height = field.width, field.height
+    sx, sy = field.start_coords
+    if not (0 <= sx < width and 0 <= sy < height):
+        return
+    distance, parent = field.distance, field.parent
+    start_index = sy * width + sx
+    distance[start_index] = 0
+    queue = deque([start_index])
+    offsets = list(_NEIGHBOR_OFFSETS)
+    while queue:
+        index = queue.popleft()
+        cx, cy = index % width, index // width
+        depth = distance[index]
+        yield (cx, cy), depth
+        if depth >= max_depth:
+            continue
+        next_distance = depth + 1
+        rng.shuffle(offsets)
+        for dx, dy in offsets:
+            nx, ny = cx + dx, cy + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            n_index = ny * width + nx
+            if distance[n_index] != UNREACHED or not is_passable(nx, ny):
+                continue
+            distance[n_index] = next_distance
+            parent[n_index] = index
+            queue.append(n_index)
+
+
+class FlowFieldCache:
+    """
+    每個 AI 決策週期共用的 FlowField 快取，以起點為鍵。
+    key 改變 (tick、地圖版本或炸彈集合變動) 時整批失效；key 為 None 時不快取。
+    """
+
+    def __init__(self):
+        self.key = None
+        self.fields = {}
+        self.builds = 0
+
+    def get(self, key, start_coords, builder):
+        if key is None:
+            self.builds += 1
+            return builder(start_coords)
+        if key != self.key:
+            self.key = key
+            self.fields = {}
+        field = self.fields.get(start_coords)
+        if field is None:
+            self.builds += 1
+            field = builder(start_coords)
+            self.fields[start_coords] = field
+        return field
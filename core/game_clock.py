@@ -0,0 +1,32 @@
+# oop-2025-proj-pycade/core/game_clock.py
+
+import pygame
+
+
+class GameClock:
+    """
+    由 Game 擁有、每次邏輯更新依 dt 推進的遊戲時鐘 (毫秒)。
+    AI 與精靈的計時都讀這個時鐘而不是 pygame.time.get_ticks()，
+    所以無頭模式可以用任意倍速推進，而行為與即時遊玩相同。
+    """
+
+    def __init__(self, start_ms=0):
+        self.now_ms = float(start_ms)
+
+    def advance(self, dt):
+        """推進 dt 秒。"""
+        self.now_ms += dt * 1000
+
+    def get_ticks(self):
+        """與 pygame.time.get_ticks() 相同的單位 (整數毫秒)。"""
+        return int(self.now_ms)
+
+
+def get_ticks(game=None):
+    """
+    取得 game 的遊戲時鐘時間；沒有 GameClock 的情況 (例如單元測試中的 Mock 遊戲) 退回 pygame.time.get_ticks()。
+    """
+    clock = getattr(game, 'game_clock', None) if game is not None else None
+    if isinstance(clock, GameClock):
+        return clock.get_ticks()
+    return pygame.time.get_ticks()
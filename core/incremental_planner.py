@@ -0,0 +1,203 @@
+# oop-2025-proj-pycade/core/incremental_planner.py
+
+import heapq
+from core.astar_engine import DEFAULT_ASTAR_TILE_COSTS
+
+_NEIGHBOR_OFFSETS = ((0, -1), (0, 1), (-1, 0), (1, 0)) # UP, DOWN, LEFT, RIGHT
+INF = float('inf')
+
+
+class DStarLitePlanner:
+    """
+    D* Lite 增量路徑規劃器 (由目標往起點反向搜尋)。
+    第一次 plan() 的成本與一次 A* 相當；之後地圖格子改變 (例如 'D' 被炸成 '.')
+    或 AI 移動時，replan() 只重新計算受影響的節點，而不是整張圖重新搜尋。
+    成本規則與 GridAStar 相同：踏入某格的成本由 tile_costs 決定，不在表中的字元不可通行。
+    """
+
+    def __init__(self, tile_costs=None):
+        self.tile_costs = dict(tile_costs) if tile_costs else dict(DEFAULT_ASTAR_TILE_COSTS)
+        self.width = 0
+        self.height = 0
+        self.start = None
+        self.goal = None
+        self._start_index = -1
+        self._goal_index = -1
+        self._tile_chars = []
+        self._cost = []  # 踏入該格的成本；None 表示不可通行
+        self._g = []
+        self._rhs = []
+        self._open = []  # (key, index)，過期項目以 _open_keys 延遲刪除
+        self._open_keys = {}
+        self._km = 0
+        self._last_start = None
+        self._blocked_tiles = set()
+        self._blocked_indices = set()
+        self._pending_changes = {} # index -> 新字元，等到下一次 replan() 才套用
+        self.last_expansions = 0
+
+    # --- 成本與鍵值 ---
+    def _tile_cost(self, tile_char, index):
+        if index in self._blocked_indices:
+            return None
+        return self.tile_costs.get(tile_char)
+
+    def _heuristic(self, index_a, index_b):
+        width = self.width
+        return abs(index_a % width - index_b % width) + abs(index_a // width - index_b // width)
+
+    def _calculate_key(self, index):
+        best = min(self._g[index], self._rhs[index])
+        return (best + self._heuristic(self._start_index, index) + self._km, best)
+
+    def _neighbors(self, index):
+        width, height = self.width, self.height
+        x, y = index % width, index // width
+        for dx, dy in _NEIGHBOR_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height:
+                yield ny * width + nx
+
+    def _update_vertex(self, index):
+        if index != self._goal_index:
+            best = INF
+            if self._cost[index] is not None or index == self._start_index:
+                cost, g = self._cost, self._g
+                for n_index in self._neighbors(index):
+                    if cost[n_index] is not None:
+                        candidate = cost[n_index] + g[n_index]
+                        if candidate < best:
+                            best = candidate
+            self._rhs[index] = best
+        self._open_keys.pop(index, None)
+        if self._g[index] != self._rhs[index]:
+            key = self._calculate_key(index)
+            self._open_keys[index] = key
+            heapq.heappush(self._open, (key, index))
+
+    def _top(self):
+        open_heap, open_keys = self._open, self._open_keys
+        while open_heap:
+            key, index = open_heap[0]
+            if open_keys.get(index) == key:
+                return key, index
+            heapq.heappop(open_heap)
+        return None, None
+
+    def _compute_shortest_path(self):
+        expansions = 0
+        g, rhs = self._g, self._rhs
+        start_index = self._start_index
+        while True:
+            top_key, index = self._top()
+            if top_key is None:
+                break
+            if not (top_key < self._calculate_key(start_index) or rhs[start_index] != g[start_index]):
+                break
+            heapq.heappop(self._open)
+            del self._open_keys[index]
+            new_key = self._calculate_key(index)
+            if top_key < new_key:
+                self._open_keys[index] = new_key
+                heapq.heappush(self._open, (new_key, index))
+                continue
+            expansions += 1
+            if g[index] > rhs[index]:
+                g[index] = rhs[index]
+            else:
+                g[index] = INF
+                self._update_vertex(index)
+            for n_index in self._neighbors(index):
+                self._update_vertex(n_index)
+        self.last_expansions = expansions
+
+    def _extract_path(self):
+        """沿著 cost + g 最小的鄰居從起點走到目標；無路可走時回傳 []。"""
+        g, cost, width = self._g, self._cost, self.width
+        index = self._start_index
+        if g[index] == INF:
+            return []
+        path = [(index % width, index // width)]
+        for _ in range(len(g)):
+            if index == self._goal_index:
+                return path
+            best_index, best_value = None, INF
+            for n_index in self._neighbors(index):
+                if cost[n_index] is not None and cost[n_index] + g[n_index] < best_value:
+                    best_index, best_value = n_index, cost[n_index] + g[n_index]
+            if best_index is None:
+                return []
+            index = best_index
+            path.append((index % width, index // width))
+        return []
+
+    # --- 公開介面 ---
+    def plan(self, map_data, width, height, start_coords, goal_coords, blocked_tiles=None):
+        """從頭建立搜尋樹並回傳起點到目標的座標路徑 (含兩端)。"""
+        self.width, self.height = width, height
+        self.start, self.goal = start_coords, goal_coords
+        self._start_index = start_coords[1] * width + start_coords[0]
+        self._goal_index = goal_coords[1] * width + goal_coords[0]
+        self._last_start = self._start_index
+        self._blocked_tiles = set(blocked_tiles or ())
+        self._blocked_indices = {y * width + x for x, y in self._blocked_tiles if 0 <= x < width and 0 <= y < height}
+        self._tile_chars = [map_data[index // width][index % width] for index in range(width * height)]
+        self._cost = [self._tile_cost(tile_char, index) for index, tile_char in enumerate(self._tile_chars)]
+        self._g = [INF] * (width * height)
+        self._rhs = [INF] * (width * height)
+        self._rhs[self._goal_index] = 0
+        self._km = 0
+        self._pending_changes = {}
+        key = self._calculate_key(self._goal_index)
+        self._open = [(key, self._goal_index)]
+        self._open_keys = {self._goal_index: key}
+        self._compute_shortest_path()
+        return self._extract_path()
+
+    def notify_tile_changed(self, tile_x, tile_y, new_char):
+        """記錄地圖格子的變化；實際修補延後到 replan()，同一格多次變化只處理最後一次。"""
+        if self.goal is None or not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return
+        self._pending_changes[tile_y * self.width + tile_x] = new_char
+
+    def _apply_cost_change(self, index, new_cost):
+        if self._cost[index] == new_cost:
+            return
+        self._cost[index] = new_cost
+        # 踏入 index 的邊成本改變，只有它的鄰居 (前驅節點) 的 rhs 需要重新計算
+        self._update_vertex(index)
+        for n_index in self._neighbors(index):
+            self._update_vertex(n_index)
+
+    def replan(self, start_coords, blocked_tiles=None):
+        """套用累積的地圖變化、移動起點，並回傳修補後的路徑。"""
+        if self.goal is None:
+            return []
+        width = self.width
+        new_start_index = start_coords[1] * width + start_coords[0]
+        if new_start_index != self._last_start:
+            self._km += self._heuristic(self._last_start, new_start_index)
+            self._last_start = new_start_index
+            old_start_index = self._start_index
+            self._start_index = new_start_index
+            self.start = start_coords
+            self._update_vertex(old_start_index)
+            self._update_vertex(new_start_index)
+
+        changed = dict(self._pending_changes)
+        self._pending_changes = {}
+        if blocked_tiles is not None:
+            blocked_tiles = set(blocked_tiles)
+            if blocked_tiles != self._blocked_tiles:
+                for x, y in blocked_tiles ^ self._blocked_tiles:
+                    if 0 <= x < width and 0 <= y < self.height:
+                        changed.setdefault(y * width + x, None)
+                self._blocked_tiles = blocked_tiles
+                self._blocked_indices = {y * width + x for x, y in blocked_tiles if 0 <= x < width and 0 <= y < self.height}
+        for index, new_char in changed.items():
+            if new_char is not None: # None 表示只有炸彈阻擋狀態改變
+                self._tile_chars[index] = new_char
+            self._apply_cost_change(index, self._tile_cost(self._tile_chars[index], index))
+
+        self._compute_shortest_path()
+        return self._extract_path()
@@ -2,7 +2,10 @@
 import pygame
 import settings
 from sprites.wall import Wall, DestructibleWall, Floor
-import random
+from core.occupancy_index import TileIndexedGroup
+from core.match_random import match_rng, MAP_RNG
+import copy
+import weakref
 from collections import deque
 
 
@@ -12,15 +15,20 @@ class MapManager:
         self.map_data = [] # 儲存地圖佈局的字符列表
         self.tile_width = 0
         self.tile_height = 0
-        self.walls_group = pygame.sprite.Group()
-        self.destructible_walls_group = pygame.sprite.Group()
+        self.map_version = 0 # 每次地圖內容改變就 +1，供 AI 的搜尋快取判斷是否過期
+        self.tile_change_listeners = [] # 格子字元改變時通知的回呼 (以弱參照保存，AI 被回收後自動失效)
+        self.walls_group = TileIndexedGroup()
+        self.destructible_walls_group = TileIndexedGroup() # 【新增】以格子索引，爆炸判定直接查詢
         self.floor_group = pygame.sprite.Group() # 用於地板或空格子
+        # 【新增】牆壁預先畫在這張透明圖層上，不再放進 all_sprites 逐一繪製；牆被炸毀時只修補該格
+        self.wall_layer_surface = None
         # self.load_map_from_data(self.get_simple_test_map()) # 不在這裡調用，由 Game.setup_initial_state 調用
 
     def get_classic_map_layout(self, width, height, p1_start_tile, p2_start_tile, safe_radius=1):
         """
         生成一個經典的、有固定棋盤格障礙物的地圖。
         """
+        rng = match_rng(self.game, MAP_RNG) # 【新增】使用這場對戰的種子化亂數
         layout = [['.' for _ in range(width)] for _ in range(height)]
 
         # 1. 設置邊界牆壁
@@ -43,7 +51,7 @@ class MapManager:
             for c in range(1, width - 1):
                 if layout[r][c] == '.':
                     if (c, r) not in safe_zones:
-                        if random.random() < destructible_wall_chance:
+                        if rng.random() < destructible_wall_chance:
                             layout[r][c] = 'D'
         
         return ["".join(row) for row in layout]
@@ -80,6 +88,7 @@ class MapManager:
         """
         生成一個隨機包含不可破壞和可破壞障礙物的地圖，並確保連通性。
         """
+        rng = match_rng(self.game, MAP_RNG) # 【新增】使用這場對戰的種子化亂數
         layout = []
         is_playable = False
         max_retries = 50
@@ -98,7 +107,7 @@ class MapManager:
             for r in range(2, height - 2):
                 for c in range(2, width - 2):
                     if (c, r) not in safe_zones:
-                        if random.random() < solid_wall_chance:
+                        if rng.random() < solid_wall_chance:
                             layout[r][c] = 'W'
             
             if self._is_path_between_points(layout, p1_start_tile, p2_start_tile):
@@ -115,7 +124,7 @@ class MapManager:
         for r in range(1, height - 1):
             for c in range(1, width - 1):
                 if layout[r][c] == '.' and (c, r) not in safe_zones:
-                    if random.random() < destructible_wall_chance:
+                    if rng.random() < destructible_wall_chance:
                         layout[r][c] = 'D'
         
         print("[MapManager] Successfully generated a truly random map with a walkable perimeter.")
@@ -128,6 +137,7 @@ class MapManager:
         # 在 Game.setup_initial_state 中，solid_obstacles_group 和 all_sprites 也會被清空
 
         self.map_data = map_layout_data
+        self.map_version += 1
         print("[MapManager DEBUG] map_data loaded in load_map_from_data:") # 新增
         for r_idx, row_str in enumerate(self.map_data): # 新增
             print(f"Row {r_idx:02d}: {row_str}") # 新增
@@ -140,13 +150,13 @@ class MapManager:
                 if tile_char == 'W':
                     wall = Wall(col_index, row_index) # Wall 的 __init__ 只需要格子座標
                     self.walls_group.add(wall)
-                    self.game.all_sprites.add(wall)
                     self.game.solid_obstacles_group.add(wall)
                 elif tile_char == 'D':
                     d_wall = DestructibleWall(col_index, row_index, self.game)
                     self.destructible_walls_group.add(d_wall)
-                    self.game.all_sprites.add(d_wall)
                     self.game.solid_obstacles_group.add(d_wall)
+
+        self.render_wall_layer()
                     
                     
 
@@ -163,20 +173,84 @@ class MapManager:
             return self.map_data[tile_y][tile_x] == '.'
         return False
 
+    def render_wall_layer(self):
+        """把所有牆壁畫到 wall_layer_surface 上，地圖載入時呼叫一次。"""
+        self.wall_layer_surface = pygame.Surface(
+            (self.tile_width * settings.TILE_SIZE, self.tile_height * settings.TILE_SIZE), pygame.SRCALPHA
+        )
+        for wall in self.walls_group:
+            self.wall_layer_surface.blit(wall.image, wall.rect)
+        for d_wall in self.destructible_walls_group:
+            self.wall_layer_surface.blit(d_wall.image, d_wall.rect)
+
+    def _patch_wall_layer_tile(self, tile_x, tile_y):
+        """清掉圖層上的一格，再畫回仍留在該格 (未被摧毀) 的牆。"""
+        if self.wall_layer_surface is None:
+            return
+        tile_rect = pygame.Rect(tile_x * settings.TILE_SIZE, tile_y * settings.TILE_SIZE, settings.TILE_SIZE, settings.TILE_SIZE)
+        self.wall_layer_surface.fill((0, 0, 0, 0), tile_rect)
+        for group in (self.walls_group, self.destructible_walls_group):
+            for wall in group.sprites_at(tile_x, tile_y):
+                if not getattr(wall, 'is_destroyed', False):
+                    self.wall_layer_surface.blit(wall.image, wall.rect)
+
     def is_solid_wall_at(self, tile_x, tile_y): # 用於炸彈爆炸阻擋
         if not (0 <= tile_x < self.tile_width and 0 <= tile_y < self.tile_height):
             return True # 地圖外視為實心牆
         return self.map_data[tile_y][tile_x] == 'W' # 只有 'W' 是不可穿透的實心牆
     
+    def add_tile_change_listener(self, callback):
+        """註冊 callback(tile_x, tile_y, old_char, new_char)，在 update_tile_char_on_map 成功後呼叫。"""
+        if hasattr(callback, '__self__'):
+            self.tile_change_listeners.append(weakref.WeakMethod(callback))
+        else:
+            self.tile_change_listeners.append(lambda: callback)
+
+    def remove_tile_change_listener(self, callback):
+        self.tile_change_listeners = [ref for ref in self.tile_change_listeners if ref() not in (None, callback)]
+
+    def __deepcopy__(self, memo):
+        """【新增】重播的關鍵影格會深拷貝整個 Game；弱參照的監聽者改為指向拷貝出來的 AI。"""
+        clone = self.__class__.__new__(self.__class__)
+        memo[id(self)] = clone
+        for name, value in self.__dict__.items():
+            if name != 'tile_change_listeners':
+                setattr(clone, name, copy.deepcopy(value, memo))
+        clone.tile_change_listeners = []
+        for ref in self.tile_change_listeners:
+            callback = ref()
+            if callback is None:
+                continue
+            owner = getattr(callback, '__self__', None)
+            if owner is None:
+                clone.tile_change_listeners.append(ref)
+            else:
+                clone.add_tile_change_listener(getattr(copy.deepcopy(owner, memo), callback.__name__))
+        return clone
+
+    def _notify_tile_change_listeners(self, tile_x, tile_y, old_char, new_char):
+        alive_listeners = []
+        for ref in self.tile_change_listeners:
+            callback = ref()
+            if callback is None:
+                continue
+            alive_listeners.append(ref)
+            callback(tile_x, tile_y, old_char, new_char)
+        self.tile_change_listeners = alive_listeners
+
     def update_tile_char_on_map(self, tile_x, tile_y, new_char):
         """Updates the character representing a tile in the internal map_data."""
         if 0 <= tile_y < self.tile_height and 0 <= tile_x < self.tile_width:
             # map_data is a list of strings. Convert row to list, modify, then join back.
             if isinstance(self.map_data[tile_y], str):
                 row_list = list(self.map_data[tile_y])
+                old_char = row_list[tile_x]
                 row_list[tile_x] = new_char
                 self.map_data[tile_y] = "".join(row_list)
+                self.map_version += 1
                 print(f"[MapManager] Tile ({tile_x},{tile_y}) updated to '{new_char}' in map_data.")
+                self._patch_wall_layer_tile(tile_x, tile_y)
+                self._notify_tile_change_listeners(tile_x, tile_y, old_char, new_char)
             else:
                 print(f"[MapManager_ERROR] map_data row {tile_y} is not a string. Cannot update.")
         else:
@@ -0,0 +1,35 @@
+# oop-2025-proj-pycade/core/match_random.py
+
+import random
+
+# Game 擁有的各個隨機數串流 (屬性名稱)。分開串流讓 AI 多想一步不會改變道具掉落的結果。
+MAP_RNG = 'map_rng'
+ITEM_RNG = 'item_rng'
+AI_RNG = 'ai_rng'
+MATCH_RNG_STREAMS = (MAP_RNG, ITEM_RNG, AI_RNG)
+
+
+def new_match_seed():
+    """沒有指定種子時，替這一場對戰挑一個新的種子 (之後仍可用它重現整場對戰)。"""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+def match_stream_rng(seed, stream):
+    """對戰種子的單一串流 (與 create_match_rngs 中同名的串流相同)。"""
+    return random.Random(f"{seed}:{stream}")
+
+
+def create_match_rngs(seed):
+    """依對戰種子建立各串流的 random.Random；同一個種子一定得到同樣的串流。"""
+    return {stream: match_stream_rng(seed, stream) for stream in MATCH_RNG_STREAMS}
+
+
+def match_rng(game, stream):
+    """
+    取得 game 的某個隨機數串流；game 沒有對應的 random.Random (例如單元測試中的 Mock 遊戲) 時
+    退回全域的 random 模組，兩者的 random()/choice()/choices()/shuffle() 介面相同。
+    """
+    rng = getattr(game, stream, None) if game is not None else None
+    if isinstance(rng, random.Random):
+        return rng
+    return random
@@ -68,7 +68,9 @@ class Menu:
         self.menu_state = "MAIN"
         self.buttons = []
         start_y = 180
-        button_spacing = 60
+        # 【修改】AI 選項變多時縮小間距，讓排行榜與退出按鈕仍留在畫面內 (共 n 個選項 + 半格 + 2 個按鈕)
+        available_height = settings.SCREEN_HEIGHT - 20 - button_height - start_y
+        button_spacing = min(60, available_height * 2 // (2 * len(self.ai_options) + 3))
         
         for i, (display_name, archetype_key) in enumerate(self.ai_options.items()):
             y_pos = start_y + i * button_spacing
@@ -0,0 +1,76 @@
+# oop-2025-proj-pycade/core/occupancy_index.py
+
+import pygame
+import settings
+
+
+def sprite_tile(sprite):
+    """回傳精靈所在的格子：炸彈用 current_tile_x/y，玩家與爆炸用 tile_x/y，其餘 (牆、道具) 由 rect 左上角推算。"""
+    if hasattr(sprite, 'current_tile_x'):
+        return sprite.current_tile_x, sprite.current_tile_y
+    if hasattr(sprite, 'tile_x'):
+        return sprite.tile_x, sprite.tile_y
+    return sprite.rect.x // settings.TILE_SIZE, sprite.rect.y // settings.TILE_SIZE
+
+
+class TileIndexedGroup(pygame.sprite.Group):
+    """
+    額外維護「格子 -> 精靈列表」索引的 Group。
+    加入、kill() 或 empty() 時由 pygame 呼叫 add_internal / remove_internal 自動更新；
+    會移動的精靈 (玩家) 換格後要呼叫 relocate()。
+    """
+
+    def __init__(self, *sprites):
+        self._sprites_by_tile = {}
+        self._tile_of_sprite = {}
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if sprite in self._tile_of_sprite:
+            return
+        tile = sprite_tile(sprite)
+        self._tile_of_sprite[sprite] = tile
+        self._sprites_by_tile.setdefault(tile, []).append(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        tile = self._tile_of_sprite.pop(sprite, None)
+        if tile is None:
+            return
+        sprites_on_tile = self._sprites_by_tile[tile]
+        sprites_on_tile.remove(sprite)
+        if not sprites_on_tile:
+            del self._sprites_by_tile[tile]
+
+    def relocate(self, sprite):
+        """精靈的格子座標改變後更新索引。"""
+        old_tile = self._tile_of_sprite.get(sprite)
+        if old_tile is None:
+            return
+        new_tile = sprite_tile(sprite)
+        if new_tile == old_tile:
+            return
+        sprites_on_tile = self._sprites_by_tile[old_tile]
+        sprites_on_tile.remove(sprite)
+        if not sprites_on_tile:
+            del self._sprites_by_tile[old_tile]
+        self._tile_of_sprite[sprite] = new_tile
+        self._sprites_by_tile.setdefault(new_tile, []).append(sprite)
+
+    def sprites_at(self, tile_x, tile_y):
+        return self._sprites_by_tile.get((tile_x, tile_y), ())
+
+
+def sprites_at(group, tile_x, tile_y):
+    """回傳 group 中位於 (tile_x, tile_y) 的精靈；一般的 pygame Group (例如測試建立的) 退回線性掃描。"""
+    if isinstance(group, TileIndexedGroup):
+        return group.sprites_at(tile_x, tile_y)
+    return [sprite for sprite in group if sprite_tile(sprite) == (tile_x, tile_y)]
+
+
+def relocate_sprite(sprite):
+    """精靈換格後，更新它所屬的所有 TileIndexedGroup。"""
+    for group in sprite.groups():
+        if isinstance(group, TileIndexedGroup):
+            group.relocate(sprite)
@@ -0,0 +1,185 @@
+# oop-2025-proj-pycade/core/planning_board.py
+
+import copy
+import random
+import settings
+from core.astar_engine import GridAStar
+from core.blast_footprint import BlastFootprintCache
+from core.danger_field import explosion_tile, get_danger_field
+from core.flow_field import FlowFieldCache
+from core.game_clock import GameClock, get_ticks
+from core.match_random import match_rng, AI_RNG
+
+# run_planning_search 的回傳值：背景搜尋還沒有結果，狀態處理函式應該直接 return 等下一個 frame
+PLAN_PENDING = object()
+
+
+class BoardPlayer:
+    """玩家在快照中的狀態 (只有規劃會讀的欄位)。"""
+    __slots__ = ('tile_x', 'tile_y', 'is_alive', 'lives', 'bomb_range', 'max_bombs', 'bombs_placed_count', 'action_timer')
+
+    def __init__(self, player):
+        self.tile_x = player.tile_x
+        self.tile_y = player.tile_y
+        self.is_alive = player.is_alive
+        self.lives = player.lives
+        self.bomb_range = player.bomb_range
+        self.max_bombs = player.max_bombs
+        self.bombs_placed_count = player.bombs_placed_count
+        self.action_timer = getattr(player, 'action_timer', 0)
+
+
+class BoardBomb:
+    """炸彈在快照中的狀態；placed_by_player 指向快照中的 BoardPlayer。"""
+    __slots__ = ('current_tile_x', 'current_tile_y', 'placed_by_player', 'time_left', 'exploded')
+
+    def __init__(self, bomb, owner):
+        self.current_tile_x = bomb.current_tile_x
+        self.current_tile_y = bomb.current_tile_y
+        self.placed_by_player = owner
+        self.time_left = bomb.time_left
+        self.exploded = bomb.exploded
+
+
+class BoardExplosion:
+    __slots__ = ('tile_x', 'tile_y')
+
+    def __init__(self, explosion):
+        self.tile_x, self.tile_y = explosion_tile(explosion)
+
+
+class BoardItem:
+    """道具在快照中的狀態；快照只收錄還在場上的道具。sprite 是場上的原精靈，只供主執行緒套用計畫時換回。"""
+    __slots__ = ('type', 'rect', 'sprite')
+
+    def __init__(self, item):
+        self.type = item.type
+        self.rect = item.rect.copy()
+        self.sprite = item
+
+    def alive(self):
+        return True
+
+
+class BoardMap:
+    """map_manager 的唯讀拷貝：地圖字元、尺寸與版本。"""
+
+    def __init__(self, map_manager):
+        self.map_data = [row[:] for row in map_manager.map_data]
+        self.tile_width = map_manager.tile_width
+        self.tile_height = map_manager.tile_height
+        self.map_version = getattr(map_manager, 'map_version', 0)
+
+    def is_solid_wall_at(self, tile_x, tile_y):
+        if not (0 <= tile_x < self.tile_width and 0 <= tile_y < self.tile_height):
+            return True
+        return self.map_data[tile_y][tile_x] == 'W'
+
+
+class PlanningBoard:
+    """
+    提交背景規劃時拍下的棋盤快照，提供 AI 搜尋函式會讀的 Game 屬性 (地圖、炸彈、爆炸、道具、玩家與時鐘)。
+    快照建立後不再改變，所以背景執行緒讀它時不必和主迴圈同步。
+    """
+
+    def __init__(self):
+        self.map_manager = None
+        self.bombs_group = ()
+        self.explosions_group = ()
+        self.items_group = ()
+        self.players_group = ()
+        self.player1 = None
+        self.ai_player = None
+        self.tick_count = None
+        self.game_clock = None
+        self.ai_rng = None
+        self.danger_field_cache = None
+        self.deterministic = False
+
+    @classmethod
+    def capture(cls, game, ai_player, human_player):
+        """在主執行緒上拍下 game 目前的狀態；AI 亂數由 game 的 AI 串流衍生出一個獨立的 random.Random。"""
+        board = cls()
+        board.map_manager = BoardMap(game.map_manager)
+
+        players = {}
+        for player in tuple(getattr(game, 'players_group', ())) + (ai_player, human_player):
+            if player is not None and id(player) not in players:
+                players[id(player)] = BoardPlayer(player)
+        board.players_group = tuple(players[id(player)] for player in getattr(game, 'players_group', ()))
+        board.ai_player = players[id(ai_player)]
+        board.player1 = players[id(human_player)] if human_player is not None else None
+
+        def owner_of(bomb):
+            owner = bomb.placed_by_player
+            if owner is None:
+                return None
+            if id(owner) not in players:
+                players[id(owner)] = BoardPlayer(owner)
+            return players[id(owner)]
+
+        bombs = getattr(game, 'bombs_group', ())
+        explosions = getattr(game, 'explosions_group', ())
+        board.bombs_group = tuple(BoardBomb(bomb, owner_of(bomb)) for bomb in bombs)
+        board.explosions_group = tuple(BoardExplosion(explosion) for explosion in explosions)
+        board.items_group = tuple(BoardItem(item) for item in getattr(game, 'items_group', ()) if item.alive())
+
+        board.tick_count = getattr(game, 'tick_count', None)
+        board.game_clock = GameClock(get_ticks(game))
+        board.ai_rng = random.Random(match_rng(game, AI_RNG).getrandbits(64))
+        if isinstance(board.tick_count, int):
+            # 沿用本 tick 已經建立的危險地圖 (建立後不會再被修改)；快取鍵與 get_danger_field 相同
+            board.danger_field_cache = ((board.tick_count, len(board.bombs_group), len(board.explosions_group)),
+                                        get_danger_field(game, game.map_manager))
+        return board
+
+
+def planning_view(controller):
+    """
+    回傳 controller 的淺拷貝，game / map_manager / 雙方玩家改指向新拍下的 PlanningBoard，
+    A* 陣列與搜尋快取換成新的物件，所以在背景執行緒呼叫它的搜尋函式不會讀寫主執行緒的狀態。
+    """
+    board = PlanningBoard.capture(controller.game, controller.ai_player, controller.human_player_sprite)
+    view = copy.copy(controller)
+    view.game = board
+    view.map_manager = board.map_manager
+    view.ai_player = board.ai_player
+    view.human_player_sprite = board.player1
+    view.async_planner = None
+    view.incremental_planner = None
+    if hasattr(controller, 'astar_engine'):
+        view.astar_engine = GridAStar(controller.astar_engine.tile_costs)
+    if hasattr(controller, 'flow_field_cache'):
+        view.flow_field_cache = FlowFieldCache()
+    if hasattr(controller, 'blast_footprint_cache'):
+        view.blast_footprint_cache = BlastFootprintCache(controller.blast_footprint_cache.max_entries)
+    return view
+
+
+def _search_on_board(view, search_name, args):
+    # 包成 tuple：搜尋本身回傳 None 時，仍能和 AsyncPlanner.poll 的「沒有結果」區分
+    return (getattr(view, search_name)(*args),)
+
+
+def run_planning_search(controller, ai_current_tile, search_name, *args):
+    """
+    執行 controller 的搜尋函式 search_name(*args)，只回傳結果，不改變 controller 的狀態。
+    同步規劃時 (固定步長模式、測試用的假 Game) 直接在目前的棋盤上呼叫；
+    背景規劃時在 PlanningBoard 快照上執行，送達前回傳 PLAN_PENDING。
+    結果只在狀態、搜尋參數、AI 位置、地圖版本、炸彈與雙方生命都和提交時相同時才被採用，否則重新提交。
+    """
+    if not controller.uses_async_planning:
+        return getattr(controller, search_name)(*args)
+
+    planner = controller.async_planner
+    stamp = (controller.current_state, search_name, args) + controller._get_plan_stamp(ai_current_tile)
+    now = get_ticks(controller.game)
+    if planner.busy:
+        # 最晚在下一個決策週期拿到結果，所以計畫最多比同步規劃晚一個決策週期
+        result = planner.poll(stamp, now, getattr(settings, "AI_ASYNC_PLAN_MAX_AGE_MS", 400), wait_after=controller.ai_decision_interval)
+        if result is not None:
+            return result[0]
+        if planner.busy:
+            return PLAN_PENDING
+    planner.submit(stamp, now, _search_on_board, planning_view(controller), search_name, args)
+    return PLAN_PENDING
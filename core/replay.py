@@ -0,0 +1,487 @@
+# oop-2025-proj-pycade/core/replay.py
+
+import copy
+import json
+import os
+import types
+import struct
+import zlib
+import datetime
+import pygame
+import settings
+
+# -----------------------------------------------------------------------------
+# 檔案格式 (小端序)：
+#   MAGIC + 版本 (1 byte)，接著是一連串 [tag (1 byte)][長度 (varint)][內容] 的紀錄，
+#   不認得的 tag 依長度跳過，之後新增欄位不會讓舊的播放器壞掉。
+#   輸入與 AI 動作都只記「有變化的 tick」：(與上一筆相差的 tick 數 varint, 代碼 1 byte)。
+# -----------------------------------------------------------------------------
+REPLAY_MAGIC = b"PYCRPL"
+REPLAY_VERSION = 1
+
+TAG_HEADER = 1 # JSON：種子、AI 類型、地圖類型、固定步長
+TAG_MAP = 2 # 初始地圖 (以 '\n' 連接的列)
+TAG_PLAYER1_INPUTS = 3 # 玩家 1 輸入狀態改變的 tick
+TAG_AI_ACTIONS = 4 # AI 實際做出動作的 tick (播放時用來檢查是否分歧)
+TAG_KEYFRAMES = 5 # 每隔 REPLAY_KEYFRAME_INTERVAL tick 的狀態摘要
+TAG_END = 6 # 最後的 tick 與勝負
+
+# 方向代碼：0 不動，1 上，2 下，3 左，4 右
+DIRECTION_CODES = {(0, 0): 0, (0, -1): 1, (0, 1): 2, (-1, 0): 3, (1, 0): 4}
+CODE_DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+# 玩家 1 的輸入代碼：bit 0-2 鍵盤方向，bit 3-5 觸控方向，bit 6 放炸彈
+# AI 的動作代碼：bit 0-2 移動方向，bit 3 放炸彈
+BOMB_BIT_PLAYER1 = 1 << 6
+BOMB_BIT_AI = 1 << 3
+
+
+def encode_player1_input(key_direction, touch_direction, bomb):
+    return DIRECTION_CODES.get(key_direction, 0) | (DIRECTION_CODES.get(touch_direction, 0) << 3) | \
+           (BOMB_BIT_PLAYER1 if bomb else 0)
+
+
+def decode_player1_input(code):
+    """回傳 (鍵盤方向, 觸控方向, 是否放炸彈)。"""
+    return CODE_DIRECTIONS.get(code & 0b111, (0, 0)), CODE_DIRECTIONS.get((code >> 3) & 0b111, (0, 0)), \
+           bool(code & BOMB_BIT_PLAYER1)
+
+
+def _write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _encode_tick_events(events):
+    out = bytearray()
+    previous_tick = 0
+    for tick, code in events:
+        _write_varint(out, tick - previous_tick)
+        out.append(code)
+        previous_tick = tick
+    return bytes(out)
+
+
+def _decode_tick_events(payload):
+    events, offset, tick = [], 0, 0
+    while offset < len(payload):
+        delta, offset = _read_varint(payload, offset)
+        tick += delta
+        events.append((tick, payload[offset]))
+        offset += 1
+    return events
+
+
+def _player_state(player):
+    return player.tile_x, player.tile_y, max(0, player.lives), max(0, player.score)
+
+
+def state_digest(game):
+    """關鍵影格的狀態摘要：(tick, 玩家 1 狀態, AI 狀態, 地圖 CRC32)，用來確認播放與錄製時一致。"""
+    map_crc = zlib.crc32("\n".join(game.map_manager.map_data).encode("utf-8"))
+    return game.tick_count, _player_state(game.player1), _player_state(game.player2_ai), map_crc
+
+
+def _encode_keyframes(keyframes):
+    out = bytearray()
+    for tick, p1_state, ai_state, map_crc in keyframes:
+        _write_varint(out, tick)
+        for x, y, lives, score in (p1_state, ai_state):
+            out += struct.pack("<BBB", x, y, lives)
+            _write_varint(out, score)
+        out += struct.pack("<I", map_crc)
+    return bytes(out)
+
+
+def _decode_keyframes(payload):
+    keyframes, offset = [], 0
+    while offset < len(payload):
+        tick, offset = _read_varint(payload, offset)
+        states = []
+        for _ in range(2):
+            x, y, lives = struct.unpack_from("<BBB", payload, offset)
+            score, offset = _read_varint(payload, offset + 3)
+            states.append((x, y, lives, score))
+        (map_crc,) = struct.unpack_from("<I", payload, offset)
+        offset += 4
+        keyframes.append((tick, states[0], states[1], map_crc))
+    return keyframes
+
+
+class AIActionObserver:
+    """比較每個 tick 前後 AI 的格子與放置炸彈總數，得出這個 tick 的 AI 動作代碼 (0 表示沒有動作)。"""
+
+    def __init__(self, ai_player):
+        self.ai_player = ai_player
+        self.last_state = (ai_player.tile_x, ai_player.tile_y, ai_player.total_bombs_placed)
+
+    def observe(self):
+        player = self.ai_player
+        last_x, last_y, last_bombs = self.last_state
+        self.last_state = (player.tile_x, player.tile_y, player.total_bombs_placed)
+        code = DIRECTION_CODES.get((player.tile_x - last_x, player.tile_y - last_y), 0)
+        if player.total_bombs_placed > last_bombs:
+            code |= BOMB_BIT_AI
+        return code
+
+
+class Replay:
+    """一場對戰的重播資料：重建 Game 需要的設定、初始地圖、玩家 1 的輸入與 AI 動作 / 關鍵影格 (用於檢查)。"""
+
+    def __init__(self, seed, ai_archetype, map_type, fixed_dt, map_data):
+        self.seed = seed
+        self.ai_archetype = ai_archetype
+        self.map_type = map_type
+        self.fixed_dt = fixed_dt
+        self.map_data = list(map_data)
+        self.player1_inputs = [] # [(tick, 代碼)]，只在輸入改變時記錄
+        self.ai_actions = [] # [(tick, 代碼)]
+        self.keyframes = [] # [state_digest(...)]
+        self.final_tick = 0
+        self.winner = ""
+
+    def to_bytes(self):
+        header = {"seed": self.seed, "ai_archetype": self.ai_archetype, "map_type": self.map_type,
+                  "fixed_dt": self.fixed_dt}
+        records = [
+            (TAG_HEADER, json.dumps(header, separators=(",", ":")).encode("utf-8")),
+            (TAG_MAP, "\n".join(self.map_data).encode("utf-8")),
+            (TAG_PLAYER1_INPUTS, _encode_tick_events(self.player1_inputs)),
+            (TAG_AI_ACTIONS, _encode_tick_events(self.ai_actions)),
+            (TAG_KEYFRAMES, _encode_keyframes(self.keyframes)),
+        ]
+        end = bytearray()
+        _write_varint(end, self.final_tick)
+        end += (self.winner or "").encode("utf-8")
+        records.append((TAG_END, bytes(end)))
+
+        out = bytearray(REPLAY_MAGIC)
+        out.append(REPLAY_VERSION)
+        for tag, payload in records:
+            out.append(tag)
+            _write_varint(out, len(payload))
+            out += payload
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data.startswith(REPLAY_MAGIC):
+            raise ValueError("Not a replay file (bad magic).")
+        offset = len(REPLAY_MAGIC)
+        version = data[offset]
+        if version > REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version {version}.")
+        offset += 1
+
+        records = {}
+        while offset < len(data):
+            tag = data[offset]
+            length, offset = _read_varint(data, offset + 1)
+            records[tag] = data[offset:offset + length]
+            offset += length
+        if TAG_HEADER not in records or TAG_MAP not in records:
+            raise ValueError("Replay is missing its header or map.")
+
+        header = json.loads(records[TAG_HEADER].decode("utf-8"))
+        replay = cls(header["seed"], header["ai_archetype"], header["map_type"], header["fixed_dt"],
+                     records[TAG_MAP].decode("utf-8").split("\n"))
+        replay.player1_inputs = _decode_tick_events(records.get(TAG_PLAYER1_INPUTS, b""))
+        replay.ai_actions = _decode_tick_events(records.get(TAG_AI_ACTIONS, b""))
+        replay.keyframes = _decode_keyframes(records.get(TAG_KEYFRAMES, b""))
+        if TAG_END in records:
+            replay.final_tick, name_offset = _read_varint(records[TAG_END], 0)
+            replay.winner = records[TAG_END][name_offset:].decode("utf-8")
+        return replay
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """
+    由 Game 在每個 tick 呼叫：記錄玩家 1 的輸入 (Game._apply_player1_input) 與 AI 的動作，
+    每 REPLAY_KEYFRAME_INTERVAL tick 存一個狀態摘要。
+    """
+
+    def __init__(self, game):
+        if not game.deterministic:
+            # 可變 dt 的對戰無法用固定的 dt 重播出同樣的結果
+            raise ValueError("ReplayRecorder requires a Game in deterministic (fixed-step) mode.")
+        self.replay = Replay(game.match_seed, game.ai_archetype, game.map_type,
+                             game.fixed_dt, game.map_manager.map_data)
+        self.keyframe_interval = getattr(settings, "REPLAY_KEYFRAME_INTERVAL", 300)
+        self.ai_observer = AIActionObserver(game.player2_ai)
+        self.last_player1_code = 0
+        self.finished = False
+
+    def record_player1_input(self, tick, code):
+        if code != self.last_player1_code:
+            self.replay.player1_inputs.append((tick, code))
+            self.last_player1_code = code
+
+    def end_tick(self, game):
+        code = self.ai_observer.observe()
+        if code:
+            self.replay.ai_actions.append((game.tick_count, code))
+        if self.keyframe_interval and game.tick_count % self.keyframe_interval == 0:
+            self.replay.keyframes.append(state_digest(game))
+
+    def finish(self, game, winner):
+        self.replay.final_tick = game.tick_count
+        self.replay.winner = winner or ""
+        self.finished = True
+        return self.replay
+
+    def default_path(self):
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        directory = getattr(settings, "REPLAY_DIRECTORY", "replays")
+        return os.path.join(directory, f"match_{stamp}_{self.replay.seed}.pcreplay")
+
+
+# 深拷貝 Game 時共用 (不拷貝) 的資源：圖片、字型、音效與模組/函式/類別本身都是唯讀的
+_SHARED_RESOURCE_TYPES = (pygame.Surface, pygame.font.Font, pygame.mixer.Sound, pygame.time.Clock,
+                          types.ModuleType, types.FunctionType, types.BuiltinFunctionType, type)
+
+
+def _shared_resources_memo(game):
+    """走訪 Game 的物件圖，把共用資源先放進 deepcopy 的 memo，讓它們在拷貝中維持同一個物件。"""
+    memo = {id(game.screen): game.screen, id(game.audio_manager): game.audio_manager}
+    if game.clock is not None:
+        memo[id(game.clock)] = game.clock
+    seen = set()
+    stack = [game]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or id(obj) in memo:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, _SHARED_RESOURCE_TYPES):
+            memo[id(obj)] = obj
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            stack.extend(getattr(obj, '__dict__', {}).values())
+            for name in getattr(type(obj), '__slots__', ()):
+                if hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+    return memo
+
+
+def clone_game_state(game):
+    """
+    完整拷貝一場對戰的可變狀態 (地圖、精靈、計時器、亂數串流、AI 的狀態機與快取)，
+    圖片等資源共用。拷貝可以獨立地繼續 _update_internal()，結果與原本的 Game 一致。
+    """
+    return copy.deepcopy(game, _shared_resources_memo(game))
+
+
+class _SilentAudioManager:
+    """播放重播時不出聲：任何 AudioManager 方法都是空操作。"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class ReplayPlayer:
+    """
+    依重播資料重建 Game 並重跑整場對戰。
+    - step() 推進一個固定步長的 tick；run_to_end() 無頭模式全速跑完。
+    - advance(frame_dt) + draw() 以 1 倍速播放 (與一般遊戲相同的累加器)。
+    - seek(tick)：播放經過每 REPLAY_KEYFRAME_INTERVAL tick 時在記憶體中保存一份可還原的 Game 拷貝
+      (clone_game_state)；跳轉時從目標之前最近的一份還原，再快轉剩下不到一個間隔的 tick。
+      還沒播放到的位置只能快轉過去 (途經的關鍵影格摘要都會檢查)。
+    錄製與播放結果不同時 (例如 AI 程式碼改了)，divergence_tick 記錄第一個不一致的 tick。
+    """
+
+    def __init__(self, replay, screen, audio_manager=None, headless=True):
+        self.replay = replay
+        self.screen = screen
+        self.audio_manager = audio_manager or _SilentAudioManager()
+        self.headless = headless
+        self.fixed_dt = replay.fixed_dt or 1 / getattr(settings, "FPS", 60)
+        self.divergence_tick = None
+        self.snapshot_interval = getattr(settings, "REPLAY_KEYFRAME_INTERVAL", 300)
+        self.snapshots = {} # tick -> (Game 拷貝, 玩家 1 目前的輸入代碼)
+        self._restart()
+        self._save_snapshot()
+
+    def _restart(self):
+        from game import Game
+        self.game = Game(self.screen, None, self.audio_manager, ai_archetype=self.replay.ai_archetype,
+                         map_type=self.replay.map_type, headless=self.headless, seed=self.replay.seed,
+                         deterministic=True)
+        self.game.replay_recorder = None
+        if self.game.map_manager.map_data != self.replay.map_data:
+            self.divergence_tick = 0 # 地圖生成方式改變，無法重現
+        self.ai_observer = AIActionObserver(self.game.player2_ai)
+        self.player1_inputs = dict(self.replay.player1_inputs)
+        self.ai_actions = dict(self.replay.ai_actions)
+        self.keyframes = {keyframe[0]: keyframe for keyframe in self.replay.keyframes}
+        self.current_player1_code = 0
+        self.accumulator = 0.0
+
+    @property
+    def tick(self):
+        return self.game.tick_count
+
+    @property
+    def finished(self):
+        return self.game.game_state != "PLAYING" or bool(self.replay.final_tick and self.tick >= self.replay.final_tick)
+
+    def step(self):
+        if self.finished:
+            return False
+        next_tick = self.game.tick_count + 1
+        self.current_player1_code = self.player1_inputs.get(next_tick, self.current_player1_code)
+        self.game.replay_input_code = self.current_player1_code
+        self.game.dt = self.fixed_dt
+        self.game._update_internal()
+
+        if self.divergence_tick is None:
+            if self.ai_observer.observe() != self.ai_actions.get(next_tick, 0):
+                self.divergence_tick = next_tick
+            elif next_tick in self.keyframes and state_digest(self.game) != self.keyframes[next_tick]:
+                self.divergence_tick = next_tick
+        else:
+            self.ai_observer.observe()
+        if self.snapshot_interval and next_tick % self.snapshot_interval == 0 and next_tick not in self.snapshots:
+            self._save_snapshot()
+        return True
+
+    def _save_snapshot(self):
+        self.snapshots[self.tick] = (clone_game_state(self.game), self.current_player1_code)
+
+    def _restore_snapshot(self, tick):
+        """從保存的拷貝還原 (再拷貝一次，保存的那份保持不變，可以重複跳回)。"""
+        game, self.current_player1_code = self.snapshots[tick]
+        self.game = clone_game_state(game)
+        self.ai_observer = AIActionObserver(self.game.player2_ai)
+        self.accumulator = 0.0
+
+    def run_to_end(self, max_ticks=None):
+        """無頭模式全速播放到結束 (或 max_ticks)，回傳最後的 tick。"""
+        while (max_ticks is None or self.tick < max_ticks) and self.step():
+            pass
+        return self.tick
+
+    def seek(self, tick):
+        """跳到指定的 tick (超過結尾時停在結尾)，回傳實際到達的 tick。"""
+        nearest = max((saved for saved in self.snapshots if saved <= tick), default=None)
+        if tick < self.tick or (nearest is not None and nearest > self.tick):
+            self._restore_snapshot(nearest)
+        while self.tick < tick and self.step():
+            pass
+        return self.tick
+
+    def advance(self, frame_dt):
+        """1 倍速播放：累加畫面時間，依固定步長推進。"""
+        self.accumulator += frame_dt
+        while self.accumulator >= self.fixed_dt and not self.finished:
+            self.step()
+            self.accumulator -= self.fixed_dt
+
+    def draw(self):
+        self.game._draw_internal()
+
+
+# -----------------------------------------------------------------------------
+# 命令列：python -m core.replay <重播檔> [--headless]
+# -----------------------------------------------------------------------------
+def _report(path, player):
+    divergence = "none" if player.divergence_tick is None else player.divergence_tick
+    print(f"{path}: tick {player.tick}/{player.replay.final_tick}, winner {player.replay.winner or '-'}, "
+          f"divergence_tick {divergence}")
+
+
+def play_on_screen(player):
+    """1 倍速播放：空白鍵暫停，←/→ 跳 REPLAY_SEEK_SECONDS 秒，Home 回到開頭，Esc 或關閉視窗離開。"""
+    seek_ticks = max(1, round(getattr(settings, "REPLAY_SEEK_SECONDS", 5) / player.fixed_dt))
+    clock = pygame.time.Clock()
+    paused = False
+    while True:
+        frame_dt = clock.tick(getattr(settings, "FPS", 60)) / 1000.0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key == pygame.K_SPACE:
+                paused = not paused
+                continue
+            if event.key == pygame.K_RIGHT:
+                player.seek(player.tick + seek_ticks)
+            elif event.key == pygame.K_LEFT:
+                player.seek(max(0, player.tick - seek_ticks))
+            elif event.key == pygame.K_HOME:
+                player.seek(0)
+            else:
+                continue
+            player.game._previous_dynamic_rects = None # 跳轉後 Game 可能換成還原的拷貝，整個畫面重畫
+            frame_dt = 0.0 # 快轉花掉的時間不算進播放進度
+            clock.tick()
+        if not paused:
+            player.advance(frame_dt)
+        player.draw()
+        if player.game.dirty_rects is not None:
+            pygame.display.update(player.game.dirty_rects)
+        else:
+            pygame.display.flip()
+
+
+def main(argv=None):
+    """載入重播檔；--headless 全速重跑並印出 divergence_tick (有分歧時回傳 1)，否則開視窗 1 倍速播放。"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Play back or verify a saved .pcreplay file.")
+    parser.add_argument("path", help="重播檔路徑")
+    parser.add_argument("--headless", action="store_true", help="不開視窗，全速跑完並回報第一個分歧的 tick")
+    parser.add_argument("--max-ticks", type=int, default=None, help="無頭模式最多跑幾個 tick")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    if args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # 載入圖片 (convert_alpha) 仍需要一個顯示模式
+    pygame.init()
+    screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    pygame.display.set_caption(f"{settings.TITLE} - Replay")
+    player = ReplayPlayer(replay, screen, headless=args.headless)
+    try:
+        if args.headless:
+            player.run_to_end(args.max_ticks)
+        else:
+            play_on_screen(player)
+        _report(args.path, player)
+    finally:
+        player.game.shutdown()
+        pygame.quit()
+    return 0 if player.divergence_tick is None else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,418 @@
+# oop-2025-proj-pycade/core/simulation.py
+
+import random
+import settings
+from core.blast_footprint import compute_blast_tiles
+from core.match_random import ITEM_RNG, match_stream_rng
+
+# 行動：None 或 "wait" 不動作，"bomb" 放炸彈，(dx, dy) 往相鄰格移動
+ACTION_WAIT = "wait"
+ACTION_BOMB = "bomb"
+MOVE_ACTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+class SimPlayer:
+    """純資料的玩家狀態 (對應 sprites.player.Player 中與規則有關的欄位)。"""
+    __slots__ = ('tile_x', 'tile_y', 'lives', 'max_bombs', 'bombs_placed_count', 'bomb_range',
+                 'score', 'is_alive', 'last_hit_ms', 'action_timer', 'move_duration')
+
+    def __init__(self, tile_x, tile_y, move_duration):
+        self.tile_x = tile_x
+        self.tile_y = tile_y
+        self.lives = settings.MAX_LIVES
+        self.max_bombs = settings.INITIAL_BOMBS
+        self.bombs_placed_count = 0
+        self.bomb_range = settings.INITIAL_BOMB_RANGE
+        self.score = 0
+        self.is_alive = True
+        self.last_hit_ms = None # None 表示從未受傷 (不受無敵時間限制)
+        self.action_timer = 0.0 # 秒，> 0 時不能再移動
+        self.move_duration = move_duration
+
+    def state(self):
+        return (self.tile_x, self.tile_y, self.lives, self.max_bombs, self.bombs_placed_count, self.bomb_range,
+                self.score, self.is_alive, self.last_hit_ms, self.action_timer, self.move_duration)
+
+    def set_state(self, state):
+        (self.tile_x, self.tile_y, self.lives, self.max_bombs, self.bombs_placed_count, self.bomb_range,
+         self.score, self.is_alive, self.last_hit_ms, self.action_timer, self.move_duration) = state
+
+
+class SimBomb:
+    """純資料的炸彈狀態；owner 是 players 列表中的索引。"""
+    __slots__ = ('tile_x', 'tile_y', 'owner', 'bomb_range', 'time_left', 'owner_has_left_tile', 'exploded')
+
+    def __init__(self, tile_x, tile_y, owner, bomb_range, time_left):
+        self.tile_x = tile_x
+        self.tile_y = tile_y
+        self.owner = owner
+        self.bomb_range = bomb_range
+        self.time_left = time_left # 毫秒
+        self.owner_has_left_tile = False
+        self.exploded = False
+
+    def state(self):
+        return (self.tile_x, self.tile_y, self.owner, self.bomb_range, self.time_left, self.owner_has_left_tile)
+
+    @classmethod
+    def from_state(cls, state):
+        bomb = cls(state[0], state[1], state[2], state[3], state[4])
+        bomb.owner_has_left_tile = state[5]
+        return bomb
+
+
+class Simulation:
+    """
+    不依賴 Surface、顯示或 pygame 時鐘的對戰規則核心。
+    棋盤 (與 MapManager.map_data 相同的字串列表)、玩家、炸彈、爆炸與道具都是純資料，
+    step(actions, dt) 依 Game._update_internal 的順序推進一個 tick：
+    玩家 0 放炸彈 -> 其他玩家 (AI) 行動 -> 動作計時 -> 玩家 0 移動 -> 爆炸熄滅 -> 炸彈倒數與 (連鎖) 引爆
+    -> 火焰傷害與炸毀 'D' -> 拾取道具 -> 勝負判定。
+    玩家 0 的移動對應鍵盤輸入 (Player.get_input 在精靈更新時、自己的動作計時遞減之後才移動)，兩人搶同一格時 AI 先到；
+    Game 的觸控方向在 tick 開始、AI 之前就移動，這條路徑不在模擬範圍內。
+    道具掉落與 Game 一樣取用對戰種子的 item_rng 串流 (同一個 tick 炸毀多面牆時依座標順序)，
+    from_game 沿用 Game 目前的串流狀態，之後掉落的道具也與 Game 相同。
+    與 Game 逐 tick 對照 (test_game.py 的 test_simulation_runs_in_lockstep_with_game)：同樣的行動下
+    位置、生命、炸彈、道具與地圖每個 tick 都相同；計時一律用整數毫秒 (clock_ms)，與 GameClock.get_ticks() 一致。
+
+    snapshot() / restore() 供前瞻搜尋使用：地圖、爆炸、道具與 item_rng 以寫入時複製 (copy-on-write) 共用，
+    快照只複製玩家與炸彈的少數欄位，不必 deepcopy 任何精靈群組。
+    (因此外部不要直接改 map_data / explosions / items 的內容，要經過 step() 或 _set_tile()。)
+    """
+
+    def __init__(self, map_data, player_starts, seed=None, move_durations=None):
+        self.map_data = list(map_data)
+        self.height = len(self.map_data)
+        self.width = len(self.map_data[0]) if self.height > 0 else 0
+        if move_durations is None:
+            move_durations = [settings.HUMAN_GRID_MOVE_ACTION_DURATION] + \
+                             [settings.AI_GRID_MOVE_ACTION_DURATION] * (len(player_starts) - 1)
+        self.players = [SimPlayer(x, y, duration) for (x, y), duration in zip(player_starts, move_durations)]
+        self.bombs = []
+        self.explosions = {} # (x, y) -> 最近一次被火焰覆蓋的時間 (毫秒)
+        self.items = {} # (x, y) -> 道具類型
+        self.seed = seed if seed is not None else 0
+        self.item_rng = match_stream_rng(self.seed, ITEM_RNG)
+        # 寫入時複製旗標：True 表示這個容器與某個快照共用，修改前要先複製
+        self._map_shared = False
+        self._explosions_shared = False
+        self._items_shared = False
+        self._item_rng_shared = False
+        self.time_ms = 0.0 # 與 GameClock.now_ms 相同的浮點毫秒；計時判斷用 clock_ms (整數)
+        self.tick_count = 0
+        self.time_elapsed_seconds = 0.0
+        self.game_over = False
+        self.winner = None # "P1"、"AI"、"DRAW"，或 None (尚未結束)
+        self.item_drop_chance = settings.WALL_ITEM_DROP_CHANCE
+        self.item_types = list(settings.ITEM_DROP_WEIGHTS.keys())
+        self.item_weights = list(settings.ITEM_DROP_WEIGHTS.values())
+
+    @property
+    def clock_ms(self):
+        """與 GameClock.get_ticks() 相同的整數毫秒：爆炸與無敵時間都以它判斷，結果才會和 Game 逐 tick 一致。"""
+        return int(self.time_ms)
+
+    @classmethod
+    def from_game(cls, game, seed=None):
+        """由進行中的 Game 建立對應的模擬狀態 (玩家 1 為索引 0，AI 為索引 1)；時間沿用 Game 的遊戲時鐘。"""
+        map_manager = game.map_manager
+        sprites = [game.player1, game.player2_ai]
+        if seed is None:
+            seed = getattr(game, 'match_seed', None)
+        sim = cls(map_manager.map_data, [(p.tile_x, p.tile_y) for p in sprites], seed=seed,
+                  move_durations=[p.ACTION_ANIMATION_DURATION for p in sprites])
+        game_clock = getattr(game, 'game_clock', None)
+        if game_clock is not None:
+            sim.time_ms = float(getattr(game_clock, 'now_ms', game_clock.get_ticks()))
+        for sim_player, player in zip(sim.players, sprites):
+            sim_player.lives = player.lives
+            sim_player.max_bombs = player.max_bombs
+            sim_player.bombs_placed_count = player.bombs_placed_count
+            sim_player.bomb_range = player.bomb_range
+            sim_player.score = player.score
+            sim_player.is_alive = player.is_alive
+            sim_player.action_timer = player.action_timer
+            if game_clock is not None and sim.clock_ms - player.last_hit_time <= player.invincible_duration:
+                sim_player.last_hit_ms = player.last_hit_time
+        for bomb in game.bombs_group:
+            if bomb.exploded:
+                continue
+            owner = sprites.index(bomb.placed_by_player) if bomb.placed_by_player in sprites else -1
+            sim_bomb = SimBomb(bomb.current_tile_x, bomb.current_tile_y, owner,
+                               bomb.placed_by_player.bomb_range, bomb.time_left)
+            sim_bomb.owner_has_left_tile = bomb.owner_has_left_tile
+            sim.bombs.append(sim_bomb)
+        for explosion in game.explosions_group:
+            spawn_ms = explosion.spawn_time if game_clock is not None else sim.clock_ms
+            tile = (explosion.tile_x, explosion.tile_y)
+            sim.explosions[tile] = max(spawn_ms, sim.explosions.get(tile, spawn_ms))
+        for item in game.items_group:
+            sim.items[(item.rect.x // settings.TILE_SIZE, item.rect.y // settings.TILE_SIZE)] = item.type
+        game_item_rng = getattr(game, ITEM_RNG, None)
+        if isinstance(game_item_rng, random.Random):
+            sim.item_rng.setstate(game_item_rng.getstate())
+        sim.time_elapsed_seconds = game.time_elapsed_seconds
+        return sim
+
+    # ------------------------------------------------------------------
+    # 快照 (copy-on-write)
+    # ------------------------------------------------------------------
+    def snapshot(self):
+        """回傳目前狀態的不可變快照；之後對模擬的修改不會影響它。"""
+        self._map_shared = self._explosions_shared = self._items_shared = self._item_rng_shared = True
+        return (self.map_data, self.explosions, self.items, self.item_rng,
+                tuple([player.state() for player in self.players]),
+                tuple([bomb.state() for bomb in self.bombs if not bomb.exploded]),
+                self.time_ms, self.tick_count, self.time_elapsed_seconds, self.game_over, self.winner)
+
+    def restore(self, snapshot):
+        """回到 snapshot() 當時的狀態；同一個快照可以重複還原。"""
+        (self.map_data, self.explosions, self.items, self.item_rng, player_states, bomb_states,
+         self.time_ms, self.tick_count, self.time_elapsed_seconds, self.game_over, self.winner) = snapshot
+        self._map_shared = self._explosions_shared = self._items_shared = self._item_rng_shared = True
+        for player, state in zip(self.players, player_states):
+            player.set_state(state)
+        self.bombs = [SimBomb.from_state(state) for state in bomb_states]
+
+    @classmethod
+    def from_snapshot(cls, template, snapshot):
+        """以 template 的棋盤尺寸與設定建立另一個模擬，並還原到 snapshot (例如給另一個執行緒的搜尋使用)。"""
+        sim = cls(template.map_data, [(p.tile_x, p.tile_y) for p in template.players], seed=template.seed,
+                  move_durations=[p.move_duration for p in template.players])
+        sim.restore(snapshot)
+        return sim
+
+    def _set_tile(self, x, y, char):
+        if self._map_shared:
+            self.map_data = list(self.map_data)
+            self._map_shared = False
+        row = self.map_data[y]
+        self.map_data[y] = row[:x] + char + row[x + 1:]
+
+    def _own_explosions(self):
+        if self._explosions_shared:
+            self.explosions = dict(self.explosions)
+            self._explosions_shared = False
+        return self.explosions
+
+    def _own_items(self):
+        if self._items_shared:
+            self.items = dict(self.items)
+            self._items_shared = False
+        return self.items
+
+    def _own_item_rng(self):
+        """掉落道具時才複製亂數狀態 (與快照共用的 Random 不能直接抽)。"""
+        if self._item_rng_shared:
+            rng = random.Random()
+            rng.setstate(self.item_rng.getstate())
+            self.item_rng = rng
+            self._item_rng_shared = False
+        return self.item_rng
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+    def bomb_at(self, x, y):
+        for bomb in self.bombs:
+            if bomb.tile_x == x and bomb.tile_y == y and not bomb.exploded:
+                return bomb
+        return None
+
+    def player_at(self, x, y, exclude=None):
+        for index, player in enumerate(self.players):
+            if index != exclude and player.is_alive and player.tile_x == x and player.tile_y == y:
+                return player
+        return None
+
+    # ------------------------------------------------------------------
+    # 行動 (對應 Player.attempt_move_to_tile / Player.place_bomb)
+    # ------------------------------------------------------------------
+    def try_move(self, index, dx, dy):
+        player = self.players[index]
+        if not player.is_alive or player.action_timer > 0:
+            return False
+        if (dx == 0) == (dy == 0): # 不動或斜向移動
+            return False
+        tx, ty = player.tile_x + dx, player.tile_y + dy
+        if not (0 <= tx < self.width and 0 <= ty < self.height):
+            return False
+        if self.map_data[ty][tx] in ('W', 'D'):
+            return False
+        if self.player_at(tx, ty, exclude=index):
+            return False
+        bomb = self.bomb_at(tx, ty)
+        if bomb is not None and (bomb.owner != index or bomb.owner_has_left_tile):
+            return False # 別人的炸彈，或自己已經離開過的炸彈
+        player.tile_x, player.tile_y = tx, ty
+        player.action_timer = player.move_duration
+        return True
+
+    def try_place_bomb(self, index):
+        player = self.players[index]
+        if not player.is_alive or player.bombs_placed_count >= player.max_bombs:
+            return False
+        x, y = player.tile_x, player.tile_y
+        if self.player_at(x, y, exclude=index) or self.bomb_at(x, y):
+            return False
+        self.bombs.append(SimBomb(x, y, index, player.bomb_range, float(settings.BOMB_TIMER)))
+        player.bombs_placed_count += 1
+        return True
+
+    def apply_action(self, index, action):
+        if action is None or action == ACTION_WAIT:
+            return False
+        if action == ACTION_BOMB:
+            return self.try_place_bomb(index)
+        return self.try_move(index, action[0], action[1])
+
+    # ------------------------------------------------------------------
+    # 推進
+    # ------------------------------------------------------------------
+    def step(self, actions, dt):
+        """
+        推進一個 tick。actions 是每個玩家的行動 (序列，或 {索引: 行動})，dt 以秒為單位。
+        回傳 self.game_over。
+        """
+        if self.game_over:
+            return True
+        self.tick_count += 1
+        self.time_ms += dt * 1000
+        dt_ms = dt * 1000
+
+        self.time_elapsed_seconds += dt
+        if self.time_elapsed_seconds >= settings.GAME_DURATION_SECONDS:
+            self._finish_by_time()
+            return True
+
+        # 玩家 0 的炸彈在 tick 開始時放 (Game._apply_player1_input)，移動等到精靈更新時 (鍵盤輸入)
+        action_items = actions.items() if isinstance(actions, dict) else enumerate(actions)
+        player0_move = None
+        for index, action in action_items:
+            if index == 0 and action is not None and action not in (ACTION_WAIT, ACTION_BOMB):
+                player0_move = action
+            else:
+                self.apply_action(index, action)
+
+        for player in self.players:
+            if player.action_timer > 0:
+                player.action_timer = max(0.0, player.action_timer - dt)
+        if player0_move is not None:
+            self.try_move(0, player0_move[0], player0_move[1])
+
+        # 爆炸熄滅 (對應 Explosion.update：存在時間超過 EXPLOSION_DURATION)
+        if self.explosions:
+            duration = settings.EXPLOSION_DURATION
+            now = self.clock_ms
+            if any(now - spawn_ms > duration for spawn_ms in self.explosions.values()):
+                self.explosions = {tile: spawn_ms for tile, spawn_ms in self.explosions.items()
+                                   if now - spawn_ms <= duration}
+                self._explosions_shared = False
+
+        # 炸彈倒數與引爆 (對應 Bomb.update / Bomb.explode，含連鎖)
+        for bomb in list(self.bombs):
+            if bomb.exploded:
+                continue
+            if not bomb.owner_has_left_tile and 0 <= bomb.owner < len(self.players):
+                owner = self.players[bomb.owner]
+                if owner.tile_x != bomb.tile_x or owner.tile_y != bomb.tile_y:
+                    bomb.owner_has_left_tile = True
+            bomb.time_left -= dt_ms
+            if bomb.time_left <= 0:
+                self._explode(bomb)
+        self.bombs = [bomb for bomb in self.bombs if not bomb.exploded]
+
+        if self.explosions:
+            self._apply_blasts()
+
+        if self.items:
+            for player in self.players:
+                if player.is_alive:
+                    tile = (player.tile_x, player.tile_y)
+                    if tile in self.items:
+                        item_type = self._own_items().pop(tile)
+                        self._apply_item(player, item_type)
+
+        self._check_knockout()
+        return self.game_over
+
+    def _explode(self, bomb):
+        bomb.exploded = True
+        bomb_range = bomb.bomb_range
+        if 0 <= bomb.owner < len(self.players):
+            owner = self.players[bomb.owner]
+            owner.bombs_placed_count = max(0, owner.bombs_placed_count - 1)
+            bomb_range = owner.bomb_range # 與 Bomb.explode 相同，使用引爆當下主人的火力
+        tiles = compute_blast_tiles(self.map_data, self.width, self.height, bomb.tile_x, bomb.tile_y, bomb_range)
+        explosions = self._own_explosions()
+        for tile in tiles:
+            explosions[tile] = self.clock_ms
+        blast_tile_set = set(tiles)
+        for other_bomb in self.bombs:
+            if not other_bomb.exploded and (other_bomb.tile_x, other_bomb.tile_y) in blast_tile_set:
+                self._explode(other_bomb)
+
+    def _apply_blasts(self):
+        invincible_ms = settings.PLAYER_INVINCIBLE_DURATION
+        for player in self.players:
+            if player.is_alive and (player.tile_x, player.tile_y) in self.explosions:
+                if player.last_hit_ms is None or self.clock_ms - player.last_hit_ms > invincible_ms:
+                    player.lives -= 1
+                    player.last_hit_ms = self.clock_ms
+                    if player.lives <= 0:
+                        player.lives = 0
+                        player.is_alive = False
+
+        # 與 Game 相同：依座標順序炸毀，每面牆先抽是否掉落 (DestructibleWall.try_drop_item)，再抽種類 (create_random_item)
+        for (x, y) in sorted(tile for tile in self.explosions if self.map_data[tile[1]][tile[0]] == 'D'):
+            self._set_tile(x, y, '.')
+            rng = self._own_item_rng()
+            if rng.random() < self.item_drop_chance and self.item_types and sum(self.item_weights) > 0:
+                self._own_items()[(x, y)] = rng.choices(self.item_types, weights=self.item_weights, k=1)[0]
+
+    def _apply_item(self, player, item_type):
+        if item_type == settings.ITEM_TYPE_SCORE:
+            player.score += settings.SCORE_ITEM_VALUE
+            return
+        if item_type == settings.ITEM_TYPE_LIFE:
+            player.lives += 1
+        elif item_type == settings.ITEM_TYPE_BOMB_CAPACITY:
+            player.max_bombs += 1
+        elif item_type == settings.ITEM_TYPE_BOMB_RANGE:
+            player.bomb_range += 1
+        player.score += getattr(settings, "GENERIC_ITEM_SCORE_VALUE", 10)
+
+    def _finish_by_time(self):
+        p1, ai = self.players[0], self.players[1]
+        if p1.is_alive and ai.is_alive:
+            if p1.lives != ai.lives:
+                self.winner = "P1" if p1.lives > ai.lives else "AI"
+            elif p1.score != ai.score:
+                self.winner = "P1" if p1.score > ai.score else "AI"
+            else:
+                self.winner = "DRAW"
+        elif p1.is_alive:
+            self.winner = "P1"
+        elif ai.is_alive:
+            self.winner = "AI"
+        else:
+            self.winner = "DRAW"
+        self.game_over = True
+
+    def _check_knockout(self):
+        p1_alive, ai_alive = self.players[0].is_alive, self.players[1].is_alive
+        if p1_alive and ai_alive:
+            return
+        self.winner = "P1" if p1_alive else "AI" if ai_alive else "DRAW"
+        self.game_over = True
+
+
+def run_headless_match(simulation, policies, dt=1.0 / 60, max_ticks=None):
+    """
+    以固定 dt 連續推進直到分出勝負。policies[i](simulation, i) 回傳玩家 i 這個 tick 的行動。
+    回傳 simulation.winner。
+    """
+    while not simulation.game_over and (max_ticks is None or simulation.tick_count < max_ticks):
+        actions = [policy(simulation, index) for index, policy in enumerate(policies)]
+        simulation.step(actions, dt)
+    return simulation.winner
@@ -3,6 +3,10 @@
 import pygame
 import settings
 from core.map_manager import MapManager
+from core.occupancy_index import TileIndexedGroup, sprite_tile, sprites_at
+from core.game_clock import GameClock
+from core.match_random import create_match_rngs, new_match_seed
+from core.replay import ReplayRecorder, encode_player1_input, decode_player1_input
 from core.touch_controls import TouchControls
 from sprites.player import Player
 from core.leaderboard_manager import LeaderboardManager
@@ -14,14 +18,23 @@ from core.ai_controller import AIController as OriginalAIController
 from core.ai_conservative import ConservativeAIController
 from core.ai_aggressive import AggressiveAIController
 from core.ai_item_focused import ItemFocusedAIController
+from core.ai_mcts import MCTSAIController
 from sprites.draw_text import DIGIT_MAP
-from sprites.draw_text import draw_text_with_shadow, draw_text_with_outline
+from sprites.draw_text import draw_text_with_shadow, draw_text_with_outline, render_text
 
 
 
 class Game:
-    def __init__(self, screen, clock, audio_manager,ai_archetype="original", map_type="classic", headless=False):
+    def __init__(self, screen, clock, audio_manager,ai_archetype="original", map_type="classic", headless=False, seed=None, deterministic=None):
         self.headless = headless 
+        # 【新增】固定步長模式與對戰種子 (None 時使用 settings 的設定；錄製重播一定要固定步長才能逐 tick 重現)
+        if deterministic is None:
+            deterministic = getattr(settings, "DETERMINISTIC_MODE", False) or getattr(settings, "REPLAY_RECORDING", False)
+        self.deterministic = deterministic
+        self.fixed_dt = getattr(settings, "FIXED_SIMULATION_DT", 1 / 60)
+        self.max_steps_per_frame = getattr(settings, "MAX_SIMULATION_STEPS_PER_FRAME", 5)
+        self.sim_accumulator = 0.0
+        self.seed = getattr(settings, "MATCH_SEED", None) if seed is None else seed
         self.screen = screen
         self.clock = clock
 
@@ -70,14 +83,26 @@ class Game:
             self.text_brick,
             (settings.TILE_SIZE, settings.TILE_SIZE)
         )
+        self.pixel_digit_surfaces = {} # 【新增】計時器數字的預組 Surface (見 get_pixel_digit_surface)
+        # 【新增】靜態場地背景的離屏快取 (見 _get_background_surface)
+        self.background_surface = None
+        # 【新增】髒矩形模式：dirty_rects 為 None 表示整個畫面都要更新 (main.py 會改用 flip)
+        self.dirty_rect_rendering = getattr(settings, "DIRTY_RECT_RENDERING", False)
+        self.show_ai_debug_overlay = not self.dirty_rect_rendering or getattr(settings, "DIRTY_RECT_SHOW_AI_DEBUG", False)
+        self.dirty_rects = None
+        self._previous_dynamic_rects = None # None 表示下一幀必須整個重繪
+        self._hud_state_key = None
+        if not headless:
+            self._get_background_surface()
 
         # --- Sprite Groups ---
         self.all_sprites = pygame.sprite.Group()
-        self.players_group = pygame.sprite.Group()
-        self.bombs_group = pygame.sprite.Group()
+        # 玩家、炸彈、道具與牆壁的 Group 同時維護格子索引，佔用查詢是 O(1)
+        self.players_group = TileIndexedGroup()
+        self.bombs_group = TileIndexedGroup()
         self.explosions_group = pygame.sprite.Group()
-        self.items_group = pygame.sprite.Group()
-        self.solid_obstacles_group = pygame.sprite.Group()
+        self.items_group = TileIndexedGroup()
+        self.solid_obstacles_group = TileIndexedGroup()
         self.floating_texts_group = pygame.sprite.Group()
 
         # --- Managers and Player/AI instances ---
@@ -238,6 +263,7 @@ class Game:
     
     def setup_initial_state(self):
         # (此函式保持不變)
+        self.shutdown() # 【新增】重新開始時先停掉上一場 AI 的背景規劃執行緒
         self.all_sprites.empty()
         self.players_group.empty()
         self.bombs_group.empty()
@@ -256,6 +282,17 @@ class Game:
         self.input_box_active = False
         self.score_to_submit = 0
         self.score_submitted_message_timer = 0.0
+        self.tick_count = 0 # 每次遊戲邏輯更新 +1，供 AI 的每 tick 快取 (例如 DangerField) 判斷是否過期
+        self.game_clock = GameClock() # 【新增】依 dt 推進的遊戲時鐘，AI 與精靈的計時都讀它
+        self.sim_accumulator = 0.0
+        # 【新增】地圖、道具掉落與 AI 的亂數都來自這場對戰的種子 (沒有指定種子時每場重新挑選)
+        self.match_seed = self.seed if self.seed is not None else new_match_seed()
+        for stream, rng in create_match_rngs(self.match_seed).items():
+            setattr(self, stream, rng)
+        self.player1_bomb_requested = False # 【新增】事件要求放炸彈，在下一個 tick 開始時執行
+        self.replay_input_code = None # 【新增】重播時由 ReplayPlayer 提供玩家 1 的輸入代碼
+        self.replay_recorder = None
+        self.danger_field_cache = None
 
         grid_width = getattr(settings, 'GRID_WIDTH', 15)
         grid_height = getattr(settings, 'GRID_HEIGHT', 11)
@@ -308,6 +345,7 @@ class Game:
         elif self.ai_archetype == "conservative": ai_controller_class = ConservativeAIController
         elif self.ai_archetype == "aggressive": ai_controller_class = AggressiveAIController
         elif self.ai_archetype == "item_focused": ai_controller_class = ItemFocusedAIController
+        elif self.ai_archetype == "mcts": ai_controller_class = MCTSAIController
         else: ai_controller_class = OriginalAIController
 
         self.ai_controller_p2 = ai_controller_class(self.player2_ai, self)
@@ -319,14 +357,28 @@ class Game:
         if self.ai_controller_p2:
             self.ai_controller_p2.human_player_sprite = self.player1
         
+        # 【新增】錄製重播 (種子、初始地圖、每個 tick 的輸入與 AI 動作)
+        if getattr(settings, "REPLAY_RECORDING", False):
+            if self.deterministic:
+                self.replay_recorder = ReplayRecorder(self)
+            else:
+                print("[Game] Warning: REPLAY_RECORDING needs deterministic (fixed-step) mode; this match will not be recorded.")
+
         # 【新增】重置 running 和 restart_game 旗標，確保每次 Game 場景開始時都是乾淨的狀態
         self.running = True
         self.restart_game = False
 
+    def shutdown(self):
+        """【新增】場景結束或重新開始時釋放 AI 的背景規劃執行緒 (可重複呼叫)。"""
+        controller = getattr(self, 'ai_controller_p2', None)
+        if controller is not None and callable(getattr(controller, 'shutdown', None)):
+            controller.shutdown()
+
     def run_one_frame(self, events_from_main_loop, dt):
         # 如果 Game 場景已經設定為不再運行 (例如，玩家按 ESC 或遊戲結束)
         if not self.running:
             from core.menu import Menu
+            self.shutdown()
             # ！！！～～～
             # 根據 restart_game 旗標決定返回 Menu 還是 "QUIT" 指令
             if self.restart_game:
@@ -355,7 +407,10 @@ class Game:
                 self.restart_game = True
         else:
             self._process_events_internal(events_from_main_loop)
-            self._update_internal()
+            if self.deterministic:
+                self._run_fixed_steps(dt)
+            else:
+                self._update_internal()
 
         # 繪製畫面
         self._draw_internal()
@@ -367,6 +422,7 @@ class Game:
         # 檢查場景是否應該結束
         if not self.running:
             from core.menu import Menu
+            self.shutdown()
             if self.restart_game:
                 self.audio_manager.stop_music()
                 self.audio_manager.stop_all_sounds()
@@ -405,7 +461,7 @@ class Game:
             if self.game_state == "PLAYING" and self.touch_controls:
                 action = self.touch_controls.handle_event(event)
                 if action == 'BOMB' and self.player1 and self.player1.is_alive:
-                    self.player1.place_bomb()
+                    self.player1_bomb_requested = True
 
             # 【新增】處理暫停按鈕點擊
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -437,7 +493,7 @@ class Game:
                 if self.game_state == "PLAYING":
                     if event.key == pygame.K_f:
                         if self.player1 and self.player1.is_alive:
-                            self.player1.place_bomb()
+                            self.player1_bomb_requested = True # 【修改】在下一個 tick 開始時放置
                 
                 # 'GAME_OVER' 狀態下的鍵盤事件
                 elif self.game_state == "GAME_OVER":
@@ -445,23 +501,80 @@ class Game:
                         self.restart_game = True
                         self.running = False
 
+    def _read_touch_direction(self):
+        if not self.touch_controls:
+            return (0, 0)
+        for name, direction in (('UP', (0, -1)), ('DOWN', (0, 1)), ('LEFT', (-1, 0)), ('RIGHT', (1, 0))):
+            if self.touch_controls.is_pressed(name):
+                return direction
+        return (0, 0)
+
+    def _apply_player1_input(self):
+        """
+        收集並套用玩家 1 這個 tick 的輸入：事件要求的炸彈、持續按住的觸控方向 (立即嘗試移動)，
+        以及鍵盤方向 (交給 Player.get_input 在精靈更新時使用，與原本的時機相同)。
+        重播時改用 replay_input_code；錄影時把代碼交給 replay_recorder。
+        """
+        if not self.player1:
+            return
+        if self.replay_input_code is not None:
+            key_direction, touch_direction, bomb = decode_player1_input(self.replay_input_code)
+        else:
+            touch_direction = self._read_touch_direction()
+            key_direction = self.player1.read_move_keys() if not self.player1.is_ai else (0, 0)
+            bomb = self.player1_bomb_requested
+        self.player1_bomb_requested = False
+        if self.replay_recorder is not None:
+            self.replay_recorder.record_player1_input(self.tick_count, encode_player1_input(key_direction, touch_direction, bomb))
+
+        if self.player1.is_alive:
+            if bomb:
+                self.player1.place_bomb()
+            if touch_direction != (0, 0):
+                self.player1.attempt_move_to_tile(*touch_direction)
+        self.player1.input_override = key_direction if not self.player1.is_ai else None
+
+    def _finish_replay_recording(self):
+        if self.time_up_winner:
+            winner = self.time_up_winner
+        elif self.player1.is_alive != self.player2_ai.is_alive:
+            winner = "P1" if self.player1.is_alive else "AI"
+        else:
+            winner = "DRAW"
+        replay = self.replay_recorder.finish(self, winner)
+        path = self.replay_recorder.default_path()
+        try:
+            replay.save(path)
+            print(f"[Replay] Saved {len(replay.to_bytes())} bytes to {path}")
+        except OSError as e:
+            print(f"[Replay] Could not save replay to '{path}': {e}")
+
+    def _run_fixed_steps(self, frame_dt):
+        """
+        固定步長模式：把畫面的 dt 累積起來，每次以 fixed_dt 推進邏輯，與畫面更新率無關。
+        同一個種子加上同樣的輸入，每一步的結果都相同。單一畫面最多補 max_steps_per_frame 步，剩下的時間捨棄。
+        """
+        self.sim_accumulator += frame_dt
+        steps = 0
+        while self.sim_accumulator >= self.fixed_dt and steps < self.max_steps_per_frame:
+            self.dt = self.fixed_dt
+            self._update_internal()
+            self.sim_accumulator -= self.fixed_dt
+            steps += 1
+        if steps >= self.max_steps_per_frame:
+            self.sim_accumulator = min(self.sim_accumulator, self.fixed_dt)
+        self.dt = frame_dt
+
     def _update_internal(self):
         # 【新增】如果遊戲暫停，則不更新
         if self.paused:
             return
 
         if self.game_state == "PLAYING":
-            # --- 新增：處理持續性的觸控移動 ---
-            if self.touch_controls and self.player1 and self.player1.is_alive:
-                if self.touch_controls.is_pressed('UP'):
-                    self.player1.attempt_move_to_tile(0, -1)
-                elif self.touch_controls.is_pressed('DOWN'):
-                    self.player1.attempt_move_to_tile(0, 1)
-                elif self.touch_controls.is_pressed('LEFT'):
-                    self.player1.attempt_move_to_tile(-1, 0)
-                elif self.touch_controls.is_pressed('RIGHT'):
-                    self.player1.attempt_move_to_tile(1, 0)
-            # --- 觸控移動處理結束 ---
+            self.tick_count += 1
+            self.game_clock.advance(self.dt)
+            # 【修改】玩家 1 這個 tick 的輸入 (事件放炸彈、觸控移動、鍵盤方向) 統一在這裡處理，供錄影 / 重播使用
+            self._apply_player1_input()
 
             p1_won_by_ko = False
             p1_won_by_time = False
@@ -514,16 +627,20 @@ class Game:
                 self.audio_manager.stop_sound('tick')
                 self.ticking_sound_playing = False
 
-            for player in list(self.players_group):
-                if player.is_alive:
-                    if pygame.sprite.spritecollide(player, self.explosions_group, False, pygame.sprite.collide_rect):
+            # 【新增】每個 tick 收集一次爆炸所在的格子，傷害判定改為集合查詢，
+            # 只處理真正位於爆炸格上的牆，不再對每個玩家/每面牆做 spritecollide。
+            blast_tiles = {sprite_tile(explosion) for explosion in self.explosions_group}
+            if blast_tiles:
+                for player in list(self.players_group):
+                    if player.is_alive and (player.tile_x, player.tile_y) in blast_tiles:
                         player.take_damage()
 
-            if hasattr(self.map_manager, 'destructible_walls_group'):
-                for d_wall in list(self.map_manager.destructible_walls_group):
-                    if d_wall.alive():
-                        if pygame.sprite.spritecollide(d_wall, self.explosions_group, False):
-                            d_wall.take_damage()
+                if hasattr(self.map_manager, 'destructible_walls_group'):
+                    # 依座標排序：同一個 tick 炸毀多面牆時，道具掉落取用 item_rng 的順序固定 (Simulation 也是如此)
+                    for tile_x, tile_y in sorted(blast_tiles):
+                        for d_wall in list(sprites_at(self.map_manager.destructible_walls_group, tile_x, tile_y)):
+                            if d_wall.alive():
+                                d_wall.take_damage()
 
             for player in list(self.players_group):
                 if player.is_alive:
@@ -554,6 +671,11 @@ class Game:
                     self.game_timer_active = False
                     if human_player_alive: p1_won_by_ko = True
 
+            if self.replay_recorder is not None and not self.replay_recorder.finished:
+                self.replay_recorder.end_tick(self)
+                if self.game_state != "PLAYING":
+                    self._finish_replay_recording()
+
             if self.game_state == "GAME_OVER":
                 is_p1_winner = (p1_won_by_ko or p1_won_by_time)
                 if is_p1_winner and self.player1 and self.leaderboard_manager.is_score_high_enough(self.player1.score):
@@ -591,65 +713,177 @@ class Game:
                 self.running = False # 標記 Game 場景結束
 
     # 【修改】將原本的 draw() 改名為 _draw_internal()
-    def _draw_internal(self):
-        if self.headless:
-            return
-        # (draw 函式的內容保持不變)
-        # self.screen.fill(settings.WHITE)
+    def _build_background_surface(self):
+        """把地板、側邊、文字區與邊框磚塊組合到一張離屏 Surface 上 (內容永遠不變)。"""
+        screen_width, screen_height = self.screen.get_size()
+        background = pygame.Surface((screen_width, screen_height)).convert()
         tile_img = self.brick_tile_image
         tile_width, tile_height = tile_img.get_size()
 
-        screen_width, screen_height = self.screen.get_size()
-
         for y in range(tile_height, tile_height*10, tile_height):
             for x in range(tile_width, tile_width*14, tile_width):
-                self.screen.blit(tile_img, (x, y))
+                background.blit(tile_img, (x, y))
         for y in range(tile_height, tile_height*15, tile_height):
             for x in range(tile_width*15, screen_width-tile_width, tile_width):
-                self.screen.blit(self.beside_brick, (x, y))
+                background.blit(self.beside_brick, (x, y))
         for y in range(tile_height*11, screen_height-tile_height, tile_height):
             for x in range(tile_width, tile_width*15, tile_width):
-                self.screen.blit(self.text_brick, (x, y))
+                background.blit(self.text_brick, (x, y))
         for y in range(tile_height*15, screen_height-tile_height, tile_height):
             for x in range(tile_width*15, screen_width-tile_width, tile_width):
-                self.screen.blit(self.text_brick, (x, y))
+                background.blit(self.text_brick, (x, y))
 
         for y in range(0, screen_height, tile_height):
-            self.screen.blit(self.border_brick, (0, y))
-            self.screen.blit(self.border_brick, (screen_width - tile_width, y))
-            self.screen.blit(self.border_brick, (tile_width*14, y))
+            background.blit(self.border_brick, (0, y))
+            background.blit(self.border_brick, (screen_width - tile_width, y))
+            background.blit(self.border_brick, (tile_width*14, y))
         for x in range(0, screen_width, tile_width):
-            self.screen.blit(self.border_brick, (x, 0))
-            self.screen.blit(self.border_brick, (x, tile_height*18))
+            background.blit(self.border_brick, (x, 0))
+            background.blit(self.border_brick, (x, tile_height*18))
         for x in range(tile_width*15, screen_width-tile_width, tile_width):
-            self.screen.blit(self.border_brick, (x, tile_height*14))
+            background.blit(self.border_brick, (x, tile_height*14))
+        return background
+
+    def _get_background_surface(self):
+        """回傳快取的背景；螢幕尺寸改變時重新組合。"""
+        if self.background_surface is None or self.background_surface.get_size() != self.screen.get_size():
+            self.background_surface = self._build_background_surface()
+        return self.background_surface
+
+    def _draw_internal(self):
+        if self.headless:
+            return
+        can_use_dirty_rects = self.dirty_rect_rendering and self.game_state == "PLAYING" and not self.paused
+        if can_use_dirty_rects and self._previous_dynamic_rects is not None:
+            self._draw_dirty_frame()
+            return
 
+        # 【修改】靜態的場地背景只在建立或螢幕尺寸改變時組合一次，每幀只需一次 blit
+        self.screen.blit(self._get_background_surface(), (0, 0))
 
         if self.game_state == "ENTER_NAME":
             self.draw_enter_name_screen()
         elif self.game_state == "SCORE_SUBMITTED":
             self.draw_score_submitted_screen()
         else: 
-            self.all_sprites.draw(self.screen) 
-            self.bombs_group.draw(self.screen)
-            self.floating_texts_group.draw(self.screen)
-            for bomb in self.bombs_group:
-                bomb.draw_timer_bar(self.screen)
+            # 【新增】牆壁已預先畫在地圖圖層上，不在 all_sprites 中
+            if self.map_manager.wall_layer_surface is not None:
+                self.screen.blit(self.map_manager.wall_layer_surface, (0, 0))
+            self._draw_sprites()
             if self.game_state == "PLAYING":
-                if self.player2_ai and self.player2_ai.is_alive and self.ai_controller_p2:
-                    if hasattr(self.ai_controller_p2, 'debug_draw_path'):
-                        self.ai_controller_p2.debug_draw_path(self.screen)
-                self.draw_hud()
-                # 【新增】繪製暫停按鈕
-                if self.hud_icon_pause:
-                    self.screen.blit(self.hud_icon_pause, self.pause_button_rect)
-                if self.touch_controls:
-                    self.touch_controls.draw(self.screen)
+                self._draw_ai_debug_overlay()
+                self._draw_hud_layer()
             elif self.game_state == "GAME_OVER":
                 self.draw_game_over_screen()
 
+        # 整個畫面都重繪了：交給 main.py flip；若下一幀可以用髒矩形，記下這一幀的基準
+        self.dirty_rects = None
+        if can_use_dirty_rects:
+            self._previous_dynamic_rects = self._collect_dynamic_rects()
+            self._hud_state_key = self._get_hud_state_key()
+        else:
+            self._previous_dynamic_rects = None
+
         # pygame.display.flip() # 由 main.py 的主迴圈呼叫
 
+    def _draw_sprites(self):
+        self.all_sprites.draw(self.screen) 
+        self.bombs_group.draw(self.screen)
+        self.floating_texts_group.draw(self.screen)
+        for bomb in self.bombs_group:
+            bomb.draw_timer_bar(self.screen)
+
+    def _draw_ai_debug_overlay(self):
+        if not self.show_ai_debug_overlay:
+            return
+        if self.player2_ai and self.player2_ai.is_alive and self.ai_controller_p2:
+            if hasattr(self.ai_controller_p2, 'debug_draw_path'):
+                self.ai_controller_p2.debug_draw_path(self.screen)
+
+    def _draw_hud_layer(self):
+        self.draw_hud()
+        # 【新增】繪製暫停按鈕
+        if self.hud_icon_pause:
+            self.screen.blit(self.hud_icon_pause, self.pause_button_rect)
+        if self.touch_controls:
+            self.touch_controls.draw(self.screen)
+
+    def _get_arena_rect(self):
+        return pygame.Rect(0, 0, self.map_manager.tile_width * settings.TILE_SIZE, self.map_manager.tile_height * settings.TILE_SIZE)
+
+    def _get_hud_rects(self):
+        """場地以外的 HUD 區域：右側欄與下方欄。"""
+        arena_rect = self._get_arena_rect()
+        screen_width, screen_height = self.screen.get_size()
+        return [
+            pygame.Rect(arena_rect.right, 0, screen_width - arena_rect.right, screen_height),
+            pygame.Rect(0, arena_rect.bottom, arena_rect.right, screen_height - arena_rect.bottom),
+        ]
+
+    def _collect_dynamic_rects(self):
+        """這一幀所有會變動的東西 (精靈、炸彈計時條) 在螢幕上佔據的矩形。"""
+        rects = []
+        for group in (self.all_sprites, self.bombs_group, self.floating_texts_group):
+            for sprite in group:
+                rects.append(pygame.Rect(sprite.rect.topleft, sprite.image.get_size()))
+        for bomb in self.bombs_group:
+            rects.append(bomb.timer_bar_rect())
+        return rects
+
+    def _get_hud_state_key(self):
+        """HUD 上顯示的所有數值；與上一幀相同時 HUD 區域不需重繪。"""
+        def player_key(player):
+            if not player:
+                return None
+            return (player.is_alive, player.lives, player.max_bombs, player.bombs_placed_count, player.score)
+
+        time_left = int(max(0, settings.GAME_DURATION_SECONDS - self.time_elapsed_seconds))
+        ai_state = None
+        if self.ai_controller_p2 and self.player2_ai and self.player2_ai.is_alive:
+            ai_state = (self.ai_controller_p2.__class__.__name__, getattr(self.ai_controller_p2, 'current_state', 'N/A'))
+        touch_state = None
+        if self.touch_controls:
+            touch_state = tuple(button['pressed'] for button in self.touch_controls.buttons.values())
+        return (time_left, player_key(self.player1), player_key(self.player2_ai), ai_state, touch_state)
+
+    def _draw_dirty_frame(self):
+        """
+        髒矩形模式：只還原上一幀與這一幀精靈佔據的區域，HUD 只有數值改變時才重繪，
+        並把變動的矩形放在 self.dirty_rects 讓 main.py 以 display.update(rects) 更新。
+        """
+        background = self._get_background_surface()
+        wall_layer = self.map_manager.wall_layer_surface
+        arena_rect = self._get_arena_rect()
+
+        dynamic_rects = self._collect_dynamic_rects()
+        dirty = self._previous_dynamic_rects + dynamic_rects
+        if self.show_ai_debug_overlay:
+            dirty.append(arena_rect) # 除錯路徑可能畫在場地的任何地方
+
+        hud_state_key = self._get_hud_state_key()
+        # 精靈超出場地時會蓋到 HUD，同樣需要重繪 HUD
+        redraw_hud = hud_state_key != self._hud_state_key or any(not arena_rect.contains(rect) for rect in dirty)
+        if redraw_hud:
+            dirty.extend(self._get_hud_rects())
+
+        screen_rect = self.screen.get_rect()
+        dirty = [rect.clip(screen_rect) for rect in dirty]
+        dirty = [rect for rect in dirty if rect.width > 0 and rect.height > 0]
+
+        for rect in dirty:
+            self.screen.blit(background, rect, rect)
+            if wall_layer is not None:
+                self.screen.blit(wall_layer, rect, rect)
+
+        self._draw_sprites()
+        self._draw_ai_debug_overlay()
+        if redraw_hud:
+            self._draw_hud_layer()
+
+        self._previous_dynamic_rects = dynamic_rects
+        self._hud_state_key = hud_state_key
+        self.dirty_rects = dirty
+
     # handle_enter_name_state_events, draw_pixel_digit, draw_hud, draw_game_over_screen,
     # draw_enter_name_screen, draw_score_submitted_screen 這些方法保持不變，
     # 因為它們是被 _process_events_internal 或 _draw_internal 內部呼叫的。
@@ -702,18 +936,27 @@ class Game:
                 self.restart_game = True 
                 self.running = False
 
-    def draw_pixel_digit(self, digit_char, top_left_x, top_left_y, block_size=settings.TILE_SIZE):
-        # (此函式保持不變)
-        pattern = DIGIT_MAP.get(digit_char)
-        if not pattern:
-            return
+    def get_pixel_digit_surface(self, digit_char, block_size=settings.TILE_SIZE):
+        """【新增】把數字的磚塊圖樣預先組合成一張 Surface，每個 (數字, 大小) 只組合一次。"""
+        key = (digit_char, block_size)
+        surface = self.pixel_digit_surfaces.get(key)
+        if surface is None:
+            pattern = DIGIT_MAP.get(digit_char)
+            if not pattern:
+                return None
+            brick_width, brick_height = self.timer_brick.get_size()
+            surface = pygame.Surface(((len(pattern[0]) - 1) * block_size + brick_width, (len(pattern) - 1) * block_size + brick_height), pygame.SRCALPHA)
+            for row in range(len(pattern)):
+                for col in range(len(pattern[0])):
+                    if pattern[row][col]:
+                        surface.blit(self.timer_brick, (col * block_size, row * block_size))
+            self.pixel_digit_surfaces[key] = surface
+        return surface
 
-        for row in range(len(pattern)):
-            for col in range(len(pattern[0])):
-                if pattern[row][col]:
-                    dest_x = top_left_x + col * block_size
-                    dest_y = top_left_y + row * block_size
-                    self.screen.blit(self.timer_brick, (dest_x, dest_y))
+    def draw_pixel_digit(self, digit_char, top_left_x, top_left_y, block_size=settings.TILE_SIZE):
+        digit_surface = self.get_pixel_digit_surface(digit_char, block_size)
+        if digit_surface:
+            self.screen.blit(digit_surface, (top_left_x, top_left_y))
 
     def draw_hud(self):
         if not self.hud_font:
@@ -749,13 +992,12 @@ class Game:
             icon_rect = icon.get_rect(topleft=(x, y))
             surface.blit(icon, icon_rect)
             
-            text_surf = font.render(text, True, settings.WHITE)
+            text_surf = render_text(text, font, settings.WHITE)
             text_rect = text_surf.get_rect(midleft=(icon_rect.right + icon_text_spacing, icon_rect.centery))
             draw_text_with_shadow(surface, text, font, text_rect.topleft, text_color=settings.WHITE, shadow_color=settings.BLACK)
 
         # --- Draw Player 1 Stats ---
         if self.player1 and self.hud_icon_heart and self.hud_icon_bomb and self.hud_icon_score:
-            p1_label_surf = self.hud_font.render("P1", True, settings.WHITE)
             draw_text_with_shadow(self.screen, "P1", self.hud_font, (start_x, start_y), text_color=settings.WHITE, shadow_color=settings.BLACK)
             
             # P1 Lives
@@ -774,7 +1016,6 @@ class Game:
         # Position AI stats to the right of Player 1 stats
         ai_start_x = start_x + 120 # 縮小與 P1 資訊的間距
         if self.player2_ai and self.hud_icon_heart and self.hud_icon_bomb and self.hud_icon_score:
-            ai_label_surf = self.hud_font.render("AI", True, settings.WHITE)
             draw_text_with_shadow(self.screen, "AI", self.hud_font, (ai_start_x, start_y), text_color=settings.WHITE, shadow_color=settings.BLACK)
 
             # AI Lives
@@ -793,7 +1034,7 @@ class Game:
             else:
                 # If AI is defeated, show only that status
                 defeated_text = "Defeated"
-                text_surf = self.hud_font.render(defeated_text, True, settings.RED)
+                text_surf = render_text(defeated_text, self.hud_font, settings.RED)
                 text_rect = text_surf.get_rect(topleft=(ai_start_x, start_y + line_height))
                 draw_text_with_shadow(self.screen, defeated_text, self.hud_font, text_rect.topleft, text_color=settings.RED, shadow_color=settings.BLACK)
 
@@ -833,12 +1074,13 @@ class Game:
                 "MOVING_TO_COLLECT_ITEM": "衝向道具",
                 "EXECUTING_ASTAR_PATH_TO_TARGET": "執行尋路",
                 "ASSESSING_OBSTACLE_FOR_ITEM": "為道具清障",
-                "ENDGAME_HUNT": "終局狩獵"
+                "ENDGAME_HUNT": "終局狩獵",
+                "PLANNING_MCTS": "樹搜尋規劃"
             }
 
             # Prepare the two lines of text
             class_name = self.ai_controller_p2.__class__.__name__
-            ai_name = class_name.replace("AIController", "").replace("Conservative", "保守型").replace("Aggressive", "侵略型").replace("ItemFocused", "道具型")
+            ai_name = class_name.replace("AIController", "").replace("Conservative", "保守型").replace("Aggressive", "侵略型").replace("ItemFocused", "道具型").replace("MCTS", "搜尋型")
             if not ai_name or ai_name == "Standard": ai_name = "標準型"
             
             state_key = getattr(self.ai_controller_p2, 'current_state', 'N/A')
@@ -848,8 +1090,8 @@ class Game:
             line2_text = f"{translated_state}"
 
             # Draw the two lines centered in the box
-            line1_surf = self.ai_status_font.render(line1_text, True, settings.WHITE)
-            line2_surf = self.ai_status_font.render(line2_text, True, settings.WHITE)
+            line1_surf = render_text(line1_text, self.ai_status_font, settings.WHITE)
+            line2_surf = render_text(line2_text, self.ai_status_font, settings.WHITE)
             
             line1_rect = line1_surf.get_rect(center=(box_center_x - 50, box_center_y - self.ai_status_font.get_height() / 2))
             line2_rect = line2_surf.get_rect(center=(box_center_x - 50, box_center_y + self.ai_status_font.get_height() / 2))
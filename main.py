@@ -23,6 +23,8 @@ async def main():
 
     # 在這裡建立唯一的 AudioManager 實例
     audio_manager = AudioManager()
+    if getattr(settings, "AUDIO_PRELOAD_SOUNDS", True):
+        audio_manager.preload_sounds() # 【新增】啟動時先解碼音效，遊戲中播放不再讀取硬碟
 
     # 【修改】將第一個場景設定為 StartScene，而不是 Menu
     current_scene = StartScene(screen, audio_manager, clock)
@@ -85,7 +87,12 @@ async def main():
             if getattr(next_scene_candidate, 'request_app_quit', False):
                 running_main_loop = False
 
-        pygame.display.flip()
+        # 【新增】Game 場景在髒矩形模式下只更新變動的區域；其他情況整個畫面 flip
+        dirty_rects = current_scene.dirty_rects if isinstance(current_scene, Game) else None
+        if dirty_rects is not None:
+            pygame.display.update(dirty_rects)
+        else:
+            pygame.display.flip()
         await asyncio.sleep(0)
 
     # 在迴圈結束後，徹底關閉 pygame
@@ -137,4 +137,6 @@ class BombermanEnv(gym.Env):
             self._render_frame()
 
     def close(self) -> None:
+        if getattr(self, 'game', None) is not None:
+            self.game.shutdown()
         pygame.quit()
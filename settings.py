@@ -10,6 +10,16 @@ TITLE = "Pycade Bomber"
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+DIRTY_RECT_RENDERING = False # 【新增】Game 場景只重繪並更新變動的矩形 (瀏覽器版建議開啟)
+DIRTY_RECT_SHOW_AI_DEBUG = False # 髒矩形模式下是否仍顯示 AI 除錯路徑 (開啟時整個場地每幀都要重繪)
+DETERMINISTIC_MODE = False # 【新增】固定步長模擬：邏輯每步固定 FIXED_SIMULATION_DT，與畫面更新率無關
+FIXED_SIMULATION_DT = 1 / 60 # 固定步長 (秒)
+MAX_SIMULATION_STEPS_PER_FRAME = 5 # 單一畫面最多補幾步，避免卡頓後追趕不完
+MATCH_SEED = None # 對戰種子；None 表示每場隨機挑選 (固定種子 + 相同輸入 = 相同結果)
+REPLAY_RECORDING = False # 【新增】錄製重播檔；開啟時 Game 預設改用固定步長 (DETERMINISTIC_MODE)，重播才能逐 tick 重現
+REPLAY_DIRECTORY = "replays" # 重播檔存放的資料夾
+REPLAY_KEYFRAME_INTERVAL = 300 # 每隔多少 tick 存一個狀態摘要 (關鍵影格)；播放時也以同樣間隔保存可還原的 Game 拷貝供跳轉
+REPLAY_SEEK_SECONDS = 5 # 重播視窗中按 ←/→ 一次跳轉的秒數
 
 # -----------------------------------------------------------------------------
 # 顏色定義 (Colors)
@@ -66,6 +76,9 @@ BOMB_TIMER = 3000  # 毫秒
 EXPLOSION_DURATION = 500  # 毫秒
 USE_EXPLOSION_IMAGES = True
 EXPLOSION_COLOR = (255, 165, 0) # 如果 USE_EXPLOSION_IMAGES 為 False
+BOMB_PULSE_FREQUENCY = 1 # 炸彈每秒跳動次數
+BOMB_PULSE_SCALE_VARIATION = 0.1 # 跳動時的最大縮小比例
+BOMB_PULSE_SCALE_STEPS = 8 # 預先計算的縮放階數 (每種炸彈外觀共用一張幀表)
 
 # -----------------------------------------------------------------------------
 # 道具設定 (Item Settings)
@@ -97,7 +110,8 @@ AVAILABLE_AI_ARCHETYPES = {
     "道具型": "item_focused",
     "保守型": "conservative",
     "攻擊型": "aggressive",
-    "標準型": "original"
+    "標準型": "original",
+    "搜尋型": "mcts"
 }
 AI_OPPONENT_ARCHETYPE = "item_focused" # 預設或在選單中選擇的 AI 原型
 
@@ -111,12 +125,23 @@ AI_EVASION_SAFETY_CHECK_FUTURE_SECONDS = 0.3
 AI_RETREAT_SPOT_OTHER_DANGER_FUTURE_SECONDS = 1.5
 AI_CLOSE_QUARTERS_BOMB_CHANCE = 0.6
 AI_OSCILLATION_STUCK_THRESHOLD = 3
+AI_BLAST_FOOTPRINT_CACHE_SIZE = 512 # 假設爆炸範圍快取的最大筆數 (LRU)
 
 # 特定 AI 類型參數 (例如保守型 AI)
 AI_CONSERVATIVE_RETREAT_DEPTH = 8
 AI_CONSERVATIVE_MIN_RETREAT_OPTIONS = 3
 AI_CONSERVATIVE_EVASION_URGENCY_MULTIPLIER = 1.5
 
+# 搜尋型 (MCTS) AI 參數
+AI_MCTS_TIME_BUDGET_MS = 8 # 每次決策的搜尋時間預算 (毫秒)
+AI_MCTS_ITERATIONS = 16 # 固定步長 (DETERMINISTIC_MODE) 時改用固定迭代數，結果才能重現；約等於上面的時間預算 (對局中位數約 7 ms)
+AI_MCTS_ROLLOUT_DEPTH = 18 # rollout 的步數 (每步為 AI_MOVE_DELAY；要比 BOMB_TIMER 長才看得到炸彈的結果)
+AI_MCTS_EXPLORATION = 1.2 # UCT 探索常數
+AI_MCTS_TRANSPOSITION_MIN_VISITS = 2 # 置換表中的狀態被評估幾次之後直接沿用平均值
+AI_MCTS_TRANSPOSITION_TABLE_SIZE = 20000 # 置換表上限，超過時清空
+AI_ASYNC_PLANNING = True # AI 的規劃搜尋在背景執行緒對棋盤快照執行；DETERMINISTIC_MODE 下一律同步
+AI_ASYNC_PLAN_MAX_AGE_MS = 400 # 背景計畫送達時若已超過這個時間 (遊戲時鐘毫秒) 就丟棄
+
 # -----------------------------------------------------------------------------
 # UI 與顯示設定 (UI & Display Settings)
 # -----------------------------------------------------------------------------
@@ -167,6 +192,9 @@ EXPLOSION_PATH = os.path.join(SOUNDS_DIR, "explosion.mp3") # 爆炸音效
 BLING_PATH = os.path.join(SOUNDS_DIR, "bling.mp3") # 拾取道具音效
 HURT_PATH = os.path.join(SOUNDS_DIR, "hurt.mp3") # 受傷音效
 PLACE_BOMB_SOUND_PATH = os.path.join(SOUNDS_DIR, "place_bomb.mp3") # 放置炸彈音效
+AUDIO_PRELOAD_SOUNDS = True # 啟動時先解碼所有音效
+AUDIO_SOUND_CACHE_MAX_BYTES = 32 * 1024 * 1024 # 已解碼音效的記憶體上限，超過時以 LRU 淘汰
+AUDIO_SFX_CHANNELS = 8 # 音效使用的 channel 數量 (channel pool)
 GAME_VICTORY_PATH = os.path.join(SOUNDS_DIR, "Undertale_Hopes_and_Dreams.mp3") # 遊戲勝利音效
 GAME_OVER_PATH = os.path.join(SOUNDS_DIR, "Undertale_An_Ending.mp3") # 遊戲結束音效
 THANKS_YOU_PATH = os.path.join(SOUNDS_DIR, "Undertale_His_Themes.mp3") # 感謝畫面音樂
@@ -4,8 +4,31 @@ import pygame
 from .game_object import GameObject # 從同一個 sprites 套件中匯入 GameObject
 import settings
 from .explosion import Explosion
+from core.occupancy_index import sprites_at
+from core.asset_cache import load_image
 import math
 
+# 【新增】炸彈跳動動畫的幀表：(圖片路徑們, 基準尺寸, 階數, 縮放幅度) -> [動畫幀][縮放階] 的 Surface
+# 同一種外觀的所有炸彈共用，update 只負責挑選幀，不再每幀 smoothscale。
+_pulse_frame_tables = {}
+
+
+def get_pulse_frame_table(image_paths, base_size, steps, scale_variation):
+    key = (tuple(image_paths), (int(base_size[0]), int(base_size[1])), steps, scale_variation)
+    table = _pulse_frame_tables.get(key)
+    if table is None:
+        w, h = key[1]
+        table = []
+        for img in image_paths:
+            frames = []
+            for step in range(steps):
+                scale_factor = 1 - scale_variation * (step / (steps - 1) if steps > 1 else 0)
+                frames.append(load_image(img, (int(w * scale_factor), int(h * scale_factor))))
+            table.append(frames)
+        _pulse_frame_tables[key] = table
+    return table
+
+
 class Bomb(GameObject):
     """
     Represents a bomb placed by a player.
@@ -47,32 +70,21 @@ class Bomb(GameObject):
         self.owner_has_left_tile = False # 標記擁有者是否已離開此格
         
         # Bomb animation
-        if placed_by_player.is_player1:
-            self.animation_images = [
-                pygame.transform.smoothscale(
-                    pygame.image.load(img).convert_alpha(),
-                    (self.original_image.get_width() * (settings.TILE_SIZE / self.original_image.get_height()), settings.TILE_SIZE)
-                )
-                for img in settings.PLAYER1_BOMB_IMAGES
-            ]
-        else:
-            self.animation_images = [
-                pygame.transform.smoothscale(
-                    pygame.image.load(img).convert_alpha(),
-                    (self.original_image.get_width() * (settings.TILE_SIZE / self.original_image.get_height()), settings.TILE_SIZE)
-                )
-                for img in settings.AI_PLAYER_BOMB_IMAGES
-            ]
+        # 【修改】動畫與爆炸圖片都從共用快取取得，放炸彈不再讀取硬碟
+        bomb_size = (self.original_image.get_width() * (settings.TILE_SIZE / self.original_image.get_height()), settings.TILE_SIZE)
+        bomb_image_paths = settings.PLAYER1_BOMB_IMAGES if placed_by_player.is_player1 else settings.AI_PLAYER_BOMB_IMAGES
+        self.animation_images = [load_image(img, bomb_size) for img in bomb_image_paths]
+        self.pulse_frequency = getattr(settings, "BOMB_PULSE_FREQUENCY", 1) # 每秒跳動次數
+        self.pulse_scale_variation = getattr(settings, "BOMB_PULSE_SCALE_VARIATION", 0.1) # 最大縮小比例
+        self.pulse_scale_steps = getattr(settings, "BOMB_PULSE_SCALE_STEPS", 8)
+        self.pulse_frames = get_pulse_frame_table(bomb_image_paths, bomb_size, self.pulse_scale_steps, self.pulse_scale_variation)
         self.animation_index = 0
         self.last_animation_time = 0 # 【修改】改為計時器
         self.animation_interval = 300  # 毫秒，調整為你想要的動畫速度
         
         # -- Explosion images --
         self.images = [
-            pygame.transform.smoothscale(
-                pygame.image.load(img).convert_alpha(),
-                (936 * (settings.TILE_SIZE / 997), settings.TILE_SIZE)
-            )
+            load_image(img, (936 * (settings.TILE_SIZE / 997), settings.TILE_SIZE))
             for img in settings.EXPLOSION_IMGS
         ]
 
@@ -90,18 +102,19 @@ class Bomb(GameObject):
         # [SPS_BOMB_NO_CHANGE_NEEDED] 這個 print 仍然有效。
         # print(f"Bomb placed at tile ({x_tile}, {y_tile}) by Player object ID: {id(self.placed_by_player)}")
 
+    def timer_bar_rect(self):
+        """倒數計時條外框的 Rect (髒矩形模式用來標記需要重繪的區域)。"""
+        bar_width = settings.TILE_SIZE * 0.9
+        bar_height = 4
+        bar_x = self.rect.centerx - bar_width // 2
+        bar_y = self.current_tile_y * settings.TILE_SIZE + settings.TILE_SIZE - 3 # tile 的底部，往下留一點距離
+        return pygame.Rect(bar_x, bar_y, bar_width, bar_height)
+
     def draw_timer_bar(self, surface):
         """在給定 surface 上繪製炸彈倒數計時條，不受炸彈動畫縮放影響。"""
         # 【修改】計算剩餘時間比例
         time_ratio = max(0, self.time_left) / self.timer
-        
-        screen_x = self.rect.centerx
-        screen_y = self.current_tile_y * settings.TILE_SIZE + settings.TILE_SIZE  # tile 的底部
-
-        bar_width = settings.TILE_SIZE * 0.9
-        bar_height = 4
-        bar_x = screen_x - bar_width // 2
-        bar_y = screen_y - 3 # 往下留一點距離
+        bar_x, bar_y, bar_width, bar_height = self.timer_bar_rect()
 
         # 畫背景邊框 + 前景條
         pygame.draw.rect(surface, (0, 0, 0), (bar_x, bar_y, bar_width, bar_height), 1)
@@ -137,24 +150,18 @@ class Bomb(GameObject):
             self.elapsed_time += dt # For pulsating effect, keep in seconds
             self.last_animation_time += dt_ms # For animation frames
 
-            # === 2. 計算縮放因子 (使用累計時間) ===
-            frequency = 1  # 每秒跳動次數
-            scale_variation = 0.1  # 最大縮小比例
-            scale_factor = 1 - scale_variation * (0.5 * (1 + math.sin(2 * math.pi * frequency * self.elapsed_time)))
+            # === 2. 計算縮放階 (使用累計時間)，0 為原尺寸，steps - 1 為最小 ===
+            shrink = 0.5 * (1 + math.sin(2 * math.pi * self.pulse_frequency * self.elapsed_time))
+            scale_step = int(round(shrink * (self.pulse_scale_steps - 1)))
 
             # === 3. 圖片切換邏輯 (使用累計時間) ===
             if self.last_animation_time >= self.animation_interval:
                 self.animation_index = (self.animation_index + 1) % len(self.animation_images)
                 self.last_animation_time = 0 # 重置
 
-            base_image = self.animation_images[self.animation_index]
-            
-            w, h = base_image.get_width(), base_image.get_height()
-            new_size = (int(w * scale_factor), int(h * scale_factor))
-            self.original_image = pygame.transform.smoothscale(base_image, new_size)
-
-            # === 4. 複製圖像做為繪製對象 ===
-            self.image = self.original_image.copy()
+            # === 4. 【修改】從預先計算的幀表挑選圖像 (共用 Surface，不可就地修改) ===
+            self.original_image = self.pulse_frames[self.animation_index][scale_step]
+            self.image = self.original_image
 
             # === 5. 保持位置中心 ===
             old_center = self.rect.center
@@ -164,6 +171,34 @@ class Bomb(GameObject):
             if self.time_left <= 0:
                 self.explode()
 
+    def compute_explosion_tiles(self, bomb_range=None):
+        """
+        【新增】只計算這顆炸彈爆炸會覆蓋的格子，不建立任何精靈、不播放音效，模擬時也可直接呼叫。
+        規則：'W' 或地圖外擋住火焰；可破壞牆本身會被波及，但火焰不再延伸。
+        可破壞牆以 destructible_walls_group 的格子索引查詢，每一步都是 O(1)。
+        """
+        if bomb_range is None:
+            bomb_range = self.placed_by_player.bomb_range
+        map_manager = self.game.map_manager
+        explosion_tiles = [(self.current_tile_x, self.current_tile_y)]
+
+        for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
+            for i in range(1, bomb_range + 1):
+                nx, ny = self.current_tile_x + dx * i, self.current_tile_y + dy * i
+
+                if not (0 <= nx < map_manager.tile_width and 0 <= ny < map_manager.tile_height):
+                    break
+
+                if map_manager.is_solid_wall_at(nx, ny):
+                    break
+
+                explosion_tiles.append((nx, ny))
+
+                if any(not getattr(d_wall, 'is_destroyed', False)
+                       for d_wall in sprites_at(map_manager.destructible_walls_group, nx, ny)):
+                    break
+        return explosion_tiles
+
     def explode(self):
         # [SPS_BOMB_NO_CHANGE_NEEDED] 爆炸邏輯完全基於炸彈自身的 current_tile_x, current_tile_y 和放置者的 bomb_range。
         # 這些都不受玩家移動方式從像素級變為格子級的影響。
@@ -177,39 +212,18 @@ class Bomb(GameObject):
             if self.placed_by_player:
                  self.placed_by_player.bomb_exploded_feedback()
 
-            bomb_range = self.placed_by_player.bomb_range
-            explosion_tiles = []
-            explosion_tiles.append((self.current_tile_x, self.current_tile_y)) 
-
-            for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]: 
-                for i in range(1, bomb_range + 1):
-                    nx, ny = self.current_tile_x + dx * i, self.current_tile_y + dy * i
-                    
-                    if not (0 <= nx < self.game.map_manager.tile_width and \
-                            0 <= ny < self.game.map_manager.tile_height):
-                        break 
-
-                    if self.game.map_manager.is_solid_wall_at(nx, ny):
-                        break 
-                    
-                    explosion_tiles.append((nx, ny))
-                    
-                    is_destructible_here = False
-                    # 需要確保 self.game.map_manager.destructible_walls_group 中的牆壁有 tile_x, tile_y 屬性
-                    for d_wall in self.game.map_manager.destructible_walls_group:
-                        if hasattr(d_wall, 'tile_x') and hasattr(d_wall, 'tile_y'): # 增加檢查
-                            if d_wall.tile_x == nx and d_wall.tile_y == ny and not getattr(d_wall, 'is_destroyed', False): # 確保牆未被摧毀
-                                is_destructible_here = True
-                                break
-                        # else:
-                            # print(f"[BOMB EXPLODE WARN] Destructible wall object {d_wall} missing tile_x/tile_y attributes.") # DEBUG
-
-                    if is_destructible_here:
-                        break 
+            explosion_tiles = self.compute_explosion_tiles()
             
             for ex_tile_x, ex_tile_y in explosion_tiles:
                 expl_sprite = Explosion(ex_tile_x, ex_tile_y, self.game, self.images)
                 self.game.all_sprites.add(expl_sprite)
                 self.game.explosions_group.add(expl_sprite)
+
+            # 【新增】連鎖爆炸：被火焰波及的其他炸彈立即引爆 (與 core/detonation_timeline 的預測一致)
+            blast_tile_set = set(explosion_tiles)
+            for other_bomb in list(self.game.bombs_group):
+                if other_bomb is not self and not other_bomb.exploded and \
+                   (other_bomb.current_tile_x, other_bomb.current_tile_y) in blast_tile_set:
+                    other_bomb.explode()
             
             self.kill()
\ No newline at end of file
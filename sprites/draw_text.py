@@ -1,3 +1,7 @@
+import pygame
+from collections import OrderedDict
+from core.game_clock import get_ticks
+
 DIGIT_MAP = {
     '0': [
         [1,1,1],
@@ -79,35 +83,83 @@ DIGIT_MAP = {
 }
 
 
+# 【新增】文字渲染快取：鍵為 (字型, 文字, 顏色, 效果)，值為組合好的 Surface。
+# HUD 每幀都會畫同樣的字串，只有數值改變 (新的文字) 時才真正呼叫 font.render。
+TEXT_RENDER_CACHE_SIZE = 256
+_text_render_cache = OrderedDict()
+
+
+def _get_cached_text(key, build):
+    surface = _text_render_cache.get(key)
+    if surface is not None:
+        _text_render_cache.move_to_end(key)
+        return surface
+    surface = build()
+    _text_render_cache[key] = surface
+    if len(_text_render_cache) > TEXT_RENDER_CACHE_SIZE:
+        _text_render_cache.popitem(last=False)
+    return surface
+
+
+def render_text(text, font, color):
+    """快取版的 font.render(text, True, color)；回傳的 Surface 是共用的，不可就地修改。"""
+    return _get_cached_text((font, text, tuple(color), None), lambda: font.render(text, True, color))
+
+
+def render_text_with_shadow(text, font, text_color=(255,255,255), shadow_color=(0,0,0), shadow_offset=(2,2)):
+    """把陰影與文字組合成一張 Surface；回傳 (surface, 文字左上角在 surface 中的位置)。"""
+    def build():
+        text_surf = render_text(text, font, text_color)
+        shadow_surf = render_text(text, font, shadow_color)
+        dx, dy = shadow_offset
+        origin = (max(0, -dx), max(0, -dy))
+        combined = pygame.Surface((text_surf.get_width() + abs(dx), text_surf.get_height() + abs(dy)), pygame.SRCALPHA)
+        combined.blit(shadow_surf, (origin[0] + dx, origin[1] + dy))
+        combined.blit(text_surf, origin)
+        return combined, origin
+    return _get_cached_text((font, text, tuple(text_color), ('shadow', tuple(shadow_color), tuple(shadow_offset))), build)
+
+
+def render_text_with_outline(text, font, text_color=(0,0,0), outline_color=(200,200,200), of=2):
+    """把八個方向的外框與文字組合成一張 Surface；回傳 (surface, 文字左上角在 surface 中的位置)。"""
+    def build():
+        text_surf = render_text(text, font, text_color)
+        outline_surf = render_text(text, font, outline_color)
+        combined = pygame.Surface((text_surf.get_width() + 2 * of, text_surf.get_height() + 2 * of), pygame.SRCALPHA)
+        offsets = [(-of,0),(of,0),(0,-of),(0,of),(-of,-of),(-of,of),(of,-of),(of,of)]
+        for dx, dy in offsets:
+            combined.blit(outline_surf, (of + dx, of + dy))
+        combined.blit(text_surf, (of, of))
+        return combined, (of, of)
+    return _get_cached_text((font, text, tuple(text_color), ('outline', tuple(outline_color), of)), build)
+
+
+def clear_text_render_cache():
+    _text_render_cache.clear()
+
+
 def draw_text_with_shadow(screen, text, font, pos, text_color=(255,255,255), shadow_color=(0,0,0), shadow_offset=(2,2)):
     x, y = pos
-    shadow_surf = font.render(text, True, shadow_color)
-    screen.blit(shadow_surf, (x + shadow_offset[0], y + shadow_offset[1]))
-    text_surf = font.render(text, True, text_color)
-    screen.blit(text_surf, (x, y))
+    combined, (ox, oy) = render_text_with_shadow(text, font, text_color, shadow_color, shadow_offset)
+    screen.blit(combined, (x - ox, y - oy))
 
 def draw_text_with_outline(screen, text, font, pos, text_color=(0,0,0), outline_color=(200,200,200), of=2):
     x, y = pos
-    offsets = [(-of,0),(of,0),(0,-of),(0,of),(-of,-of),(-of,of),(of,-of),(of,of)]
-    for dx, dy in offsets:
-        outline = font.render(text, True, outline_color)
-        screen.blit(outline, (x + dx, y + dy))
-    main_text = font.render(text, True, text_color)
-    screen.blit(main_text, (x, y))
-    
-import pygame
+    combined, (ox, oy) = render_text_with_outline(text, font, text_color, outline_color, of)
+    screen.blit(combined, (x - ox, y - oy))
     
 class FloatingText(pygame.sprite.Sprite):
-    def __init__(self, x, y, text, color=(255, 0, 0), duration=1000, rise_speed=1):
+    def __init__(self, x, y, text, color=(255, 0, 0), duration=1000, rise_speed=1, game=None):
         super().__init__()
+        self.game = game # 【新增】有 game 時使用它的遊戲時鐘計時
         self.font = pygame.font.Font(None, 32)  # 你也可以用自己的字體
         self.image = self.font.render(text, True, color)
         self.rect = self.image.get_rect(center=(x, y))
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = get_ticks(self.game)
         self.duration = duration
         self.rise_speed = rise_speed
 
     def update(self):
         self.rect.y -= self.rise_speed  # 每幀往上飄
-        if pygame.time.get_ticks() - self.start_time > self.duration:
+        if get_ticks(self.game) - self.start_time > self.duration:
             self.kill()  # 時間到自動移除
@@ -3,6 +3,7 @@
 import pygame
 from .game_object import GameObject
 import settings
+from core.game_clock import get_ticks
 
 class Explosion(GameObject):
     """
@@ -36,14 +37,16 @@ class Explosion(GameObject):
                 color=settings.EXPLOSION_COLOR
             )
         self.game = game_instance
-        self.spawn_time = pygame.time.get_ticks()
+        self.tile_x = x_tile
+        self.tile_y = y_tile
+        self.spawn_time = get_ticks(self.game)
         self.duration = settings.EXPLOSION_DURATION
         
         if settings.USE_EXPLOSION_IMAGES:
             self.images = explode_imgs
             self.animation_index = 0
             self.frame_interval = 100  # 每張圖顯示 100 毫秒
-            self.last_frame_switch = pygame.time.get_ticks()
+            self.last_frame_switch = get_ticks(self.game)
             self.image = self.images[self.animation_index]
             self.rect = self.image.get_rect(topleft=(x_tile * settings.TILE_SIZE, y_tile * settings.TILE_SIZE))
         else:
@@ -60,7 +63,7 @@ class Explosion(GameObject):
         """
         Checks if the explosion duration has passed. If so, removes itself.
         """
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks(self.game)
         
         if settings.USE_EXPLOSION_IMAGES:
             if current_time - self.last_frame_switch > self.frame_interval:
@@ -2,6 +2,7 @@
 
 import pygame
 import settings
+from core.asset_cache import load_image
 
 class GameObject(pygame.sprite.Sprite):
     """
@@ -14,27 +15,22 @@ class GameObject(pygame.sprite.Sprite):
         loaded_image = None
         if image_path:
             try:
-                raw_image = pygame.image.load(image_path)
-                loaded_image = raw_image.convert_alpha() # 使用 convert_alpha() 處理透明度
+                # 【修改】透過共用的圖片快取載入，同一張圖不會為每個實例重新解碼與縮放
+                loaded_image = load_image(image_path)
             except pygame.error as e:
                 print(f"Error loading image {image_path}: {e}")
                 # Fallback to a colored surface if image loading fails
         
         if loaded_image:
-            self.original_image = loaded_image # 保存原始載入的圖像
             if width is None and height is not None:
-                width = (self.original_image.get_width() * (height / self.original_image.get_height()))
-                self.original_image = pygame.transform.smoothscale(self.original_image, (width, height))
-                self.image = self.original_image.copy() # self.image 是實際繪製和可能被修改的圖像
+                width = int(loaded_image.get_width() * (height / loaded_image.get_height()))
             elif height is None and width is not None:
-                height = int(self.original_image.get_height() * (width / self.original_image.get_width()))
-                self.original_image = pygame.transform.smoothscale(self.original_image, (width, height))
-                self.image = self.original_image.copy() # self.image 是實際繪製和可能被修改的圖像
-            elif width is not None and height is not None:
-                self.original_image = pygame.transform.smoothscale(self.original_image, (width, height))
-                self.image = self.original_image.copy() # self.image 是實際繪製和可能被修改的圖像
-            else:
-                self.image = self.original_image.copy() # self.image 是實際繪製和可能被修改的圖像
+                height = int(loaded_image.get_height() * (width / loaded_image.get_width()))
+            if width is not None and height is not None:
+                loaded_image = load_image(image_path, (width, height))
+            # original_image 與 image 是快取中的共用 Surface，不可就地修改；需要變化時請另外建立新的 Surface
+            self.original_image = loaded_image
+            self.image = self.original_image
             
         elif color:
             self.original_image = pygame.Surface([width, height])
@@ -3,7 +3,7 @@
 import pygame
 from .game_object import GameObject
 import settings
-import random # 我們將用它來隨機選擇道具類型
+from core.match_random import match_rng, ITEM_RNG # 【修改】用對戰的種子化亂數選擇道具類型
 
 class Item(GameObject):
     """
@@ -127,7 +127,7 @@ def create_random_item(x_tile, y_tile, game_instance):
         print("[ItemCreation] Warning: ITEM_DROP_WEIGHTS in settings is empty or all weights are zero. No item will drop.")
         return None
 
-    chosen_item_type = random.choices(item_types, weights=weights, k=1)[0]
+    chosen_item_type = match_rng(game_instance, ITEM_RNG).choices(item_types, weights=weights, k=1)[0]
 
     # （4）！！！ 修改：根據 chosen_item_type 實例化對應的道具子類 ！！！（4）
     if chosen_item_type == settings.ITEM_TYPE_SCORE:
@@ -4,6 +4,9 @@ import pygame
 from .game_object import GameObject
 import settings
 from sprites.draw_text import FloatingText
+from core.occupancy_index import sprites_at, relocate_sprite
+from core.asset_cache import load_image
+from core.game_clock import get_ticks
 # from .bomb import Bomb # Bomb 在 Player 中放置炸彈時才需要
 
 class Player(GameObject):
@@ -21,7 +24,7 @@ class Player(GameObject):
         self.animations = {}
         self.spritesheet = None
         try:
-            self.spritesheet = pygame.image.load(spritesheet_path).convert_alpha()
+            self.spritesheet = load_image(spritesheet_path) # 【修改】共用快取，只從中切出 subsurface 不會修改它
         except pygame.error as e:
             print(f"Error loading spritesheet {spritesheet_path}: {e}")
 
@@ -51,7 +54,7 @@ class Player(GameObject):
 
         self.current_direction = "DOWN"
         self.current_frame_index = 0
-        self.last_animation_update_time = pygame.time.get_ticks()
+        self.last_animation_update_time = get_ticks(self.game)
         
         # （2）！！！ 修改：PLAYER_ANIMATION_SPEED 已在 settings.py 中定義 ！！！（2）
         self.animation_frame_duration = settings.PLAYER_ANIMATION_SPEED * 1000 
@@ -109,13 +112,16 @@ class Player(GameObject):
         self.lives = settings.MAX_LIVES 
         self.max_bombs = settings.INITIAL_BOMBS 
         self.bombs_placed_count = 0 
+        self.total_bombs_placed = 0 
         self.bomb_range = settings.INITIAL_BOMB_RANGE 
+        self.input_override = None # 【新增】不為 None 時，get_input 使用這個方向而不讀鍵盤
         self.score = 0 
         
         self.is_alive = True 
-        self.last_hit_time = 0 
         # （6）！！！ 修改：使用 settings.py 中的 PLAYER_INVINCIBLE_DURATION ！！！（6）
         self.invincible_duration = settings.PLAYER_INVINCIBLE_DURATION 
+        # 【修改】遊戲時鐘從 0 開始，初始值設在無敵時間之前，第一次受傷一定成立
+        self.last_hit_time = -self.invincible_duration - 1 
         # （6）！！！ 修改結束 ！！！（6）
 
         self.is_moving = False 
@@ -156,41 +162,30 @@ class Player(GameObject):
             print(f"[DEBUG_ATTEMPT_MOVE_FAIL] Reason: Target out of bounds. Target: ({target_tile_x},{target_tile_y})")
             return False
 
-        target_check_rect = pygame.Rect(target_tile_x * settings.TILE_SIZE,
-                                        target_tile_y * settings.TILE_SIZE,
-                                        settings.TILE_SIZE,
-                                        settings.TILE_SIZE)
-        
         # 2. Check solid obstacles (walls, destructible walls)
+        # 以格子索引查詢，不再對每一面牆做 colliderect
         if hasattr(self.game, 'solid_obstacles_group'):
-            for obstacle in self.game.solid_obstacles_group:
+            for obstacle in sprites_at(self.game.solid_obstacles_group, target_tile_x, target_tile_y):
                 # 確保只檢查實際的碰撞體，並且未被摧毀的牆壁
                 if hasattr(obstacle, 'is_destroyed') and obstacle.is_destroyed: 
                     continue 
-                if obstacle.rect.colliderect(target_check_rect):
-                    print(f"[DEBUG_MOVE_FAIL] Player at ({self.tile_x}, {self.tile_y}) trying to move to ({target_tile_x}, {target_tile_y}).")
-                    print(f"    Blocked by: {type(obstacle)} sprite.")
-                    print(f"    Obstacle rect: {obstacle.rect}, its map coords should be: ({obstacle.rect.x // settings.TILE_SIZE}, {obstacle.rect.y // settings.TILE_SIZE})")
-                    print(f"    Target check rect: {target_check_rect}")
-                    return False
+                print(f"[DEBUG_MOVE_FAIL] Player at ({self.tile_x}, {self.tile_y}) trying to move to ({target_tile_x}, {target_tile_y}).")
+                print(f"    Blocked by: {type(obstacle)} sprite.")
+                return False
         
         # 3. Check other players
         if hasattr(self.game, 'players_group'):
-            for other_player in self.game.players_group:
+            for other_player in sprites_at(self.game.players_group, target_tile_x, target_tile_y):
                 if other_player is self: 
                     continue 
-                if other_player.is_alive and \
-                   other_player.tile_x == target_tile_x and \
-                   other_player.tile_y == target_tile_y:
+                if other_player.is_alive:
                     print(f"[DEBUG_ATTEMPT_MOVE_FAIL] Reason: Blocked by other player {id(other_player)} at target ({target_tile_x},{target_tile_y})")
                     return False
         
         # 4. Check bombs (核心修改處)
         if hasattr(self.game, 'bombs_group'):
-            for bomb in self.game.bombs_group:
-                if not bomb.exploded and \
-                   bomb.current_tile_x == target_tile_x and \
-                   bomb.current_tile_y == target_tile_y:
+            for bomb in sprites_at(self.game.bombs_group, target_tile_x, target_tile_y):
+                if not bomb.exploded:
                     # 如果目標格子上的炸彈是【當前玩家自己】放置的
                     if bomb.placed_by_player is self:
                         # 並且當前玩家【還沒有離開過】這個炸彈所在的格子
@@ -218,6 +213,7 @@ class Player(GameObject):
                              self.tile_y * settings.TILE_SIZE + settings.TILE_SIZE // 2)
         if hasattr(self, 'hitbox'): # 同時更新 hitbox 位置
             self.hitbox.center = self.rect.center
+        relocate_sprite(self) # 更新 players_group 的格子索引
 
         # 更新面向和移動動畫相關狀態
         if dx > 0: self.current_direction = "RIGHT"
@@ -232,15 +228,22 @@ class Player(GameObject):
     def move(self, dx, dy):
         return self.attempt_move_to_tile(dx, dy)
     
-    def get_input(self):
-        if self.is_ai or not self.is_alive: return
-        if self.action_timer > 0: return 
+    @staticmethod
+    def read_move_keys():
+        """讀取鍵盤目前按住的移動方向 (dx, dy)，沒有按時回傳 (0, 0)。"""
         keys = pygame.key.get_pressed()
         dx, dy = 0, 0
         if keys[pygame.K_LEFT] or keys[pygame.K_a]: dx = -1
         elif keys[pygame.K_RIGHT] or keys[pygame.K_d]: dx = 1
         elif keys[pygame.K_UP] or keys[pygame.K_w]: dy = -1
         elif keys[pygame.K_DOWN] or keys[pygame.K_s]: dy = 1
+        return dx, dy
+
+    def get_input(self):
+        if self.is_ai or not self.is_alive: return
+        if self.action_timer > 0: return 
+        # 【修改】Game 每個 tick 會先把玩家 1 的方向放進 input_override (錄影 / 重播共用同一條路徑)
+        dx, dy = self.input_override if self.input_override is not None else self.read_move_keys()
         if dx != 0 or dy != 0: self.attempt_move_to_tile(dx, dy)
 
     def _animate(self):
@@ -248,7 +251,7 @@ class Player(GameObject):
         animation_frames = self.animations[self.current_direction]
         if not self.is_moving: self.current_frame_index = 0
         else:
-            now = pygame.time.get_ticks()
+            now = get_ticks(self.game)
             if now - self.last_animation_update_time > self.animation_frame_duration:
                 self.last_animation_update_time = now
                 self.current_frame_index = (self.current_frame_index + 1) % len(animation_frames)
@@ -288,28 +291,16 @@ class Player(GameObject):
             bomb_tile_x = self.tile_x; bomb_tile_y = self.tile_y
             can_place = True
             
-            if hasattr(self.game, 'players_group'):
-                for other_player in self.game.players_group:
-                    if other_player is not self and other_player.is_alive and \
-                       other_player.tile_x == bomb_tile_x and other_player.tile_y == bomb_tile_y:
-                        can_place = False; break
-
-            # （10）！！！ 修改：放置炸彈前，除了檢查是否已有炸彈，也應檢查是否已有其他玩家 ！！！（10）
+            # 放置炸彈前，檢查是否已有其他玩家或炸彈 (格子索引查詢)
             # （這是一個保險措施，因為 attempt_move_to_tile 應該已經阻止了玩家重疊）
             if hasattr(self.game, 'players_group'):
-                for other_player in self.game.players_group:
-                    if other_player is not self and other_player.is_alive and \
-                       other_player.tile_x == bomb_tile_x and other_player.tile_y == bomb_tile_y:
-                        # print(f"Player {id(self)} cannot place bomb: tile ({bomb_tile_x},{bomb_tile_y}) occupied by another player.")
+                for other_player in sprites_at(self.game.players_group, bomb_tile_x, bomb_tile_y):
+                    if other_player is not self and other_player.is_alive:
                         can_place = False; break
             
             if can_place: # 只有在沒有其他玩家時才繼續檢查炸彈
-                for bomb_sprite in self.game.bombs_group: 
-                    if bomb_sprite.current_tile_x == bomb_tile_x and \
-                       bomb_sprite.current_tile_y == bomb_tile_y:
-                        # print(f"Player {id(self)} cannot place bomb: tile ({bomb_tile_x},{bomb_tile_y}) already has a bomb.")
-                        can_place = False; break 
-            # （10）！！！ 修改結束 ！！！（10）
+                if sprites_at(self.game.bombs_group, bomb_tile_x, bomb_tile_y):
+                    can_place = False
             
             if can_place:
                 if (not self.is_ai) and hasattr(self.game, 'audio_manager'):
@@ -319,16 +310,17 @@ class Player(GameObject):
                 # self.game.all_sprites.add(new_bomb) 
                 self.game.bombs_group.add(new_bomb) 
                 self.bombs_placed_count += 1 
+                self.total_bombs_placed += 1 # 【新增】整場累計，供重播記錄 AI 動作
                 
                 if self.is_ai and self.ai_controller: 
                     self.ai_controller.ai_just_placed_bomb = True 
-                    self.ai_controller.last_bomb_placed_time = pygame.time.get_ticks() 
+                    self.ai_controller.last_bomb_placed_time = get_ticks(self.game) 
     
     def bomb_exploded_feedback(self): 
         self.bombs_placed_count = max(0, self.bombs_placed_count - 1) 
 
     def take_damage(self, amount=1): 
-        current_time = pygame.time.get_ticks() 
+        current_time = get_ticks(self.game) 
         if self.is_alive and (current_time - self.last_hit_time > self.invincible_duration): 
             self.lives -= amount 
             self.last_hit_time = current_time 
@@ -341,7 +333,7 @@ class Player(GameObject):
             if hasattr(self.game, "floating_texts_group"):
                 fx = self.rect.centerx
                 fy = self.rect.top
-                text = FloatingText(fx, fy, "-1 LIFE", color=(255, 50, 50))
+                text = FloatingText(fx, fy, "-1 LIFE", color=(255, 50, 50), game=self.game)
                 self.game.floating_texts_group.add(text)
             if self.lives <= 0: 
                 self.lives = 0 
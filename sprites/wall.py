@@ -4,7 +4,7 @@ import pygame
 from .game_object import GameObject # 從同一個 sprites 套件中匯入 GameObject
 import settings
 from .item import create_random_item # 用於掉落道具
-import random # 用於 item_drop_chance 的判斷
+from core.match_random import match_rng, ITEM_RNG # 【修改】item_drop_chance 的判斷使用對戰的種子化亂數
 
 class Floor(GameObject):
     def __init__(self, x, y):
@@ -97,7 +97,7 @@ class DestructibleWall(Wall): # 繼承自 Wall，因為它也是一種牆
         and then creates a specific random item.
         """
         # 首先判斷這面牆本身是否掉落道具 (80% 機率)
-        if random.random() < self.item_drop_chance: # random.random() 返回 [0.0, 1.0)
+        if match_rng(self.game, ITEM_RNG).random() < self.item_drop_chance: # random.random() 返回 [0.0, 1.0)
             print(f"DestructibleWall at ({self.tile_x}, {self.tile_y}) will attempt to drop an item.")
             # 如果觸發了掉落，再調用 create_random_item 決定掉落哪種道具
             item_to_drop = create_random_item(self.tile_x, self.tile_y, self.game)
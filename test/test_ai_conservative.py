@@ -1,5 +1,6 @@
 # test/test_ai_conservative.py
 
+from types import SimpleNamespace
 import pygame
 import pytest
 import settings
@@ -210,27 +211,23 @@ class TestConservativeAIController:
         assert ai_controller.current_state == "PLANNING_ROAM" # Conservative AI should go back to roaming
 
     def test_evading_danger_finds_and_moves_to_safe_spot(self, mock_conservative_ai_env, mocker):
-        """Test EVADING_DANGER state finds a safe spot and sets path."""
+        """Test EVADING_DANGER state finds a safe spot and its route in one space-time search."""
         ai_controller, game, ai_player, _ = mock_conservative_ai_env
         
         ai_player.tile_x, ai_player.tile_y = 1,1 # AI current position
-        
-        # Simulate current tile is dangerous
-        mocker.patch.object(ai_controller, 'is_tile_dangerous', side_effect=lambda x,y,future_seconds: (x,y) == (1,1) if future_seconds > 0 else False)
 
-        # Mock find_safe_tiles_nearby_for_retreat to return a safe spot
-        mock_safe_spot = (0,1) # Assume (0,1) is safe
-        game.map_manager.map_data[1] = ".W.D.D.D.W" # (0,1) is '.'
-        mocker.patch.object(ai_controller, 'find_safe_tiles_nearby_for_retreat', return_value=[mock_safe_spot])
-        
-        # Mock BFS to path to this safe spot
-        mock_evasion_path = [(1,1), (0,1)]
-        mocker.patch.object(ai_controller, 'bfs_find_direct_movement_path', return_value=mock_evasion_path)
-        
+        # An opponent's bomb right next to the AI, about to explode
+        opponent = SimpleNamespace(bomb_range=2)
+        game.bombs_group = [SimpleNamespace(current_tile_x=2, current_tile_y=1, time_left=300, exploded=False, placed_by_player=opponent)]
+        spy = mocker.spy(ai_controller, 'find_evasion_route')
+
         ai_controller.change_state("EVADING_DANGER")
         ai_controller.handle_evading_danger_state(ai_controller._get_ai_current_tile())
 
-        ai_controller.find_safe_tiles_nearby_for_retreat.assert_called_once()
-        ai_controller.bfs_find_direct_movement_path.assert_called_with(ai_controller._get_ai_current_tile(), mock_safe_spot, max_depth=ai_controller.retreat_search_depth + 1)
-        assert ai_controller.current_movement_sub_path == mock_evasion_path
+        spy.assert_called_once_with(ai_controller._get_ai_current_tile(), max_depth=ai_controller.retreat_search_depth + 1)
+        path = ai_controller.current_movement_sub_path
+        assert path and path[0] == (1, 1)
+        blast_tiles = {(2, 1), (1, 1), (3, 1), (4, 1), (2, 2)}
+        assert path[-1] not in blast_tiles, "Destination must be outside the blast."
+        assert ai_controller.current_state == "EVADING_DANGER"
         # State remains EVADING_DANGER while moving, base class handles transition once safe or path ends
\ No newline at end of file
@@ -277,4 +277,35 @@ class TestAIControllerBase:
         assert actual_path_around_d_coords == expected_path_around_d_coords
         assert path_around_d[1].tile_char == 'D' # The middle node should be 'D'
 
-    
\ No newline at end of file
+    
+    def test_destroyed_box_repairs_astar_plan_incrementally(self, mock_ai_base_env):
+        """'D' 被炸毀時，EXECUTING_ASTAR_PATH_TO_TARGET 中的路徑由增量規劃器修補，節點字元同步更新。"""
+        ai_controller, game, ai_player = mock_ai_base_env
+        ai_controller.astar_planned_path = ai_controller.astar_find_path((1, 1), (3, 1))
+        ai_controller.change_state("EXECUTING_ASTAR_PATH_TO_TARGET")
+        assert ai_controller.incremental_planner is not None
+        assert ai_controller.astar_planned_path[1].tile_char == 'D'
+
+        game.map_manager.update_tile_char_on_map(2, 1, '.')
+        assert ai_controller.astar_plan_repair_pending
+
+        assert ai_controller._repair_astar_plan((1, 1))
+        assert [(n.x, n.y) for n in ai_controller.astar_planned_path] == [(1, 1), (2, 1), (3, 1)]
+        assert ai_controller.astar_planned_path[1].tile_char == '.'
+        assert not ai_controller.astar_plan_repair_pending
+
+        ai_controller.change_state("PLANNING_ITEM_TARGET")
+        assert ai_controller.incremental_planner is None
+
+    def test_safe_retreat_tiles_are_lazy_and_ordered(self, mock_ai_base_env):
+        """撤退點依偏好順序產生；只取第一個時結果與完整列表的第一個一致。"""
+        ai_controller, game, ai_player = mock_ai_base_env
+        all_spots = ai_controller.find_safe_tiles_nearby_for_retreat((1, 1), (1, 1), 1, max_depth=4)
+        blast = {(1, 1), (2, 1), (1, 2)}
+        assert all_spots and not (set(all_spots) & blast)
+        openness = [ai_controller._get_tile_openness(x, y) for x, y in all_spots]
+        assert openness == sorted(openness, reverse=True)
+
+        best_only = ai_controller.find_safe_tiles_nearby_for_retreat((1, 1), (1, 1), 1, max_depth=4, max_results=1)
+        assert len(best_only) == 1
+        assert ai_controller._get_tile_openness(*best_only[0]) == openness[0]
@@ -0,0 +1,179 @@
+# test/test_ai_mcts.py
+
+import time
+import pygame
+import pytest
+import settings
+from unittest.mock import MagicMock
+from game import Game
+from core.leaderboard_manager import LeaderboardManager
+from core.ai_mcts import MCTSAIController, MCTSNode, MCTSSearch, AI_INDEX
+from core.simulation import Simulation, SimBomb, ACTION_BOMB, ACTION_WAIT, MOVE_ACTIONS
+
+BOARD = [
+    "WWWWWWW",
+    "W.....W",
+    "W.W.W.W",
+    "W.....W",
+    "WWWWWWW",
+]
+
+
+@pytest.fixture
+def screen(mocker):
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    mocker.patch.object(LeaderboardManager, 'load_scores', return_value=[])
+    mocker.patch.object(LeaderboardManager, 'save_scores', return_value=None)
+    mocker.patch.object(LeaderboardManager, 'is_score_high_enough', return_value=False)
+    yield screen
+    pygame.quit()
+
+
+def make_game(screen, seed=7):
+    return Game(screen, None, MagicMock(), ai_archetype="mcts", map_type="classic",
+                seed=seed, deterministic=True, headless=True)
+
+
+def bomb_escape_sim():
+    """AI 站在自己剛放、快要爆炸的炸彈上；對手在遠處。"""
+    sim = Simulation(BOARD, [(5, 1), (3, 3)], seed=1)
+    sim.players[AI_INDEX].bombs_placed_count = 1
+    sim.bombs.append(SimBomb(3, 3, AI_INDEX, sim.players[AI_INDEX].bomb_range, 1200))
+    return sim
+
+
+class TestMCTSAIController:
+    def test_game_creates_mcts_controller(self, screen):
+        """選單的「搜尋型」會建立 MCTSAIController，並在固定步長模式下用固定迭代數完成整場決策。"""
+        assert settings.AVAILABLE_AI_ARCHETYPES["搜尋型"] == "mcts"
+        game = make_game(screen)
+        controller = game.ai_controller_p2
+        assert isinstance(controller, MCTSAIController)
+        assert controller.current_state == "PLANNING_MCTS"
+        while game.tick_count < 240 and game.game_state == "PLAYING":
+            game.dt = game.fixed_dt
+            game._update_internal()
+        assert controller.last_search_iterations == controller.fixed_iterations
+
+    def test_escapes_own_bomb(self, screen):
+        """站在炸彈上時搜尋結果是離開的移動，而不是等待或再放一顆。"""
+        controller = make_game(screen).ai_controller_p2
+        action = controller.search(bomb_escape_sim(), (3, 3))
+        assert action in MOVE_ACTIONS
+        assert controller.transpositions, "搜尋過程應該記錄置換表。"
+
+    def test_search_is_reproducible_in_deterministic_mode(self, screen):
+        """相同種子的兩場對戰，搜尋出的行動與根節點的拜訪分佈完全相同；固定迭代數仍守住每次決策的時間預算。"""
+        results = []
+        for _ in range(2):
+            controller = make_game(screen, seed=11).ai_controller_p2
+            action = controller.search(bomb_escape_sim(), (3, 3))
+            results.append((action, controller.root.visits, controller.last_search_iterations))
+            # 容許測試機器的雜訊，但 200 次迭代 (約 70~150 ms) 這種數量級的超支會失敗
+            assert controller.last_search_ms < 4 * settings.AI_MCTS_TIME_BUDGET_MS
+        assert results[0] == results[1]
+        assert results[0][2] == settings.AI_MCTS_ITERATIONS
+
+    def test_tree_reuse(self, screen):
+        """走到預期的格子時沿用子樹；位置不同 (例如被閃避打斷) 時重新建樹。"""
+        controller = make_game(screen).ai_controller_p2
+        action = controller.search(bomb_escape_sim(), (3, 3))
+        expected = (3 + action[0], 3 + action[1])
+        assert controller.expected_tile == expected
+        subtree = controller.root
+        assert subtree.visits > 0 and subtree.parent is not None
+
+        assert controller._take_reusable_root(expected) is subtree
+        assert subtree.parent is None
+        fresh = controller._take_reusable_root((1, 1))
+        assert fresh is not subtree and isinstance(fresh, MCTSNode) and fresh.visits == 0
+
+    def test_legal_actions(self, screen):
+        controller = make_game(screen).ai_controller_p2
+        sim = bomb_escape_sim()
+        actions = MCTSSearch._legal_actions(sim, AI_INDEX)
+        assert ACTION_WAIT in actions
+        assert ACTION_BOMB not in actions, "腳下已經有炸彈。"
+        assert set(actions) - {ACTION_WAIT} == {(-1, 0), (1, 0), (0, -1)}, "(3, 4) 是牆。"
+
+    def test_async_planning_delivers_and_discards(self, screen):
+        """非固定步長模式在背景執行緒搜尋；送達時 AI 已離開提交時的格子，計畫就被丟棄。"""
+        game = Game(screen, None, MagicMock(), ai_archetype="mcts", map_type="classic",
+                    seed=3, deterministic=False, headless=True)
+        controller = game.ai_controller_p2
+        assert controller.uses_async_planning
+        tile = controller._get_ai_current_tile()
+
+        controller.handle_planning_mcts_state(tile)
+        assert controller.async_planner.busy
+        assert not controller.current_movement_sub_path, "搜尋結果送達之前不會移動。"
+        controller.async_planner._pending[2].result(timeout=5)
+        controller.handle_planning_mcts_state(tile)
+        assert controller.async_planner.delivered_plans == 1
+        assert controller.last_search_iterations > 0
+
+        controller.current_movement_sub_path = []
+        controller.ai_player.action_timer = 0
+        controller.handle_planning_mcts_state(tile)
+        controller.async_planner._pending[2].result(timeout=5)
+        moved_tile = (tile[0] + 1, tile[1])
+        controller.handle_planning_mcts_state(moved_tile)
+        assert controller.async_planner.discarded_plans == 1
+
+    def test_unthrottled_loop_still_delivers_plans(self, screen):
+        """主迴圈不休息 (無畫面訓練) 時背景執行緒搶不到 GIL；超過一個決策週期的計畫會被等到，AI 仍然會行動。"""
+        game = Game(screen, None, MagicMock(), ai_archetype="mcts", map_type="classic",
+                    seed=3, deterministic=False, headless=True)
+        game.start_timer()
+        controller = game.ai_controller_p2
+        while game.game_state == "PLAYING" and game.tick_count < 600:
+            game.dt = 1 / 60
+            game._update_internal()
+        assert controller.async_planner.delivered_plans > 0
+        game.shutdown()
+
+    def test_evasion_cancels_pending_plan(self, screen):
+        game = Game(screen, None, MagicMock(), ai_archetype="mcts", map_type="classic",
+                    seed=3, deterministic=False, headless=True)
+        controller = game.ai_controller_p2
+        controller.handle_planning_mcts_state(controller._get_ai_current_tile())
+        assert controller.async_planner.busy
+        controller.change_state("EVADING_DANGER")
+        assert not controller.async_planner.busy
+
+    def test_background_job_does_not_touch_main_thread_state(self, screen):
+        """背景搜尋用自己的置換表與亂數；被取消後仍在執行的工作不會寫入控制器或 Game 的 ai_rng。"""
+        game = Game(screen, None, MagicMock(), ai_archetype="mcts", map_type="classic",
+                    seed=3, deterministic=False, headless=True)
+        controller = game.ai_controller_p2
+        controller.handle_planning_mcts_state(controller._get_ai_current_tile())
+        future = controller.async_planner._pending[2]
+        while not (future.running() or future.done()):
+            time.sleep(0.001) # 等工作開始執行，取消就只能丟棄結果而無法阻止它
+        rng_state = game.ai_rng.getstate()
+        controller.reset_state()
+        table = controller.transpositions
+        root, job_table, iterations, _ = future.result(timeout=5)
+        assert iterations > 0 and job_table, "工作仍然跑完，並寫入它自己的置換表。"
+        assert controller.transpositions is table and not table
+        assert controller.root is None
+        assert game.ai_rng.getstate() == rng_state
+
+    def test_game_shutdown_releases_planner_thread(self, screen):
+        """Game 場景結束或重新開始時，上一場 AI 的背景規劃執行緒會被關閉。"""
+        game = Game(screen, None, MagicMock(), ai_archetype="mcts", map_type="classic",
+                    seed=3, deterministic=False, headless=True)
+        controller = game.ai_controller_p2
+        controller.handle_planning_mcts_state(controller._get_ai_current_tile())
+        executor = controller.async_planner._executor
+        game.setup_initial_state()
+        assert controller.async_planner._executor is None and not controller.async_planner.busy
+        assert executor._shutdown
+        assert game.ai_controller_p2 is not controller
+
+        game.ai_controller_p2.handle_planning_mcts_state(game.ai_controller_p2._get_ai_current_tile())
+        game.running = False
+        game.run_one_frame([], 1 / 60)
+        assert game.ai_controller_p2.async_planner._executor is None
@@ -0,0 +1,39 @@
+# test/test_asset_cache.py
+
+import pygame
+import pytest
+import settings
+from core.asset_cache import load_image, load_image_scaled_to_height, clear_asset_cache
+from sprites.wall import Wall
+
+
+@pytest.fixture
+def display():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    clear_asset_cache()
+    yield
+    clear_asset_cache()
+    pygame.display.quit()
+
+
+class TestAssetCache:
+    def test_same_key_returns_shared_surface(self, display):
+        """同樣的 (路徑, 尺寸, 旗標) 回傳同一個 Surface；不同尺寸各自快取。"""
+        first = load_image(settings.WALL_SOLID_IMG, (settings.TILE_SIZE, settings.TILE_SIZE))
+        assert load_image(settings.WALL_SOLID_IMG, (settings.TILE_SIZE, settings.TILE_SIZE)) is first
+        assert first.get_size() == (settings.TILE_SIZE, settings.TILE_SIZE)
+        half = load_image(settings.WALL_SOLID_IMG, (settings.TILE_SIZE // 2, settings.TILE_SIZE // 2))
+        assert half is not first and half.get_size() == (settings.TILE_SIZE // 2, settings.TILE_SIZE // 2)
+        assert load_image_scaled_to_height(settings.WALL_SOLID_IMG, 20).get_height() == 20
+
+    def test_walls_do_not_hit_disk_after_first_load(self, display, mocker):
+        """地圖載入的時間不應隨牆的數量增加：第一面牆之後不再呼叫 pygame.image.load。"""
+        load_spy = mocker.spy(pygame.image, 'load')
+        walls = [Wall(x, 0) for x in range(20)]
+        assert load_spy.call_count == 1
+        assert all(wall.image is walls[0].image for wall in walls)
+
+    def test_missing_file_raises_and_is_not_cached(self, display):
+        with pytest.raises((pygame.error, FileNotFoundError)):
+            load_image("assets/images/does_not_exist.png")
@@ -0,0 +1,67 @@
+# test/test_astar_engine.py
+
+import random
+import pytest
+from core.astar_engine import GridAStar
+from core.ai_controller_base import TileNode
+from benchmarks.astar_benchmark import legacy_astar, build_layouts, build_queries
+
+
+SIMPLE_MAP = [
+    "WWWWW",
+    "W.D.W",
+    "W.W.W",
+    "W...W",
+    "WWWWW",
+]
+
+
+class TestGridAStar:
+    """GridAStar 的測試套件。"""
+
+    def test_path_shape_matches_tilenode_contract(self):
+        """回傳的節點應為 TileNode，並保留 tile_char、parent 與 g_cost。"""
+        engine = GridAStar()
+        path = engine.find_path_nodes(SIMPLE_MAP, 5, 5, (1, 1), (3, 1), TileNode)
+        assert [(n.x, n.y) for n in path] == [(1, 1), (2, 1), (3, 1)]
+        assert isinstance(path[1], TileNode)
+        assert path[1].is_destructible_box()
+        assert path[0].parent is None and path[2].parent is path[1]
+        assert path[-1].g_cost == 4 # '.'=1 + 'D'=3
+
+    def test_blocked_tiles_force_detour(self):
+        """blocked_tiles 中的格子不可通過。"""
+        engine = GridAStar()
+        path = engine.find_path_coords(SIMPLE_MAP, 5, 5, (1, 1), (3, 1), blocked_tiles={(2, 1)})
+        assert path == [(1, 1), (1, 2), (1, 3), (2, 3), (3, 3), (3, 2), (3, 1)]
+
+    def test_unreachable_and_out_of_bounds(self):
+        engine = GridAStar()
+        assert engine.find_path_coords(SIMPLE_MAP, 5, 5, (1, 1), (2, 2)) == [] # 目標是實心牆
+        assert engine.find_path_coords(SIMPLE_MAP, 5, 5, (1, 1), (9, 9)) == []
+
+    def test_arrays_reused_across_calls_and_resized_for_new_map(self):
+        """連續呼叫時應重用陣列，換地圖尺寸時應重新配置。"""
+        engine = GridAStar()
+        engine.find_path_coords(SIMPLE_MAP, 5, 5, (1, 1), (3, 3))
+        g_array = engine._g_cost
+        engine.find_path_coords(SIMPLE_MAP, 5, 5, (3, 3), (1, 1))
+        assert engine._g_cost is g_array
+        corridor = ["WWWWWWW", "W.....W", "WWWWWWW"]
+        assert engine.find_path_coords(corridor, 7, 3, (1, 1), (5, 1)) == [(x, 1) for x in range(1, 6)]
+        assert len(engine._g_cost) == 21
+
+    @pytest.mark.parametrize("map_name", ["classic", "random"])
+    def test_costs_match_legacy_implementation(self, map_name):
+        """在經典與隨機地圖上，路徑成本應與舊版 A* 完全一致。"""
+        layout = build_layouts(seed=7)[map_name]
+        width, height = len(layout[0]), len(layout)
+        engine = GridAStar()
+        for start, target in build_queries(layout, 200, random.Random(3)):
+            legacy_path, _ = legacy_astar(layout, width, height, start, target)
+            new_path = engine.find_path_nodes(layout, width, height, start, target, TileNode)
+            assert bool(legacy_path) == bool(new_path)
+            if new_path:
+                assert new_path[-1].g_cost == legacy_path[-1].g_cost
+                assert (new_path[0].x, new_path[0].y) == start
+                assert (new_path[-1].x, new_path[-1].y) == target
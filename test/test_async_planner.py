@@ -0,0 +1,74 @@
+# test/test_async_planner.py
+
+import threading
+from core.async_planner import AsyncPlanner
+
+
+def wait_for(planner):
+    planner._pending[2].result(timeout=5)
+
+
+class TestAsyncPlanner:
+    def test_delivers_result_with_matching_stamp(self):
+        planner = AsyncPlanner()
+        assert planner.poll("a", 0) is None, "沒有工作時回傳 None。"
+        assert planner.submit("a", 0, lambda x: x * 2, 21)
+        assert planner.busy
+        assert not planner.submit("a", 0, lambda: 0), "一次只接受一個工作。"
+        wait_for(planner)
+        assert planner.poll("a", 10) == 42
+        assert not planner.busy and planner.delivered_plans == 1
+        planner.shutdown()
+
+    def test_runs_off_the_calling_thread(self):
+        planner = AsyncPlanner()
+        planner.submit(0, 0, threading.get_ident)
+        wait_for(planner)
+        assert planner.poll(0, 0) != threading.get_ident()
+        planner.shutdown()
+
+    def test_stale_plans_are_discarded(self):
+        """棋盤戳記改變或計畫太舊時，結果不會被採用。"""
+        planner = AsyncPlanner()
+        planner.submit(("tile", 1), 0, lambda: "plan")
+        wait_for(planner)
+        assert planner.poll(("tile", 2), 0) is None
+        planner.submit("s", 0, lambda: "plan")
+        wait_for(planner)
+        assert planner.poll("s", 500, max_age=400) is None
+        assert planner.discarded_plans == 2 and planner.delivered_plans == 0
+        assert not planner.busy, "丟棄後可以提交新的工作。"
+        planner.shutdown()
+
+    def test_unfinished_work_is_kept_and_cancel_drops_it(self):
+        release = threading.Event()
+        planner = AsyncPlanner()
+        planner.submit("s", 0, release.wait)
+        assert planner.poll("s", 0) is None and planner.busy, "還沒完成的工作繼續等待。"
+        planner.cancel()
+        assert not planner.busy and planner.discarded_plans == 1
+        release.set()
+        planner.shutdown()
+
+    def test_shutdown_stops_the_worker_thread(self):
+        planner = AsyncPlanner("planner-shutdown-test")
+        planner.submit(0, 0, lambda: None)
+        wait_for(planner)
+        workers = [t for t in threading.enumerate() if t.name.startswith("planner-shutdown-test")]
+        assert workers
+        planner.shutdown()
+        for worker in workers:
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+        assert not planner.busy
+
+    def test_overdue_work_is_waited_for(self):
+        """提交超過 wait_after 毫秒仍未完成的工作，poll 會等它做完再回傳結果。"""
+        release = threading.Event()
+        planner = AsyncPlanner()
+        planner.submit("s", 0, lambda: release.wait(5) and "plan")
+        assert planner.poll("s", 100, wait_after=200) is None and planner.busy
+        threading.Timer(0.05, release.set).start()
+        assert planner.poll("s", 200, wait_after=200) == "plan"
+        assert planner.delivered_plans == 1
+        planner.shutdown()
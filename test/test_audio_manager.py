@@ -0,0 +1,69 @@
+# test/test_audio_manager.py
+
+import pygame
+import pytest
+from unittest.mock import MagicMock
+from core.audio_manager import AudioManager
+
+
+@pytest.fixture
+def audio(mocker):
+    mocker.patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    mocker.patch('pygame.mixer.get_num_channels', return_value=8)
+    mocker.patch('pygame.mixer.set_num_channels')
+    channels = []
+
+    def make_channel(index):
+        channel = MagicMock(name=f"channel{index}")
+        channel.get_busy.return_value = False
+        channels.append(channel)
+        return channel
+
+    mocker.patch('pygame.mixer.Channel', side_effect=make_channel)
+    sound_factory = mocker.patch('pygame.mixer.Sound', side_effect=lambda path: MagicMock(name=path, **{'get_length.return_value': 1.0}))
+    manager = AudioManager()
+    manager.num_sfx_channels = 3
+    return manager, sound_factory, channels
+
+
+class TestAudioManager:
+    def test_sounds_are_decoded_once(self, audio):
+        """同一個音效只解碼一次；preload 之後播放不再建立 Sound。"""
+        manager, sound_factory, _ = audio
+        manager.preload_sounds(['explosion', 'bling'])
+        assert sound_factory.call_count == 2
+        for _ in range(5):
+            manager.play_sound('explosion')
+            manager.play_sound('bling')
+        assert sound_factory.call_count == 2
+
+    def test_cache_evicts_least_recently_used_within_budget(self, audio):
+        manager, sound_factory, _ = audio
+        one_second = 44100 * 2 * 2
+        manager.sound_cache_max_bytes = 2 * one_second
+        manager.get_sound('explosion')
+        manager.get_sound('bling')
+        manager.get_sound('explosion') # explosion 變成最近使用
+        manager.get_sound('hurt')
+        assert list(manager.sound_cache) == ['explosion', 'hurt']
+        assert manager.sound_cache_bytes == 2 * one_second
+
+    def test_overlapping_sounds_reuse_channel_pool(self, audio):
+        """channel 全忙時重用最舊的一次性 channel，不會搶走循環播放中的 channel。"""
+        manager, _, channels = audio
+        manager.play_sound('tick', loops=-1)
+        tick_channel = manager.playing_sounds['tick']
+        tick_channel.get_busy.return_value = True
+        for _ in range(6):
+            manager.play_sound('explosion', volume_multiplier=0.5)
+            for channel in channels:
+                if channel is not tick_channel and channel.play.called:
+                    channel.get_busy.return_value = True
+        assert len(channels) == 3
+        assert tick_channel.play.call_count == 1
+        assert sum(channel.play.call_count for channel in channels) == 7
+        channels[1].set_volume.assert_called_with(manager.sfx_volume * 0.5)
+
+        manager.stop_sound('tick')
+        tick_channel.stop.assert_called()
+        assert 'tick' not in manager.playing_sounds
@@ -7,6 +7,7 @@ from sprites.bomb import Bomb
 from sprites.player import Player
 from sprites.explosion import Explosion
 from core.map_manager import MapManager # Bomb.explode() interacts with MapManager
+from core.blast_footprint import compute_blast_tiles
 
 @pytest.fixture
 def mock_bomb_env(mocker):
@@ -190,3 +191,65 @@ class TestBomb:
         assert bomb.owner_has_left_tile is True, "即使玩家返回，owner_has_left_tile 應保持 True。"
         assert bomb.is_solidified is True, "即使玩家返回，is_solidified 應保持 True。"
     
+
+    def test_bomb_explode_chains_into_bombs_in_blast(self, mock_bomb_env):
+        """測試被火焰波及的炸彈會被連鎖引爆，範圍外的炸彈不受影響。"""
+        game, player = mock_bomb_env
+        player.bomb_range = 2
+        first_bomb = Bomb(5, 5, player, game)
+        chained_bomb = Bomb(5, 7, player, game)
+        far_bomb = Bomb(9, 9, player, game)
+        game.bombs_group.add(first_bomb, chained_bomb, far_bomb)
+
+        first_bomb.explode()
+
+        assert chained_bomb.exploded is True, "在爆炸範圍內的炸彈應被連鎖引爆。"
+        assert far_bomb.exploded is False, "範圍外的炸彈不應被引爆。"
+        assert far_bomb in game.bombs_group
+
+    def test_compute_explosion_tiles_matches_map_footprint_without_sprites(self, mock_bomb_env):
+        """以格子索引查詢可破壞牆，結果與地圖字元計算的爆炸範圍相同，且不建立任何精靈。"""
+        game, player = mock_bomb_env
+        layout = [
+            "WWWWWWWWW",
+            "W...D...W",
+            "W.W.W.W.W",
+            "W.D.....W",
+            "WWWWWWWWW",
+        ]
+        map_manager = MapManager(game)
+        map_manager.map_data = layout
+        map_manager.tile_width, map_manager.tile_height = len(layout[0]), len(layout)
+        for y, row in enumerate(layout):
+            for x, char in enumerate(row):
+                if char == 'D':
+                    d_wall = pygame.sprite.Sprite()
+                    d_wall.tile_x, d_wall.tile_y, d_wall.is_destroyed = x, y, False
+                    map_manager.destructible_walls_group.add(d_wall)
+        game.map_manager = map_manager
+        game.explosions_group.empty()
+
+        for tile in [(1, 1), (3, 1), (3, 3), (7, 3)]:
+            bomb = Bomb(tile[0], tile[1], player, game)
+            for bomb_range in (1, 3, 6):
+                assert bomb.compute_explosion_tiles(bomb_range) == \
+                    compute_blast_tiles(layout, map_manager.tile_width, map_manager.tile_height, tile[0], tile[1], bomb_range)
+        assert len(game.explosions_group) == 0
+
+    def test_pulse_frames_are_shared_and_update_does_not_rescale(self, mock_bomb_env, mocker):
+        """同一種外觀的炸彈共用跳動幀表；update 只挑選幀，不呼叫 smoothscale。"""
+        game, player = mock_bomb_env
+        first_bomb = Bomb(3, 3, player, game)
+        second_bomb = Bomb(5, 5, player, game)
+        assert first_bomb.pulse_frames is second_bomb.pulse_frames
+        assert len(first_bomb.pulse_frames) == len(settings.PLAYER1_BOMB_IMAGES)
+
+        smoothscale_spy = mocker.spy(pygame.transform, 'smoothscale')
+        center = first_bomb.rect.center
+        sizes = set()
+        for _ in range(20):
+            first_bomb.update(0.05)
+            sizes.add(first_bomb.image.get_size())
+            assert first_bomb.rect.center == center
+        assert smoothscale_spy.call_count == 0
+        assert len(sizes) > 1, "跳動效果仍然會改變圖像尺寸。"
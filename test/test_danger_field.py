@@ -0,0 +1,89 @@
+# test/test_danger_field.py
+
+from types import SimpleNamespace
+from core.danger_field import DangerField, get_danger_field
+from core.blast_footprint import compute_blast_tiles, BlastFootprintCache
+
+
+MAP_LAYOUT = [
+    "WWWWWWW",
+    "W.....W",
+    "W.W.D.W",
+    "W.....W",
+    "WWWWWWW",
+]
+
+
+def make_map_manager(layout=MAP_LAYOUT):
+    return SimpleNamespace(map_data=list(layout), tile_width=len(layout[0]), tile_height=len(layout))
+
+
+def make_bomb(x, y, time_left, bomb_range=2, exploded=False):
+    owner = SimpleNamespace(bomb_range=bomb_range)
+    return SimpleNamespace(current_tile_x=x, current_tile_y=y, time_left=time_left, exploded=exploded, placed_by_player=owner)
+
+
+def make_explosion(x, y):
+    return SimpleNamespace(tile_x=x, tile_y=y, rect=None)
+
+
+class TestBlastFootprint:
+    def test_walls_block_and_boxes_absorb(self):
+        """'W' 擋住火焰；'D' 被波及但火焰不再延伸。"""
+        tiles = compute_blast_tiles(MAP_LAYOUT, 7, 5, 3, 1, 2)
+        assert tiles[0] == (3, 1)
+        assert set(tiles) == {(3, 1), (3, 2), (3, 3), (1, 1), (2, 1), (4, 1), (5, 1)}
+        tiles_at_box_row = compute_blast_tiles(MAP_LAYOUT, 7, 5, 5, 2, 3)
+        assert (4, 2) in tiles_at_box_row and (3, 2) not in tiles_at_box_row
+
+    def test_footprint_cache_hits_until_map_version_changes(self):
+        """同一地圖版本重複查詢命中快取；版本改變後重新計算；超過容量時淘汰最久未用的項目。"""
+        map_manager = make_map_manager()
+        map_manager.map_version = 0
+        cache = BlastFootprintCache(max_entries=2)
+        first = cache.get(map_manager, 3, 1, 2)
+        assert first == frozenset(compute_blast_tiles(MAP_LAYOUT, 7, 5, 3, 1, 2))
+        assert cache.get(map_manager, 3, 1, 2) is first and cache.hits == 1
+
+        map_manager.map_data[2] = "W.W...W"
+        map_manager.map_version = 1
+        assert (5, 2) in cache.get(map_manager, 3, 2, 2), "地圖版本改變後應看到 'D' 已被炸毀。"
+
+        cache.get(map_manager, 1, 1, 1)
+        cache.get(map_manager, 5, 1, 1)
+        misses_before = cache.misses
+        cache.get(map_manager, 3, 2, 2)
+        assert cache.misses == misses_before + 1, "最久未使用的項目應已被淘汰。"
+
+
+class TestDangerField:
+    def test_bomb_danger_depends_on_time_horizon(self):
+        game = SimpleNamespace(bombs_group=[make_bomb(1, 1, 400)], explosions_group=[])
+        field = DangerField.from_game(game, make_map_manager())
+        assert field.is_dangerous(1, 3, future_seconds=0.5)
+        assert not field.is_dangerous(1, 3, future_seconds=0.3)
+        assert not field.is_dangerous(5, 3, future_seconds=10)
+
+    def test_active_explosion_is_always_dangerous(self):
+        game = SimpleNamespace(bombs_group=[], explosions_group=[make_explosion(2, 3)])
+        field = DangerField.from_game(game, make_map_manager())
+        assert field.is_dangerous(2, 3, future_seconds=0)
+        assert not field.is_dangerous(3, 3, future_seconds=5)
+
+    def test_earliest_time_wins_and_exploded_bombs_ignored(self):
+        bombs = [make_bomb(1, 1, 2500), make_bomb(1, 3, 600), make_bomb(5, 3, 100, exploded=True)]
+        field = DangerField.from_game(SimpleNamespace(bombs_group=bombs, explosions_group=[]), make_map_manager())
+        assert field.earliest_blast_at(1, 2) == 600
+        assert field.earliest_blast_at(5, 3) == float('inf')
+        assert not field.is_dangerous(-1, 0, future_seconds=10)
+
+    def test_cached_per_tick_and_rebuilt_when_bombs_change(self):
+        map_manager = make_map_manager()
+        game = SimpleNamespace(tick_count=1, bombs_group=[], explosions_group=[])
+        first = get_danger_field(game, map_manager)
+        assert get_danger_field(game, map_manager) is first
+        game.bombs_group.append(make_bomb(1, 1, 200))
+        second = get_danger_field(game, map_manager)
+        assert second is not first and second.is_dangerous(1, 1, 0.3)
+        game.tick_count = 2
+        assert get_danger_field(game, map_manager) is not second
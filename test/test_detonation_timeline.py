@@ -0,0 +1,59 @@
+# test/test_detonation_timeline.py
+
+from types import SimpleNamespace
+from core.detonation_timeline import solve_detonation_timeline
+from core.danger_field import DangerField
+
+
+MAP_LAYOUT = [
+    "WWWWWWWWW",
+    "W.......W",
+    "W.D.....W",
+    "W.......W",
+    "WWWWWWWWW",
+]
+WIDTH, HEIGHT = len(MAP_LAYOUT[0]), len(MAP_LAYOUT)
+
+
+def make_bomb(x, y, time_left, bomb_range=2):
+    return SimpleNamespace(current_tile_x=x, current_tile_y=y, time_left=time_left, exploded=False,
+                           placed_by_player=SimpleNamespace(bomb_range=bomb_range))
+
+
+class TestDetonationTimeline:
+    def test_chained_bomb_is_pulled_forward(self):
+        early = make_bomb(1, 1, 500)
+        late = make_bomb(3, 1, 2800)
+        timeline = solve_detonation_timeline([early, late], MAP_LAYOUT, WIDTH, HEIGHT)
+        assert timeline.detonation_time(early) == 500
+        assert timeline.detonation_time(late) == 500
+        assert timeline.is_chained(late) and not timeline.is_chained(early)
+        # late 的火焰也以 500ms 計入
+        assert timeline.blast_time_at(5, 1) == 500
+
+    def test_cascade_propagates_through_several_bombs(self):
+        bombs = [make_bomb(1, 3, 100, bomb_range=1), make_bomb(2, 3, 3000, bomb_range=1),
+                 make_bomb(3, 3, 3000, bomb_range=1), make_bomb(7, 1, 2000, bomb_range=1)]
+        timeline = solve_detonation_timeline(bombs, MAP_LAYOUT, WIDTH, HEIGHT)
+        assert [timeline.detonation_time(b) for b in bombs] == [100, 100, 100, 2000]
+        assert (4, 3) in timeline.blast_tile_set()
+
+    def test_box_destroyed_by_earlier_blast_no_longer_blocks(self):
+        """較早的爆炸炸毀 'D' 後，之後的爆炸可以穿過該格。"""
+        clearing = make_bomb(2, 1, 200, bomb_range=1) # 從上方波及 (2,2) 的 'D'
+        later = make_bomb(1, 2, 1500, bomb_range=3)
+        timeline = solve_detonation_timeline([clearing, later], MAP_LAYOUT, WIDTH, HEIGHT)
+        assert timeline.detonation_time(later) == 1500
+        assert timeline.blast_time_at(2, 2) == 200
+        assert timeline.blast_time_at(4, 2) == 1500
+        # 沒有較早的爆炸時，'D' 會擋住火焰
+        alone = solve_detonation_timeline([make_bomb(1, 2, 1500, bomb_range=3)], MAP_LAYOUT, WIDTH, HEIGHT)
+        assert alone.blast_time_at(3, 2) == float('inf')
+
+    def test_danger_field_uses_cascade_times(self):
+        early = make_bomb(1, 1, 300)
+        late = make_bomb(3, 1, 2900)
+        game = SimpleNamespace(bombs_group=[early, late], explosions_group=[])
+        map_manager = SimpleNamespace(map_data=MAP_LAYOUT, tile_width=WIDTH, tile_height=HEIGHT)
+        field = DangerField.from_game(game, map_manager)
+        assert field.is_dangerous(5, 1, future_seconds=0.5), "late 被提前引爆，(5,1) 應在 0.5 秒內危險。"
@@ -3,7 +3,7 @@
 import pygame
 import pytest
 import settings
-from sprites.draw_text import DIGIT_MAP, draw_text_with_shadow, draw_text_with_outline
+from sprites.draw_text import DIGIT_MAP, draw_text_with_shadow, draw_text_with_outline, clear_text_render_cache
 
 @pytest.fixture
 def mock_draw_env(mocker):
@@ -56,3 +56,35 @@ class TestDrawText:
                 for val in row:
                     assert val in (0, 1), f"Values in DIGIT_MAP for key '{key}' should be 0 or 1. Found {val}."
 
+
+    def test_shadow_and_outline_text_render_once_per_key(self, mocker):
+        """同樣的 (字型, 文字, 顏色, 效果) 只呼叫一次 font.render；每次繪製只 blit 一張組合好的 Surface。"""
+        pygame.font.init()
+        font = CountingFont(pygame.font.Font(None, 24))
+        screen = mocker.Mock(spec=pygame.Surface)
+        clear_text_render_cache()
+
+        for _ in range(5):
+            draw_text_with_shadow(screen, "Score 10", font, (10, 20))
+        assert font.render_calls == 2, "文字與陰影各 render 一次。"
+        assert screen.blit.call_count == 5
+        assert screen.blit.call_args.args[1] == (10, 20)
+
+        for _ in range(3):
+            draw_text_with_outline(screen, "Score 10", font, (40, 50))
+        assert font.render_calls == 3, "外框使用的文字顏色不同，只多 render 一次。"
+        assert screen.blit.call_args.args[1] == (38, 48)
+
+        draw_text_with_shadow(screen, "Score 20", font, (10, 20))
+        assert font.render_calls == 5, "數值改變時才重新 render。"
+
+
+class CountingFont:
+    """包裝真正的字型並計算 render 次數 (pygame 的 Font.render 無法直接 spy)。"""
+    def __init__(self, font):
+        self.font = font
+        self.render_calls = 0
+
+    def render(self, *args):
+        self.render_calls += 1
+        return self.font.render(*args)
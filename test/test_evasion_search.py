@@ -0,0 +1,54 @@
+# test/test_evasion_search.py
+
+from core.danger_field import DangerField, ACTIVE_EXPLOSION_MS
+from core.evasion_search import find_evasion_route, is_occupancy_safe
+
+
+CORRIDOR = [
+    "WWWWWWW",
+    "W.....W",
+    "WWWWW.W",
+    "W.....W",
+    "WWWWWWW",
+]
+WIDTH, HEIGHT = len(CORRIDOR[0]), len(CORRIDOR)
+
+
+def is_empty(x, y):
+    return CORRIDOR[y][x] == '.'
+
+
+def make_field(blasts):
+    field = DangerField(WIDTH, HEIGHT)
+    for (x, y), blast_ms in blasts.items():
+        field.mark_tile(x, y, blast_ms)
+    return field
+
+
+class TestEvasionSearch:
+    def test_occupancy_overlap(self):
+        assert is_occupancy_safe(float('inf'), 0, 200, 500)
+        assert not is_occupancy_safe(300, 200, 400, 500), "停留期間爆炸。"
+        assert is_occupancy_safe(300, 900, 1100, 500), "火焰已經熄滅。"
+        assert not is_occupancy_safe(ACTIVE_EXPLOSION_MS, 0, 200, 500)
+
+    def test_rejects_route_that_crosses_blast_mid_walk(self):
+        """唯一的出口 (3,1) 會在 AI 經過時爆炸，因此沒有安全路線；爆炸稍晚時則可以穿過。"""
+        field = make_field({(1, 1): 0, (2, 1): 0, (3, 1): 350})
+        route = find_evasion_route(field, (2, 1), is_empty, max_depth=8, step_ms=200,
+                                   blast_duration_ms=500, safe_horizon_ms=1500)
+        assert route == [], "(3,1) 在第 1 步之後才爆炸，但 AI 停留時間與火焰重疊。"
+
+        slower_blast = make_field({(1, 1): 0, (2, 1): 0, (3, 1): 450})
+        route = find_evasion_route(slower_blast, (2, 1), is_empty, max_depth=8, step_ms=200,
+                                   blast_duration_ms=500, safe_horizon_ms=1500)
+        assert route[0] == (2, 1) and route[1] == (3, 1) and route[-1] == (4, 1)
+
+    def test_prefers_score_and_returns_destination_with_path(self):
+        field = make_field({(5, 1): 5000})
+        route = find_evasion_route(field, (1, 1), is_empty, max_depth=10, step_ms=200,
+                                   blast_duration_ms=500, safe_horizon_ms=1500,
+                                   score_fn=lambda coords, path_len: (-coords[1], path_len))
+        assert route[-1] == (5, 3) and len(route) == 7
+        for (ax, ay), (bx, by) in zip(route, route[1:]):
+            assert abs(ax - bx) + abs(ay - by) == 1
@@ -0,0 +1,64 @@
+# test/test_flow_field.py
+
+import random
+from core.flow_field import FlowField, FlowFieldCache, iter_breadth_first
+
+
+MAP_LAYOUT = [
+    "WWWWWWW",
+    "W.....W",
+    "W.WDW.W",
+    "W.....W",
+    "WWWWWWW",
+]
+WIDTH, HEIGHT = len(MAP_LAYOUT[0]), len(MAP_LAYOUT)
+
+
+def is_empty(x, y):
+    return MAP_LAYOUT[y][x] == '.'
+
+
+class TestIterBreadthFirst:
+    def test_yields_in_depth_order_and_respects_max_depth(self):
+        field = FlowField((1, 1), WIDTH, HEIGHT)
+        visited = list(iter_breadth_first(field, is_empty, max_depth=2))
+        depths = [depth for _, depth in visited]
+        assert visited[0] == ((1, 1), 0)
+        assert depths == sorted(depths) and max(depths) == 2
+        assert {coords for coords, _ in visited} == {(1, 1), (2, 1), (1, 2), (3, 1), (1, 3)}
+
+    def test_early_stop_keeps_paths_for_expanded_tiles(self):
+        """找到目標後停止，已展開的部分仍可還原路徑。"""
+        field = FlowField((1, 1), WIDTH, HEIGHT)
+        for coords, depth in iter_breadth_first(field, is_empty, rng=random.Random(3)):
+            if coords == (3, 1):
+                break
+        assert field.path_to((3, 1)) == [(1, 1), (2, 1), (3, 1)]
+        assert field.distance_to((5, 3)) == float('inf'), "停止後未展開的格子不應有距離。"
+
+
+class TestFlowField:
+    def test_distances_and_path_extraction(self):
+        field = FlowField.build((1, 1), WIDTH, HEIGHT, is_empty, rng=random.Random(0))
+        assert field.distance_to((1, 1)) == 0
+        assert field.distance_to((5, 3)) == 6
+        assert field.distance_to((3, 2)) == float('inf'), "'D' 不可直接踏入。"
+        path = field.path_to((5, 3))
+        assert path[0] == (1, 1) and path[-1] == (5, 3) and len(path) == 7
+        for (ax, ay), (bx, by) in zip(path, path[1:]):
+            assert abs(ax - bx) + abs(ay - by) == 1
+
+    def test_max_depth_limits_result(self):
+        field = FlowField.build((1, 1), WIDTH, HEIGHT, is_empty)
+        assert field.path_to((5, 3), max_depth=5) == []
+        assert field.path_to((1, 1)) == [(1, 1)]
+
+    def test_cache_reuses_fields_until_key_changes(self):
+        cache = FlowFieldCache()
+        builder = lambda start: FlowField.build(start, WIDTH, HEIGHT, is_empty)
+        first = cache.get(("tick", 1), (1, 1), builder)
+        assert cache.get(("tick", 1), (1, 1), builder) is first
+        assert cache.get(("tick", 1), (5, 1), builder) is not first
+        assert cache.get(("tick", 2), (1, 1), builder) is not first
+        assert cache.get(None, (1, 1), builder) is not cache.get(None, (1, 1), builder)
+        assert cache.builds == 5
@@ -11,6 +11,7 @@ from core.ai_controller import AIController as OriginalAIController
 from core.ai_conservative import ConservativeAIController
 from core.ai_aggressive import AggressiveAIController
 from core.ai_item_focused import ItemFocusedAIController
+from sprites.wall import DestructibleWall
 from unittest.mock import MagicMock
 
 @pytest.fixture
@@ -120,7 +121,7 @@ class TestGame:
 
         initial_lives = game_instance.player1.lives
         for _ in range(initial_lives):
-            game_instance.player1.last_hit_time = pygame.time.get_ticks() - (settings.PLAYER_INVINCIBLE_DURATION + 100)
+            game_instance.player1.last_hit_time = game_instance.game_clock.get_ticks() - (settings.PLAYER_INVINCIBLE_DURATION + 100)
             game_instance.player1.take_damage()
 
         game_instance.dt = 0.1 # 手動設定一個 dt
@@ -136,7 +137,7 @@ class TestGame:
 
         initial_lives_ai = game_instance.player2_ai.lives
         for _ in range(initial_lives_ai):
-            game_instance.player2_ai.last_hit_time = pygame.time.get_ticks() - (settings.PLAYER_INVINCIBLE_DURATION + 100)
+            game_instance.player2_ai.last_hit_time = game_instance.game_clock.get_ticks() - (settings.PLAYER_INVINCIBLE_DURATION + 100)
             game_instance.player2_ai.take_damage()
 
         game_instance.dt = 0.1 # 手動設定一個 dt
@@ -207,4 +208,229 @@ class TestGame:
         game_instance._update_internal()
         
         assert game_instance.game_state == "GAME_OVER"
-        assert game_instance.time_up_winner == "DRAW"
\ No newline at end of file
+        assert game_instance.time_up_winner == "DRAW"
+
+    def test_explosion_damage_uses_blast_tiles(self, mock_game_dependencies):
+        """爆炸只傷害位於爆炸格上的玩家與牆；相鄰格不受影響。"""
+        screen, clock, audio_manager = mock_game_dependencies
+        game_instance = Game(screen, clock, audio_manager, ai_archetype="original")
+        game_instance.start_timer()
+
+        hit_wall = DestructibleWall(3, 1, game_instance)
+        spared_wall = DestructibleWall(4, 1, game_instance)
+        for d_wall in (hit_wall, spared_wall):
+            d_wall.item_drop_chance = 0
+            game_instance.map_manager.destructible_walls_group.add(d_wall)
+            game_instance.solid_obstacles_group.add(d_wall)
+
+        for tile in ((3, 1), (game_instance.player1.tile_x, game_instance.player1.tile_y)):
+            explosion = pygame.sprite.Sprite()
+            explosion.tile_x, explosion.tile_y = tile
+            explosion.rect = pygame.Rect(tile[0] * settings.TILE_SIZE, tile[1] * settings.TILE_SIZE, settings.TILE_SIZE, settings.TILE_SIZE)
+            game_instance.all_sprites.add(explosion); game_instance.explosions_group.add(explosion)
+
+        p1_lives, ai_lives = game_instance.player1.lives, game_instance.player2_ai.lives
+        game_instance.player1.last_hit_time = game_instance.game_clock.get_ticks() - (settings.PLAYER_INVINCIBLE_DURATION + 100)
+        game_instance.dt = 0.1
+        game_instance._update_internal()
+
+        assert hit_wall.is_destroyed and not hit_wall.alive()
+        assert not spared_wall.is_destroyed and spared_wall.alive()
+        assert game_instance.player1.lives == p1_lives - 1
+        assert game_instance.player2_ai.lives == ai_lives
+
+    def test_static_background_is_composed_once(self, mock_game_dependencies, mocker):
+        """場地背景在建立 Game 時組合一次，之後每幀只 blit 快取的 Surface。"""
+        screen, clock, audio_manager = mock_game_dependencies
+        game_instance = Game(screen, clock, audio_manager, ai_archetype="original")
+        background = game_instance.background_surface
+        assert background is not None and background.get_size() == screen.get_size()
+
+        build_spy = mocker.spy(game_instance, '_build_background_surface')
+        game_instance._draw_internal()
+        game_instance._draw_internal()
+        assert build_spy.call_count == 0
+        assert game_instance.background_surface is background
+
+    def test_dirty_rect_frame_matches_full_redraw(self, mock_game_dependencies):
+        """髒矩形模式只更新變動的區域，但畫出來的結果與整個重繪相同。"""
+        screen, clock, audio_manager = mock_game_dependencies
+        game_instance = Game(screen, clock, audio_manager, ai_archetype="original")
+        game_instance.dirty_rect_rendering = True
+        game_instance.show_ai_debug_overlay = False
+
+        game_instance._draw_internal()
+        assert game_instance.dirty_rects is None, "第一幀必須整個重繪。"
+
+        game_instance.player1.action_timer = 0
+        assert game_instance.player1.attempt_move_to_tile(1, 0)
+        game_instance._draw_internal()
+        dirty_rects = game_instance.dirty_rects
+        assert dirty_rects, "玩家移動後應有髒矩形。"
+        dirty_area = sum(rect.width * rect.height for rect in dirty_rects)
+        assert dirty_area < screen.get_width() * screen.get_height() // 10
+        dirty_pixels = pygame.image.tostring(screen, "RGB")
+
+        game_instance._previous_dynamic_rects = None # 強制整個重繪
+        game_instance._draw_internal()
+        assert pygame.image.tostring(screen, "RGB") == dirty_pixels
+
+        game_instance.player1.score += 10
+        game_instance._draw_internal()
+        hud_rects = game_instance._get_hud_rects()
+        assert all(rect in game_instance.dirty_rects for rect in hud_rects), "HUD 數值改變時要重繪 HUD 區域。"
+
+    def test_simulation_mirrors_game_state(self, mock_game_dependencies):
+        """Simulation.from_game 取得與 Game 相同的棋盤、玩家與炸彈狀態。"""
+        from core.simulation import Simulation
+        screen, clock, audio_manager = mock_game_dependencies
+        game = Game(screen, clock, audio_manager, ai_archetype="original")
+        game.player1.place_bomb()
+
+        sim = Simulation.from_game(game, seed=0)
+        assert sim.map_data == game.map_manager.map_data
+        assert (sim.players[0].tile_x, sim.players[0].tile_y) == (game.player1.tile_x, game.player1.tile_y)
+        assert (sim.players[1].tile_x, sim.players[1].tile_y) == (game.player2_ai.tile_x, game.player2_ai.tile_y)
+        assert len(sim.bombs) == 1 and sim.bombs[0].owner == 0
+        assert sim.players[0].bombs_placed_count == 1
+
+    def test_game_clock_drives_sprite_timers(self, mock_game_dependencies, mocker):
+        """爆炸與浮動文字依 Game 的遊戲時鐘計時，與實際經過的時間無關。"""
+        from sprites.explosion import Explosion
+        from sprites.draw_text import FloatingText
+        screen, clock, audio_manager = mock_game_dependencies
+        game_instance = Game(screen, clock, audio_manager, ai_archetype="original")
+        mocker.patch('pygame.time.get_ticks', return_value=0) # 實際時鐘停住
+
+        explosion = Explosion(3, 3, game_instance, game_instance.player1.animations['DOWN'])
+        game_instance.all_sprites.add(explosion); game_instance.explosions_group.add(explosion)
+        text = FloatingText(100, 100, "-1 LIFE", duration=300, game=game_instance)
+        game_instance.floating_texts_group.add(text)
+
+        game_instance.dt = 0.2
+        game_instance._update_internal()
+        assert game_instance.game_clock.get_ticks() == 200
+        assert explosion.alive() and text.alive()
+        game_instance._update_internal()
+        assert not text.alive()
+        game_instance._update_internal()
+        assert not explosion.alive(), "遊戲時鐘過了 EXPLOSION_DURATION 之後爆炸消失。"
+
+
+class TestDeterministicMode:
+    """固定步長 + 種子化亂數：同樣的種子與輸入得到相同的對戰。"""
+
+    @pytest.fixture
+    def display(self, mocker):
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+        mocker.patch.object(LeaderboardManager, 'load_scores', return_value=[])
+        mocker.patch.object(LeaderboardManager, 'save_scores', return_value=None)
+        mocker.patch.object(LeaderboardManager, 'is_score_high_enough', return_value=False)
+        yield screen
+        pygame.quit()
+
+    def _play(self, screen, seed, frame_dt, frames):
+        game = Game(screen, pygame.time.Clock(), MagicMock(), ai_archetype="aggressive", map_type="random",
+                    seed=seed, deterministic=True)
+        for _ in range(frames):
+            game.run_one_frame([], frame_dt)
+        ai = game.player2_ai
+        return (game.tick_count, list(game.map_manager.map_data), (ai.tile_x, ai.tile_y, ai.lives, ai.score),
+                sorted((item.rect.topleft, item.type) for item in game.items_group))
+
+    def test_same_seed_same_outcome_at_any_frame_rate(self, display):
+        at_60_fps = self._play(display, 1234, 1 / 60, 480)
+        at_30_fps = self._play(display, 1234, 1 / 30, 240)
+        assert at_60_fps[0] == 480
+        assert at_60_fps == at_30_fps, "畫面更新率不影響固定步長模擬的結果。"
+        assert self._play(display, 1234, 1 / 60, 480) == at_60_fps
+
+    def test_different_seed_changes_map(self, display):
+        assert self._play(display, 1, 1 / 60, 1)[1] != self._play(display, 2, 1 / 60, 1)[1]
+
+    # (方向, 持續 tick 數, 開頭放炸彈)：走出去、放炸彈、躲開，再往另一邊
+    PARITY_SCRIPT = [((0, 1), 20, False), ((0, 0), 5, True), ((0, -1), 20, False), ((1, 0), 60, False),
+                     ((0, 0), 5, True), ((-1, 0), 30, False), ((0, 0), 200, False)]
+
+    def _parity_input(self, tick):
+        t = tick % sum(length for _, length, _ in self.PARITY_SCRIPT)
+        for direction, length, bomb in self.PARITY_SCRIPT:
+            if t < length:
+                return direction, bomb and t == 0
+            t -= length
+
+    @staticmethod
+    def _lockstep_view(players, map_data, items):
+        return [(p.tile_x, p.tile_y, p.lives, p.bombs_placed_count, p.max_bombs, p.bomb_range, p.score)
+                for p in players], list(map_data), sorted(items)
+
+    def _game_view(self, game):
+        items = [((item.rect.x // settings.TILE_SIZE, item.rect.y // settings.TILE_SIZE), item.type)
+                 for item in game.items_group]
+        return self._lockstep_view((game.player1, game.player2_ai), game.map_manager.map_data, items)
+
+    def _step_lockstep(self, game, sim, ai_observer, direction, bomb):
+        """以鍵盤輸入路徑推進 Game 一個 tick，再把同樣的玩家 1 輸入與觀察到的 AI 動作餵給 Simulation。"""
+        from core.simulation import ACTION_BOMB
+        from core.replay import encode_player1_input, CODE_DIRECTIONS, BOMB_BIT_AI
+        game.replay_input_code = encode_player1_input(direction, (0, 0), bomb)
+        game.dt = game.fixed_dt
+        game._update_internal()
+
+        ai_code = ai_observer.observe()
+        ai_move = CODE_DIRECTIONS[ai_code & 0b111]
+        if ai_code & BOMB_BIT_AI:
+            sim.try_place_bomb(1) # AI 先放炸彈再離開 (同一個 tick 內)
+        if bomb:
+            sim.try_place_bomb(0) # 玩家 1 放炸彈後同一個 tick 仍可依鍵盤移動
+        sim.step([direction if direction != (0, 0) else None, ai_move if ai_move != (0, 0) else None], game.fixed_dt)
+
+    @pytest.mark.parametrize("archetype, seed", [("original", 3), ("aggressive", 1), ("item_focused", 2)])
+    def test_simulation_runs_in_lockstep_with_game(self, display, mocker, archetype, seed):
+        """
+        Game 與 Simulation.from_game 以相同的玩家 1 鍵盤輸入並排推進 (AI 的動作由 Game 觀察後餵給模擬)，
+        經過放炸彈、爆炸、炸牆、道具掉落與拾取、受傷，每個 tick 的玩家、地圖與道具都相同。
+        """
+        from core.simulation import Simulation
+        from core.replay import AIActionObserver
+        game = Game(display, None, MagicMock(), ai_archetype=archetype, map_type="classic",
+                    seed=seed, deterministic=True, headless=True)
+        game.start_timer()
+        sim = Simulation.from_game(game)
+        ai_observer = AIActionObserver(game.player2_ai)
+        initial_map = list(game.map_manager.map_data)
+        items_seen = 0
+
+        for tick in range(1, 1801):
+            direction, bomb = self._parity_input(tick)
+            self._step_lockstep(game, sim, ai_observer, direction, bomb)
+            assert self._lockstep_view(sim.players, sim.map_data, sim.items.items()) == self._game_view(game), \
+                f"tick {tick} 分歧"
+            items_seen = max(items_seen, len(sim.items))
+            if game.game_state != "PLAYING":
+                break
+
+        assert game.player1.total_bombs_placed >= 4 and game.player2_ai.total_bombs_placed >= 4
+        assert game.map_manager.map_data != initial_map, "炸彈應該炸掉了一些牆。"
+        assert items_seen > 0, "炸牆應該掉出道具 (兩邊用同一個 item_rng 串流)。"
+
+    def test_simulation_matches_game_when_both_step_onto_the_same_tile(self, display, mocker):
+        """玩家 1 (鍵盤) 與 AI 在同一個 tick 走向同一格：兩邊都是 AI 先到、玩家 1 被擋住。"""
+        from core.simulation import Simulation
+        from core.replay import AIActionObserver
+        game = Game(display, None, MagicMock(), ai_archetype="original", map_type="classic",
+                    seed=1, deterministic=True, headless=True)
+        game.start_timer()
+        p1, ai = game.player1, game.player2_ai
+        for x in range(2, 5):
+            game.map_manager.update_tile_char_on_map(x, 1, '.')
+        p1.tile_x, p1.tile_y = 2, 1
+        ai.tile_x, ai.tile_y = 4, 1
+        mocker.patch.object(game.ai_controller_p2, 'update', side_effect=lambda: ai.attempt_move_to_tile(-1, 0))
+        sim = Simulation.from_game(game)
+
+        self._step_lockstep(game, sim, AIActionObserver(ai), (1, 0), False)
+        assert (ai.tile_x, p1.tile_x) == (3, 2)
+        assert self._lockstep_view(sim.players, sim.map_data, sim.items.items()) == self._game_view(game)
@@ -0,0 +1,118 @@
+# test/test_incremental_planner.py
+
+import random
+from core.astar_engine import GridAStar
+from core.incremental_planner import DStarLitePlanner
+from core.map_manager import MapManager
+
+
+MAP_LAYOUT = [
+    "WWWWWWWWW",
+    "W...D...W",
+    "W.W.D.W.W",
+    "W...D...W",
+    "WWWWWWWWW",
+]
+WIDTH, HEIGHT = len(MAP_LAYOUT[0]), len(MAP_LAYOUT)
+
+
+def path_cost(map_data, path):
+    costs = {'.': 1, 'D': 3}
+    return sum(costs[map_data[y][x]] for x, y in path[1:])
+
+
+def set_tile(map_data, x, y, char):
+    row = list(map_data[y])
+    row[x] = char
+    map_data[y] = "".join(row)
+
+
+def random_layout(rng, width=15, height=11):
+    layout = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            if x in (0, width - 1) or y in (0, height - 1) or (x % 2 == 0 and y % 2 == 0):
+                row.append('W')
+            else:
+                row.append('D' if rng.random() < 0.5 else '.')
+        layout.append("".join(row))
+    return layout
+
+
+class TestDStarLitePlanner:
+    def test_initial_plan_matches_astar_cost(self):
+        """第一次規劃的路徑成本與 GridAStar 相同。"""
+        planner = DStarLitePlanner()
+        path = planner.plan(MAP_LAYOUT, WIDTH, HEIGHT, (1, 1), (7, 3))
+        expected = GridAStar().find_path_coords(MAP_LAYOUT, WIDTH, HEIGHT, (1, 1), (7, 3))
+        assert path[0] == (1, 1) and path[-1] == (7, 3)
+        assert path_cost(MAP_LAYOUT, path) == path_cost(MAP_LAYOUT, expected)
+
+    def test_repair_after_box_destroyed_uses_fewer_expansions(self):
+        """'D' 被炸毀後只修補受影響的部分，路徑改走新的空地。"""
+        map_data = list(MAP_LAYOUT)
+        planner = DStarLitePlanner()
+        planner.plan(map_data, WIDTH, HEIGHT, (1, 1), (7, 1))
+        initial_expansions = planner.last_expansions
+        set_tile(map_data, 4, 1, '.')
+        planner.notify_tile_changed(4, 1, '.')
+        path = planner.replan((1, 1))
+        assert path == [(x, 1) for x in range(1, 8)]
+        assert path_cost(map_data, path) == 6
+        assert planner.last_expansions < initial_expansions
+
+    def test_blocked_tiles_are_avoided_and_released(self):
+        planner = DStarLitePlanner()
+        map_data = ["WWWWW", "W...W", "W...W", "WWWWW"]
+        path = planner.plan(map_data, 5, 4, (1, 1), (3, 1), blocked_tiles={(2, 1)})
+        assert (2, 1) not in path and len(path) == 5
+        assert planner.replan((1, 1), blocked_tiles=set()) == [(1, 1), (2, 1), (3, 1)]
+
+    def test_random_changes_and_moves_match_full_replan(self):
+        """隨機炸毀 'D' 並移動起點，每次修補後的成本都與重新執行 A* 相同。"""
+        rng = random.Random(7)
+        for _ in range(10):
+            map_data = random_layout(rng)
+            width, height = len(map_data[0]), len(map_data)
+            open_tiles = [(x, y) for y in range(height) for x in range(width) if map_data[y][x] != 'W']
+            start, goal = rng.sample(open_tiles, 2)
+            planner = DStarLitePlanner()
+            path = planner.plan(map_data, width, height, start, goal)
+            astar = GridAStar()
+            for _ in range(8):
+                boxes = [(x, y) for x, y in open_tiles if map_data[y][x] == 'D']
+                for x, y in rng.sample(boxes, min(3, len(boxes))):
+                    set_tile(map_data, x, y, '.')
+                    planner.notify_tile_changed(x, y, '.')
+                if len(path) > 2:
+                    start = path[1]
+                path = planner.replan(start)
+                expected = astar.find_path_coords(map_data, width, height, start, goal)
+                assert path[0] == start and path[-1] == goal
+                for (ax, ay), (bx, by) in zip(path, path[1:]):
+                    assert abs(ax - bx) + abs(ay - by) == 1
+                assert path_cost(map_data, path) == path_cost(map_data, expected)
+
+
+class TestTileChangeListeners:
+    def test_listener_receives_changes_and_is_weakly_held(self):
+        map_manager = MapManager(None)
+        map_manager.map_data = ["WWW", "WDW", "WWW"]
+        map_manager.tile_width = map_manager.tile_height = 3
+
+        class Recorder:
+            def __init__(self):
+                self.changes = []
+
+            def on_change(self, x, y, old_char, new_char):
+                self.changes.append((x, y, old_char, new_char))
+
+        recorder = Recorder()
+        map_manager.add_tile_change_listener(recorder.on_change)
+        map_manager.update_tile_char_on_map(1, 1, '.')
+        assert recorder.changes == [(1, 1, 'D', '.')]
+
+        del recorder
+        map_manager.update_tile_char_on_map(1, 1, 'D')
+        assert map_manager.tile_change_listeners == []
@@ -0,0 +1,45 @@
+# test/test_map_manager.py
+
+import pygame
+import pytest
+import settings
+from core.map_manager import MapManager
+from core.occupancy_index import TileIndexedGroup
+
+
+@pytest.fixture
+def map_game(mocker):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    game = mocker.Mock()
+    game.all_sprites = pygame.sprite.Group()
+    game.solid_obstacles_group = TileIndexedGroup()
+    game.items_group = TileIndexedGroup()
+    yield game
+    pygame.display.quit()
+
+
+class TestWallLayer:
+    def test_walls_are_baked_and_destroyed_tile_is_patched(self, map_game):
+        """牆壁畫在地圖圖層而不在 all_sprites；炸毀 'D' 只清掉那一格。"""
+        map_manager = MapManager(map_game)
+        map_game.map_manager = map_manager
+        map_manager.load_map_from_data(["WWWW", "W.DW", "WDDW", "WWWW"])
+
+        assert len(map_game.all_sprites) == 0
+        layer = map_manager.wall_layer_surface
+        assert layer.get_size() == (4 * settings.TILE_SIZE, 4 * settings.TILE_SIZE)
+
+        def tile_alpha(x, y):
+            center = (x * settings.TILE_SIZE + settings.TILE_SIZE // 2, y * settings.TILE_SIZE + settings.TILE_SIZE // 2)
+            return layer.get_at(center).a
+
+        assert tile_alpha(1, 1) == 0, "空地在圖層上是透明的。"
+        assert tile_alpha(2, 1) > 0 and tile_alpha(0, 0) > 0
+
+        d_wall = next(iter(map_manager.destructible_walls_group.sprites_at(2, 1)))
+        d_wall.item_drop_chance = 0
+        d_wall.take_damage()
+        assert map_manager.wall_layer_surface is layer
+        assert tile_alpha(2, 1) == 0
+        assert tile_alpha(1, 2) > 0 and tile_alpha(2, 2) > 0
@@ -0,0 +1,66 @@
+# test/test_occupancy_index.py
+
+import pygame
+import pytest
+import settings
+from core.occupancy_index import TileIndexedGroup, sprites_at, sprite_tile
+from sprites.player import Player
+
+
+def make_tile_sprite(tile_x, tile_y):
+    sprite = pygame.sprite.Sprite()
+    sprite.rect = pygame.Rect(tile_x * settings.TILE_SIZE, tile_y * settings.TILE_SIZE, settings.TILE_SIZE, settings.TILE_SIZE)
+    return sprite
+
+
+@pytest.fixture
+def indexed_game(mocker):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    game = mocker.Mock()
+    game.map_manager.tile_width = 7
+    game.map_manager.tile_height = 5
+    game.players_group = TileIndexedGroup()
+    game.bombs_group = TileIndexedGroup()
+    game.solid_obstacles_group = TileIndexedGroup()
+    yield game
+    pygame.display.quit()
+
+
+class TestTileIndexedGroup:
+    def test_add_kill_and_empty_keep_index_in_sync(self):
+        group = TileIndexedGroup()
+        wall_a, wall_b = make_tile_sprite(2, 1), make_tile_sprite(3, 1)
+        group.add(wall_a, wall_b)
+        assert list(group.sprites_at(2, 1)) == [wall_a]
+        wall_a.kill()
+        assert not group.sprites_at(2, 1)
+        group.empty()
+        assert not group.sprites_at(3, 1)
+
+    def test_plain_group_falls_back_to_scan(self):
+        plain = pygame.sprite.Group(make_tile_sprite(4, 2))
+        assert len(sprites_at(plain, 4, 2)) == 1
+        assert sprites_at(plain, 1, 1) == []
+
+    def test_player_moves_are_relocated_in_index(self, indexed_game):
+        """玩家移動後索引跟著更新；牆壁與其他玩家以格子查詢阻擋移動。"""
+        config = {"ROW_MAP": settings.PLAYER_SPRITESHEET_ROW_MAP, "NUM_FRAMES": settings.PLAYER_NUM_WALK_FRAMES}
+        player = Player(game=indexed_game, x_tile=1, y_tile=1, spritesheet_path=settings.PLAYER1_SPRITESHEET_PATH, sprite_config=config)
+        other = Player(game=indexed_game, x_tile=1, y_tile=3, spritesheet_path=settings.PLAYER1_SPRITESHEET_PATH, sprite_config=config)
+        indexed_game.players_group.add(player, other)
+        indexed_game.solid_obstacles_group.add(make_tile_sprite(3, 1))
+
+        assert player.attempt_move_to_tile(1, 0)
+        assert sprite_tile(player) == (2, 1)
+        assert list(indexed_game.players_group.sprites_at(2, 1)) == [player]
+        assert not indexed_game.players_group.sprites_at(1, 1)
+
+        player.action_timer = 0
+        assert not player.attempt_move_to_tile(1, 0), "(3,1) 有牆。"
+        player.action_timer = 0
+        assert player.attempt_move_to_tile(-1, 0)
+        player.action_timer = 0
+        assert player.attempt_move_to_tile(0, 1)
+        player.action_timer = 0
+        assert not player.attempt_move_to_tile(0, 1), "(1,3) 有其他玩家。"
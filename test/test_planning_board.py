@@ -0,0 +1,134 @@
+# test/test_planning_board.py
+
+import pygame
+import pytest
+import settings
+from unittest.mock import MagicMock
+from game import Game
+from core.leaderboard_manager import LeaderboardManager
+from core.planning_board import PlanningBoard, BoardPlayer, PLAN_PENDING, planning_view, run_planning_search
+
+
+@pytest.fixture
+def screen(mocker):
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    mocker.patch.object(LeaderboardManager, 'load_scores', return_value=[])
+    mocker.patch.object(LeaderboardManager, 'save_scores', return_value=None)
+    mocker.patch.object(LeaderboardManager, 'is_score_high_enough', return_value=False)
+    yield screen
+    pygame.quit()
+
+
+def make_game(screen, archetype="original", deterministic=False):
+    return Game(screen, None, MagicMock(), ai_archetype=archetype, map_type="classic",
+                seed=3, deterministic=deterministic, headless=True)
+
+
+def wait_for(controller):
+    controller.async_planner._pending[2].result(timeout=5)
+
+
+def first_floor_tile(map_manager, exclude=()):
+    for y, row in enumerate(map_manager.map_data):
+        for x, char in enumerate(row):
+            if char == '.' and (x, y) not in exclude:
+                return x, y
+
+
+class TestPlanningBoard:
+    def test_snapshot_does_not_follow_the_live_game(self, screen):
+        """快照拍下後，主迴圈改變地圖或玩家位置都不會影響它。"""
+        game = make_game(screen)
+        controller = game.ai_controller_p2
+        board = PlanningBoard.capture(game, controller.ai_player, game.player1)
+        assert isinstance(board.ai_player, BoardPlayer) and isinstance(board.player1, BoardPlayer)
+        ai_tile = (board.ai_player.tile_x, board.ai_player.tile_y)
+        assert ai_tile == controller._get_ai_current_tile()
+
+        x, y = first_floor_tile(game.map_manager, exclude={ai_tile, controller.player_initial_spawn_tile})
+        game.map_manager.update_tile_char_on_map(x, y, 'D')
+        controller.ai_player.tile_x += 1
+        assert board.map_manager.map_data[y][x] == '.'
+        assert board.map_manager.map_version != game.map_manager.map_version
+        assert (board.ai_player.tile_x, board.ai_player.tile_y) == ai_tile
+
+    def test_planning_view_has_its_own_search_state(self, screen):
+        game = make_game(screen)
+        controller = game.ai_controller_p2
+        view = planning_view(controller)
+        assert isinstance(view.game, PlanningBoard)
+        assert view.map_manager is view.game.map_manager
+        assert view.astar_engine is not controller.astar_engine
+        assert view.async_planner is None
+        assert controller.game is game, "拷貝不會改變原本的控制器。"
+
+        tile = controller._get_ai_current_tile()
+        live_path = controller.astar_find_path(tile, controller.player_initial_spawn_tile)
+        board_path = view.astar_find_path(tile, controller.player_initial_spawn_tile)
+        assert [(n.x, n.y) for n in board_path] == [(n.x, n.y) for n in live_path]
+
+
+class TestRunPlanningSearch:
+    def test_fixed_step_mode_searches_inline(self, screen):
+        game = make_game(screen, deterministic=True)
+        controller = game.ai_controller_p2
+        assert not controller.uses_async_planning
+        tile = controller._get_ai_current_tile()
+        path = run_planning_search(controller, tile, "astar_find_path", tile, controller.player_initial_spawn_tile)
+        assert path and path is not PLAN_PENDING
+        assert not controller.async_planner.busy
+
+    def test_plan_is_pending_then_delivered(self, screen):
+        """A* 在背景執行；送達前 AI 不動，送達後套用與同步規劃相同的狀態轉換。"""
+        game = make_game(screen)
+        controller = game.ai_controller_p2
+        assert controller.uses_async_planning
+        tile = controller._get_ai_current_tile()
+
+        controller.handle_planning_path_to_player_state(tile)
+        assert controller.async_planner.busy
+        assert controller.current_state == "PLANNING_PATH_TO_PLAYER" and not controller.astar_planned_path
+        wait_for(controller)
+        controller.handle_planning_path_to_player_state(tile)
+        assert controller.async_planner.delivered_plans == 1
+        assert controller.astar_planned_path
+        assert controller.current_state != "PLANNING_PATH_TO_PLAYER"
+        assert all(type(node).__name__ == "TileNode" for node in controller.astar_planned_path)
+
+    def test_plan_for_an_old_board_is_discarded_and_resubmitted(self, screen):
+        game = make_game(screen)
+        controller = game.ai_controller_p2
+        tile = controller._get_ai_current_tile()
+        controller.handle_planning_path_to_player_state(tile)
+        wait_for(controller)
+
+        x, y = first_floor_tile(game.map_manager, exclude={tile, controller.player_initial_spawn_tile})
+        game.map_manager.update_tile_char_on_map(x, y, 'D') # 地圖版本改變
+        controller.handle_planning_path_to_player_state(tile)
+        assert controller.async_planner.discarded_plans == 1
+        assert controller.async_planner.busy, "對新的棋盤重新提交。"
+        assert not controller.astar_planned_path
+
+    def test_evading_danger_stays_synchronous(self, screen):
+        game = make_game(screen)
+        controller = game.ai_controller_p2
+        tile = controller._get_ai_current_tile()
+        controller.handle_planning_path_to_player_state(tile)
+        controller.change_state("EVADING_DANGER")
+        assert not controller.async_planner.busy, "換狀態就放棄背景計畫。"
+        controller.handle_evading_danger_state(tile)
+        assert not controller.async_planner.busy
+
+    @pytest.mark.parametrize("archetype", ["original", "aggressive", "conservative", "item_focused"])
+    def test_classic_archetypes_play_with_background_planning(self, screen, archetype):
+        """每種 AI 在背景規劃下都能正常對戰 (背景執行緒的例外會在 poll 時拋出)。"""
+        game = make_game(screen, archetype)
+        game.start_timer()
+        controller = game.ai_controller_p2
+        while game.game_state == "PLAYING" and game.tick_count < 600:
+            game.dt = 1 / 60
+            game._update_internal()
+        assert controller.async_planner.delivered_plans > 0
+        game.shutdown()
@@ -0,0 +1,118 @@
+# test/test_replay.py
+
+import pygame
+import pytest
+import settings
+from unittest.mock import MagicMock
+from game import Game
+from sprites.player import Player
+from core.leaderboard_manager import LeaderboardManager
+from core.replay import Replay, ReplayRecorder, ReplayPlayer, state_digest, encode_player1_input, decode_player1_input, main
+
+
+@pytest.fixture
+def screen(mocker):
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    mocker.patch.object(LeaderboardManager, 'load_scores', return_value=[])
+    mocker.patch.object(LeaderboardManager, 'save_scores', return_value=None)
+    mocker.patch.object(LeaderboardManager, 'is_score_high_enough', return_value=False)
+    yield screen
+    pygame.quit()
+
+
+def record_match(screen, mocker, ticks, seed=42):
+    """用固定的「按鍵腳本」錄製一場無頭對戰，回傳 (Game, Replay)。"""
+    script = [(0, 1), (0, 1), (1, 0), (1, 0), (0, 0), (0, -1), (-1, 0), (0, 0)]
+    game = Game(screen, None, MagicMock(), ai_archetype="aggressive", map_type="random",
+                seed=seed, deterministic=True, headless=True)
+    game.replay_recorder = ReplayRecorder(game)
+    keys = mocker.patch.object(Player, 'read_move_keys')
+    while game.tick_count < ticks and game.game_state == "PLAYING":
+        keys.return_value = script[(game.tick_count // 45) % len(script)]
+        if game.tick_count % 240 == 100:
+            game.player1_bomb_requested = True
+        game.dt = game.fixed_dt
+        game._update_internal()
+    mocker.stopall()
+    return game, game.replay_recorder.finish(game, "DRAW")
+
+
+class TestReplay:
+    def test_input_code_round_trip(self):
+        for key in ((0, 0), (0, -1), (1, 0)):
+            for touch in ((0, 0), (-1, 0)):
+                for bomb in (False, True):
+                    assert decode_player1_input(encode_player1_input(key, touch, bomb)) == (key, touch, bomb)
+
+    def test_replay_reproduces_match_and_is_compact(self, screen, mocker):
+        """錄下的對戰重播後每個 tick 的 AI 動作與關鍵影格都一致，檔案只有幾 KB。"""
+        game, replay = record_match(screen, mocker, ticks=1800)
+        data = replay.to_bytes()
+        assert len(data) < 4096
+        loaded = Replay.from_bytes(data)
+        assert loaded.player1_inputs == replay.player1_inputs and loaded.keyframes == replay.keyframes
+        assert loaded.ai_actions, "AI 在這段時間內應該有動作。"
+
+        player = ReplayPlayer(loaded, screen)
+        player.run_to_end()
+        assert player.divergence_tick is None
+        assert player.tick == game.tick_count
+        assert state_digest(player.game) == state_digest(game)
+
+        # 往回跳：從保存的 Game 拷貝還原，只快轉不到一個間隔，不會從頭重建
+        assert sorted(player.snapshots) == list(range(0, game.tick_count + 1, settings.REPLAY_KEYFRAME_INTERVAL))
+        restart = mocker.patch.object(player, '_restart')
+        step = mocker.spy(player, 'step')
+        keyframe = loaded.keyframes[1]
+        assert player.seek(keyframe[0]) == keyframe[0]
+        assert state_digest(player.game) == keyframe
+        assert step.call_count == 0
+        assert player.seek(keyframe[0] + 100) == keyframe[0] + 100
+        assert step.call_count == 100
+        assert player.seek(keyframe[0] - 1) == keyframe[0] - 1 # 跳回前一份拷貝再快轉
+        assert step.call_count < 100 + settings.REPLAY_KEYFRAME_INTERVAL
+        restart.assert_not_called()
+
+        # 還原後繼續播放，結果與一路播放完全相同
+        player.run_to_end()
+        assert player.divergence_tick is None
+        assert state_digest(player.game) == state_digest(game)
+
+    def test_divergence_is_reported(self, screen, mocker):
+        _, replay = record_match(screen, mocker, ticks=900)
+        tick, code = replay.ai_actions[0]
+        replay.ai_actions[0] = (tick, code ^ 0b111)
+        player = ReplayPlayer(replay, screen)
+        player.run_to_end()
+        assert player.divergence_tick == tick
+
+    def test_command_line_headless_verifies_saved_file(self, screen, mocker, tmp_path, capsys):
+        """python -m core.replay <檔案> --headless：從檔案重跑整場並印出 divergence_tick，有分歧時回傳 1。"""
+        game, replay = record_match(screen, mocker, ticks=600)
+        path = tmp_path / "match.pcreplay"
+        replay.save(str(path))
+        assert main([str(path), "--headless"]) == 0
+        output = capsys.readouterr().out
+        assert f"tick {game.tick_count}/{game.tick_count}" in output and "divergence_tick none" in output
+
+        tick, code = replay.ai_actions[0]
+        replay.ai_actions[0] = (tick, code ^ 0b111)
+        replay.save(str(path))
+        assert main([str(path), "--headless"]) == 1
+        assert f"divergence_tick {tick}" in capsys.readouterr().out
+
+    def test_recording_requires_fixed_step_mode(self, screen, mocker):
+        """REPLAY_RECORDING 預設會開啟固定步長；明確關閉固定步長時不錄製，錄製器也拒絕可變 dt 的對戰。"""
+        mocker.patch.object(settings, 'REPLAY_RECORDING', True)
+        mocker.patch.object(settings, 'DETERMINISTIC_MODE', False)
+        game = Game(screen, None, MagicMock(), ai_archetype="original", headless=True, seed=1)
+        assert game.deterministic and game.replay_recorder is not None
+        assert game.replay_recorder.replay.fixed_dt == game.fixed_dt
+
+        variable_dt_game = Game(screen, None, MagicMock(), ai_archetype="original", headless=True, seed=1,
+                                deterministic=False)
+        assert variable_dt_game.replay_recorder is None
+        with pytest.raises(ValueError):
+            ReplayRecorder(variable_dt_game)
@@ -0,0 +1,154 @@
+# test/test_simulation.py
+
+import sys
+import settings
+from core.simulation import Simulation, ACTION_BOMB, run_headless_match
+
+BOARD = [
+    "WWWWWWW",
+    "W....DW",
+    "W.W.W.W",
+    "W.....W",
+    "WWWWWWW",
+]
+DT = 1.0 / 60
+
+
+def run_ticks(sim, actions, ticks):
+    for _ in range(ticks):
+        sim.step(actions, DT)
+
+
+class TestSimulation:
+    def test_core_does_not_need_pygame_surfaces(self):
+        """模擬核心只用 settings 與 blast_footprint，不建立任何 Surface 或顯示。"""
+        import core.simulation as simulation_module
+        source = open(simulation_module.__file__, encoding="utf-8").read()
+        assert "import pygame" not in source
+        sim = Simulation(BOARD, [(1, 1), (1, 3)], seed=1)
+        sim.step([None, None], DT)
+        assert sim.tick_count == 1
+
+    def test_move_rules(self):
+        sim = Simulation(BOARD, [(1, 1), (1, 3)], seed=1)
+        assert not sim.try_move(0, -1, 0), "不能走進 'W'。"
+        assert not sim.try_move(0, 1, 1), "不能斜向移動。"
+        assert sim.try_move(0, 1, 0)
+        assert not sim.try_move(0, 1, 0), "動作計時中不能再移動。"
+        run_ticks(sim, [None, None], int(settings.HUMAN_GRID_MOVE_ACTION_DURATION / DT) + 1)
+        assert sim.players[0].action_timer == 0
+
+        # 自己剛放的炸彈可以離開；離開之後就會擋路，別人的炸彈一直擋路
+        assert sim.try_place_bomb(1)
+        sim.step([None, (1, 0)], DT)
+        assert (sim.players[1].tile_x, sim.players[1].tile_y) == (2, 3)
+        run_ticks(sim, [None, None], 20)
+        assert sim.bombs[0].owner_has_left_tile
+        assert not sim.try_move(1, -1, 0)
+
+    def test_bomb_destroys_wall_chains_and_damages(self):
+        """炸彈依 BOMB_TIMER 引爆、連鎖其他炸彈、炸毀 'D' 並讓站在火焰中的玩家扣血。"""
+        sim = Simulation(BOARD, [(3, 1), (3, 3)], seed=3)
+        sim.item_drop_chance = 0
+        sim.players[0].bomb_range = 2
+        sim.players[1].max_bombs = 1
+        assert sim.try_place_bomb(0)
+        sim.step([None, None], DT)
+        sim.bombs[0].time_left = DT * 1000 * 2
+        assert sim.try_place_bomb(1)
+        sim.bombs[1].time_left = 10 ** 6
+        sim.players[1].tile_y = 2 # (3, 2) 在玩家 0 炸彈的範圍內
+        sim.players[1].tile_x = 3
+        sim.bombs[1].tile_x, sim.bombs[1].tile_y = 3, 3
+
+        run_ticks(sim, [None, None], 2)
+        assert sim.bombs == [], "範圍內的炸彈被連鎖引爆。"
+        assert sim.map_data[1][5] == '.'
+        assert sim.players[0].lives == settings.MAX_LIVES - 1
+        assert sim.players[1].lives == settings.MAX_LIVES - 1
+        assert sim.players[0].bombs_placed_count == 0 and sim.players[1].bombs_placed_count == 0
+
+        # 無敵時間內不會再次受傷，爆炸在 EXPLOSION_DURATION 後熄滅
+        run_ticks(sim, [None, None], int(settings.EXPLOSION_DURATION / 1000 / DT) + 2)
+        assert sim.explosions == {}
+        assert sim.players[0].lives == settings.MAX_LIVES - 1
+
+    def test_item_pickup(self):
+        sim = Simulation(BOARD, [(1, 1), (1, 3)], seed=1)
+        sim.items[(2, 1)] = settings.ITEM_TYPE_BOMB_RANGE
+        sim.items[(1, 2)] = settings.ITEM_TYPE_SCORE
+        sim.step([(1, 0), (0, -1)], DT)
+        assert sim.players[0].bomb_range == settings.INITIAL_BOMB_RANGE + 1
+        assert sim.players[0].score == settings.GENERIC_ITEM_SCORE_VALUE
+        assert sim.players[1].score == settings.SCORE_ITEM_VALUE
+        assert sim.items == {}
+
+    def test_time_up_and_knockout_winner(self):
+        sim = Simulation(BOARD, [(1, 1), (1, 3)], seed=1)
+        sim.players[1].lives = 2
+        sim.time_elapsed_seconds = settings.GAME_DURATION_SECONDS - DT / 2
+        assert sim.step([None, None], DT)
+        assert sim.winner == "P1"
+
+        sim = Simulation(BOARD, [(1, 1), (1, 3)], seed=1)
+        sim.players[0].is_alive = False
+        sim.step([None, None], DT)
+        assert sim.game_over and sim.winner == "AI"
+
+    def test_same_seed_same_match(self):
+        """同樣的種子與策略得到完全相同的結果。"""
+        def make_policy(seed):
+            import random
+            rng = random.Random(seed)
+            choices = [None, ACTION_BOMB, (0, 1), (0, -1), (1, 0), (-1, 0)]
+            return lambda sim, index: rng.choice(choices)
+
+        def play(seed):
+            sim = Simulation(BOARD, [(1, 1), (5, 3)], seed=seed)
+            winner = run_headless_match(sim, [make_policy(seed), make_policy(seed + 1)], DT, max_ticks=3000)
+            return winner, sim.tick_count, sim.map_data, sorted(sim.items.items()), \
+                [(p.tile_x, p.tile_y, p.lives, p.score) for p in sim.players]
+
+        assert play(7) == play(7)
+
+
+class TestSnapshot:
+    def test_restore_replays_identical_future(self):
+        """從同一個快照還原兩次，推進相同的行動會得到相同的結果；快照不受之後的修改影響。"""
+        sim = Simulation(BOARD, [(3, 1), (1, 3)], seed=5)
+        sim.players[0].bomb_range = 3
+        sim.try_place_bomb(0)
+        run_ticks(sim, [(-1, 0), None], 5)
+        snap = sim.snapshot()
+        map_before = list(sim.map_data)
+
+        def play():
+            sim.restore(snap)
+            run_ticks(sim, [None, (0, -1)], int(settings.BOMB_TIMER / 1000 / DT) + 5)
+            return list(sim.map_data), dict(sim.items), sim.bombs, \
+                [(p.tile_x, p.tile_y, p.lives, p.score, p.bombs_placed_count) for p in sim.players]
+
+        first = play()
+        assert first[0] != map_before, "炸彈應該炸掉 'D'。"
+        assert first[2] == [] and first[3][0][4] == 0
+        assert snap[0] == map_before, "寫入時複製：快照中的地圖沒有被改到。"
+        second = play()
+        assert first == second
+
+    def test_snapshot_does_not_share_mutable_player_or_bomb_state(self):
+        sim = Simulation(BOARD, [(1, 1), (1, 3)], seed=5)
+        sim.try_place_bomb(0)
+        snap = sim.snapshot()
+        sim.bombs[0].time_left = 1
+        sim.players[0].lives = 0
+        sim.restore(snap)
+        assert sim.bombs[0].time_left == settings.BOMB_TIMER
+        assert sim.players[0].lives == settings.MAX_LIVES
+
+    def test_from_snapshot_creates_independent_copy(self):
+        sim = Simulation(BOARD, [(1, 1), (1, 3)], seed=5)
+        sim.try_place_bomb(0)
+        copy = Simulation.from_snapshot(sim, sim.snapshot())
+        run_ticks(copy, [(1, 0), None], int(settings.BOMB_TIMER / 1000 / DT) + 2)
+        assert copy.bombs == [] and len(sim.bombs) == 1
+        assert (sim.players[0].tile_x, sim.players[0].tile_y) == (1, 1)